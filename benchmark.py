@@ -136,6 +136,66 @@ mol_cmds = [
 time_commands(mol_cmds)
 
 
+def time_frames(count=20):
+    from time import time
+    view = session.main_view
+    times = []
+    for _ in range(count):
+        run(session, "turn y 5")
+        t0 = time()
+        view.draw(swap_buffers=False)
+        view.finish_rendering()
+        times.append(time() - t0)
+    return times
+
+
+# Frame drawing time for the huge model with and without view-dependent
+# atom culling and level of detail.  Needs offscreen rendering, e.g.
+# "ChimeraX --offscreen --exit --silent benchmark.py".
+if session.main_view.render is not None:
+    run(session, "windowsize 1000 1000")
+    for zoom in [1, 8]:
+        for view_dependent in [False, True]:
+            run(session, f"graphics quality viewDependent {str(view_dependent).lower()}")
+            run(session, f"view ; zoom {zoom}")
+            print_results(f"draw frame ({HUGE_MMCIF_ID} zoom {zoom},"
+                          f" viewDependent {str(view_dependent).lower()})", time_frames())
+    run(session, "graphics quality viewDependent true")
+
+# Writing large structures: the huge model as is, and a synthetic structure
+# twice as large made by combining two copies of it
+import tempfile
+save_dir = tempfile.mkdtemp()
+run(session, "combine #1 modelId 2")
+run(session, "combine #1,2 modelId 3 name synthetic")
+run(session, "close #2")
+save_cmds = []
+for model_spec, tag in [("#1", HUGE_MMCIF_ID), ("#3", "synthetic")]:
+    for suffix in ["cif", "cif.gz", "pdb", "pdb.gz"]:
+        save_cmds.append((f"save {save_dir}/{tag}.{suffix} models {model_spec}",
+                          f"save {tag}.{suffix}"))
+time_commands(save_cmds)
+import shutil
+shutil.rmtree(save_dir)
+run(session, "close #3")
+
+# Zone specifiers and select zone with many models.  The first zone
+# evaluation indexes the atoms of all models, later ones reuse the index.
+run(session, "close")
+run(session, f"open {PDB_MMCIF_IDS[0]} loginfo false")
+for model_id in range(2, 121):
+    run(session, f"combine #1 modelId {model_id}")
+run(session, "tile")
+zone_cmds = [
+    ("select #1/A:50 @< 5", "(120 models) select #1/A:50 @< 5"),
+    ("select #1/A:50 @< 5", "(120 models, indexed) select #1/A:50 @< 5"),
+    ("select #1-60 :< 3", "(120 models) select #1-60 :< 3"),
+    ("select zone #1/A:50 8 residues true", "(120 models) select zone #1/A:50 8"),
+]
+time_commands(zone_cmds)
+run(session, "close")
+
+
 end_usage = get_memory_use()
 print(f"Ending memory use:    {end_usage}")
 print_delta_memory("Total memory increase", start_usage, end_usage)
@@ -433,8 +433,10 @@ match(PyObject *, PyObject *args)
 	}
 
 	// fill matrix [dynamic programming]
+	// (no Python objects are touched in the fill, so other threads can run)
 	std::vector<size_t> col_gap_starts(cols-1, 0); // don't care about column zero
 	double base_col_gap_val, base_row_gap_val, skip;
+	Py_BEGIN_ALLOW_THREADS
 	for (size_t i1 = 0; i1 < rows-1; ++i1) {
 		size_t row_gap_pos = 0;
 		size_t i2_end = cols-1;
@@ -502,6 +504,7 @@ match(PyObject *, PyObject *args)
 			}
 		}
 	}
+	Py_END_ALLOW_THREADS
 
 	// create match list
 	bool py_error_happened = false;
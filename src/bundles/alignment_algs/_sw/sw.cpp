@@ -249,28 +249,32 @@ align(PyObject *, PyObject *args, PyObject *kwdict)
 	//
 	// Fill in all cells of the score matrix
 	//
+	// (no Python objects are touched in the fill, so other threads can run)
 	double best_score = 0;
 	int best_row = 0, best_column = 0;
-	for (size_t i = 1; i < rows; ++i) {
+	const char *missing_fmt = nullptr;
+	char missing1 = '\0', missing2 = '\0';
+	Py_BEGIN_ALLOW_THREADS
+	for (size_t i = 1; i < rows && missing_fmt == nullptr; ++i) {
 		for (size_t j = 1; j < cols; ++j) {
 			//
 			// Start with the matching score
 			//
 			Similarity::const_iterator it = matrix_lookup(matrix, seq1[i - 1], seq2[j - 1]);
 			if (it == matrix.end()) {
-				char buf[80];
-				(void) sprintf(buf, MissingKey, seq1[i - 1], seq2[j - 1]);
-				PyErr_SetString(PyExc_KeyError, buf);
-				return nullptr;
+				missing_fmt = MissingKey;
+				missing1 = seq1[i - 1];
+				missing2 = seq2[j - 1];
+				break;
 			}
 			double match_score = (*it).second;
 			if (doing_ss) {
 				Similarity::const_iterator it = matrix_lookup(ss_matrix, ss1[i - 1], ss2[j - 1]);
 				if (it == ss_matrix.end()) {
-					char buf[80];
-					(void) sprintf(buf, MissingSSKey, ss1[i - 1], ss2[j - 1]);
-					PyErr_SetString(PyExc_KeyError, buf);
-					return nullptr;
+					missing_fmt = MissingSSKey;
+					missing1 = ss1[i - 1];
+					missing2 = ss2[j - 1];
+					break;
 				}
 				match_score = (1.0 - ss_fraction) * match_score + ss_fraction * (*it).second;
 			}
@@ -322,6 +326,13 @@ align(PyObject *, PyObject *args, PyObject *kwdict)
 			}
 		}
 	}
+	Py_END_ALLOW_THREADS
+	if (missing_fmt != nullptr) {
+		char buf[80];
+		(void) sprintf(buf, missing_fmt, missing1, missing2);
+		PyErr_SetString(PyExc_KeyError, buf);
+		return nullptr;
+	}
 
 	//
 	// Use the backtrack matrix to create the best alignment
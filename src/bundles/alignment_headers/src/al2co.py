@@ -0,0 +1,297 @@
+# vim: set expandtab ts=4 sw=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+"""
+AL2CO positional conservation (Pei and Grishin, Bioinformatics 17:700, 2001)
+computed with numpy from an alignment character matrix.  This reproduces the
+entropy, variance and sum-of-pairs measures of the al2co program (al2co/al2co.c)
+with unweighted, modified Henikoff and independent count frequencies, window
+averaging and normalization, without writing the alignment to a file and
+running the executable.
+"""
+
+amino_acids = 'WFYMLIVACGPTSNQDEHRK'	# AL2CO residue codes 1-20, 0 is gap
+
+class Al2coError(ValueError):
+    pass
+
+class TooFewColumnsError(Al2coError):
+    pass
+
+def residue_codes(matrix):
+    '''
+    Map an alignment uint8 character matrix to AL2CO residue codes, 1-20 for
+    amino acids of either case and 0 for gaps and all other characters.
+    '''
+    from numpy import zeros, uint8
+    table = zeros((256,), uint8)
+    for i, c in enumerate(amino_acids):
+        table[ord(c)] = table[ord(c.lower())] = i+1
+    return table[matrix]
+
+def similarity_array(sim_matrix = None, transform = 0):
+    '''
+    Return a 20 x 20 array of amino acid similarity scores in AL2CO residue code
+    order from a chimerax.sim_matrices matrix, or the identity matrix if sim_matrix
+    is None.  Transform 1 normalizes S(a,b)/sqrt(S(a,a)*S(b,b)) and transform 2
+    adjusts 2*S(a,b)-(S(a,a)+S(b,b))/2.  Returns None if the matrix lacks scores
+    for some amino acid pair or can't be normalized.
+    '''
+    from numpy import identity, empty, float64, sqrt, outer
+    if sim_matrix is None:
+        m = identity(20, float64)
+    else:
+        m = empty((20,20), float64)
+        for i, a in enumerate(amino_acids):
+            for j, b in enumerate(amino_acids):
+                try:
+                    m[i,j] = sim_matrix[(a,b)]
+                except KeyError:
+                    return None
+    d = m.diagonal().copy()
+    if transform == 1:
+        if (d <= 0).any():
+            return None
+        m = m / sqrt(outer(d, d))
+    elif transform == 2:
+        m = 2*m - 0.5*(d[:,None] + d[None,:])
+    return m
+
+def al2co_conservation(matrix, freq = 2, cons = 0, window = 1, gap = 0.5,
+                       sim_array = None, normalize = True, nthread = None):
+    '''
+    Conservation index of each column of an (nseqs x ncolumns) uint8 character
+    matrix.  Freq is the frequency estimate, 0 = unweighted, 1 = modified Henikoff
+    weights, 2 = independent counts.  Cons is the measure, 0 = entropy, 1 = variance,
+    2 = sum of pairs using the 20 x 20 sim_array (default identity).  Columns with
+    gap fraction at least gap get value nan.  Raises Al2coError where the al2co
+    program would exit without output.
+    '''
+    codes = residue_codes(matrix)
+    nseqs, ncols = codes.shape
+    counts = _code_counts(codes)
+    ngaps = counts[:,0]
+    cols = (ngaps < gap * nseqs).nonzero()[0]
+    if len(cols) == 0:
+        raise TooFewColumnsError('less than one position')
+
+    if freq == 0:
+        f = counts[cols,1:] / (nseqs - ngaps[cols])[:,None]
+    elif freq == 1:
+        f, u_oaf, h_oaf = _henikoff_frequencies(codes, cols, True, nthread)
+    else:
+        f = _independent_count_frequencies(codes, cols, nthread)
+
+    from numpy import log, where, sqrt, einsum, identity
+    if cons == 0:
+        conv = (f * log(where(f > 0, f, 1))).sum(axis = 1)
+    elif cons == 1:
+        if freq == 1:
+            oaf = h_oaf
+        else:
+            u_oaf = _henikoff_frequencies(codes, cols, False, nthread)
+            oaf = u_oaf
+        conv = sqrt(((f - oaf)**2).sum(axis = 1))
+    else:
+        s = identity(20) if sim_array is None else sim_array
+        conv = einsum('ci,ik,ck->c', f, s, f)
+
+    if window > 1:
+        conv = _window_average(conv, window)
+
+    if normalize:
+        conv = _normalize(conv)
+
+    from numpy import full, nan, float64
+    values = full((ncols,), nan, float64)
+    values[cols] = conv
+    return values
+
+def _code_counts(codes):
+    '''Count of each residue code in each column, (ncolumns x 21) array.'''
+    from numpy import arange, bincount, int64
+    n = codes.shape[1]
+    index = arange(0, 21*n, 21, dtype = int64)[None,:] + codes
+    return bincount(index.ravel(), minlength = 21*n).reshape((n, 21))
+
+def _weighted_code_counts(codes, weights):
+    from numpy import arange, bincount, int64, broadcast_to
+    n = codes.shape[1]
+    index = arange(0, 21*n, 21, dtype = int64)[None,:] + codes
+    w = broadcast_to(weights[:,None], codes.shape)
+    return bincount(index.ravel(), w.ravel(), minlength = 21*n).reshape((n, 21))
+
+# -----------------------------------------------------------------------------
+# Henikoff frequencies and overall frequencies depend only on the set of
+# sequences without a gap in the column, so columns with the same set of
+# ungapped sequences are computed together.
+#
+def _henikoff_frequencies(codes, cols, weighted, nthread):
+    from numpy import packbits
+    groups = {}
+    for c in cols.tolist():
+        mark = (codes[:,c] != 0)
+        groups.setdefault(packbits(mark).tobytes(), (mark, []))[1].append(c)
+    args = [(i, codes, mark, gcols, weighted) for i, (mark, gcols) in enumerate(groups.values())]
+    from chimerax.core.threadq import apply_to_list
+    results = apply_to_list(_mark_set_frequencies, args, nthread)
+    _raise_thread_errors(results)
+
+    from numpy import zeros, float64, searchsorted
+    n = len(cols)
+    u_oaf = zeros((n,20), float64)
+    if weighted:
+        h_oaf, hfq = zeros((n,20), float64), zeros((n,20), float64)
+    for i, gcols, u, h, hf in results:
+        rows = searchsorted(cols, gcols)
+        u_oaf[rows] = u
+        if weighted:
+            h_oaf[rows] = h
+            hfq[rows] = hf
+    if weighted:
+        return hfq, u_oaf, h_oaf
+    return u_oaf
+
+def _mark_set_frequencies(index, codes, mark, cols, weighted):
+    from numpy import ones, arange, float64
+    sub = codes[mark]
+    m, ncols = sub.shape
+    u_oaf = _overall_frequencies(sub, ones((m,), float64))
+    if not weighted:
+        return index, cols, u_oaf, None, None
+
+    # Region where all sequences without a gap in this column are aligned.
+    ungapped = (sub != 0)
+    first = int(ungapped.argmax(axis = 1).max())
+    last = ncols - 1 - int(ungapped[:,::-1].argmax(axis = 1).max())
+    first = min(first, last)
+    region = sub[:,first:last+1]
+
+    if m == 1:
+        weights = ones((1,), float64)
+    else:
+        # Modified Henikoff weights from columns that are not identical
+        # and have at most half gaps.
+        c = _code_counts(region)
+        types = (c > 0).sum(axis = 1)
+        use = (types > 1) & (c[:,0] <= 0.5*m)
+        cseq = c[arange(region.shape[1])[None,:], region]
+        weights = (use / (cseq * types)).sum(axis = 1)
+        if not (weights > 0).any():
+            weights = ones((m,), float64) / m
+    h_oaf = _overall_frequencies(region, weights)
+
+    hfq = _weighted_code_counts(sub[:,cols], weights)[:,1:] / weights.sum()
+    return index, cols, u_oaf, h_oaf, hfq
+
+def _overall_frequencies(sub, weights):
+    '''Weighted amino acid frequencies over columns with at most half gaps.'''
+    m = sub.shape[0]
+    keep = ((sub == 0).sum(axis = 0) <= 0.5*m)
+    oaf = _weighted_code_counts(sub[:,keep], weights)[:,1:].sum(axis = 0)
+    total = oaf.sum()
+    return oaf / total if total > 0 else oaf
+
+# -----------------------------------------------------------------------------
+# Independent count frequencies weight each amino acid in a column by the
+# effective number of sequences having that amino acid in the column.
+#
+def _independent_count_frequencies(codes, cols, nthread, chunk_size = 64):
+    args = [(i, codes, cols[i:i+chunk_size]) for i in range(0, len(cols), chunk_size)]
+    from chimerax.core.threadq import apply_to_list
+    results = apply_to_list(_chunk_independent_counts, args, nthread)
+    _raise_thread_errors(results)
+    results.sort(key = lambda r: r[0])
+    from numpy import concatenate
+    return concatenate([icf for i, icf in results])
+
+def _chunk_independent_counts(index, codes, cols):
+    from numpy import zeros, float64, unique, packbits
+    icf = zeros((len(cols), 20), float64)
+    neff = {}
+    for r, c in enumerate(cols.tolist()):
+        column = codes[:,c]
+        for k in unique(column[column > 0]).tolist():
+            mark = (column == k)
+            key = packbits(mark).tobytes()
+            n = neff.get(key)
+            if n is None:
+                neff[key] = n = _effective_number(codes[mark])
+            icf[r,k-1] = n
+        total = icf[r].sum()
+        if total == 0:
+            raise Al2coError('all counts are zeros at the column %d' % (c+1))
+        icf[r] /= total
+    return index, icf
+
+def _effective_number(sub):
+    '''
+    Effective number of sequences from the mean number of different amino
+    acids per column over columns where none of the sequences has a gap.
+    '''
+    ungapped = (sub != 0).all(axis = 0)
+    nsites = int(ungapped.sum())
+    if nsites == 0:
+        return 0.0
+    c = _code_counts(sub[:,ungapped])
+    letters_per_site = (c[:,1:] > 0).sum() / nsites
+    from math import log
+    return -log(1.0 - 0.05*letters_per_site) / 0.05129329438755
+
+def _raise_thread_errors(results):
+    for r in results:
+        if isinstance(r, Exception):
+            raise r
+
+# -----------------------------------------------------------------------------
+# Average over windows of columns with computed values.  Windows at the ends
+# are shortened and scaled toward the mean as in al2co.
+#
+def _window_average(conv, window):
+    n = len(conv)
+    if window > n:
+        raise Al2coError('window size too big')
+    from numpy import cumsum, concatenate, empty, sqrt, arange
+    avc = conv.mean()
+    s = concatenate(([0.0], cumsum(conv)))
+    w = empty((n,), conv.dtype)
+    k = arange((window+1)//2, n - window//2 + 1)		# 1-based window centers
+    w[k-1] = (s[k + window//2] - s[k - (window-1)//2 - 1]) / window
+    for k in range(1, (window+1)//2):
+        m = 2*k-1
+        w[k-1] = avc + (s[m]/m - avc) * sqrt(m/window)
+    for k in range(window//2):
+        m = 2*k+1
+        w[n-1-k] = avc + ((s[n] - s[n-m])/m - avc) * sqrt(m/window)
+    return w
+
+def _normalize(conv):
+    n = len(conv)
+    if n <= 1:
+        raise TooFewColumnsError('less than one position')
+    mean = conv.mean()
+    sd = conv.std(ddof = 1)
+    if sd == 0:
+        raise Al2coError('variance is zero')
+    return (conv - mean) / sd
@@ -138,8 +138,34 @@ class Consensus(DynamicHeaderSequence):
         else:
             r1, r2 = pos1, (len(self.conserved) if pos2 is None else pos2+1)
             self.conserved[r1:r2] = [False] * (r2-r1)
+        if evaluation_func is None:
+            evaluation_func = self._reeval_columns
         super().reevaluate(pos1, pos2, evaluation_func=evaluation_func)
 
+    def _reeval_columns(self, pos1, pos2):
+        # Compute all columns at once from the alignment column character counts.
+        from chimerax.seqalign.columns import consensus_characters
+        aln = self.alignment
+        nseqs = len(aln.seqs)
+        chars, nums = consensus_characters(aln.character_matrix(), aln.column_counts(pos1, pos2),
+            ignore_gaps=self.settings.ignore_gaps, first_column=pos1)
+        threshold = self.settings.capitalize_threshold
+        hide_low = self.settings.hide_low
+        values = []
+        for pos, let, num in zip(range(pos1, pos2+1), chars, nums.tolist()):
+            self.conserved[pos] = False
+            if let is None:
+                values.append(' ')
+            elif num / nseqs >= threshold:
+                values.append(let.upper())
+                if num == nseqs:
+                    self.conserved[pos] = True
+            elif hide_low:
+                values.append(' ')
+            else:
+                values.append(let.lower())
+        self.set_values(pos1, pos2, values)
+
     def set_state(self, state):
         super().set_state(state['base state'])
         self.settings.capitalize_threshold = state['capitalize_threshold']
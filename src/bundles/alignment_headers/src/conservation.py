@@ -25,7 +25,6 @@
 """Find conservation sequences"""
 
 from .header_sequence import DynamicHeaderSequence
-from chimerax.seqalign import clustal_strong_groups, clustal_weak_groups
 
 class Conservation(DynamicHeaderSequence):
     name = "Conservation"
@@ -37,6 +36,9 @@ class Conservation(DynamicHeaderSequence):
     STYLE_AL2CO = "AL2CO"
     styles = (STYLE_PERCENT, STYLE_CLUSTAL_CHARS, STYLE_AL2CO)
 
+    # AL2CO values for alignments with at least this many characters are computed in a thread
+    AL2CO_THREAD_SIZE = 2**18
+
     AL2CO_cite = ["Pei, J. and Grishin, N.V. (2001)",
             "AL2CO: calculation of positional conservation in a protein sequence alignment",
             "Bioinformatics, 17, 700-712."]
@@ -46,6 +48,9 @@ class Conservation(DynamicHeaderSequence):
     def __init__(self, alignment, *args, **kw):
         # need access to settings early, so replicate code in HeaderSequence
         self.alignment = alignment
+        self._hist_values = None
+        self._al2co_cache = {}
+        self._al2co_pending = None
         if not hasattr(self.__class__, 'settings'):
             self.__class__.settings = self.make_settings(alignment.session)
         self._set_update_vars(self.settings.style)
@@ -125,6 +130,7 @@ class Conservation(DynamicHeaderSequence):
 
     def destroy(self):
         self.handler_ID.remove()
+        self._al2co_pending = None
         super().destroy()
 
     def evaluate(self, pos):
@@ -165,24 +171,9 @@ class Conservation(DynamicHeaderSequence):
 
     def percent_identity(self, pos, for_histogram=False):
         """actually returns a fraction"""
-        occur = {}
-        for seq in self.alignment.seqs:
-            let = seq[pos]
-            try:
-                occur[let] += 1
-            except KeyError:
-                occur[let] = 1
-        best = 0
-        for let, num in occur.items():
-            if not let.isalpha():
-                continue
-            if num > best:
-                best = num
-        if best == 0:
-            return 0.0
-        if for_histogram:
-            return (best - 1) / (len(self.alignment.seqs) - 1)
-        return best / len(self.alignment.seqs)
+        from chimerax.seqalign.columns import percent_identity
+        counts = self.alignment.column_counts(pos, pos)
+        return float(percent_identity(counts, len(self.alignment.seqs), for_histogram)[0])
 
     def reevaluate(self, pos1=0, pos2=None, *, evaluation_func=None):
         if self.style == self.STYLE_AL2CO:
@@ -192,9 +183,32 @@ class Conservation(DynamicHeaderSequence):
         else:
             if hasattr(self, 'depiction_val'):
                 delattr(self, 'depiction_val')
-        evaluation_func = self._reeval_al2co if self.style == self.STYLE_AL2CO else evaluation_func
+        if self.style == self.STYLE_AL2CO:
+            evaluation_func = self._reeval_al2co
+        elif evaluation_func is None:
+            evaluation_func = self._reeval_columns
         return super().reevaluate(pos1, pos2, evaluation_func=evaluation_func)
 
+    def _reeval_columns(self, pos1, pos2):
+        # Compute all columns at once from the alignment column character counts.
+        nseqs = len(self.alignment.seqs)
+        counts = self.alignment.column_counts(pos1, pos2)
+        if self.style == self.STYLE_PERCENT:
+            from chimerax.seqalign.columns import percent_identity
+            if nseqs == 1:
+                values = [1.0] * len(counts)
+            else:
+                values = percent_identity(counts, nseqs).tolist()
+            hist = percent_identity(counts, nseqs, for_histogram=True).tolist()
+            if self._hist_values is None or len(self._hist_values) != len(self.alignment.seqs[0]):
+                self._hist_values = [0.0] * len(self.alignment.seqs[0])
+            self._hist_values[pos1:pos2+1] = hist
+        else:
+            from chimerax.seqalign.columns import clustal_types
+            chars = [' ', '.', ':', '*']
+            values = [chars[t] for t in clustal_types(counts, nseqs)]
+        self.set_values(pos1, pos2, values)
+
     @property
     def residue_attr_name(self):
         if self.style == self.STYLE_CLUSTAL_CHARS:
@@ -242,42 +256,82 @@ class Conservation(DynamicHeaderSequence):
         return float
 
     def clustal_type(self, pos):
-        conserve = None
-        for i in range(len(self.alignment.seqs)):
-            char = self.alignment.seqs[i][pos].upper()
-            if conserve is None:
-                conserve = char
-                continue
-            if char != conserve:
-                break
-        else:
-            return 3
-
-        for group in clustal_strong_groups:
-            for i in range(len(self.alignment.seqs)):
-                char = self.alignment.seqs[i][pos].upper()
-                if char not in group:
-                    break
-            else:
-                return 2
-
-        for group in clustal_weak_groups:
-            for i in range(len(self.alignment.seqs)):
-                char = self.alignment.seqs[i][pos].upper()
-                if char not in group:
-                    break
-            else:
-                return 1
-
-        return 0
+        from chimerax.seqalign.columns import clustal_types
+        counts = self.alignment.column_counts(pos, pos)
+        return int(clustal_types(counts, len(self.alignment.seqs))[0])
 
     def _hist_percent(self, pos):
-        return self.percent_identity(pos, for_histogram=True)
+        hv = self._hist_values
+        if hv is None or len(hv) != len(self.alignment.seqs[0]):
+            return self.percent_identity(pos, for_histogram=True)
+        return hv[pos]
 
     def _reeval_al2co(self, pos1, pos2):
         if len(self.alignment.seqs) == 1:
             self[:] = [100.0] * len(self.alignment.seqs[0])
             return
+        params = self._al2co_params()
+        if params is None:
+            # similarity matrix not usable by the in-process calculation
+            self._reeval_al2co_binary()
+            return
+        from chimerax.seqalign.columns import character_matrix
+        chars = character_matrix(self.alignment.seqs)
+        from hashlib import sha1
+        key = (params[0], chars.shape, sha1(chars).hexdigest())
+        result = self._al2co_cache.get(key)
+        if result is None:
+            session = self.alignment.session
+            if session.ui.is_gui and chars.size >= self.AL2CO_THREAD_SIZE:
+                if key != self._al2co_pending:
+                    self._al2co_pending = key
+                    import threading
+                    threading.Thread(target=self._al2co_thread, args=(session, key, chars, params[1]),
+                        daemon=True).start()
+                    session.logger.status("Computing AL2CO conservation for %s" % self.alignment)
+                if len(self) != chars.shape[1]:
+                    self[:] = [None] * chars.shape[1]
+                return
+            result = self._cache_al2co(key, _al2co_result(chars, params[0], params[1]))
+        values, depict = result
+        self[:] = values
+        if not depict:
+            delattr(self, 'depiction_val')
+
+    def _al2co_thread(self, session, key, chars, sim_array):
+        result = _al2co_result(chars, key[0], sim_array)
+        session.ui.thread_safe(self._al2co_thread_done, key, result)
+
+    def _al2co_thread_done(self, key, result):
+        self._cache_al2co(key, result)
+        if key == self._al2co_pending:
+            self._al2co_pending = None
+            if self.style == self.STYLE_AL2CO:
+                self.reevaluate()
+
+    def _cache_al2co(self, key, result, max_cached=8):
+        cache = self._al2co_cache
+        cache[key] = result
+        while len(cache) > max_cached:
+            del cache[next(iter(cache))]
+        return result
+
+    def _al2co_params(self):
+        """Return option values and similarity array, or None if in-process calculation isn't possible"""
+        s = self.settings
+        if s.al2co_cons != 2:
+            return (s.al2co_freq, s.al2co_cons, s.al2co_window, s.al2co_gap), None
+        from chimerax.sim_matrices import matrices
+        from .al2co import similarity_array
+        # like the al2co program, use the identity matrix for unknown matrix names
+        sim_matrix = matrices(self.alignment.session.logger).get(s.al2co_matrix)
+        sim_array = similarity_array(sim_matrix, s.al2co_transform)
+        if sim_array is None:
+            return None
+        return (s.al2co_freq, s.al2co_cons, s.al2co_window, s.al2co_gap, s.al2co_matrix,
+            s.al2co_transform), sim_array
+
+    def _reeval_al2co_binary(self):
         session = self.alignment.session
         self[:] = []
         # sequence names in the alignment may contain characters that cause AL2CO to barf,
@@ -351,3 +405,19 @@ class Conservation(DynamicHeaderSequence):
             elif attr_name == "al2co_cons":
                 self.al2co_sop_options_widget.setHidden(new_val != 2)
         self.reevaluate()
+
+def _al2co_result(chars, params, sim_array):
+    """Return conservation values and whether to depict them, mimicking al2co program failures"""
+    from .al2co import al2co_conservation, Al2coError, TooFewColumnsError
+    freq, cons, window, gap = params[:4]
+    num_cols = chars.shape[1]
+    try:
+        values = al2co_conservation(chars, freq, cons, window, gap, sim_array)
+    except TooFewColumnsError:
+        # one or fewer columns have values
+        return [0.0] * num_cols, False
+    except Al2coError:
+        # possibly no variance in alignment
+        return [1.0] * num_cols, True
+    # round like the al2co program output
+    return [None if v != v else round(v, 3) for v in values.tolist()], True
@@ -81,7 +81,8 @@ class HeaderSequence(list):
             else:
                 self._edit_bounds = (min(left, self._edit_bounds[0]), max(right, self._edit_bounds[1]))
             return
-        if single_column_updateable:
+        self.alignment.columns_changed(left, right)
+        if self.single_column_updateable:
             self.reevaluate(left, right)
         else:
             self.reevaluate()
@@ -210,12 +211,12 @@ class HeaderSequence(list):
             self._update_needed = True
             return
         prev_vals = self[:]
-        if pos2 is None:
-            pos2 = len(self.alignment.seqs[0]) - 1
+        num_cols = len(self.alignment.seqs[0])
+        if pos2 is None or len(self) != num_cols:
+            # Only a full update is possible if the alignment length changed.
+            pos1, pos2 = 0, num_cols - 1
         if evaluation_func is None:
-            self[:] = []
-            for pos in range(pos1, pos2+1):
-                self.append(self.evaluate(pos))
+            self.set_values(pos1, pos2, [self.evaluate(pos) for pos in range(pos1, pos2+1)])
         else:
             evaluation_func(pos1, pos2)
         self._update_needed = False
@@ -238,6 +239,13 @@ class HeaderSequence(list):
                 bounds = (first_mismatch, last_mismatch)
             self.notify_alignment(self.alignment.NOTE_HDR_VALUES, bounds)
 
+    def set_values(self, pos1, pos2, values):
+        '''Set values for positions pos1 through pos2 inclusive.'''
+        if pos1 == 0 and pos2 >= len(self) - 1:
+            self[:] = values
+        else:
+            self[pos1:pos2+1] = values
+
     @property
     def relevant(self):
         return True
@@ -285,7 +293,7 @@ class HeaderSequence(list):
         with self.alignment_notifications_suppressed():
             if show:
                 if self._edit_bounds:
-                    self.reevaluate(*self._edit_bounds, suppress_callback=True)
+                    self.reevaluate(*self._edit_bounds)
                 elif self._update_needed:
                     self.reevaluate()
         self.notify_alignment(self.alignment.NOTE_HDR_SHOWN)
@@ -0,0 +1,67 @@
+import numpy
+
+import pytest
+
+from chimerax.alignment_headers.al2co import al2co_conservation, TooFewColumnsError
+
+# Alignment with gaps, lower case, ambiguous (B, X) and rare columns.
+sequences = [
+    "KPTEWQTLPKTDGPDMRA-VN-V-QTLRKQLKLH-V",
+    "KCF-w-ABFMTRASL-LKwDNDL-IDLEKTLLWGVW",
+    "CCEEBNIFiMTDASHMRA-QNCiSIYLXKT-CWWVG",
+    "KcTELSaFX--D-SNMSIWVPCI-iFL-KQCLDWVV",
+    "KCE-XQ-QIMNDASXMYWWDNHiSIY--KYL-WwVQ",
+    "-CKH-YRFIPTBF-RMRAWV-TSWIY-KKE-LNW-V",
+    "KCPEWQBTIMM-V-HMKAVI-CHCIYLK--L-WWVV",
+    "KCTYWAVFC--D-sH--AWFF-ISIYA-M-L-WTRV",
+]
+
+# Output of the al2co program (-g 0.5) for this alignment, None for gap columns.
+al2co_output = {
+    # (freq, cons, window)
+    (0, 0, 1): [1.173, 1.25, -1.349, 0.109, 0.963, -1.305, -1.504, -0.557, -0.557, 0.109, 0.109,
+                1.079, -0.764, 1.079, -1.305, 2.127, -1.305, -0.371, 1.079, -1.349, 0.109, -0.764,
+                -1.098, -0.084, 1.25, -0.371, 1.079, None, 1.173, -0.967, 1.079, -0.084, -0.371,
+                -0.371, 1.079, -0.371],
+    (1, 0, 1): [1.282, 1.134, -1.296, 0.104, 1.043, -1.222, -1.47, -0.574, -0.712, 0.005, 0.222,
+                1.083, -0.826, 0.982, -1.355, 2.147, -1.268, -0.298, 1.119, -1.224, 0.146, -0.771,
+                -1.215, -0.086, 1.134, -0.484, 1.12, None, 1.15, -0.928, 1.152, 0.001, -0.463,
+                -0.523, 1.066, -0.178],
+    (2, 0, 1): [1.138, 1.175, -1.233, 0.062, 1.03, -1.21, -1.31, -0.618, -0.635, 0.049, 0.172,
+                1.047, -0.747, 1.018, -1.271, 2.419, -1.197, -0.499, 1.046, -1.237, 0.084, -0.744,
+                -1.218, -0.068, 1.175, -0.571, 1.136, None, 1.177, -0.774, 1.095, 0.036, -0.579,
+                -0.548, 1.084, -0.484],
+    (2, 1, 1): [1.112, 1.326, -1.109, 0.269, 0.704, -0.99, -1.43, -0.516, -0.628, -0.017, 0.221,
+                1.135, -0.614, 1.123, -1.053, 2.699, -1.075, -0.554, 0.67, -1.252, 0.279, -0.767,
+                -1.317, -0.367, 1.21, -0.372, 0.982, None, 1.218, -0.763, 0.903, -0.423, -0.772,
+                -0.578, 1.179, -0.435],
+    (2, 2, 1): [1.133, 1.207, -1.057, -0.125, 0.912, -1.027, -1.134, -0.642, -0.665, -0.146, 0.055,
+                0.947, -0.811, 0.886, -1.093, 3.022, -1.013, -0.482, 0.945, -1.064, -0.088, -0.807,
+                -1.036, -0.336, 1.207, -0.579, 1.128, None, 1.21, -0.851, 1.046, -0.167, -0.59,
+                -0.548, 1.023, -0.461],
+    (2, 0, 3): [1.531, 0.863, 0.055, -0.054, -0.036, -1.065, -2.302, -1.871, -0.851, -0.259, 1.003,
+                0.406, 1.041, -0.699, 1.677, 0.015, 0.594, -0.436, -0.465, -0.028, -1.371, -1.357,
+                -1.471, -0.031, 0.455, 1.358, 1.359, None, 1.206, 1.176, 0.32, 0.467, -0.766, 0.02,
+                0.092, -0.577],
+}
+
+def _matrix(seqs):
+    return numpy.frombuffer("".join(seqs).encode(), numpy.uint8).reshape((len(seqs), len(seqs[0])))
+
+@pytest.mark.parametrize("params", sorted(al2co_output.keys()))
+@pytest.mark.parametrize("nthread", [1, 4])
+def test_matches_al2co_program(params, nthread):
+    freq, cons, window = params
+    values = al2co_conservation(_matrix(sequences), freq, cons, window, 0.5, nthread = nthread)
+    expected = al2co_output[params]
+    assert len(values) == len(expected)
+    for v, e in zip(values, expected):
+        if e is None:
+            assert numpy.isnan(v)
+        else:
+            # al2co prints 3 decimal places
+            assert abs(v - e) <= 0.0005 + 1e-9
+
+def test_all_gap_columns():
+    with pytest.raises(TooFewColumnsError):
+        al2co_conservation(_matrix(["A-", "--", "-C"]), gap = 0.5)
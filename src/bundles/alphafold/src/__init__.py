@@ -73,6 +73,9 @@ class _AlphaFoldBundle(BundleAPI):
         elif command_name == 'alphafold interfaces':
             from . import interfaces
             interfaces.register_alphafold_interfaces_command(logger)
+        elif command_name == 'alphafold kmerindex':
+            from . import kmer_index
+            kmer_index.register_alphafold_kmerindex_command(logger)
 
     @staticmethod
     def run_provider(session, name, mgr):
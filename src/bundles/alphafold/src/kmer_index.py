@@ -0,0 +1,391 @@
+# vim: set expandtab ts=4 sw=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Search a local database of protein sequences in a FASTA file using an index
+# listing the sequences that contain each k-mer (sequence of k amino acids).
+# The index files are the same as those made by kmer_search/kmer_search.py for
+# the AlphaFold sequence search web service, so an index made on a server can
+# be copied to a computer without network access.
+#
+amino_acid_characters = 'ACDEFGHIKLMNPQRSTVWY'
+
+# -----------------------------------------------------------------------------
+#
+class KmerSequenceIndex:
+    '''
+    Find the sequences in a FASTA file that share the most k-mers with a query
+    sequence.  The index files made by create_kmer_index() are read from disk
+    only for the k-mers in the query.
+    '''
+    def __init__(self, sequences_path):
+        self.sequences_path = sequences_path	# FASTA sequence file
+        size_path, sizes_path, counts_path, seqs_path = index_file_paths(sequences_path)
+        from os.path import exists
+        if not exists(size_path):
+            from .search import SearchError
+            raise SearchError('No k-mer index for sequence file %s, use command "alphafold kmerindex" to make one'
+                              % sequences_path)
+        import json
+        with open(size_path, 'r') as f:
+            info = json.load(f)
+        self.k = info['k']
+        self.num_sequences = info['num_sequences']
+        self._first_offset = info.get('first_offset', 0)	# File offset of first FASTA entry
+        self._num_residues = info.get('num_residues')
+        self._seqs_path = seqs_path
+
+        from numpy import fromfile, uint32, cumsum, uint64
+        self.counts = fromfile(counts_path, dtype = uint32)	# Number of sequences for each k-mer
+        self.sizes = fromfile(sizes_path, dtype = info.get('sizes_type', 'uint16'))	# Bytes for each FASTA entry
+        self._kmer_offsets = cumsum(self.counts, dtype = uint64) - self.counts
+        self._entry_offsets = None
+
+    @property
+    def num_residues(self):
+        '''Number of residues in the database, estimated from entry sizes for indices made on a server.'''
+        n = self._num_residues
+        if n is None:
+            from numpy import uint64
+            n = int(self.sizes.sum(dtype = uint64))
+        return n
+
+    def search(self, sequence, max_hits = 1, min_kmer_matches = 15, nthread = None):
+        '''
+        Return the database sequence numbers with the most k-mers matching the
+        specified sequence, and the number of matching k-mers for each, ordered
+        from most to fewest matches.  Sequences with fewer than min_kmer_matches
+        are not returned.
+        '''
+        from numpy import zeros, int64
+        kmers = sequence_kmers(sequence, self.k)
+        if len(kmers) == 0:
+            return zeros((0,), int64), zeros((0,), int64)
+        seqi = self.kmer_sequences(kmers, nthread = nthread)
+
+        # A counts array for all database sequences is much bigger than the
+        # list of matching sequences for large databases.
+        if len(seqi) >= self.num_sequences // 4:
+            from numpy import bincount, arange
+            counts = bincount(seqi, minlength = self.num_sequences)
+            snum = arange(len(counts))
+        else:
+            from numpy import unique
+            snum, counts = unique(seqi, return_counts = True)
+        found = (counts >= min_kmer_matches)
+        snum, counts = snum[found], counts[found]
+        if len(counts) > max_hits:
+            from numpy import argpartition
+            top = argpartition(-counts, max_hits-1)[:max_hits]
+            snum, counts = snum[top], counts[top]
+        from numpy import argsort
+        order = argsort(-counts, kind = 'stable')
+        return snum[order].astype(int64), counts[order].astype(int64)
+
+    def kmer_sequences(self, kmers, nthread = None, blocks_per_read = 64):
+        '''
+        Return the concatenated sequence numbers of database sequences containing
+        each of the specified k-mers.  The index file blocks are read in parallel
+        threads since reading is slow when the index is on a network file system.
+        '''
+        uint_size = 4
+        offsets = (uint_size * self._kmer_offsets[kmers]).tolist()
+        sizes = (uint_size * self.counts[kmers].astype(self._kmer_offsets.dtype)).tolist()
+        blocks = [(o,s) for o,s in zip(offsets, sizes) if s > 0]
+        groups = [(self._seqs_path, blocks[i:i+blocks_per_read])
+                  for i in range(0, len(blocks), blocks_per_read)]
+        from chimerax.core.threadq import apply_to_list
+        data = apply_to_list(_read_blocks, groups, nthread)
+        from numpy import frombuffer, uint32
+        return frombuffer(b''.join(data), dtype = uint32)
+
+    def title_and_sequence(self, seq_num):
+        '''Return the FASTA title line and sequence for a database sequence number.'''
+        offsets = self._entry_offsets
+        if offsets is None:
+            from numpy import cumsum, uint64
+            offsets = cumsum(self.sizes, dtype = uint64) - self.sizes + uint64(self._first_offset)
+            self._entry_offsets = offsets
+        with open(self.sequences_path, 'rb') as f:
+            f.seek(int(offsets[seq_num]))
+            entry = f.read(int(self.sizes[seq_num])).decode('utf-8')
+        lines = entry.split('\n')
+        title = lines[0].rstrip()
+        sequence = ''.join(line.strip() for line in lines[1:])
+        return title, sequence
+
+def _read_blocks(path, blocks):
+    data = []
+    with open(path, 'rb') as f:
+        for offset, size in blocks:
+            f.seek(offset)
+            data.append(f.read(size))
+    return b''.join(data)
+
+# -----------------------------------------------------------------------------
+#
+def index_file_paths(sequences_path):
+    from os.path import splitext
+    basename = splitext(sequences_path)[0]
+    return basename + '.size', basename + '.sizes', basename + '.counts', basename + '.seqs'
+
+# -----------------------------------------------------------------------------
+#
+def create_kmer_index(sequences_path, k = 5, nthread = None, chunk_bytes = 2**21, log = None):
+    '''
+    Make index files listing the sequences in a FASTA file that contain each k-mer.
+    The sequences are read in batches so databases larger than memory can be
+    indexed, and the index of sequences for each k-mer is written to a memory
+    mapped file.  Returns the number of sequences indexed.
+    '''
+    if k < min_k or k > max_k:
+        from chimerax.core.errors import UserError
+        raise UserError('K-mer length must be between %d and %d, got %d' % (min_k, max_k, k))
+    nk = number_of_kmers(k)
+    from numpy import zeros, int64, uint32, uint64, uint16, concatenate, diff, append
+
+    # First pass counts the sequences containing each k-mer.
+    counts = zeros((nk,), uint32)
+    sizes = []
+    first_offset = None
+    num_residues = 0
+    from chimerax.seqalign.io.msa_matrix import sequence_record_batches
+    with open(sequences_path, 'rb') as f:
+        for records in sequence_record_batches(f, nthread = nthread, chunk_bytes = chunk_bytes):
+            if len(records) == 0:
+                continue
+            starts = records.name_offsets[:,0] - 1
+            if first_offset is None:
+                first_offset = int(starts[0])
+            sizes.append(diff(append(starts, records.end_offset)))
+            num_residues += int(records.lengths.sum())
+            kmers, seqs = _batch_kmers(records.characters, records.lengths, k)
+            ukmers, ucounts, ustarts = _sorted_counts(kmers)
+            counts[ukmers] += ucounts.astype(uint32)
+            if log:
+                log.status('Counted k-mers for %d sequences' % sum(len(s) for s in sizes))
+    sizes = concatenate(sizes) if sizes else zeros((0,), int64)
+    num_sequences = len(sizes)
+
+    # Second pass records the sequence numbers for each k-mer.
+    size_path, sizes_path, counts_path, seqs_path = index_file_paths(sequences_path)
+    total = int(counts.sum(dtype = uint64))
+    if total == 0:
+        open(seqs_path, 'wb').close()
+    else:
+        from numpy import memmap, arange, repeat
+        seqi = memmap(seqs_path, dtype = uint32, mode = 'w+', shape = (total,))
+        # Offset of the next sequence number to write for each k-mer.
+        offsets = counts.cumsum(dtype = uint64) - counts
+        seq_base = 0
+        with open(sequences_path, 'rb') as f:
+            for records in sequence_record_batches(f, nthread = nthread, chunk_bytes = chunk_bytes):
+                kmers, seqs = _batch_kmers(records.characters, records.lengths, k)
+                ukmers, ucounts, ustarts = _sorted_counts(kmers)
+                # Pairs are sorted by k-mer, so rank within k-mer is index minus first index.
+                rank = arange(len(kmers), dtype = uint64) - repeat(ustarts, ucounts).astype(uint64)
+                seqi[offsets[kmers] + rank] = seqs + seq_base
+                offsets[ukmers] += ucounts.astype(uint64)
+                seq_base += len(records)
+                if log:
+                    log.status('Indexed %d of %d sequences' % (seq_base, num_sequences))
+        seqi.flush()
+        del seqi
+
+    info = {'k': k, 'num_sequences': num_sequences, 'num_residues': num_residues}
+    if first_offset:
+        info['first_offset'] = first_offset
+    if len(sizes) > 0 and sizes.max() >= 2**16:
+        info['sizes_type'] = 'uint32'
+        sizes = sizes.astype(uint32)
+    else:
+        sizes = sizes.astype(uint16)
+    import json
+    with open(size_path, 'w') as fs:
+        json.dump(info, fs)
+    sizes.tofile(sizes_path)
+    counts.tofile(counts_path)
+
+    return num_sequences
+
+def _sorted_counts(kmers):
+    '''
+    Distinct values of a sorted k-mer array with their counts and first indices.
+    Used instead of a bincount over all possible k-mers which is large for long k-mers.
+    '''
+    from numpy import flatnonzero, diff, concatenate, append, int64
+    if len(kmers) == 0:
+        return kmers, kmers, kmers
+    starts = concatenate(((0,), flatnonzero(diff(kmers)) + 1)).astype(int64)
+    return kmers[starts], diff(append(starts, len(kmers))), starts
+
+def _batch_kmers(characters, lengths, k):
+    '''
+    Unique (k-mer, sequence number) pairs for a batch of sequences given as
+    concatenated characters, sorted by k-mer then sequence number.
+    '''
+    from numpy import zeros, int64, repeat, arange, unique
+    n = len(characters)
+    m = n - k + 1
+    nseq = len(lengths)
+    if m <= 0 or nseq == 0:
+        return zeros((0,), int64), zeros((0,), int64)
+    kmers, valid = _kmer_codes(_amino_acid_index()[characters], k)
+    # Only k-mers lying within one sequence.
+    seq_num = repeat(arange(nseq, dtype = int64), lengths)
+    within = (seq_num[:m] == seq_num[k-1:]) & valid
+    keys = unique(kmers[within] * nseq + seq_num[:m][within])
+    return keys // nseq, keys % nseq
+
+# -----------------------------------------------------------------------------
+#
+# K-mer indices must fit in 32-bit unsigned integers, and index files for
+# short k-mers list nearly every sequence for each k-mer.  Indexing keeps
+# per k-mer count and offset arrays in memory, 20**6 k-mers needs 768 Mbytes.
+min_k, max_k = 3, 6
+
+def number_of_kmers(k):
+    return len(amino_acid_characters)**k
+
+_aaindex = None		# Map amino acid ascii integer to integer in range 0-19
+_not_amino_acid = 255	# Index for characters that are not standard amino acids
+def _amino_acid_index():
+    global _aaindex
+    if _aaindex is None:
+        from numpy import full, uint8
+        _aaindex = full((256,), _not_amino_acid, uint8)
+        for i,c in enumerate(amino_acid_characters):
+            _aaindex[ord(c)] = _aaindex[ord(c.lower())] = i
+    return _aaindex
+
+def _kmer_codes(aa, k):
+    '''
+    K-mer index at each position of an amino acid index array, and whether
+    the k-mer contains only standard amino acids.  K-mers with non-standard
+    residues (X, U, B, ...) are not indexed or searched.
+    '''
+    from numpy import zeros, int64, cumsum, concatenate
+    m = len(aa) - k + 1
+    kmers = zeros((m,), int64)
+    naa = len(amino_acid_characters)
+    for i in range(k):
+        kmers *= naa
+        kmers += aa[i:m+i]
+    nbad = concatenate(((0,), cumsum(aa == _not_amino_acid)))
+    valid = (nbad[k:] == nbad[:m])
+    return kmers, valid
+
+def sequence_kmers(sequence, k):
+    '''
+    Return the unique k-mers in a sequence as a sorted array of k-mer indices.
+    K-mers containing characters other than the 20 standard amino acids are
+    skipped, the same as when the index is made.
+    '''
+    from numpy import frombuffer, uint8, zeros, uint32, unique
+    if len(sequence) < k:
+        return zeros((0,), uint32)
+    aa = _amino_acid_index()[frombuffer(sequence.encode('ascii', 'replace'), uint8)]
+    kmers, valid = _kmer_codes(aa, k)
+    return unique(kmers[valid]).astype(uint32)
+
+def clean_sequence(sequence):
+    '''Remove characters that are not one of 20 standard amino acids.'''
+    aset = set(amino_acid_characters)
+    return ''.join(c for c in sequence.upper() if c in aset)
+
+# -----------------------------------------------------------------------------
+#
+def uniprot_id_and_name(fasta_title_line):
+    title = fasta_title_line.lstrip('>')
+    uniprot_id = uniprot_name = None
+    if title.startswith('AFDB:'):
+        # AlphaFold Database version 3 title line format
+        # >AFDB:AF-A0A2L2JPH6-F1 Uncharacterized protein UA=A0A2L2JPH6 UI=A0A2L2JPH6_9NOCA OS=...
+        for field in title.split():
+            if field.startswith('UA='):
+                uniprot_id = field[3:]
+            elif field.startswith('UI='):
+                uniprot_name = field[3:]
+    elif '|' in title:
+        # AlphaFold Database version 2 and UniProt title line format
+        # >tr|X1WFM8|X1WFM8_DANRE EPS8-like 2 OS=Danio rerio OX=7955 GN=eps8l2 PE=3 SV=1
+        fields = title.split('|')
+        if len(fields) >= 2:
+            uniprot_id = fields[1]
+        if len(fields) >= 3:
+            uniprot_name = fields[2].split()[0]
+    return uniprot_id, uniprot_name
+
+# -----------------------------------------------------------------------------
+# Local replacement for search.alphafold_sequence_search() used by alphafold match.
+#
+def kmer_sequence_search(sequences, sequences_path, min_length = 20, min_kmer_matches = 15,
+                         version = None, nthread = None, log = None):
+    '''
+    Search a local FASTA file of AlphaFold database sequences using its k-mer index.
+    Return the best match UniProt id for each sequence, or None if no match.
+    '''
+    useqs = list(set(seq for seq in sequences if len(seq) >= min_length))
+    if len(useqs) == 0:
+        return [None] * len(sequences)
+
+    if log is not None:
+        log.status('Searching %s for %d sequence%s'
+                   % (sequences_path, len(useqs), 's' if len(useqs) > 1 else ''))
+
+    index = KmerSequenceIndex(sequences_path)
+    from .search import DatabaseEntryId
+    seq_uids = {}
+    for seq in useqs:
+        snum, nmatch = index.search(seq, max_hits = 1, min_kmer_matches = min_kmer_matches,
+                                    nthread = nthread)
+        if len(snum) == 0:
+            continue
+        title, db_seq = index.title_and_sequence(snum[0])
+        uid, uname = uniprot_id_and_name(title)
+        if uid is not None:
+            seq_uids[seq] = DatabaseEntryId(uid, name = uname, version = version)
+
+    return [seq_uids.get(seq) for seq in sequences]
+
+# -----------------------------------------------------------------------------
+#
+def alphafold_kmerindex(session, sequences_path, k = 5):
+    from time import time
+    t0 = time()
+    n = create_kmer_index(sequences_path, k = k, log = session.logger)
+    t1 = time()
+    session.logger.status('Made %d-mer index for %d sequences in %s in %.1f seconds'
+                          % (k, n, sequences_path, t1-t0), log = True)
+
+# -----------------------------------------------------------------------------
+#
+def register_alphafold_kmerindex_command(logger):
+    from chimerax.core.commands import CmdDesc, register, OpenFileNameArg, IntArg
+    desc = CmdDesc(
+        required = [('sequences_path', OpenFileNameArg)],
+        keyword = [('k', IntArg)],
+        synopsis = 'Make k-mer index for searching a local FASTA sequence file'
+    )
+    register('alphafold kmerindex', desc, alphafold_kmerindex, logger=logger)
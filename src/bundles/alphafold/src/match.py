@@ -23,12 +23,14 @@
 # === UCSF ChimeraX Copyright ===
 
 def alphafold_match(session, sequences, color_confidence=True, trim = True,
-                    search = True, pae = False, ignore_cache=False):
+                    search = True, pae = False, ignore_cache=False, kmer_index = None):
     '''
     Find the most similar sequence in the AlphaFold database to each specified
     sequence and load them.  The specified sequences can be Sequence instances
     or Chain instances.  For chains the loaded structure will be aligned to
-    the chain structure.
+    the chain structure.  If kmer_index is the path to a local FASTA file of
+    AlphaFold database sequences indexed with "alphafold kmerindex" then it is
+    searched instead of using the sequence search web service.
     '''
     from chimerax.atomic import Residue
     sequences = [seq for seq in sequences
@@ -46,11 +48,16 @@ def alphafold_match(session, sequences, color_confidence=True, trim = True,
     # Try sequence search if some sequences were not found by UniProt identifier.
     if search:
         from .fetch import alphafold_fetch
-        from .search import alphafold_sequence_search
+        if kmer_index is None:
+            from .search import alphafold_sequence_search as sequence_search
+        else:
+            from .kmer_index import kmer_sequence_search
+            def sequence_search(seq_strings, log = None, path = kmer_index):
+                return kmer_sequence_search(seq_strings, path, log = log)
         search_seqs = [seq for seq in sequences if seq not in seq_models]
         search_seq_models = _fetch_by_sequence(session, search_seqs,
                                                color_confidence=color_confidence, trim=trim,
-                                               sequence_search=alphafold_sequence_search,
+                                               sequence_search=sequence_search,
                                                fetch=alphafold_fetch, ignore_cache=ignore_cache, log=log)
         seq_models.update(search_seq_models)
 
@@ -556,7 +563,7 @@ def _sequence_name(seq):
     return ug[:5] + '...' + ug[-5:]
 
 def register_alphafold_match_command(logger):
-    from chimerax.core.commands import CmdDesc, register, BoolArg
+    from chimerax.core.commands import CmdDesc, register, BoolArg, OpenFileNameArg
     from chimerax.atomic import SequencesArg
     desc = CmdDesc(
         required = [('sequences', SequencesArg)],
@@ -564,7 +571,8 @@ def register_alphafold_match_command(logger):
                    ('trim', BoolArg),
                    ('search', BoolArg),
                    ('pae', BoolArg),
-                   ('ignore_cache', BoolArg)],
+                   ('ignore_cache', BoolArg),
+                   ('kmer_index', OpenFileNameArg)],
         synopsis = 'Fetch AlphaFold database models matching an open structure'
     )
     register('alphafold match', desc, alphafold_match, logger=logger)
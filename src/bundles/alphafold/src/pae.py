@@ -1191,8 +1191,23 @@ def read_pae_matrix(path):
 
 # -----------------------------------------------------------------------------
 #
-def read_json_pae_matrix(path):
-    '''Open AlphaFold database distance error PAE JSON file returning a numpy matrix.'''
+def read_json_pae_matrix(path, cache = True):
+    '''
+    Open AlphaFold database distance error PAE JSON file returning a numpy matrix.
+    The PAE matrix is parsed directly into a float32 array without making Python
+    lists.  Large matrices are cached in a numpy .npy file next to the JSON file
+    which is used instead of the JSON file if it is newer.
+    '''
+    pae = _read_cached_pae_matrix(path) if cache else None
+    if pae is None:
+        pae = _read_json_number_matrix(path, ('predicted_aligned_error', 'pae'))
+        if pae is None:
+            pae = _read_json_pae_matrix_slow(path)
+        if cache:
+            _cache_pae_matrix(path, pae)
+    return pae
+
+def _read_json_pae_matrix_slow(path):
     f = open(path, 'r')
     import json
     j = json.load(f)
@@ -1236,6 +1251,95 @@ def read_json_pae_matrix(path):
     from chimerax.core.errors import UserError
     raise UserError(f'JSON file "{path}" is not AlphaFold predicted aligned error data, expected a dictionary with keys "predicted_aligned_error" or "residue1", "residue2" and "distance", got keys {keys}')
 
+# -----------------------------------------------------------------------------
+# Parse a square matrix of numbers given as a JSON list of lists for a
+# dictionary key without creating Python objects for each number.
+# Returns None if the key is not found or the data is not a square matrix
+# so the caller can fall back to the json module.
+#
+def _read_json_number_matrix(path, keys, chunk_size = 2**24):
+    import mmap
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        except ValueError:
+            return None	# Empty file
+        try:
+            return _parse_number_matrix(mm, keys, chunk_size)
+        finally:
+            mm.close()
+
+def _parse_number_matrix(mm, keys, chunk_size):
+    import re
+    for key in keys:
+        m = re.compile(rb'"%s"\s*:\s*\[\s*\[' % key.encode()).search(mm)
+        if m:
+            break
+    else:
+        return None
+    start = m.end()
+    end_match = re.compile(rb'\]\s*\]').search(mm, start)
+    if end_match is None:
+        return None
+    end = end_match.start()
+    row_end = mm.find(b']', start, end + 1)
+    n = mm[start:row_end].count(b',') + 1
+    if n * n > (end - start + 1):
+        return None	# Matrix too large for file, not square
+
+    from numpy import empty, float32, fromstring
+    pae = empty((n*n,), float32)
+    filled = 0
+    table = bytes.maketrans(b'[]', b'  ')
+    pos = start
+    while pos < end:
+        cend = min(end, pos + chunk_size)
+        if cend < end:
+            cend = mm.rfind(b',', pos, cend) + 1
+            if cend <= pos:
+                cend = end
+        text = mm[pos:cend].translate(table).rstrip(b', \t\r\n')
+        values = fromstring(text, dtype = float32, sep = ',')
+        nv = len(values)
+        if filled + nv > n*n:
+            return None
+        pae[filled:filled+nv] = values
+        filled += nv
+        pos = cend
+    if filled != n*n:
+        return None
+    return pae.reshape((n,n))
+
+# -----------------------------------------------------------------------------
+#
+def _pae_cache_path(path):
+    return path + '.npy'
+
+def _read_cached_pae_matrix(path):
+    cpath = _pae_cache_path(path)
+    from os.path import exists, getmtime
+    if not exists(cpath) or getmtime(cpath) < getmtime(path):
+        return None
+    from numpy import load, float32
+    try:
+        pae = load(cpath, allow_pickle = False)
+    except Exception:
+        return None
+    if pae.dtype != float32 or pae.ndim != 2 or pae.shape[0] != pae.shape[1]:
+        return None
+    return pae
+
+def _cache_pae_matrix(path, pae, min_size = 1000):
+    '''Cache large matrices, small ones are read from JSON quickly.'''
+    if pae.shape[0] < min_size:
+        return
+    from numpy import save, float32
+    try:
+        with open(_pae_cache_path(path), 'wb') as f:
+            save(f, pae.astype(float32, copy = False), allow_pickle = False)
+    except OSError:
+        pass		# Directory not writable.
+
 # -----------------------------------------------------------------------------
 #
 def read_pickle_pae_matrix(path):
@@ -1321,32 +1425,171 @@ def pae_image(rgb):
 # https://github.com/tristanic/isolde/blob/master/isolde/src/reference_model/alphafold/find_domains.py
 #
 def pae_domains(pae_matrix, pae_power=1, pae_cutoff=5, graph_resolution=0.5,
-                min_size = None):
+                min_size = None, method = 'auto', greedy_max_size = 2000):
+    '''
+    Cluster residues into domains using a graph with edges between residues with
+    PAE less than pae_cutoff weighted by 1/PAE.  The edges are kept in a sparse
+    matrix.  Method "greedy" uses networkx greedy modularity communities and
+    "louvain" uses a Louvain modularity optimization that is much faster for large
+    matrices.  Method "auto" uses greedy for matrices up to greedy_max_size so
+    domains for typical predictions are unchanged, and louvain for larger ones.
+    Returns a list of sets of matrix row indices, largest first.
+    '''
     # PAE matrix is not strictly symmetric.
     # Prediction for error in residue i when aligned on residue j may be different from 
     # error in j when aligned on i. Take the smallest error estimate for each pair.
     import numpy
     pae_matrix = numpy.minimum(pae_matrix, pae_matrix.T)
     pae_matrix = numpy.maximum(pae_matrix, 0.2)	# AlphaFold Database version 3 has 0 values.
-    weights = 1/pae_matrix**pae_power if pae_power != 1 else 1/pae_matrix
-
-    import networkx as nx
-    g = nx.Graph()
-    size = weights.shape[0]
-    g.add_nodes_from(range(size))
-    edges = numpy.argwhere(pae_matrix < pae_cutoff)
-    # Limit to bottom triangle of matrix
-    edges = edges[edges[:,0]<edges[:,1]]
-    sel_weights = weights[edges.T[0], edges.T[1]]
-    wedges = [(i,j,w) for (i,j),w in zip(edges,sel_weights)]
-    g.add_weighted_edges_from(wedges)
-
-    from networkx.algorithms.community import greedy_modularity_communities
-    clusters = greedy_modularity_communities(g, weight='weight', resolution=graph_resolution)
+    size = pae_matrix.shape[0]
+
+    # Limit to upper triangle of matrix
+    i, j = numpy.nonzero(numpy.triu(pae_matrix < pae_cutoff, 1))
+    w = pae_matrix[i,j]
+    weights = 1/w**pae_power if pae_power != 1 else 1/w
+
+    if method == 'auto':
+        method = 'greedy' if size <= greedy_max_size else 'louvain'
+
+    if method == 'greedy':
+        import networkx as nx
+        g = nx.Graph()
+        g.add_nodes_from(range(size))
+        g.add_weighted_edges_from(zip(i.tolist(), j.tolist(), weights.tolist()))
+        from networkx.algorithms.community import greedy_modularity_communities
+        clusters = greedy_modularity_communities(g, weight='weight', resolution=graph_resolution)
+    elif method == 'louvain':
+        from scipy.sparse import csr_matrix
+        a = csr_matrix((numpy.concatenate((weights, weights)),
+                        (numpy.concatenate((i, j)), numpy.concatenate((j, i)))),
+                       shape = (size, size))
+        clusters = _louvain_communities(a, graph_resolution)
+    else:
+        raise ValueError('Unknown PAE domain clustering method "%s"' % method)
+
     if min_size:
         clusters = [c for c in clusters if len(c) >= min_size]
     return clusters
 
+# -----------------------------------------------------------------------------
+# Louvain modularity clustering of a weighted graph given as a symmetric scipy
+# sparse matrix.  Nodes are visited in order so results are reproducible.
+#
+def _louvain_communities(adjacency, resolution = 1.0, max_passes = 100):
+    import numpy
+    from scipy.sparse import csr_matrix
+    n = adjacency.shape[0]
+    membership = numpy.arange(n)
+    a = adjacency.tocsr()
+    m2 = a.sum()		# Twice the total edge weight
+    if m2 == 0:
+        return [frozenset([i]) for i in range(n)]
+
+    while True:
+        comm, moved = _louvain_local_moves(a, m2, resolution, max_passes)
+        if not moved:
+            break
+        # Aggregate communities into nodes of a new graph.
+        ids, comm = numpy.unique(comm, return_inverse = True)
+        membership = comm[membership]
+        nc = len(ids)
+        p = csr_matrix((numpy.ones(len(comm)), (numpy.arange(len(comm)), comm)),
+                       shape = (len(comm), nc))
+        a = (p.T @ a @ p).tocsr()
+
+    order = numpy.argsort(membership, kind = 'stable')
+    bounds = numpy.flatnonzero(numpy.diff(membership[order])) + 1
+    clusters = [frozenset(c.tolist()) for c in numpy.split(order, bounds)]
+    clusters.sort(key = len, reverse = True)
+    return clusters
+
+def _louvain_local_moves(a, m2, resolution, max_passes):
+    '''
+    Move nodes to the neighbor community giving the largest modularity gain.
+    All nodes move at once using sparse matrix operations.  To keep pairs of
+    nodes from swapping communities endlessly, alternate passes allow moves
+    only to higher or only to lower community numbers.  If moving all nodes
+    at once does not increase modularity, only the half with the largest
+    gains are moved, down to a single node which always increases it.
+    '''
+    import numpy
+    from scipy.sparse import csr_matrix
+    n = a.shape[0]
+    k = numpy.asarray(a.sum(axis = 1)).ravel()
+    rows = numpy.repeat(numpy.arange(n), numpy.diff(a.indptr))
+    off = (rows != a.indices)
+    a_off = csr_matrix((a.data[off], (rows[off], a.indices[off])), shape = (n, n))
+    self_w = a.diagonal()
+    cw = _community_weights(a_off, self_w, k, m2, resolution, numpy.arange(n))
+    moved = False
+    failed = 0
+    for p in range(max_passes):
+        nodes, targets = _best_moves(cw, k, m2, resolution, up = (p % 2 == 0))
+        improved = False
+        while len(nodes) > 0:
+            comm = cw[0].copy()
+            comm[nodes] = targets
+            new_cw = _community_weights(a_off, self_w, k, m2, resolution, comm)
+            if new_cw[-1] > cw[-1] + 1e-12:
+                cw, improved = new_cw, True
+                break
+            half = len(nodes) // 2
+            nodes, targets = nodes[:half], targets[:half]
+        if improved:
+            moved = True
+            failed = 0
+        else:
+            failed += 1
+            if failed >= 2:
+                break		# No improving moves up or down.
+    return cw[0], moved
+
+def _community_weights(a_off, self_w, k, m2, resolution, comm):
+    '''
+    Edge weight from each node to each neighboring community as sparse matrix
+    row, column and value arrays, the weight to its own community, the total
+    degree of each community, and the modularity.
+    '''
+    import numpy
+    from scipy.sparse import csr_matrix
+    n = len(comm)
+    p = csr_matrix((numpy.ones(n), (numpy.arange(n), comm)), shape = (n, n))
+    kc = (a_off @ p).tocsr()
+    node = numpy.repeat(numpy.arange(n), numpy.diff(kc.indptr))
+    c, kin = kc.indices, kc.data
+    own = (c == comm[node])
+    kin_own = numpy.zeros(n)
+    kin_own[node[own]] = kin[own]
+    tot = numpy.bincount(comm, k, n)
+    internal = numpy.bincount(comm, kin_own + self_w, n)
+    q = float((internal - resolution * tot * tot / m2).sum()) / m2
+    return comm, node, c, kin, kin_own, tot, q
+
+def _best_moves(cw, k, m2, resolution, up):
+    '''
+    Nodes that can increase modularity by moving to a neighbor community and
+    the community with the largest gain for each, ordered by decreasing gain.
+    Only moves to higher numbered communities are considered if up is true,
+    else only moves to lower numbered ones.
+    '''
+    import numpy
+    comm, node, c, kin, kin_own, tot, q = cw
+    c0 = comm[node]
+    stay = kin_own - resolution * (tot[comm] - k) * k / m2
+    gain = kin - resolution * tot[c] * k[node] / m2 - stay[node]
+    ok = (gain > 1e-12) & ((c > c0) if up else (c < c0))
+    if not ok.any():
+        return node[:0], c[:0]
+    # Largest gain for each node.  Rows of the sparse matrix are contiguous.
+    gain[~ok] = -numpy.inf
+    starts = numpy.flatnonzero(numpy.concatenate(((True,), node[1:] != node[:-1])))
+    row_max = numpy.maximum.reduceat(gain, starts)
+    is_best = ok & (gain == numpy.repeat(row_max, numpy.diff(numpy.append(starts, len(node)))))
+    best = numpy.flatnonzero(is_best)
+    best = best[numpy.concatenate(((True,), node[best][1:] != node[best][:-1]))]
+    best = best[numpy.argsort(-gain[best], kind = 'stable')]
+    return node[best], c[best]
+
 # -----------------------------------------------------------------------------
 #
 def color_by_pae_domain(residues_or_atoms, clusters, colors = None):
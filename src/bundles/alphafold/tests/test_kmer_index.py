@@ -0,0 +1,68 @@
+import pytest
+
+from chimerax.core.errors import UserError
+from chimerax.alphafold.kmer_index import (
+    KmerSequenceIndex, create_kmer_index, sequence_kmers, index_file_paths
+)
+
+sequences = [
+    ("sp|P00001|FIRST_HUMAN First protein", "MKTAYIAKQRQISFVKSHFSRQLEERLGLIEVQAPILSRVGDGTQDNLSGAEKAVQVKVKALPDAQ"),
+    ("sp|P00002|SECOND_HUMAN Second protein", "GSHMSLFDFFKNKGSAAATATDRLKLTPEQRAEIARLLEEALRAGDPAAVAEALAR"),
+    ("sp|P00003|THIRD_HUMAN Selenoprotein", "MWRSLGLALALCLLPSGGTESQDQSSLCKQPPAWSIRDQDPMLNSNGSVTVVALLQASUYLCILQASKLEDLRVKLKKEGYSNISYIVVNHQGISSRLKYTHLKNKVSEHIPVYQQEENQTDVWTLLNGSKDDFLIYDRCGRLVYHLGLPFSFLTFPYVEEAIKIAYCEKKCGNCSLTTLKDEDFCKRVSLATVDKTVETPSPHYHHEHHHNHGHQHLGSSELSENQQPGAPNAPTHPAPPGLHHHHKHKGQHRQGHPENRDMPASEDLQDLQKKLCRKRCINQLLCKLPTDSELAPRS"),
+]
+
+@pytest.fixture
+def fasta_path(tmp_path):
+    path = tmp_path / "seqs.fasta"
+    path.write_text("".join(">%s\n%s\n" % (title, seq[:40] + "\n" + seq[40:])
+                            for title, seq in sequences))
+    return str(path)
+
+@pytest.mark.parametrize("k", [3, 5, 6])
+def test_search_finds_each_sequence(fasta_path, k):
+    assert create_kmer_index(fasta_path, k = k, chunk_bytes = 64) == len(sequences)
+    index = KmerSequenceIndex(fasta_path)
+    assert index.k == k
+    assert index.num_sequences == len(sequences)
+    assert index.num_residues == sum(len(seq) for title, seq in sequences)
+    for i, (title, seq) in enumerate(sequences):
+        snum, nmatch = index.search(seq, max_hits = 3, min_kmer_matches = 1)
+        assert snum[0] == i
+        assert index.title_and_sequence(snum[0]) == (">" + title, seq)
+
+def test_search_subsequence(fasta_path):
+    create_kmer_index(fasta_path, k = 5)
+    index = KmerSequenceIndex(fasta_path)
+    snum, nmatch = index.search(sequences[1][1][10:40], min_kmer_matches = 5)
+    assert snum.tolist() == [1]
+    assert nmatch.tolist() == [26]
+
+def test_min_kmer_matches(fasta_path):
+    create_kmer_index(fasta_path, k = 5)
+    index = KmerSequenceIndex(fasta_path)
+    snum, nmatch = index.search(sequences[0][1][:20], min_kmer_matches = 17)
+    assert len(snum) == 0
+
+def test_nonstandard_residues_skipped():
+    # K-mers containing U or X are neither indexed nor searched.
+    assert len(sequence_kmers("ACDUEFG", 3)) == 2
+    assert len(sequence_kmers("ACDXEFG", 3)) == 2
+    assert (sequence_kmers("acdef", 3) == sequence_kmers("ACDEF", 3)).all()
+    assert len(sequence_kmers("AC", 3)) == 0
+
+def test_nonstandard_residues_match_index(fasta_path):
+    create_kmer_index(fasta_path, k = 5)
+    index = KmerSequenceIndex(fasta_path)
+    seq = sequences[2][1]
+    u = seq.index("U")
+    query = seq[u-20:u+20]
+    snum, nmatch = index.search(query, min_kmer_matches = 1)
+    assert snum.tolist() == [2]
+    assert nmatch[0] == len(sequence_kmers(query, 5))
+
+@pytest.mark.parametrize("k", [2, 7])
+def test_k_out_of_range(fasta_path, k):
+    with pytest.raises(UserError):
+        create_kmer_index(fasta_path, k = k)
+    from os.path import exists
+    assert not exists(index_file_paths(fasta_path)[0])
@@ -47,6 +47,7 @@ from .structure import PickedAtom, PickedBond, PickedResidue, PickedPseudobond
 from .structure import uniprot_ids
 from .molsurf import buried_area, MolecularSurface, surfaces_with_atoms
 from .changes import check_for_changes
+from .zoneindex import zone_index
 from .pdbmatrices import biological_unit_matrices
 from .triggers import get_triggers
 from .shapedrawing import AtomicShapeDrawing, AtomicShapeInfo
@@ -85,6 +85,14 @@ class MolecularSurface(Surface):
       Default true.
     '''
 
+    incremental_update_min_atoms = 20000
+    '''
+    Auto-updating solvent excluded surfaces enclosing at least this many atoms
+    keep the grid bricks used to compute them so that when atoms move only
+    the surface near those atoms is recomputed.  Smaller surfaces are
+    recomputed entirely.  Set to None to always recompute entirely.
+    '''
+
     def __init__(self, session, enclose_atoms, show_atoms, probe_radius, grid_spacing,
                  resolution, level, name, color, visible_patches, sharp_boundaries, update=True):
         
@@ -106,6 +114,7 @@ class MolecularSurface(Surface):
         self._joined_triangles = None
         self._refinement_steps = 1	# Used for fixing sharp edge problems near 3 atom junctions.
 
+        self._bricked_surface = None	# Grid bricks for recomputing surface near moved atoms.
         self._auto_update_handler = None
         self.auto_update = update
 
@@ -150,6 +159,7 @@ class MolecularSurface(Surface):
             shape_change = True
 
         if shape_change:
+            self._bricked_surface = None
             self._clear_shape()
         elif shown_changed:
             self.triangle_mask = self._calc_triangle_mask()
@@ -180,6 +190,7 @@ class MolecularSurface(Surface):
             t = get_triggers()
             t.remove_handler(h)
             self._auto_update_handler = None
+            self._bricked_surface = None
     auto_update = property(_get_auto_update, _set_auto_update)
 
     def _atoms_changed(self, trigger_name, changes):
@@ -243,7 +254,16 @@ class MolecularSurface(Surface):
             # Compute solvent excluded surface
             r = atoms.radii
             self._max_radius = r.max()
-            va, na, ta = surface.ses_surface_geometry(xyz, r, self.probe_radius, self.grid_spacing)
+            if self._use_bricked_surface():
+                # Keep grid bricks so that when a few atoms move only
+                # the surface near those atoms is recomputed.
+                bs = self._bricked_surface
+                if bs is None or not bs.update(xyz, r):
+                    self._bricked_surface = bs = surface.BrickedSESSurface(
+                        xyz, r, self.probe_radius, self.grid_spacing, brick_size = 24)
+                va, na, ta = bs.geometry(xyz, r)
+            else:
+                va, na, ta = surface.ses_surface_geometry(xyz, r, self.probe_radius, self.grid_spacing)
         else:
             # Compute Gaussian surface
             va, na, ta, level = surface.gaussian_surface(xyz, atoms.element_numbers, res,
@@ -266,6 +286,11 @@ class MolecularSurface(Surface):
         self.update_selection()
         self._atom_count = len(atoms)
 
+    def _use_bricked_surface(self):
+        min_atoms = self.incremental_update_min_atoms
+        return (self.auto_update and min_atoms is not None
+                and len(self.atoms) >= min_atoms)
+
     def _calc_triangle_mask(self):
         tmask = self._patch_display_mask(self.show_atoms)
         if self.visible_patches is None:
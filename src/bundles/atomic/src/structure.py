@@ -522,6 +522,8 @@ class Structure(Model, StructureData):
         ad = self._atoms_drawing
         if ad:
             lod.set_atom_sphere_geometry(ad, total_atoms)
+            if not ad.view_dependent:
+                ad.clear_view_level_of_detail()
 
     def _update_position(self, trig_name, updated_model):
         need_update = False
@@ -1005,9 +1007,9 @@ class Structure(Model, StructureData):
         return selected
 
     def atomspec_zone(self, session, coords, distance, target_type, operator, results):
-        from chimerax.geometry import find_close_points
+        from .zoneindex import zone_index
         atoms = self.atoms
-        a, _ = find_close_points(atoms.scene_coords, coords, distance)
+        a = zone_index(session).close_atom_indices(self, coords, distance)
         def not_a():
             from numpy import ones, bool_
             mask = ones(len(atoms), dtype=bool_)
@@ -1049,8 +1051,55 @@ class AtomsDrawing(Drawing):
 
     def __init__(self, name):
         self.visible_atoms = None
+        self._view_lod = None	# AtomsViewLevelOfDetail, culling and level of detail for huge structures
         super().__init__(name)
 
+    @property
+    def view_dependent(self):
+        '''Huge structures cull atoms outside the view and simplify distant atoms.'''
+        s, a = self.parent, self.visible_atoms
+        if s is None or a is None:
+            return False
+        lod = s._level_of_detail
+        return lod.atom_view_dependent and len(a) >= lod.atom_view_dependent_min_atoms
+
+    def update_for_camera(self, camera, window_size):
+        vl = self._view_lod
+        if vl is None:
+            self._view_lod = vl = AtomsViewLevelOfDetail(self)
+        vl.update(camera, window_size)
+
+    def _view_lod_active(self):
+        vl = self._view_lod
+        return vl is not None and vl.active and self.view_dependent
+
+    def clear_view_level_of_detail(self):
+        vl = self._view_lod
+        if vl is not None:
+            vl.delete()
+            self._view_lod = None
+
+    def draw_self(self, renderer, draw_pass):
+        if self._view_lod_active():
+            self._view_lod.draw(renderer, draw_pass)
+        else:
+            Drawing.draw_self(self, renderer, draw_pass)
+
+    def redraw_needed(self, **kw):
+        vl = self._view_lod
+        if vl is not None:
+            vl.contents_changed = True
+        Drawing.redraw_needed(self, **kw)
+
+    def number_of_triangles(self, displayed_only=False):
+        if displayed_only and self._view_lod_active():
+            return self._view_lod.number_of_triangles()
+        return Drawing.number_of_triangles(self, displayed_only)
+
+    def delete(self):
+        self.clear_view_level_of_detail()
+        Drawing.delete(self)
+
     def bounds(self):
         cpb = self._cached_position_bounds	# Attribute of Drawing.
         if cpb is not None:
@@ -1138,6 +1187,173 @@ class AtomsDrawing(Drawing):
             print('%s </Shape>' % tab, file=stream)
             print('%s</Transform>' % tab, file=stream)
 
+class AtomsViewLevelOfDetail:
+    '''
+    Culling and view-dependent level of detail for the atom spheres of huge structures.
+    Atoms are grouped into spatial bins.  Bins outside the view frustum are not drawn
+    and bins far from the camera, where atoms cover few pixels, are drawn with fewer
+    triangles per sphere.  The drawn atoms are held by helper drawings, one per level
+    of detail, which are not children of the atoms drawing.  Bin levels are computed
+    from the camera before each frame is drawn and the helper drawings are only
+    refilled when the levels or the atom graphics change.
+    '''
+    def __init__(self, atoms_drawing):
+        self._atoms_drawing = atoms_drawing
+        self.active = False
+        self.contents_changed = True	# Set when atom positions, colors or highlights change
+        self._positions = None		# Positions the bins were computed from
+        self._order = None		# Atom indices ordered by bin
+        self._bin_counts = None		# Number of atoms in each bin
+        self._bin_centers = None
+        self._bin_radii = None		# Radius of bin including atom radii
+        self._bin_atom_radii = None	# Largest atom radius in each bin
+        self._bin_levels = None		# Level of detail for each bin, -1 if culled
+        self._level_triangles = None	# Sphere triangles for each level of detail
+        self._drawings = []
+        self._level_counts = []
+
+    def delete(self):
+        for d in self._drawings:
+            d.parent = None	# Not a child drawing.
+            d.delete()
+        self._drawings = []
+        self._level_counts = []
+        self.active = False
+
+    def update(self, camera, window_size):
+        ad = self._atoms_drawing
+        s = ad.parent
+        spos = s.get_scene_positions(displayed_only = True)
+        if len(spos) != 1 or ad.empty_drawing():
+            # Multiple instances of the structure are drawn without culling.
+            self.active = False
+            return
+        self.active = True
+        if ad.positions is not self._positions:
+            self._compute_bins()
+        lod = s._level_of_detail
+        levels = self._camera_bin_levels(camera, window_size, spos[0], lod)
+        bl = self._bin_levels
+        if self.contents_changed or bl is None or (levels != bl).any():
+            self._bin_levels = levels
+            self._fill_drawings(lod)
+            self.contents_changed = False
+
+    def draw(self, renderer, draw_pass):
+        for d, n in zip(self._drawings, self._level_counts):
+            if n > 0:
+                d.draw_self(renderer, draw_pass)
+
+    def number_of_triangles(self):
+        return sum(n * len(d.triangles) for d, n in zip(self._drawings, self._level_counts))
+
+    def _compute_bins(self):
+        ad = self._atoms_drawing
+        self._positions = ad.positions
+        self._bin_levels = None
+        xyzr = ad.positions.shift_and_scale_array()
+        xyz, r = xyzr[:,:3], xyzr[:,3]
+        n = len(xyz)
+        lod = ad.parent._level_of_detail
+        from numpy import maximum, int64, argsort, unique, add, repeat, arange, sqrt, float64
+        xyz_min = xyz.min(axis = 0)
+        size = maximum(xyz.max(axis = 0) - xyz_min, 1.0)
+        nbins = max(1, n // lod.atoms_per_bin)
+        step = (size.prod() / nbins) ** (1/3)
+        ijk = ((xyz - xyz_min) / step).astype(int64)
+        gsize = ijk.max(axis = 0) + 1
+        keys = (ijk[:,2]*gsize[1] + ijk[:,1])*gsize[0] + ijk[:,0]
+        order = argsort(keys, kind = 'stable')
+        ukeys, starts, counts = unique(keys[order], return_index = True, return_counts = True)
+        oxyz = xyz[order].astype(float64)
+        centers = add.reduceat(oxyz, starts, axis = 0) / counts[:,None]
+        bin_of_atom = repeat(arange(len(starts)), counts)
+        orad = r[order]
+        d = sqrt(((oxyz - centers[bin_of_atom])**2).sum(axis = 1)) + orad
+        self._order = order
+        self._bin_counts = counts
+        self._bin_centers = centers
+        self._bin_radii = maximum.reduceat(d, starts)
+        self._bin_atom_radii = maximum.reduceat(orad, starts)
+
+    def _camera_bin_levels(self, camera, window_size, scene_position, lod):
+        centers = scene_position * self._bin_centers
+        radii = self._bin_radii
+        from numpy import zeros, int8
+        levels = zeros((len(centers),), int8)
+
+        # Apparent atom size in pixels sets the level of detail.
+        widths = _camera_view_widths(camera, centers)
+        if widths is not None:
+            pixels = (2 * window_size[0]) * self._bin_atom_radii / widths
+            for level, min_pixels in enumerate(lod.atom_lod_pixel_sizes):
+                levels[pixels < min_pixels] = level + 1
+
+        # Cull bins outside the view frustum side planes.
+        planes = camera.rectangle_bounding_planes((0,0), window_size, window_size)
+        if len(planes) > 0:
+            dist = centers @ planes[:,:3].T + planes[:,3]
+            outside = (dist < -radii[:,None]).any(axis = 1)
+            levels[outside] = -1
+
+        return levels
+
+    def _set_level_geometries(self, lod, num_drawn):
+        '''
+        Full detail spheres use the triangle count for the number of atoms not
+        culled, so zooming in on part of a huge structure gives smooth spheres.
+        '''
+        ad = self._atoms_drawing
+        if not self._drawings:
+            self._drawings = [Drawing('%s level %d' % (ad.name, level))
+                              for level in range(1 + len(lod.atom_lod_pixel_sizes))]
+            for d in self._drawings:
+                d.parent = ad.parent	# Used for scene positions, not a child drawing.
+        ntri = lod.atom_sphere_triangles(num_drawn)
+        level_tri = tuple(lod.atom_level_triangles(ntri, level) for level in range(len(self._drawings)))
+        if level_tri != self._level_triangles:
+            for d, nt in zip(self._drawings, level_tri):
+                va, na, ta = lod.sphere_geometry(nt)
+                d.set_geometry(va, na, ta)
+            self._level_triangles = level_tri
+
+    def _fill_drawings(self, lod):
+        ad = self._atoms_drawing
+        xyzr = ad.positions.shift_and_scale_array()
+        colors = ad.colors
+        hp = ad.highlighted_positions
+        from numpy import repeat
+        atom_levels = repeat(self._bin_levels, self._bin_counts)
+        self._set_level_geometries(lod, int((atom_levels >= 0).sum()))
+        from chimerax.geometry import Places
+        counts = []
+        for level, d in enumerate(self._drawings):
+            i = self._order[atom_levels == level]
+            counts.append(len(i))
+            if len(i) == 0:
+                continue
+            i.sort()
+            d.positions = Places(shift_and_scale = xyzr[i])
+            d.colors = colors[i]
+            d.highlighted_positions = None if hp is None else hp[i]
+        self._level_counts = counts
+
+def _camera_view_widths(camera, points):
+    '''
+    Width of the view in scene units at each point.  Returns None if the
+    camera does not have a simple perspective or orthographic projection.
+    '''
+    from numpy import full, maximum
+    if camera.name == 'orthographic':
+        return full((len(points),), camera.field_width)
+    fov = getattr(camera, 'field_of_view', None)
+    if fov is None:
+        return None
+    p = camera.position
+    depth = (points - p.origin()) @ p.z_axis()
+    from math import tan, radians
+    return 2 * tan(0.5 * radians(fov)) * maximum(-depth, 1e-3)
+
 class BondsDrawing(Drawing):
     # Used for both bonds and pseudoonds.
     # Should not have any child drawings, as bounds and picking will ignore any children.
@@ -1986,6 +2202,12 @@ class LevelOfDetail(State):
         self.atom_fixed_triangles = None	# If not None use fixed number of triangles
         self._sphere_geometries = {}	# Map ntri to (va,na,ta)
 
+        # View-dependent culling and level of detail for atom spheres of huge structures.
+        self.atom_view_dependent = True
+        self.atom_view_dependent_min_atoms = 1000000	# Only for structures showing more atoms
+        self.atoms_per_bin = 4096	# Average atoms per spatial bin for culling
+        self.atom_lod_pixel_sizes = (8, 2)	# Fewer triangles when atom diameter is fewer pixels
+
         # Number of triangles used for a bond cylinder.
         self._bond_min_triangles = 24
         self._bond_max_triangles = 160
@@ -2064,6 +2286,19 @@ class LevelOfDetail(State):
         ntri = 2*(ntri//2)	# Require multiple of 2.
         return ntri
 
+    def atom_level_triangles(self, ntri, level):
+        '''
+        Triangles for spheres at a reduced level of detail used for distant
+        atoms of huge structures.  Level 0 is full detail.
+        '''
+        nmin = self._atom_min_triangles
+        if level == 0:
+            return ntri
+        if level >= len(self.atom_lod_pixel_sizes):
+            return 2*(nmin//2)
+        n = max(nmin, ntri // (4**level))
+        return 2*(n//2)
+
     def clamp_geometric(self, n, nmin, nmax):
         f = self._step_factor
         from math import log, pow
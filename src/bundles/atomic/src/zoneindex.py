@@ -0,0 +1,208 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+
+# -----------------------------------------------------------------------------
+# Session-wide spatial index of atom coordinates used for zone atom specifiers
+# (@<, :<, /<, #<) and select zone.  Each structure has a grid of atoms in its
+# own coordinate system, so moving models does not require updating the index.
+# A structure grid is discarded when its coordinates change and rebuilt the
+# next time it is queried.
+#
+def zone_index(session):
+    zi = getattr(session, '_atom_zone_index', None)
+    if zi is None:
+        session._atom_zone_index = zi = ZoneIndex(session)
+    return zi
+
+# -----------------------------------------------------------------------------
+#
+class ZoneIndex:
+
+    def __init__(self, session, cell_size = 5.0):
+        self._session = session
+        self.cell_size = cell_size	# Grid cell size in Angstroms
+        self._grids = {}		# Map Structure to _AtomGrid
+        from . import get_triggers
+        self._changes_handler = get_triggers().add_handler('changes', self._atoms_changed)
+
+    def delete(self):
+        from . import get_triggers
+        get_triggers().remove_handler(self._changes_handler)
+        self._changes_handler = None
+        self._grids.clear()
+
+    def close_atom_indices(self, structure, points, distance):
+        '''
+        Return indices into structure.atoms of the atoms within distance
+        of any of the points given in scene coordinates.
+        '''
+        p = structure.scene_position
+        if not _is_orthonormal(p):
+            # Scaled positions do not preserve distances in structure coordinates.
+            from chimerax.geometry import find_close_points
+            i, _ = find_close_points(structure.atoms.scene_coords, points, distance)
+            return i
+        g = self._structure_grid(structure)
+        spoints = points if p.is_identity() else p.inverse(is_orthonormal = True) * points
+        return g.close_atom_indices(spoints, distance)
+
+    def close_atoms(self, atoms, points, distance):
+        '''Return the subset of atoms within distance of any of the scene points.'''
+        from . import Atoms
+        if len(atoms) == 0 or len(points) == 0:
+            return Atoms()
+        close = []
+        for s, satoms in atoms.by_structure:
+            i = self.close_atom_indices(s, points, distance)
+            if len(i) > 0:
+                close.append(satoms.intersect(s.atoms.filter(i)))
+        from .molarray import concatenate
+        return concatenate(close, Atoms)
+
+    def _structure_grid(self, structure):
+        grids = self._grids
+        g = grids.get(structure)
+        if g is not None and not g.is_current(structure, self._pending_changes()):
+            g = None
+        if g is None:
+            for s in tuple(grids.keys()):
+                if s.deleted:
+                    del grids[s]
+            grids[structure] = g = _AtomGrid(structure, self.cell_size)
+        return g
+
+    def _pending_changes(self):
+        ct = getattr(self._session, 'change_tracker', None)
+        return ct is not None and ct.changed
+
+    def _atoms_changed(self, trigger_name, changes):
+        grids = self._grids
+        if not grids:
+            return
+        stale = set()
+        if 'active_coordset changed' in changes.structure_reasons():
+            stale.update(changes.modified_structures())
+        atom_reasons = changes.atom_reasons()
+        if 'coord changed' in atom_reasons or 'alt_loc changed' in atom_reasons:
+            # Changing the current alternate location moves atoms.
+            stale.update(changes.modified_atoms().unique_structures)
+        if 'alt_locs changed' in changes.residue_reasons():
+            stale.update(changes.modified_residues().unique_structures)
+        if 'coordset changed' in changes.coordset_reasons():
+            stale.update(cs.structure for cs in changes.modified_coordsets())
+        created = changes.created_atoms(include_new_structures = False)
+        if len(created) > 0:
+            stale.update(created.unique_structures)
+        for s in stale:
+            grids.pop(s, None)
+        for s in tuple(grids.keys()):
+            if s.deleted:
+                del grids[s]
+
+# -----------------------------------------------------------------------------
+# Atoms of one structure binned in a uniform grid in structure coordinates.
+#
+class _AtomGrid:
+
+    def __init__(self, structure, cell_size):
+        self.cell_size = cell_size
+        self.num_atoms = structure.num_atoms
+        self.coordset_id = structure.active_coordset_id
+        self.coords = xyz = structure.atoms.coords
+        if len(xyz) == 0:
+            return
+        from numpy import floor, int64, int32, argsort, unique
+        self.xyz_min = xyz_min = xyz.min(axis = 0)
+        self.xyz_max = xyz.max(axis = 0)
+        ijk = floor((xyz - xyz_min) / cell_size).astype(int64)
+        self.grid_size = ijk.max(axis = 0) + 1
+        keys = self._cell_keys(ijk)
+        self.order = order = argsort(keys, kind = 'stable').astype(int32)
+        self.keys, self.starts, self.counts = unique(keys[order], return_index = True,
+                                                     return_counts = True)
+
+    def _cell_keys(self, ijk):
+        gs = self.grid_size
+        return (ijk[:,2]*gs[1] + ijk[:,1])*gs[0] + ijk[:,0]
+
+    def is_current(self, structure, pending_changes):
+        if structure.num_atoms != self.num_atoms:
+            return False
+        if structure.active_coordset_id != self.coordset_id:
+            return False
+        if pending_changes:
+            # Coordinate changes not yet reported by the changes trigger.
+            from numpy import array_equal
+            return array_equal(structure.atoms.coords, self.coords)
+        return True
+
+    def close_atom_indices(self, points, distance):
+        from numpy import empty, int32
+        if len(self.coords) == 0 or len(points) == 0:
+            return empty((0,), int32)
+
+        # Only points near the structure bounding box can be close.
+        inside = ((points >= self.xyz_min - distance) &
+                  (points <= self.xyz_max + distance)).all(axis = 1)
+        if not inside.all():
+            points = points[inside]
+            if len(points) == 0:
+                return empty((0,), int32)
+
+        from math import ceil
+        from numpy import floor, int64, unique
+        k = int(ceil(distance / self.cell_size))
+        pcells = unique(floor((points - self.xyz_min) / self.cell_size).astype(int64), axis = 0)
+        from chimerax.geometry import find_close_points
+        if len(pcells) * (2*k+1)**3 > 8 * len(self.order):
+            # Neighborhood of points covers most of the structure.
+            i, _ = find_close_points(self.coords, points, distance)
+            return i
+
+        # Gather atoms in grid cells within the distance of the point cells.
+        from numpy import arange, meshgrid, stack, searchsorted, repeat, cumsum
+        r = arange(-k, k+1)
+        offsets = stack(meshgrid(r, r, r, indexing = 'ij'), axis = -1).reshape(-1,3)
+        cells = (pcells[:,None,:] + offsets[None,:,:]).reshape(-1,3)
+        cells = cells[((cells >= 0) & (cells < self.grid_size)).all(axis = 1)]
+        ckeys = unique(self._cell_keys(cells))
+        pos = searchsorted(self.keys, ckeys)
+        found = pos < len(self.keys)
+        pos, ckeys = pos[found], ckeys[found]
+        pos = pos[self.keys[pos] == ckeys]
+        if len(pos) == 0:
+            return empty((0,), int32)
+        starts, counts = self.starts[pos], self.counts[pos]
+        ends = cumsum(counts)
+        ai = arange(ends[-1]) + repeat(starts - (ends - counts), counts)
+        candidates = self.order[ai]
+
+        i, _ = find_close_points(self.coords[candidates], points, distance)
+        close = candidates[i]
+        close.sort()
+        return close
+
+def _is_orthonormal(place, tolerance = 1e-5):
+    return all(abs(a - 1) < tolerance for a in place.axes_lengths())
@@ -21,6 +21,7 @@ from chimerax.core.commands import (
     Or,
     CmdDesc,
     AtomSpecArg,
+    OpenFileNameArg,
     atomspec,
 )
 from chimerax.atomic import SequenceArg, Sequence, Chain
@@ -28,7 +29,7 @@ from chimerax.core.errors import UserError
 from chimerax.seqalign import AlignSeqPairArg
 
 from .data_model import AvailableDBs, AvailableMatrices
-from .job import BlastProteinJob
+from .job import BlastProteinJob, KmerSearchJob
 
 
 # Use camel-case variable names for displaying keywords in help/usage
@@ -47,6 +48,7 @@ def blastprotein(
     showSequenceAlignment: bool = False,
     onlyBest: bool = False,
     log=None,
+    kmerIndex: Optional[str] = None,
     *,
     name=None
 ):
@@ -85,7 +87,11 @@ def blastprotein(
             # Make sure we have a structure spec in there so
             # the atomspec remains unique when we load structures later
             chain_spec = str_chain.structure.atomspec + chain_spec
-    job = BlastProteinJob(
+    job_class, job_kw = BlastProteinJob, {}
+    if kmerIndex is not None:
+        # Search a local sequence file indexed with "alphafold kmerindex".
+        job_class, job_kw = KmerSearchJob, {"kmer_index": kmerIndex}
+    job = job_class(
         session,
         chain.ungapped(),
         chain_spec,
@@ -100,6 +106,7 @@ def blastprotein(
         load_structures=loadStructures,
         load_sequences=showSequenceAlignment,
         only_best=onlyBest,
+        **job_kw,
     )
     job.start()
 
@@ -118,6 +125,7 @@ blastprotein_desc = CmdDesc(
         ("loadStructures", BoolArg),
         ("showSequenceAlignment", BoolArg),
         ("onlyBest", BoolArg),
+        ("kmerIndex", OpenFileNameArg),
     ],
     synopsis=blastprotein.__doc__.split("\n")[0].strip(),
 )
@@ -186,7 +186,7 @@ class NCBIDB(Database):
     @staticmethod
     def add_info(matches, sequences):
         chain_ids = list(matches.keys())
-        data = fetch_pdb_info(chain_ids)
+        data = fetch_pdb_info(chain_ids) if chain_ids else {}
         for chain_id, hit in matches.items():
             try:
                 for k, v in data[chain_id].items():
@@ -234,7 +234,7 @@ class UniRefDB(NCBIDB):
         # TODO: If we never see matches, remove the logic that deals with
         # them and reduce the scope of this function to sequences
         chain_ids = list(matches.keys())
-        data = fetch_pdb_info(chain_ids)
+        data = fetch_pdb_info(chain_ids) if chain_ids else {}
         for chain_id, hit in matches.items():
             try:
                 for k, v in data[chain_id].items():
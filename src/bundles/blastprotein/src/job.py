@@ -306,6 +306,51 @@ class BlastProteinJob(CxServicesJob):
         return BlastProteinJob.from_snapshot(session, data)
 
 
+class KmerSearchJob(BlastProteinJob):
+    """Search a local sequence file that has a k-mer index instead of
+    submitting the sequence to the BLAST web service.  The search runs in
+    a thread and the results are shown the same way as BLAST results."""
+
+    SESSION_SAVE = False
+
+    def __init__(self, session, seq, atomspec, *, kmer_index, **kw):
+        self.kmer_index = kmer_index
+        self._results = None
+        self._error = None
+        super().__init__(session, seq, atomspec, **kw)
+
+    def run(self, *args, **kw):
+        from .kmer import kmer_blast_results
+
+        try:
+            self._results = kmer_blast_results(
+                self.seq,
+                self.kmer_index,
+                database=self.database,
+                cutoff=float(self.cutoff),
+                matrix=self.matrix,
+                max_seqs=int(self.max_seqs),
+            )
+        except Exception as e:
+            self._error = str(e)
+            self.session.ui.thread_safe(
+                self.session.logger.error, "k-mer search failed: %s" % self._error
+            )
+
+    @property
+    def launched_successfully(self) -> bool:
+        return self._error is None
+
+    def exited_normally(self) -> bool:
+        return self._results is not None
+
+    def get_results(self) -> Dict:
+        return self._results
+
+    def __str__(self):
+        return "BlastProtein k-mer search Job, ID %s" % self.id
+
+
 def parse_blast_results_nogui(session, params, sequence, results, log=None):
     blast_results = get_database(params.database)
     try:
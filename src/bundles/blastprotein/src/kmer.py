@@ -0,0 +1,173 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2021 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+"""Search a local FASTA sequence database with a k-mer index and report the
+hits as BLAST JSON output so they can be shown in the BLAST results table."""
+from math import exp, log
+
+from .utils import SeqGapChars
+
+# BLAST default gap penalties and approximate Karlin-Altschul parameters
+# (lambda, K) for gapped alignments with each scoring matrix.  Matrices
+# missing from chimerax.sim_matrices use the closest available one.
+MatrixScoring = {
+    "BLOSUM45": ("BLOSUM-45", 15, 2, 0.201, 0.041),
+    "BLOSUM50": ("BLOSUM-50", 13, 2, 0.212, 0.063),
+    "BLOSUM62": ("BLOSUM-62", 11, 1, 0.267, 0.041),
+    "BLOSUM80": ("BLOSUM-80", 10, 1, 0.299, 0.071),
+    "BLOSUM90": ("BLOSUM-90", 10, 1, 0.306, 0.084),
+    "PAM30": ("PAM-40", 9, 1, 0.294, 0.110),
+    "PAM70": ("PAM-40", 10, 1, 0.291, 0.091),
+    "PAM250": ("PAM-250", 14, 2, 0.172, 0.018),
+    "IDENTITY": ("BLOSUM-62", 11, 1, 0.267, 0.041),
+}
+
+
+def kmer_blast_results(
+    sequence: str,
+    sequences_path: str,
+    database: str = "alphafold",
+    cutoff: float = 1.0e-3,
+    matrix: str = "BLOSUM62",
+    max_seqs: int = 100,
+    min_kmer_matches: int = 15,
+    logger=None,
+) -> dict:
+    """Find the database sequences sharing the most k-mers with the query,
+    align each to the query with Smith-Waterman, and estimate e-values from
+    the alignment scores.  Returns a dictionary in BLAST JSON format."""
+    from chimerax.alphafold.kmer_index import KmerSequenceIndex
+    from chimerax.alignment_algs import SmithWaterman
+    from chimerax import sim_matrices
+
+    index = KmerSequenceIndex(sequences_path)
+    seq_nums, kmer_matches = index.search(
+        sequence, max_hits=max_seqs, min_kmer_matches=min_kmer_matches
+    )
+    mat_name, gap_open, gap_extend, lam, K = MatrixScoring.get(
+        matrix, MatrixScoring["BLOSUM62"]
+    )
+    sim_matrix = sim_matrices.matrix(mat_name, logger)
+    matrix_letters = set(c1 for c1, c2 in sim_matrix.keys())
+    query = _matrix_sequence(sequence, matrix_letters)
+    search_space = len(sequence) * index.num_residues
+
+    hits = []
+    for seq_num in seq_nums:
+        title, hit_seq = index.title_and_sequence(seq_num)
+        hit = _matrix_sequence(hit_seq, matrix_letters)
+        score, (q_aligned, h_aligned) = SmithWaterman.align(
+            query, hit, sim_matrix, float(gap_open), float(gap_extend)
+        )
+        evalue = K * search_space * exp(-lam * score)
+        if evalue > cutoff:
+            continue
+        q_from = _aligned_start(query, q_aligned)
+        h_from = _aligned_start(hit, h_aligned)
+        q_aligned = _original_letters(q_aligned, sequence, q_from)
+        h_aligned = _original_letters(h_aligned, hit_seq, h_from)
+        hits.append(
+            {
+                "num": len(hits) + 1,
+                "description": [_hit_description(title, database)],
+                "len": len(hit_seq),
+                "hsps": [
+                    {
+                        "num": 1,
+                        "bit_score": (lam * score - log(K)) / log(2),
+                        "score": int(score),
+                        "evalue": evalue,
+                        "identity": sum(
+                            1 for q, h in zip(q_aligned, h_aligned) if q == h
+                        ),
+                        "query_from": q_from,
+                        "query_to": q_from + _ungapped_length(q_aligned) - 1,
+                        "hit_from": h_from,
+                        "hit_to": h_from + _ungapped_length(h_aligned) - 1,
+                        "align_len": len(q_aligned),
+                        "gaps": q_aligned.count("-") + h_aligned.count("-"),
+                        "qseq": q_aligned,
+                        "hseq": h_aligned,
+                    }
+                ],
+            }
+        )
+    hits.sort(key=lambda hit: hit["hsps"][0]["evalue"])
+    for num, hit in enumerate(hits):
+        hit["num"] = num + 1
+
+    report = {
+        "program": "kmer",
+        "version": "k-mer index search (k=%d)" % index.k,
+        "reference": "",
+        "search_target": {"db": sequences_path},
+        "params": {
+            "matrix": matrix,
+            "expect": cutoff,
+            "gap_open": gap_open,
+            "gap_extend": gap_extend,
+        },
+        "results": {
+            "search": {
+                "query_id": "query",
+                "query_len": len(sequence),
+                "hits": hits,
+                "stat": {
+                    "db_num": index.num_sequences,
+                    "db_len": index.num_residues,
+                },
+            }
+        },
+    }
+    return {"BlastOutput2": [{"report": report}]}
+
+
+def _matrix_sequence(sequence, matrix_letters):
+    """Sequence with letters the similarity matrix does not score replaced
+    by 'X', so that selenocysteine (U), pyrrolysine (O) and other unusual
+    codes can be aligned."""
+    return "".join(
+        c if c in matrix_letters else "X" for c in sequence.upper()
+    )
+
+
+def _original_letters(aligned, sequence, start):
+    """Aligned segment with the letters of the original sequence, starting
+    at 1-based position start, in place of any letters replaced by 'X'."""
+    letters = iter(sequence[start - 1 :])
+    return "".join(c if c in SeqGapChars else next(letters) for c in aligned)
+
+
+def _aligned_start(sequence, aligned):
+    """1-based position in sequence where the ungapped aligned segment starts."""
+    segment = "".join(c for c in aligned if c not in SeqGapChars)
+    return sequence.find(segment) + 1
+
+
+def _ungapped_length(aligned):
+    return sum(1 for c in aligned if c not in SeqGapChars)
+
+
+def _hit_description(title, database):
+    """Hit description in the form the BLAST parser for the database expects.
+    Hits from databases other than AlphaFold are reported as sequence-only
+    hits named by the first word of the FASTA title line."""
+    title = title.lstrip(">")
+    fields = title.split(None, 1)
+    accession = fields[0] if fields else ""
+    if database == "alphafold":
+        return {"id": accession, "title": title}
+    return {
+        "id": accession,
+        "accession": accession,
+        "title": fields[1] if len(fields) > 1 else "",
+    }
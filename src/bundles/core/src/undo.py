@@ -56,11 +56,22 @@ class Undo(StateManager):
     limit.  Otherwise, if a stack grows deeper than its
     allowed maximum, the bottom of stack is discarded.
 
+    The memory used by the saved states of both stacks is also
+    limited.  When it exceeds max_bytes the large arrays of the
+    oldest actions are moved to a temporary file, and when the
+    file exceeds max_spill_bytes the oldest actions are discarded.
+
     Attributes
     ----------
     max_depth : int
         Maximum depth for both the undo and redo stacks.
         Default is 10.  Setting to 0 removes limit.
+    max_bytes : int
+        Maximum memory in bytes for saved states of undo and redo actions.
+        Default is 512 Mbytes.  Setting to 0 removes limit.
+    max_spill_bytes : int
+        Maximum bytes of saved states written to a temporary file.
+        Default is 4 Gbytes.
     redo_stack : list
         List of UndoAction instances
     undo_stack : list
@@ -68,7 +79,8 @@ class Undo(StateManager):
     """
     # Most of this code is modeled after tools.Tools
 
-    def __init__(self, session, first=False, max_depth=10):
+    def __init__(self, session, first=False, max_depth=10,
+                 max_bytes=512*2**20, max_spill_bytes=4*2**30):
         """Initialize per-session state manager for undo/redo actions.
 
         Parameters
@@ -79,9 +91,12 @@ class Undo(StateManager):
         import weakref
         self._session = weakref.ref(session)
         self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self.max_spill_bytes = max_spill_bytes
         self.undo_stack = []
         self.redo_stack = []
         self._register_stack = []
+        self._spill_file = None
 
     @property
     def session(self):
@@ -135,8 +150,8 @@ class Undo(StateManager):
         """
         if len(self._register_stack):
             return self._register_stack[0].register(action)
-        self._push(self.undo_stack, action)
         self.redo_stack.clear()
+        self._push(self.undo_stack, action)
         self._update_ui()
         return action
 
@@ -160,6 +175,7 @@ class Undo(StateManager):
         """
         self._remove(self.undo_stack, action, delete_history)
         self._remove(self.redo_stack, action, delete_history)
+        self._trim_spill_file()
         self._update_ui()
 
     def clear(self):
@@ -167,8 +183,20 @@ class Undo(StateManager):
         """
         self.undo_stack.clear()
         self.redo_stack.clear()
+        self._close_spill_file()
         self._update_ui()
 
+    def memory_used(self):
+        """Return bytes of memory used by saved states of undo and redo actions.
+        """
+        return sum(a.nbytes for a in self.undo_stack + self.redo_stack)
+
+    def disk_used(self):
+        """Return bytes of saved states of undo and redo actions written
+        to a temporary file.
+        """
+        return sum(a.disk_bytes for a in self.undo_stack + self.redo_stack)
+
     def top_undo_name(self):
         """Return name for top undo action, or None if stack is empty.
         """
@@ -243,13 +271,26 @@ class Undo(StateManager):
         self._trim(self.undo_stack)
         self._trim(self.redo_stack)
 
+    def set_memory_limit(self, nbytes):
+        """Set the maximum memory for saved states of undo and redo actions.
+
+        Parameter
+        ---------
+        nbytes : int
+            Maximum bytes.  Values <= 0 means unlimited.
+        """
+        self.max_bytes = max(0, nbytes)
+        self._trim_memory()
+
     # State methods
 
     def take_snapshot(self, session, flags):
-        return {"version":1, "max_depth":self.max_depth}
+        return {"version":2, "max_depth":self.max_depth, "max_bytes":self.max_bytes}
 
     @classmethod
     def restore_snapshot(cls, session, data):
+        if 'max_bytes' in data:
+            return cls(session, max_depth=data["max_depth"], max_bytes=data["max_bytes"])
         return cls(session, max_depth=data["max_depth"])
 
     def reset_state(self, session):
@@ -263,9 +304,47 @@ class Undo(StateManager):
             while len(stack) > self.max_depth:
                 stack.pop(0)
 
+    def _trim_memory(self):
+        used = self.memory_used()
+        if self.max_bytes > 0 and used > self.max_bytes:
+            # Move saved states of oldest actions to a temporary file, keeping
+            # the next undo and redo actions in memory.
+            oldest_first = self.undo_stack[:-1] + self.redo_stack[:-1]
+            for action in oldest_first:
+                if action.nbytes > 0:
+                    used -= action.spill(self._spill())
+                    if used <= self.max_bytes:
+                        break
+            # Discard oldest actions if the temporary file is too large.
+            while self.undo_stack and self.disk_used() > self.max_spill_bytes:
+                self.undo_stack.pop(0)
+        self._trim_spill_file()
+
+    def _trim_spill_file(self):
+        # Data of discarded actions stays in the temporary file until
+        # the file is closed or compacted.
+        sf = self._spill_file
+        if sf is None:
+            return
+        if sf.live_bytes == 0:
+            self._close_spill_file()
+        elif sf.dead_bytes > max(sf.live_bytes, sf.min_compact_bytes):
+            sf.compact()
+
+    def _spill(self):
+        if self._spill_file is None:
+            self._spill_file = UndoSpillFile()
+        return self._spill_file
+
+    def _close_spill_file(self):
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
     def _push(self, stack, inst):
         stack.append(inst)
         self._trim(stack)
+        self._trim_memory()
 
     def _pop(self, stack):
         return stack.pop()
@@ -316,6 +395,22 @@ class UndoAction:
         self.name = name
         self.can_redo = can_redo
 
+    @property
+    def nbytes(self):
+        """Approximate bytes of memory used by saved state."""
+        return 0
+
+    @property
+    def disk_bytes(self):
+        """Bytes of saved state moved to a temporary file."""
+        return 0
+
+    def spill(self, spill_file):
+        """Move large saved state to an UndoSpillFile to reduce memory use.
+        Return the number of bytes of memory freed.
+        """
+        return 0
+
     def undo(self):
         """Undo an action.
         """
@@ -346,6 +441,9 @@ class UndoState(UndoAction):
 
     _valid_options = ["A", "M", "MA", "MK", "S"]
 
+    # Numpy array values at least this large are kept compressed.
+    compact_size = 2**20
+
     def __init__(self, name, can_redo=True):
         super().__init__(name, can_redo)
         self.state = []
@@ -397,13 +495,46 @@ class UndoState(UndoAction):
         """
         if option not in self._valid_options:
             raise ValueError("invalid UndoState option: %s" % option)
+        if option in ("A", "M"):
+            old_value, new_value = self._compact_values(old_value, new_value)
         self.state.append((owner, attribute, old_value, new_value, option, deleted_check))
 
+    def _compact_values(self, old_value, new_value):
+        # Large arrays are compressed, and if the old value differs from the
+        # new value in only a fraction of its elements only the differences are kept.
+        from numpy import ndarray
+        size = self.compact_size
+        if isinstance(new_value, ndarray) and new_value.nbytes >= size:
+            new_value = UndoArray(new_value)
+        if isinstance(old_value, ndarray) and old_value.nbytes >= size:
+            old_value = UndoArray(old_value, reference=new_value)
+        return old_value, new_value
+
+    @property
+    def nbytes(self):
+        return sum(_value_nbytes(old_value) + _value_nbytes(new_value)
+                   for owner, attribute, old_value, new_value, option, deleted_check in self.state)
+
+    @property
+    def disk_bytes(self):
+        return sum(v.disk_bytes for owner, attribute, old_value, new_value, option, deleted_check
+                   in self.state for v in (old_value, new_value) if isinstance(v, UndoArray))
+
+    def spill(self, spill_file):
+        freed = 0
+        for owner, attribute, old_value, new_value, option, deleted_check in self.state:
+            for v in (old_value, new_value):
+                if isinstance(v, UndoArray):
+                    freed += v.spill(spill_file)
+        return freed
+
     def undo(self):
         """Undo action (set owner attributes to old values).
         """
         self._consistency_check()
         for owner, attribute, old_value, new_value, option, deleted_check in reversed(self.state):
+            if isinstance(old_value, UndoArray):
+                old_value = old_value.array()
             self._update_owner(owner, attribute, old_value, option, deleted_check)
 
     def redo(self):
@@ -411,6 +542,8 @@ class UndoState(UndoAction):
         """
         self._consistency_check()
         for owner, attribute, old_value, new_value, option, deleted_check in self.state:
+            if isinstance(new_value, UndoArray):
+                new_value = new_value.array()
             self._update_owner(owner, attribute, new_value, option, deleted_check)
 
     def _consistency_check(self):
@@ -450,6 +583,151 @@ class UndoState(UndoAction):
                 setattr(e, attribute, v)
 
 
+def _value_nbytes(value):
+    if isinstance(value, UndoArray):
+        return value.nbytes
+    from numpy import ndarray
+    if isinstance(value, ndarray):
+        return value.nbytes
+    return 0
+
+
+class UndoArray:
+    """Compact storage of a large numpy array saved for undo.
+
+    The array is kept LZ4 compressed.  If a reference array of the same
+    shape is given (the value after the action) and the array differs in
+    fewer than a quarter of its rows, only those rows and their indices
+    are kept.  The compressed bytes can be moved to a temporary file
+    with spill() and are read back when the array is needed.
+    """
+
+    def __init__(self, array, reference=None):
+        self.dtype = array.dtype
+        self.shape = array.shape
+        self._reference = None
+        self._rows = None		# Row indices for difference from reference
+        self._spill_file = None
+        self._spill_offset = None
+        self._spill_size = 0
+        data = array
+        if (isinstance(reference, UndoArray) and reference.shape == array.shape
+                and reference.dtype == array.dtype and array.ndim >= 1):
+            ref = reference.array()
+            diff = (array != ref)
+            if diff.ndim > 1:
+                diff = diff.reshape((len(diff), -1)).any(axis=1)
+            rows = diff.nonzero()[0]
+            if len(rows) < len(array) // 4:
+                from numpy import int32
+                self._reference = reference
+                self._rows = rows.astype(int32)
+                data = array[rows]
+        import lz4.frame
+        from numpy import ascontiguousarray
+        self._data = lz4.frame.compress(ascontiguousarray(data).tobytes())
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def nbytes(self):
+        """Bytes of memory used."""
+        n = 0 if self._data is None else len(self._data)
+        if self._rows is not None:
+            n += self._rows.nbytes
+        return n
+
+    @property
+    def disk_bytes(self):
+        return self._spill_size
+
+    def spill(self, spill_file):
+        """Move compressed data to a temporary file, return bytes freed."""
+        if self._data is None:
+            return 0
+        n = len(self._data)
+        self._spill_offset = spill_file.write(self._data, self)
+        self._spill_size = n
+        self._spill_file = spill_file
+        self._data = None
+        return n
+
+    def array(self):
+        """Return the uncompressed array."""
+        data = self._data
+        if data is None:
+            data = self._spill_file.read(self._spill_offset, self._spill_size)
+        import lz4.frame
+        from numpy import frombuffer
+        a = frombuffer(lz4.frame.decompress(data), self.dtype)
+        if self._rows is None:
+            return a.reshape(self.shape).copy()
+        full = self._reference.array()
+        full[self._rows] = a.reshape((len(self._rows),) + self.shape[1:])
+        return full
+
+
+class UndoSpillFile:
+    """Temporary file holding saved undo states to reduce memory use.
+
+    The UndoArray instances written to the file are tracked with weak
+    references, so the bytes of discarded undo actions are known and
+    compact() can copy the remaining data to a new file.
+    """
+
+    min_compact_bytes = 64*2**20
+
+    def __init__(self):
+        self._file = self._temporary_file()
+        self.size = 0
+        import weakref
+        self._arrays = weakref.WeakSet()	# UndoArrays with data in this file
+
+    def _temporary_file(self):
+        import tempfile
+        return tempfile.TemporaryFile(prefix='chimerax_undo_')
+
+    def write(self, data, array=None):
+        """Append bytes and return their offset.  If the bytes belong to an
+        UndoArray it is updated if the file is compacted."""
+        offset = self.size
+        self._file.seek(offset)
+        self._file.write(data)
+        self.size += len(data)
+        if array is not None:
+            self._arrays.add(array)
+        return offset
+
+    def read(self, offset, size):
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    @property
+    def live_bytes(self):
+        """Bytes of the file used by existing arrays."""
+        return sum(a.disk_bytes for a in self._arrays)
+
+    @property
+    def dead_bytes(self):
+        """Bytes of the file used by arrays that have been discarded."""
+        return self.size - self.live_bytes
+
+    def compact(self):
+        """Copy data of existing arrays to a new file and close the old one."""
+        arrays = sorted(self._arrays, key=lambda a: a._spill_offset)
+        old_file = self._file
+        self._file = self._temporary_file()
+        self.size = 0
+        for a in arrays:
+            old_file.seek(a._spill_offset)
+            a._spill_offset = self.write(old_file.read(a._spill_size))
+        old_file.close()
+
+    def close(self):
+        self._file.close()
+
+
 class UndoHandler(metaclass=abc.ABCMeta):
     """An instance that intercepts undo registration
     requests.  For example, multiple undo actions may
@@ -528,6 +806,17 @@ class UndoAggregateAction(UndoAction):
         super().__init__(name, can_redo=can_redo)
         self.actions = actions
 
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in self.actions)
+
+    @property
+    def disk_bytes(self):
+        return sum(a.disk_bytes for a in self.actions)
+
+    def spill(self, spill_file):
+        return sum(a.spill(spill_file) for a in self.actions)
+
     def undo(self):
         for a in reversed(self.actions):
             a.undo()
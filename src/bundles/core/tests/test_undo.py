@@ -0,0 +1,83 @@
+import numpy
+
+from chimerax.core.undo import Undo, UndoState, UndoArray, UndoSpillFile
+
+class _Owner:
+    coords = None
+
+class _Session:
+    pass
+
+def _coords(seed, n = 2**16):
+    return numpy.random.default_rng(seed).random((n, 3))
+
+def _move(undo, owner, seed):
+    old, new = owner.coords, _coords(seed)
+    owner.coords = new
+    action = UndoState("move")
+    action.add(owner, "coords", old, new)
+    undo.register(action)
+    return old, new
+
+def test_undo_array_round_trip():
+    a = _coords(1)
+    ua = UndoArray(a)
+    assert (ua.array() == a).all()
+    sf = UndoSpillFile()
+    freed = ua.spill(sf)
+    assert freed > 0 and ua.nbytes == 0 and ua.disk_bytes == freed
+    assert (ua.array() == a).all()
+    sf.close()
+
+def test_undo_array_rows_from_reference():
+    ref = _coords(1)
+    a = ref.copy()
+    a[10:20] = 0
+    ua = UndoArray(a, reference = UndoArray(ref))
+    assert ua.nbytes < UndoArray(a).nbytes
+    assert (ua.array() == a).all()
+
+def test_spilled_undo_redo():
+    session = _Session()
+    undo = Undo(session, max_depth = 10, max_bytes = 1)
+    owner = _Owner()
+    owner.coords = _coords(0)
+    history = [owner.coords]
+    for seed in range(1, 6):
+        history.append(_move(undo, owner, seed)[1])
+    assert undo.disk_used() > 0
+    for coords in reversed(history[:-1]):
+        undo.undo()
+        assert (owner.coords == coords).all()
+    for coords in history[1:]:
+        undo.redo()
+        assert (owner.coords == coords).all()
+
+def test_spill_file_compacted(monkeypatch):
+    monkeypatch.setattr(UndoSpillFile, "min_compact_bytes", 0)
+    session = _Session()
+    undo = Undo(session, max_depth = 3, max_bytes = 1)
+    owner = _Owner()
+    owner.coords = _coords(0)
+    history = [owner.coords]
+    for seed in range(1, 12):
+        history.append(_move(undo, owner, seed)[1])
+        sf = undo._spill_file
+        if sf is not None:
+            # Discarded actions leave at most as many dead bytes as live bytes.
+            assert sf.dead_bytes <= sf.live_bytes
+    assert undo._spill_file.size <= 2 * undo.disk_used()
+    for coords in reversed(history[-4:-1]):
+        undo.undo()
+        assert (owner.coords == coords).all()
+
+def test_spill_file_closed_when_unused():
+    session = _Session()
+    undo = Undo(session, max_bytes = 1)
+    owner = _Owner()
+    owner.coords = _coords(0)
+    for seed in range(1, 4):
+        _move(undo, owner, seed)
+    assert undo._spill_file is not None
+    undo.clear()
+    assert undo._spill_file is None
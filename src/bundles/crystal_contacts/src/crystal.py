@@ -38,7 +38,8 @@ def show_crystal_contacts(molecule, dist,
                           probe_radius = 1.4,
                           intra_biounit = True,
                           angle_tolerance = pi/1800,   # 0.1 degrees
-                          shift_tolerance = 0.1       # Angstroms
+                          shift_tolerance = 0.1,      # Angstroms
+                          save_file = None
                           ):
 
     from chimerax.pdb_matrices import unit_cell_parameters
@@ -50,7 +51,8 @@ def show_crystal_contacts(molecule, dist,
     clist = report_crystal_contacts(molecule, dist,
                                     residue_info, buried_areas, probe_radius,
                                     intra_biounit,
-                                    angle_tolerance, shift_tolerance)
+                                    angle_tolerance, shift_tolerance,
+                                    save_file = save_file)
 
     crystal = Crystal(molecule)
 
@@ -272,10 +274,12 @@ def report_crystal_contacts(molecule, distance,
                             probe_radius = 1.4,
                             intra_biounit = True,
                             angle_tolerance = pi/1800,   # 0.1 degrees
-                            shift_tolerance = 0.1):      # Angstroms
+                            shift_tolerance = 0.1,       # Angstroms
+                            save_file = None):
 
-    clist = asymmetric_unit_contacts(molecule, distance, intra_biounit,
-                                     angle_tolerance, shift_tolerance)
+    contacts = asymmetric_unit_contact_table(molecule, distance, intra_biounit,
+                                             angle_tolerance, shift_tolerance)
+    clist = contacts.contact_list()
     lines = []
     lines.append('%d pairs of asymmetric units of %s contact at distance %.1f A' %
                  (len(clist), molecule.name, distance))
@@ -284,14 +288,17 @@ def report_crystal_contacts(molecule, distance,
         clist.reverse()
         lines.append(asu_contacts_info(clist))
 
+        if residue_info or buried_areas:
+            rc = contacts.residue_contacts()
         if residue_info:
-            rc = residue_contacts(clist, distance)
             lines.append(residue_contacts_info(rc))
         if buried_areas:
-            if not residue_info:
-                rc = residue_contacts(clist, distance)
             lines.append(buried_areas_info(rc, probe_radius))
 
+    if save_file is not None:
+        contacts.save_csv(save_file)
+        lines.append('Saved %d atom contacts to %s' % (len(contacts), save_file))
+
     msg = '\n'.join(lines)
     molecule.session.logger.info(msg, is_html = True)
     
@@ -333,15 +340,17 @@ def residue_contacts_info(rcontacts):
     return '\n'.join(lines)
 
 # -----------------------------------------------------------------------------
+# Buried areas are computed in parallel threads since the surface area
+# calculation releases the Python global interpreter lock.
 #
-def buried_areas_info(rcontacts, probe_radius):
+def buried_areas_info(rcontacts, probe_radius, nthread = None):
 
-    areas = []
-    for r1, asu1, r2list in rcontacts:
-        a = buried_area(r1, asu1.transform,
-                        [(r2, asu2.transform) for r2, asu2, d in r2list],
-                        probe_radius)
-        areas.append((r1, asu1, a))
+    args = [residue_xyzr([(r1, asu1.transform)] + [(r2, asu2.transform) for r2, asu2, d in r2list])
+            + (r1.num_atoms, i)
+            for i, (r1, asu1, r2list) in enumerate(rcontacts)]
+    from chimerax.core.threadq import apply_to_list
+    results = sorted(apply_to_list(_buried_area, args, nthread))
+    areas = [(r1, asu1, a) for (r1, asu1, r2list), (i, a) in zip(rcontacts, results)]
 
     lines =['<pre>',
             'Residue buried areas, %d residues' % len(areas),
@@ -358,7 +367,10 @@ def buried_areas_info(rcontacts, probe_radius):
 def buried_area(r, tf, rlist, probe_radius = 1.4):
 
     xyz12, r12 = residue_xyzr([(r,tf)] + rlist)
-    na = r.num_atoms
+    return _buried_area(xyz12, r12, r.num_atoms)[1]
+
+def _buried_area(xyz12, r12, na, index = 0):
+
     xyz1, r1 = xyz12[:na], r12[:na]
 
     from chimerax.surface import spheres_surface_area
@@ -366,7 +378,7 @@ def buried_area(r, tf, rlist, probe_radius = 1.4):
     a12a = spheres_surface_area(xyz12, r12)
     bsas = (a1a[:na] - a12a[:na]).sum()
 
-    return bsas
+    return index, bsas
 
 # -----------------------------------------------------------------------------
 #
@@ -387,57 +399,116 @@ def residue_xyzr(rtflist):
     return xyz, r
 
 # -----------------------------------------------------------------------------
+# Close atom pairs between pairs of asymmetric units with unique relative
+# orientations.  The arrays give for each atom pair the index of the
+# asymmetric unit pair, the indices of the two atoms in the structure atoms
+# and their distance.
 #
-def residue_contacts(clist, distance):
+class AsymmetricUnitContacts:
 
-    rclose = {}
-    for atoms1, atoms2, equiv_asu_pairs in clist:
-        asu1, asu2 = equiv_asu_pairs[0]
-        apairs = close_atom_pairs(atoms1, asu1, atoms2, asu2, distance)
-        rpairs = close_residue_pairs(apairs)
-        for r1,r2,d in rpairs:
-            if (r1,asu1) in rclose:
-                rclose[(r1,asu1)].append((r2,asu2,d))
-            else:
-                rclose[(r1,asu1)] = [(r2,asu2,d)]
-    rc = [(r1, asu1, r2list) for (r1,asu1), r2list in rclose.items()]
-    rc.sort(key = lambda o: (o[0].chain_id, o[0].number))
-    return rc
+    def __init__(self, atoms, asu_pairs, pair_index, atom1, atom2, distance):
 
-# -----------------------------------------------------------------------------
-#
-def close_atom_pairs(atoms1, asu1, atoms2, asu2, distance):
+        self.atoms = atoms		# Atoms of the reference asymmetric unit
+        self.asu_pairs = asu_pairs	# Lists of equivalent asymmetric unit pairs
+        self.pair_index = pair_index	# Index into asu_pairs for each contact, int32
+        self.atom1 = atom1		# Atom index in first asymmetric unit, int32
+        self.atom2 = atom2		# Atom index in second asymmetric unit, int32
+        self.distance = distance	# Atom distance, float32
 
-    xyz1 = atoms1.coords
-    asu1.transform.transform_points(xyz1, in_place=True)
-    xyz2 = atoms2.coords
-    asu2.transform.transform_points(xyz2, in_place=True)
+    def __len__(self):
+        return len(self.pair_index)
 
-    close = []
-    import  numpy
-    dist = numpy.zeros((len(atoms2),), numpy.float32)
-    from chimerax.geometry import distances_from_origin
-    for i1, a1 in enumerate(atoms1):
-        distances_from_origin(xyz2, xyz1[i1,:], dist)
-        for i2, a2 in enumerate(atoms2):
-            if dist[i2] <= distance:
-                close.append((a1, a2, dist[i2]))
+    # -------------------------------------------------------------------------
+    # Return start and end of contacts for each asymmetric unit pair with
+    # contacts ordered by asymmetric unit pair.
+    #
+    def _pair_ranges(self):
 
-    return close
+        from numpy import argsort, flatnonzero, diff, concatenate
+        order = argsort(self.pair_index, kind = 'stable')
+        pi = self.pair_index[order]
+        if len(pi) == 0:
+            return order, []
+        starts = concatenate(([0], flatnonzero(diff(pi)) + 1))
+        ends = concatenate((starts[1:], [len(pi)]))
+        return order, [(int(pi[s]), s, e) for s, e in zip(starts, ends)]
 
-# -----------------------------------------------------------------------------
-#
-def close_residue_pairs(apairs):
+    # -------------------------------------------------------------------------
+    # List of (atoms1, atoms2, equiv_asu_pairs) for each contacting pair of
+    # asymmetric units.
+    #
+    def contact_list(self):
+
+        from numpy import unique
+        order, ranges = self._pair_ranges()
+        atoms = self.atoms
+        clist = []
+        for p, s, e in ranges:
+            c = order[s:e]
+            atoms1 = atoms.filter(unique(self.atom1[c]))
+            atoms2 = atoms.filter(unique(self.atom2[c]))
+            clist.append((atoms1, atoms2, self.asu_pairs[p]))
+        return clist
 
-    rdist = {}
-    for a1, a2, dist in apairs:
-        rp = (a1.residue, a2.residue)
-        if rp in rdist:
-            rdist[rp] = min(rdist[rp], dist)
-        else:
-            rdist[rp] = dist
-    rpairs = [(rp[0], rp[1], d) for rp, d in rdist.items()]
-    return rpairs
+    # -------------------------------------------------------------------------
+    # List of (residue1, asu1, [(residue2, asu2, distance), ...]) giving the
+    # closest atom distance for each contacting residue pair, sorted by chain
+    # and residue number.
+    #
+    def residue_contacts(self):
+
+        atoms = self.atoms
+        residues = atoms.unique_residues
+        ri = residues.indices(atoms.residues)
+        nr = len(residues)
+        from numpy import lexsort, unique, int64
+        order, ranges = self._pair_ranges()
+        rclose = {}
+        for p, s, e in ranges:
+            asu1, asu2 = self.asu_pairs[p][0]
+            c = order[s:e]
+            rkey = ri[self.atom1[c]].astype(int64) * nr + ri[self.atom2[c]]
+            d = self.distance[c]
+            # Minimum distance for each residue pair.
+            o = lexsort((d, rkey))
+            keys, first = unique(rkey[o], return_index = True)
+            dmin = d[o][first]
+            for k, dist in zip(keys.tolist(), dmin.tolist()):
+                r1, r2 = residues[k // nr], residues[k % nr]
+                rkey1 = (r1, asu1)
+                if rkey1 in rclose:
+                    rclose[rkey1].append((r2,asu2,dist))
+                else:
+                    rclose[rkey1] = [(r2,asu2,dist)]
+        rc = [(r1, asu1, r2list) for (r1,asu1), r2list in rclose.items()]
+        rc.sort(key = lambda o: (o[0].chain_id, o[0].number))
+        return rc
+
+    # -------------------------------------------------------------------------
+    # Write a comma separated value file with one line per close atom pair
+    # for analysis of many structures.
+    #
+    def save_csv(self, path):
+
+        atoms = self.atoms
+        res = atoms.residues
+        chains, rnames, rnums, anames = res.chain_ids, res.names, res.numbers, atoms.names
+        order, ranges = self._pair_ranges()
+        with open(path, 'w') as f:
+            f.write('ncs1,ncs2,smtry2,cell_i,cell_j,cell_k,copies,'
+                    'chain1,residue1,number1,atom1,chain2,residue2,number2,atom2,distance\n')
+            for p, s, e in ranges:
+                equiv_asu_pairs = self.asu_pairs[p]
+                asu1, asu2 = equiv_asu_pairs[0]
+                asu_fields = '%d,%d,%d,%d,%d,%d,%d' % ((asu1.ncs_index, asu2.ncs_index, asu2.smtry_index)
+                                                       + tuple(asu2.unit_cell_index)
+                                                       + (len(equiv_asu_pairs),))
+                c = order[s:e]
+                for i1, i2, d in zip(self.atom1[c].tolist(), self.atom2[c].tolist(),
+                                     self.distance[c].tolist()):
+                    f.write('%s,%s,%s,%d,%s,%s,%s,%d,%s,%.3f\n'
+                            % (asu_fields, chains[i1], rnames[i1], rnums[i1], anames[i1],
+                               chains[i2], rnames[i2], rnums[i2], anames[i2], d))
 
 # -----------------------------------------------------------------------------
 # Angle and shift tolerance values are used to eliminate equivalent pairs
@@ -447,30 +518,100 @@ def close_residue_pairs(apairs):
 def asymmetric_unit_contacts(molecule, distance, intra_biounit,
                              angle_tolerance, shift_tolerance):
 
+    return asymmetric_unit_contact_table(molecule, distance, intra_biounit,
+                                         angle_tolerance, shift_tolerance).contact_list()
+
+# -----------------------------------------------------------------------------
+# Find close atom pairs for all asymmetric unit pairs with unique relative
+# orientation.  Distances between atoms of two asymmetric units are the same
+# as between the reference asymmetric unit and a copy placed by their relative
+# transform, so all copies are searched using one spatial index of the
+# reference atoms.
+#
+def asymmetric_unit_contact_table(molecule, distance, intra_biounit,
+                                  angle_tolerance, shift_tolerance):
+
     plist = nearby_asymmetric_units(molecule, distance)
     if not intra_biounit:
         plist = interbiounit_asu_pairs(molecule, plist,
                                        angle_tolerance, shift_tolerance)
     uplist = unique_asymmetric_unit_pairs(plist, angle_tolerance,
                                           shift_tolerance)
-    
-    alist = molecule.atoms
-    from numpy import float32
-    xyz = alist.coords.astype(float32)
 
-    catoms = []
+    alist = molecule.atoms
+    xyz = alist.coords
+    rel_tfs = []
     for equiv_asu_pairs in uplist:
         asu1, asu2 = equiv_asu_pairs[0]
-        t1 = asu1.transform.matrix
-        t2 = asu2.transform.matrix
-        from chimerax.geometry import find_close_points_sets
-        i1, i2 = find_close_points_sets([(xyz, t1)], [(xyz, t2)], distance)
-        if len(i1[0]) > 0:
-            atoms1 = alist.filter(i1[0])
-            atoms2 = alist.filter(i2[0])
-            catoms.append((atoms1, atoms2, equiv_asu_pairs))
-
-    return catoms
+        rel_tfs.append(asu1.transform.inverse() * asu2.transform)
+    pi, i1, i2, d = close_points_transformed(xyz, rel_tfs, distance)
+
+    return AsymmetricUnitContacts(alist, uplist, pi, i1, i2, d)
+
+# -----------------------------------------------------------------------------
+# Find all pairs of points within distance between points xyz and copies of
+# xyz placed by each transform.  The points xyz are binned in a grid with
+# cell size equal to the distance and transformed points are looked up in the
+# 27 cells around them.  Transformed points are processed for many transforms
+# at once in groups of about chunk_size points.  Returns arrays of transform
+# index, untransformed point index, transformed point index and distance.
+#
+def close_points_transformed(xyz, transforms, distance, chunk_size = 2**21):
+
+    from numpy import (float64, float32, int32, int64, floor, argsort, unique, array,
+                       searchsorted, repeat, cumsum, arange, concatenate, empty, sqrt)
+    xyz = xyz.astype(float64)
+    n = len(xyz)
+    if n == 0 or len(transforms) == 0:
+        return empty((0,), int32), empty((0,), int32), empty((0,), int32), empty((0,), float32)
+
+    # Grid cells of reference points, padded by one cell on each side.
+    xyz_min, xyz_max = xyz.min(axis = 0) - distance, xyz.max(axis = 0) + distance
+    gsize = (floor((xyz_max - xyz_min) / distance).astype(int64) + 3).tolist()
+    def cell_keys(cells):
+        return (cells[:,0] * gsize[1] + cells[:,1]) * gsize[2] + cells[:,2]
+    ref_keys = cell_keys(floor((xyz - xyz_min) / distance).astype(int64) + 1)
+    order = argsort(ref_keys, kind = 'stable')
+    keys, kstart, kcount = unique(ref_keys[order], return_index = True, return_counts = True)
+    offsets = array([(i,j,k) for i in (-1,0,1) for j in (-1,0,1) for k in (-1,0,1)], int64)
+
+    tf_index, index1, index2, dist = [], [], [], []
+    step = max(1, chunk_size // n)
+    for t0 in range(0, len(transforms), step):
+        m = array([tf.matrix for tf in transforms[t0:t0+step]], float64)
+        txyz = (xyz[None,:,:] @ m[:,:,:3].transpose((0,2,1)) + m[:,None,:,3]).reshape((-1,3))
+
+        # Only points in the padded reference box can be close.
+        q = ((txyz >= xyz_min) & (txyz <= xyz_max)).all(axis = 1).nonzero()[0]
+        qxyz = txyz[q]
+        qcells = floor((qxyz - xyz_min) / distance).astype(int64) + 1
+        for offset in offsets:
+            qkeys = cell_keys(qcells + offset)
+            k = searchsorted(keys, qkeys)
+            k[k == len(keys)] = 0
+            found = (keys[k] == qkeys).nonzero()[0]
+            if len(found) == 0:
+                continue
+            counts = kcount[k[found]]
+            total = int(counts.sum())
+            # Expand to all pairs of transformed point and reference point in cell.
+            qi = repeat(found, counts)
+            within = arange(total) - repeat(cumsum(counts) - counts, counts)
+            ri = order[repeat(kstart[k[found]], counts) + within]
+            dxyz = qxyz[qi] - xyz[ri]
+            d = sqrt((dxyz*dxyz).sum(axis = 1))
+            close = (d <= distance).nonzero()[0]
+            if len(close) == 0:
+                continue
+            tq = q[qi[close]]
+            tf_index.append((tq // n + t0).astype(int32))
+            index1.append(ri[close].astype(int32))
+            index2.append((tq % n).astype(int32))
+            dist.append(d[close].astype(float32))
+
+    if len(dist) == 0:
+        return empty((0,), int32), empty((0,), int32), empty((0,), int32), empty((0,), float32)
+    return concatenate(tf_index), concatenate(index1), concatenate(index2), concatenate(dist)
 
 # -----------------------------------------------------------------------------
 # Find nearby asymmetric units in a crystal by looking for overlapping bounding
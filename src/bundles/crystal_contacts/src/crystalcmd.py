@@ -28,7 +28,8 @@
 def crystalcontacts(session, structures = None, distance = 3.0,
                     residue_info = False, buried_areas = False, probe_radius = 1.4,
                     intra_biounit = True,
-                    copies = True, rainbow = True, schematic = False):
+                    copies = True, rainbow = True, schematic = False,
+                    save_file = None):
     '''
     Make contacting copies of an atomic model of a crystal asymmetric unit.
 
@@ -56,6 +57,10 @@ def crystalcontacts(session, structures = None, distance = 3.0,
         copies are colored the same as the original.  Default true.
     schematic : bool
         Whether a schematic of the contacting units shown as balls is shown.  Default false.
+    save_file : string
+        Write a comma separated value file with one line for each close atom pair
+        giving the asymmetric units, residues, atoms and distance.  If more than one
+        structure is specified the model id is added to the file name.
     '''
 
     if structures is None:
@@ -67,6 +72,7 @@ def crystalcontacts(session, structures = None, distance = 3.0,
 
     from .crystal import show_crystal_contacts
     for m in structures:
+        path = save_file if save_file is None or len(structures) == 1 else _numbered_path(save_file, m)
         show_crystal_contacts(m, distance,
                               make_copies = copies,
                               rainbow = rainbow,
@@ -74,7 +80,8 @@ def crystalcontacts(session, structures = None, distance = 3.0,
                               residue_info = residue_info,
                               buried_areas = buried_areas,
                               probe_radius = probe_radius,
-                              intra_biounit = intra_biounit)
+                              intra_biounit = intra_biounit,
+                              save_file = path)
     
 # -----------------------------------------------------------------------------------
 #
@@ -91,6 +98,13 @@ def crystalcontacts_delete(session, structures = None):
         if sm:
             session.models.close([sm])
 
+# -----------------------------------------------------------------------------------
+#
+def _numbered_path(path, m):
+    from os.path import splitext
+    base, suffix = splitext(path)
+    return '%s_%s%s' % (base, m.id_string.replace('.','_'), suffix)
+
 # -----------------------------------------------------------------------------------
 #
 def _all_structures(session):
@@ -104,7 +118,7 @@ def _all_structures(session):
 def register_crystalcontacts_command(logger):
 
     from chimerax.core.commands import CmdDesc, register
-    from chimerax.core.commands import FloatArg, BoolArg
+    from chimerax.core.commands import FloatArg, BoolArg, SaveFileNameArg
     from chimerax.atomic import AtomicStructuresArg
 
     desc = CmdDesc(
@@ -116,7 +130,8 @@ def register_crystalcontacts_command(logger):
                    ('intra_biounit', BoolArg),
                    ('copies', BoolArg),
                    ('rainbow', BoolArg),
-                   ('schematic', BoolArg)],
+                   ('schematic', BoolArg),
+                   ('save_file', SaveFileNameArg)],
         synopsis = 'Find contacting copies of crystal asymmetric unit'
     )
     register('crystalcontacts', desc, crystalcontacts, logger=logger)
@@ -37,6 +37,9 @@ class _FoldseekBundle(BundleAPI):
         if command_name == 'foldseek':
             from . import foldseek
             foldseek.register_foldseek_command(logger)
+        elif command_name == 'foldseek index':
+            from . import local_search
+            local_search.register_foldseek_index_command(logger)
         elif command_name == 'foldseek sequences':
             from . import sequences
             sequences.register_foldseek_sequences_command(logger)
@@ -23,17 +23,28 @@
 # === UCSF ChimeraX Copyright ===
 
 def foldseek(session, chain, database = 'pdb100', trim = None, alignment_cutoff_distance = None,
-             save_directory = None, wait = False):
-    '''Submit a Foldseek search for similar structures and display results in a table.'''
+             save_directory = None, wait = False, library = None, prefilter_hits = 300):
+    '''
+    Submit a Foldseek search for similar structures and display results in a table.
+    If library is a directory indexed with "foldseek index" it is searched locally
+    instead of using the Foldseek web service.
+    '''
+    if save_directory is None:
+        from os.path import expanduser
+        save_directory = expanduser(f'~/Downloads/ChimeraX/Foldseek/{chain.structure.name}_{chain.chain_id}')
+
+    if library is not None:
+        from .local_search import foldseek_local
+        foldseek_local(session, chain, library, trim = trim,
+                       alignment_cutoff_distance = alignment_cutoff_distance,
+                       save_directory = save_directory, prefilter_hits = prefilter_hits)
+        return
+
     global _query_in_progress
     if _query_in_progress:
         from chimerax.core.errors import UserError
         raise UserError('Foldseek search in progress.  Cannot run another search until current one completes.')
 
-    if save_directory is None:
-        from os.path import expanduser
-        save_directory = expanduser(f'~/Downloads/ChimeraX/Foldseek/{chain.structure.name}_{chain.chain_id}')
-
     FoldseekWebQuery(session, chain, database=database,
                      trim=trim, alignment_cutoff_distance=alignment_cutoff_distance,
                      save_directory = save_directory, wait=wait)
@@ -316,6 +327,9 @@ def parse_search_result(line, database):
         values.update(parse_pdb100_theader(values['theader']))
     if database.startswith('afdb'):
         values.update(parse_alphafold_theader(values['theader']))
+    if database == 'local':
+        from .local_search import parse_local_theader
+        values.update(parse_local_theader(values['theader']))
     return values
 
 def parse_pdb100_theader(theader):
@@ -389,9 +403,14 @@ def open_hit(session, hit, query_chain, trim = True, alignment_cutoff_distance =
         return
 
     db_id = hit.get('database_id')
-    from_db = 'from alphafold' if hit['database'].startswith('afdb') else ''
+    if hit['database'] == 'local':
+        from chimerax.core.commands import quote_path_if_necessary
+        open_cmd = f'open {quote_path_if_necessary(hit["path"])}'
+    else:
+        from_db = 'from alphafold' if hit['database'].startswith('afdb') else ''
+        open_cmd = f'open {db_id} {from_db}'
     from chimerax.core.commands import run
-    structures = run(session, f'open {db_id} {from_db}')
+    structures = run(session, open_cmd)
     # Can get multiple structures such as NMR ensembles from PDB.
     stats = []
     for structure in structures:
@@ -745,7 +764,7 @@ def _guess_query_chain(session, results_path):
     return None, []
 
 def _guess_database(path, hit_lines):
-    for database in foldseek_databases:
+    for database in foldseek_databases + ['local']:
         if path.endswith(database + '.m8'):
             return database
 
@@ -781,7 +800,8 @@ def show_foldseek_hits(session, hit_lines, database, query_chain = None,
     return fp
     
 def register_foldseek_command(logger):
-    from chimerax.core.commands import CmdDesc, register, EnumOf, BoolArg, Or, ListOf, FloatArg, SaveFolderNameArg
+    from chimerax.core.commands import CmdDesc, register, EnumOf, BoolArg, Or, ListOf, FloatArg, PositiveIntArg
+    from chimerax.core.commands import SaveFolderNameArg, OpenFolderNameArg
     from chimerax.atomic import ChainArg
     desc = CmdDesc(
         required = [('chain', ChainArg)],
@@ -790,6 +810,8 @@ def register_foldseek_command(logger):
                    ('alignment_cutoff_distance', FloatArg),
                    ('save_directory', SaveFolderNameArg),
                    ('wait', BoolArg),
+                   ('library', OpenFolderNameArg),
+                   ('prefilter_hits', PositiveIntArg),
                    ],
         synopsis = 'Search for proteins with similar folds using Foldseek web service'
     )
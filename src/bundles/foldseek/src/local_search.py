@@ -0,0 +1,492 @@
+# vim: set expandtab ts=4 sw=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Search a local collection of protein structure files for structures with a
+# fold similar to a query chain without using the Foldseek web service.
+#
+# An index of the structure files is made once.  It holds a fingerprint vector
+# for each protein chain computed from C-alpha geometry, and the C-alpha
+# coordinates and sequence of each chain.  The fingerprints and coordinates are
+# numpy arrays saved in .npy files that are memory mapped when searching.
+#
+# A search compares the query fingerprint to all library fingerprints, then
+# structurally aligns only the best scoring chains to the query.  Hits are
+# reported as Foldseek m8 format lines so they are shown in the same results
+# table as Foldseek web service hits.
+#
+index_directory_name = 'foldseek_index'
+structure_suffixes = ('.cif', '.mmcif', '.pdb', '.ent')
+
+def foldseek_index(session, directory, min_residues = 20):
+    '''Make or update a fingerprint index of the protein chains in a directory of structure files.'''
+    index = LocalStructureIndex(directory, create = True)
+    nnew, nchains = index.update(session, min_residues = min_residues)
+    session.logger.status(f'Foldseek index of {directory} has {nchains} protein chains, '
+                          f'read {nnew} new or changed files', log = True)
+
+def foldseek_local(session, chain, library, trim = None, alignment_cutoff_distance = None,
+                   save_directory = None, prefilter_hits = 300):
+    '''Search a local structure collection indexed with "foldseek index" and show the hits.'''
+    if prefilter_hits < 1:
+        from chimerax.core.errors import UserError
+        raise UserError(f'Foldseek prefilterHits must be at least 1, got {prefilter_hits}')
+    index = LocalStructureIndex(library)
+    session.logger.status(f'Searching {index.num_chains} chains in {library} for structures similar to {chain}')
+    cutoff = 2.0 if alignment_cutoff_distance is None else alignment_cutoff_distance
+    hit_lines = local_search(chain, index, prefilter_hits = prefilter_hits,
+                             alignment_cutoff_distance = cutoff)
+
+    if save_directory is not None:
+        from os import path, makedirs
+        if not path.exists(save_directory):
+            makedirs(save_directory)
+        with open(path.join(save_directory, 'local.m8'), 'w') as f:
+            f.write(''.join(hit_lines))
+        spath = getattr(chain.structure, 'filename', None)
+        if spath:
+            with open(path.join(save_directory, 'query'), 'w') as f:
+                f.write(f'{spath}\t{chain.chain_id}')
+
+    from .foldseek import show_foldseek_hits
+    show_foldseek_hits(session, hit_lines, 'local', chain,
+                       trim = trim, alignment_cutoff_distance = alignment_cutoff_distance)
+
+# -----------------------------------------------------------------------------
+#
+class LocalStructureIndex:
+    '''
+    Fingerprints, C-alpha coordinates and sequences of protein chains from
+    structure files in a directory.  The index files are written in a
+    subdirectory of the structure directory.
+    '''
+    version = 1
+
+    def __init__(self, directory, create = False):
+        from os.path import join, isdir, exists
+        if not isdir(directory):
+            from chimerax.core.errors import UserError
+            raise UserError(f'Foldseek library directory {directory} does not exist')
+        self.directory = directory
+        self.index_directory = idir = join(directory, index_directory_name)
+        self._entries_path = join(idir, 'entries.json')
+        self._fingerprints_path = join(idir, 'fingerprints.npy')
+        self._coords_path = join(idir, 'ca_coords.npy')
+
+        self.entries = []		# Dictionary for each chain with keys path, mtime, chain_id, name, sequence, start
+        self.fingerprints = None	# N x D float16, memory mapped
+        self.ca_coords = None		# M x 3 float32 for all chains, memory mapped
+        if exists(self._entries_path):
+            self._read()
+        elif not create:
+            from chimerax.core.errors import UserError
+            raise UserError(f'No Foldseek index in {directory}.  Use the command "foldseek index" to make one.')
+
+    @property
+    def num_chains(self):
+        return len(self.entries)
+
+    def _read(self):
+        import json
+        with open(self._entries_path, 'r') as f:
+            info = json.load(f)
+        if info.get('version') != self.version:
+            self.entries = []
+            return
+        self.entries = info['entries']
+        from numpy import load
+        self.fingerprints = load(self._fingerprints_path, mmap_mode = 'r')
+        self.ca_coords = load(self._coords_path, mmap_mode = 'r')
+
+    def chain_coords(self, i):
+        e = self.entries[i]
+        s = e['start']
+        return self.ca_coords[s:s+len(e['sequence'])]
+
+    # -------------------------------------------------------------------------
+    #
+    def update(self, session, min_residues = 20):
+        '''
+        Index new or changed structure files and drop deleted files.
+        Returns the number of files read and the number of indexed chains.
+        '''
+        from os import walk, path, makedirs
+        files = {}
+        for dirpath, dirnames, filenames in walk(self.directory):
+            dirnames[:] = [d for d in dirnames if d != index_directory_name]
+            for filename in filenames:
+                name = filename[:-3] if filename.endswith('.gz') else filename
+                if name.lower().endswith(structure_suffixes):
+                    p = path.join(dirpath, filename)
+                    files[path.relpath(p, self.directory)] = path.getmtime(p)
+
+        # Reuse chains of unchanged files.
+        keep = [i for i, e in enumerate(self.entries) if files.get(e['path']) == e['mtime']]
+        kept_paths = set(self.entries[i]['path'] for i in keep)
+        new_paths = sorted(p for p in files.keys() if p not in kept_paths)
+
+        entries, fingerprints, coords = [], [], []
+        for i in keep:
+            e = dict(self.entries[i])
+            fingerprints.append(self.fingerprints[i].astype('float32'))
+            coords.append(self.chain_coords(i))
+            entries.append(e)
+
+        log = session.logger
+        for fi, rpath in enumerate(new_paths):
+            if fi % 100 == 0:
+                log.status(f'Indexing structure file {fi+1} of {len(new_paths)}, {rpath}')
+            for chain_id, name, seq, xyz in _structure_file_chains(session, path.join(self.directory, rpath),
+                                                                   min_residues):
+                entries.append({'path': rpath, 'mtime': files[rpath], 'chain_id': chain_id,
+                                'name': name, 'sequence': seq})
+                fingerprints.append(structure_fingerprint(xyz))
+                coords.append(xyz)
+
+        from numpy import array, concatenate, float16, float32, empty, save
+        start = 0
+        for e, xyz in zip(entries, coords):
+            e['start'] = start
+            start += len(xyz)
+
+        # Release memory maps before overwriting files.
+        self.fingerprints = self.ca_coords = None
+        if not path.exists(self.index_directory):
+            makedirs(self.index_directory)
+        fp = array(fingerprints, float16) if fingerprints else empty((0, fingerprint_size()), float16)
+        save(self._fingerprints_path, fp)
+        save(self._coords_path, concatenate(coords).astype(float32) if coords else empty((0,3), float32))
+        import json
+        with open(self._entries_path, 'w') as f:
+            json.dump({'version': self.version, 'entries': entries}, f)
+        self._read()
+
+        return len(new_paths), len(entries)
+
+    # -------------------------------------------------------------------------
+    #
+    def fingerprint_scores(self, fingerprint, chunk_size = 65536):
+        '''Cosine similarity of fingerprint to all library fingerprints.'''
+        from numpy import empty, float32
+        fps = self.fingerprints
+        scores = empty((len(fps),), float32)
+        q = fingerprint.astype(float32)
+        for c in range(0, len(fps), chunk_size):
+            scores[c:c+chunk_size] = fps[c:c+chunk_size].astype(float32) @ q
+        return scores
+
+# -----------------------------------------------------------------------------
+# Protein chains in a structure file as (chain id, structure name, sequence,
+# C-alpha coordinates).  Only residues with C-alpha atoms are used.
+#
+def _structure_file_chains(session, path, min_residues):
+    try:
+        models, status = session.open_command.open_data(path)
+    except Exception as e:
+        session.logger.warning(f'Could not read structure file {path}: {e}')
+        return []
+    from chimerax.atomic import Structure, Residue
+    chains = []
+    seen = set()
+    for m in models:
+        if not isinstance(m, Structure):
+            continue
+        for c in m.chains:
+            if c.polymer_type != Residue.PT_AMINO or c.chain_id in seen:
+                continue
+            seen.add(c.chain_id)	# Use first model of ensembles.
+            seq, xyz = chain_ca(c)
+            if len(seq) >= min_residues and len(seq) == len(c.existing_residues):
+                chains.append((c.chain_id, m.name, seq, xyz))
+    for m in models:
+        m.delete()
+    return chains
+
+def chain_ca(chain):
+    '''
+    Sequence and C-alpha coordinates of chain residues with coordinates.  Residues
+    without a C-alpha atom are dropped so that the sequence matches the coordinates.
+    Library chains with such residues are not indexed since Foldseek hit residue
+    numbering counts all residues with coordinates.
+    '''
+    res = chain.existing_residues
+    ca = res.existing_principal_atoms
+    if len(ca) < len(res):
+        res = ca.residues
+    seq = ''.join(r.one_letter_code for r in res)
+    return seq, ca.coords
+
+# -----------------------------------------------------------------------------
+# Residue descriptors are C-alpha distances to residues 2, 3 and 4 positions
+# before and after, and the number of C-alpha atoms within 10 Angstroms.
+# They characterize local backbone conformation and burial, are independent
+# of orientation, and are used to score structural alignment of residues.
+#
+def residue_descriptors(xyz, neighbor_distance = 10.0, block_size = 512):
+    from numpy import zeros, float32, sqrt
+    n = len(xyz)
+    d = zeros((n,7), float32)
+    for c, k in enumerate((2,3,4)):
+        if n > k:
+            dk = sqrt(((xyz[k:] - xyz[:-k])**2).sum(axis = 1))
+            d[k:,2*c] = dk
+            d[:-k,2*c+1] = dk
+        # Chain ends use the distance in the other direction.
+        back, forward = d[:,2*c], d[:,2*c+1]
+        back[back == 0] = forward[back == 0]
+        forward[forward == 0] = back[forward == 0]
+    d2max = neighbor_distance * neighbor_distance
+    for b in range(0, n, block_size):
+        dxyz = xyz[b:b+block_size,None,:] - xyz[None,:,:]
+        d[b:b+block_size,6] = ((dxyz*dxyz).sum(axis = 2) <= d2max).sum(axis = 1) - 1
+    return d
+
+# Local conformation state from C-alpha i to i+3 and i+4 distances.  Helices have
+# short distances, strands long, and loops and turns are in between.
+_d3_bins = (6.0, 8.0, 9.5)
+_d4_bins = (7.0, 10.0, 12.5)
+_separation_bins = (6, 12, 24)		# Sequence separation 3-5, 6-11, 12-23, 24 or more
+_distance_bins = (5.0, 6.5, 8.0, 10.0, 12.0)
+_contact_distance = 8.0
+_min_separation = 3
+
+def fingerprint_size():
+    ns = (len(_d3_bins)+1) * (len(_d4_bins)+1)
+    return ns + (len(_separation_bins)+1)*len(_distance_bins) + ns*ns
+
+def _local_states(descrip):
+    from numpy import digitize
+    d3, d4 = descrip[:,3], descrip[:,5]
+    return digitize(d3, _d3_bins) * (len(_d4_bins)+1) + digitize(d4, _d4_bins)
+
+# -----------------------------------------------------------------------------
+# Fingerprint of a chain fold made from the counts of local conformation
+# states, counts of C-alpha pairs binned by sequence separation and distance,
+# and counts of pairs of local states in contact.  The vector is normalized
+# to length 1 so fingerprints are compared with a dot product.
+#
+def structure_fingerprint(xyz, block_size = 512):
+    from numpy import zeros, float64, arange, digitize, bincount, sqrt, int64
+    n = len(xyz)
+    states = _local_states(residue_descriptors(xyz))
+    ns = (len(_d3_bins)+1) * (len(_d4_bins)+1)
+    nsep, ndist = len(_separation_bins)+1, len(_distance_bins)
+    state_counts = bincount(states, minlength = ns).astype(float64)
+    pair_counts = zeros((nsep*ndist,), float64)
+    contact_counts = zeros((ns*ns,), float64)
+    dmax = _distance_bins[-1]
+    for b in range(0, n, block_size):
+        i = arange(b, min(n, b+block_size))
+        dxyz = xyz[i,None,:] - xyz[None,:,:]
+        d = sqrt((dxyz*dxyz).sum(axis = 2))
+        sep = arange(n)[None,:] - i[:,None]
+        close = (sep >= _min_separation) & (d < dmax)
+        ci, cj = close.nonzero()
+        cd = d[ci, cj]
+        db = digitize(cd, _distance_bins[:-1])
+        sb = digitize(sep[ci, cj], _separation_bins)
+        pair_counts += bincount(sb*ndist + db, minlength = nsep*ndist)
+        contact = (cd <= _contact_distance) & (sep[ci, cj] >= _separation_bins[0])
+        s1, s2 = states[i[ci[contact]]].astype(int64), states[cj[contact]]
+        contact_counts += bincount(s1*ns + s2, minlength = ns*ns)
+        contact_counts += bincount(s2*ns + s1, minlength = ns*ns)
+    from numpy import concatenate
+    fp = concatenate((state_counts, pair_counts, contact_counts)) / max(1, n)
+    norm = sqrt((fp*fp).sum())
+    if norm > 0:
+        fp /= norm
+    return fp.astype('float32')
+
+# -----------------------------------------------------------------------------
+#
+def local_search(chain, index, prefilter_hits = 300, alignment_cutoff_distance = 2.0):
+    '''
+    Compare the chain fingerprint to all library fingerprints, structurally
+    align the best prefilter_hits chains to the query and return hits as
+    Foldseek m8 format lines ordered by decreasing TM-score.
+    '''
+    qseq, qxyz = chain_ca(chain)
+    if len(qseq) < 3 or index.num_chains == 0:
+        return []
+    scores = index.fingerprint_scores(structure_fingerprint(qxyz))
+
+    # Estimate E-values from the distribution of fingerprint scores.
+    from numpy import argpartition
+    from math import erfc, sqrt
+    mean, sd = float(scores.mean()), float(scores.std())
+    n = len(scores)
+    top = argpartition(-scores, prefilter_hits-1)[:prefilter_hits] if n > prefilter_hits else range(n)
+    top = sorted(top, key = lambda i: -scores[i])
+
+    qname = chain.string(include_structure = True)
+    qdescrip = residue_descriptors(qxyz)
+    hits = []
+    for i in top:
+        e = index.entries[i]
+        txyz = index.chain_coords(i).astype('float32')
+        tseq = e['sequence']
+        a = structure_alignment(qseq, qxyz, qdescrip, tseq, txyz,
+                                cutoff_distance = alignment_cutoff_distance)
+        if a is None:
+            continue
+        z = (float(scores[i]) - mean) / sd if sd > 0 else 0
+        evalue = n * 0.5 * erfc(z / sqrt(2))
+        hits.append((a['tm_score'], _m8_line(qname, qseq, tseq, txyz, e, index, a, evalue)))
+
+    hits.sort(key = lambda h: -h[0])
+    return [line for tm, line in hits]
+
+# -----------------------------------------------------------------------------
+# Align target residues to query residues by dynamic programming first using
+# residue descriptor similarity, then again using distances after superposition
+# as in TM-align.  Returns a dictionary with aligned residue index pairs, the
+# superposition and TM-score, or None if too few residues align.
+#
+def structure_alignment(qseq, qxyz, qdescrip, tseq, txyz, cutoff_distance = 2.0):
+    from numpy import abs, float64, array
+    tdescrip = residue_descriptors(txyz)
+    # Descriptor differences scaled so typical distances differ by about 1 Angstrom.
+    scale = array((1,1,1,1,1,1,0.25))
+    cost = 0
+    for c in range(7):
+        cost = cost + abs(qdescrip[:,c,None] - tdescrip[None,:,c]) * scale[c]
+    score = 1.0 - cost / 3.0
+    score[score < -1] = -1
+    qa = array(list(qseq))[:,None]
+    ta = array(list(tseq))[None,:]
+    score += 0.5 * (qa == ta)
+    pairs = _dp_pairs(qseq, tseq, score.astype(float64), gap_open = -1.5, gap = -0.2)
+    if len(pairs) < 3:
+        return None
+
+    from chimerax.std_commands.align import IterationError
+    from .foldseek import align_xyz_transform
+    try:
+        p, rms, npairs = align_xyz_transform(txyz[pairs[:,1]], qxyz[pairs[:,0]],
+                                             cutoff_distance = cutoff_distance)
+        # Realign using distances after superposition.
+        d0 = _tm_d0(len(qseq))
+        mxyz = p.transform_points(txyz)
+        dxyz = qxyz[:,None,:] - mxyz[None,:,:]
+        d2 = (dxyz*dxyz).sum(axis = 2)
+        tm = 1.0 / (1.0 + d2 / (d0*d0))
+        pairs = _dp_pairs(qseq, tseq, tm.astype(float64), gap_open = -0.6, gap = 0)
+        if len(pairs) < 3:
+            return None
+        p, rms, npairs = align_xyz_transform(txyz[pairs[:,1]], qxyz[pairs[:,0]],
+                                             cutoff_distance = cutoff_distance)
+    except IterationError:
+        return None
+
+    dxyz = p.transform_points(txyz[pairs[:,1]]) - qxyz[pairs[:,0]]
+    d2 = (dxyz*dxyz).sum(axis = 1)
+    tm_score = float((1.0 / (1.0 + d2 / (d0*d0))).sum()) / len(qseq)
+    return {'pairs': pairs, 'position': p, 'rmsd': rms, 'npairs': npairs, 'tm_score': tm_score}
+
+def _tm_d0(n):
+    return max(0.5, 1.24 * (max(n, 19) - 15) ** (1/3) - 1.8)
+
+def _dp_pairs(qseq, tseq, score, gap_open, gap):
+    '''Aligned (query, target) residue index pairs from Needleman-Wunsch with a score array.'''
+    from chimerax.atomic import Sequence
+    from chimerax.alignment_algs.NeedlemanWunsch import nw
+    s, matches = nw(Sequence(characters = qseq), Sequence(characters = tseq),
+                    score_matrix = score, score_gap_open = gap_open, score_gap = gap)
+    from numpy import array, int32
+    pairs = array(sorted(matches), int32).reshape((-1,2))
+    if len(pairs) > 0:
+        # Drop pairs with negative score at the alignment ends.
+        good = (score[pairs[:,0], pairs[:,1]] > 0).nonzero()[0]
+        if len(good) == 0:
+            return pairs[:0]
+        pairs = pairs[good[0]:good[-1]+1]
+    return pairs
+
+# -----------------------------------------------------------------------------
+# Foldseek m8 format line for a hit.  The TM-score is reported in the
+# probability column and the target header gives the structure file path and
+# chain id.
+#
+def _m8_line(qname, qseq, tseq, txyz, entry, index, alignment, evalue):
+    pairs = alignment['pairs']
+    qi, ti = pairs[:,0].tolist(), pairs[:,1].tolist()
+    qaln, taln = [], []
+    mismatch = gapopen = 0
+    for k in range(len(qi)):
+        if k > 0:
+            qgap, tgap = qi[k] - qi[k-1] - 1, ti[k] - ti[k-1] - 1
+            if qgap > 0:
+                qaln.append(qseq[qi[k-1]+1:qi[k]])
+                taln.append('-' * qgap)
+                gapopen += 1
+            if tgap > 0:
+                qaln.append('-' * tgap)
+                taln.append(tseq[ti[k-1]+1:ti[k]])
+                gapopen += 1
+        qaln.append(qseq[qi[k]])
+        taln.append(tseq[ti[k]])
+        if qseq[qi[k]] != tseq[ti[k]]:
+            mismatch += 1
+    qaln, taln = ''.join(qaln), ''.join(taln)
+    npairs = len(qi)
+    pident = 100 * (npairs - mismatch) / npairs
+
+    from os.path import join
+    from urllib.parse import quote
+    path = join(index.directory, entry['path'])
+    theader = f'{quote(path)}_{entry["chain_id"]} {entry["name"]}'
+    tca = ','.join('%.3f' % x for x in txyz.ravel())
+    fields = [qname, theader, '%.1f' % pident, str(len(qaln)), str(mismatch), str(gapopen),
+              str(qi[0]+1), str(qi[-1]+1), str(ti[0]+1), str(ti[-1]+1),
+              '%.3f' % alignment['tm_score'], '%.3g' % evalue, '%.1f' % (100*alignment['tm_score']),
+              str(len(qseq)), str(len(tseq)), qaln, taln, tca, tseq, '', '']
+    return '\t'.join(fields) + '\n'
+
+def parse_local_theader(theader):
+    '''Example: "/data/models/model_12.cif_A model_12.cif"'''
+    name, description = (theader.split(' ', maxsplit = 1) + [''])[:2]
+    qpath, chain_id = name.rsplit('_', maxsplit = 1)
+    from urllib.parse import unquote
+    path = unquote(qpath)
+    from os.path import basename
+    file_id = basename(path).split('.')[0]
+    values = {
+        'path': path,
+        'chain_id': chain_id,
+        'description': description,
+        'database_id': file_id,
+        'database_full_id': f'{file_id}_{chain_id}',
+    }
+    return values
+
+# -----------------------------------------------------------------------------
+#
+def register_foldseek_index_command(logger):
+    from chimerax.core.commands import CmdDesc, register, OpenFolderNameArg, IntArg
+    desc = CmdDesc(
+        required = [('directory', OpenFolderNameArg)],
+        keyword = [('min_residues', IntArg)],
+        synopsis = 'Make an index of structure files for local Foldseek searches'
+    )
+    register('foldseek index', desc, foldseek_index, logger=logger)
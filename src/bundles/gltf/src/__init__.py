@@ -54,7 +54,7 @@ class _gltfBundle(BundleAPI):
                 @property
                 def save_args(self):
                     from chimerax.core.commands import BoolArg, ModelsArg, Float3Arg, \
-                        FloatArg, Or
+                        FloatArg, IntArg, Or
                     return {
                         'center': Or(BoolArg, Float3Arg),
                         'float_colors': BoolArg,
@@ -69,6 +69,10 @@ class _gltfBundle(BundleAPI):
                         'backface_culling': BoolArg,
                         'instancing': BoolArg,
                         'size': FloatArg,
+                        'max_triangles': IntArg,
+                        'quantize': BoolArg,
+                        'gpu_instancing': BoolArg,
+                        'deduplicate': BoolArg,
                     }
                     
         return Info()
@@ -88,7 +88,7 @@ def read_gltf(session, filename, name):
                                                     j.get('textures'),
                                                     j.get('images'))
     bv = buffer_views(j['bufferViews'], bin_chunk)
-    ba = buffer_arrays(j['accessors'], bv, bin_chunk)
+    ba = buffer_arrays(j['accessors'], bv, bin_chunk, j['bufferViews'])
     mesh_drawings = meshes_as_models(session, j['meshes'], colors, textures, ba, bv)
 
     # Add mesh drawings to node models.
@@ -169,6 +169,8 @@ def scene_and_node_models(scenes, nodes, file_name, session):
             nm.position = Place(((m[0],m[4],m[8],m[12]),
                                  (m[1],m[5],m[9],m[13]),
                                  (m[2],m[6],m[10],m[14])))
+        if 'EXT_mesh_gpu_instancing' in node.get('extensions', {}):
+            session.logger.warning('glTF node %d uses unsupported GPU instancing, showing one copy' % ni)
         if 'scale' in node or 'translation' in node or 'rotation' in node:
             session.logger.warning('glTF node %d has unsupported rotation, scale or translation, ignoring it' % ni)
         nmodels.append(nm)
@@ -205,7 +207,7 @@ def meshes_as_models(session, meshes, material_colors, material_textures,
 
     mesh_models = []
     ba = buffer_arrays
-    from numpy import int32
+    from numpy import int32, float32
     from chimerax.core.models import Surface
     for m in meshes:
         if 'primitives' not in m:
@@ -224,9 +226,9 @@ def meshes_as_models(session, meshes, material_colors, material_textures,
             pa = p['attributes']
             if 'POSITION' not in pa:
                 raise glTFError('glTF missing "POSITION" attribute in primitive %s' % str(p))
-            va = ba[pa['POSITION']]
+            va = ba[pa['POSITION']].astype(float32, copy=False)	# May be quantized
             if 'NORMAL' in pa:
-                na = ba[pa['NORMAL']]
+                na = ba[pa['NORMAL']].astype(float32, copy=False)
             elif ta.shape[1] == 3:
                 # Compute triangle normals
                 from chimerax import surface
@@ -293,26 +295,39 @@ def buffer_views(buffer_views, binc):
         
 # -----------------------------------------------------------------------------
 #
-def buffer_arrays(accessors, buffer_views, binc):
+def buffer_arrays(accessors, buffer_views, binc, buffer_view_specs = None):
     balist = []
-    from numpy import float32, uint32, uint16, int16, uint8, frombuffer
-    value_type = {5126:float32, 5125:uint32, 5123:uint16, 5122:int16, 5121:uint8}
+    from numpy import float32, uint32, uint16, int16, uint8, int8, frombuffer
+    value_type = {5126:float32, 5125:uint32, 5123:uint16, 5122:int16, 5121:uint8, 5120:int8}
     atype_size = {'VEC2':2, 'VEC3':3, 'VEC4':4, 'SCALAR':1}
     for a in accessors:
         ibv = a['bufferView']	# index into buffer_views
         bv = buffer_views[ibv]
-        ct = a['componentType']	# 5123 = uint16, 5126 = float32, 5120 = uint8
+        ct = a['componentType']	# 5123 = uint16, 5126 = float32, 5121 = uint8
         dtype = value_type[ct]
         atype = a['type']		# "VEC3", "SCALAR"
         av = bv
         if 'byteOffset' in a:
             ao = a['byteOffset']
             av = av[ao:]
-        if 'count' in a:
-            ac = a['count']
-            nb = ac*dtype().itemsize*atype_size[atype]
-            av = av[:nb]
-        ba = frombuffer(av, dtype)
+        esize = dtype().itemsize*atype_size[atype]
+        stride = esize
+        if buffer_view_specs is not None:
+            stride = buffer_view_specs[ibv].get('byteStride', esize)
+        if stride != esize:
+            # Interleaved or padded values, for instance quantized positions.
+            ac = a.get('count', len(av)//stride)
+            av = bytes(av[:ac*stride] + b'\0'*max(0, ac*stride - len(av)))
+            ba = frombuffer(av, dtype).reshape((ac, stride//dtype().itemsize))
+            ba = ba[:,:atype_size[atype]].reshape(-1)
+        else:
+            if 'count' in a:
+                ac = a['count']
+                av = av[:ac*esize]
+            ba = frombuffer(av, dtype)
+        if a.get('normalized') and ct in (5120, 5122):
+            # Signed normalized values, for instance quantized normals.
+            ba = (ba.astype(float32) / float(2**(8*dtype().itemsize-1)-1)).clip(-1,1)
         if atype == 'VEC3':
             ba = ba.reshape((len(ba)//3, 3))
         elif atype == 'VEC4':
@@ -435,19 +450,24 @@ def write_gltf(session, filename = None, models = None,
                texture_colors = False, prune_vertex_colors = True,
                instancing = False,
                metallic_factor = 0, roughness_factor = 1,
-               flat_lighting = False, backface_culling = True):
+               flat_lighting = False, backface_culling = True,
+               max_triangles = None, quantize = False, gpu_instancing = False,
+               deduplicate = True):
+    from time import time
+    t0 = time()
+
     if models is None:
         models = session.models.list()
 
     drawings = all_visible_drawings(models)
 
-    buffers = Buffers()
+    buffers = Buffers(deduplicate)
     materials = Materials(buffers, preserve_transparency, float_colors,
                           texture_colors, metallic_factor, roughness_factor,
                           flat_lighting, backface_culling)
     nodes, meshes = nodes_and_meshes(drawings, buffers, materials,
                                      short_vertex_indices, prune_vertex_colors,
-                                     instancing)
+                                     instancing, max_triangles, quantize, gpu_instancing)
 
     if center is True:
         center = (0,0,0)
@@ -468,8 +488,29 @@ def write_gltf(session, filename = None, models = None,
         file = open(filename, 'wb')
         file.write(glb)
         file.close()
+        _report_size(session, filename, len(glb), buffers, meshes, time() - t0)
 
     return glb
+
+# -----------------------------------------------------------------------------
+#
+def _report_size(session, filename, nbytes, buffers, meshes, seconds):
+    saved = [('quantization', meshes.bytes_saved_quantizing),
+             ('GPU instancing', meshes.bytes_saved_instancing),
+             ('deduplication', buffers.bytes_deduplicated)]
+    saved = [(name, nb) for name, nb in saved if nb > 0]
+    from os.path import basename
+    msg = 'Wrote %s, %s in %.2f seconds' % (basename(filename), _size_string(nbytes), seconds)
+    if saved:
+        unreduced = nbytes + sum(nb for name, nb in saved)
+        msg += (', %.0f%% of %s without ' % (100 * nbytes / unreduced, _size_string(unreduced))
+                + ', '.join('%s (-%s)' % (name, _size_string(nb)) for name, nb in saved))
+    session.logger.info(msg)
+
+def _size_string(nbytes):
+    if nbytes >= 2**20:
+        return '%.1f Mbytes' % (nbytes / 2**20)
+    return '%.1f Kbytes' % (nbytes / 2**10)
         
 # -----------------------------------------------------------------------------
 #
@@ -516,6 +557,12 @@ def encode_gltf(nodes, buffers, meshes, materials):
 
     if len(materials.textures) > 0:
         h.update(materials.textures.texture_specs)	# adds 'textures', 'images', 'samplers'
+
+    ext_used, ext_required = meshes.extensions
+    if ext_used:
+        h['extensionsUsed'] = ext_used
+    if ext_required:
+        h['extensionsRequired'] = ext_required
         
     import json
     json_text = json.dumps(h).encode('utf-8')
@@ -597,20 +644,31 @@ def any_triangles_shown(d, drawings, ts):
 #
 def nodes_and_meshes(drawings, buffers, materials,
                      short_vertex_indices = False, prune_vertex_colors = True,
-                     leaf_instancing = False):
+                     leaf_instancing = False, max_triangles = None,
+                     quantize = False, gpu_instancing = False):
 
     # Create tree of nodes with children and matrices set.
-    nodes, drawing_nodes = node_tree(drawings, leaf_instancing)
+    gpu_instanced = set() if gpu_instancing else None
+    nodes, drawing_nodes = node_tree(drawings, leaf_instancing, buffers, gpu_instanced)
 
     # Create meshes for nodes.
-    meshes = Meshes(buffers, materials, short_vertex_indices, prune_vertex_colors, leaf_instancing)
+    meshes = Meshes(buffers, materials, short_vertex_indices, prune_vertex_colors, leaf_instancing,
+                    max_triangles, quantize, gpu_instanced)
     for drawing, dnodes in drawing_nodes.items():
         if meshes.has_mesh(drawing):
             for node in dnodes:
-                node['mesh'] = meshes.mesh_index(drawing, node['single_color'])
+                mi = meshes.mesh_index(drawing, node['single_color'])
+                dq = meshes.dequantization_matrix(drawing)
+                if dq is None:
+                    node['mesh'] = mi
+                else:
+                    # Quantized vertex positions are scaled by a child node.
+                    node.setdefault('children', []).append(len(nodes))
+                    nodes.append({'name': node['name'] + ' quantized',
+                                  'mesh': mi, 'matrix': dq})
 
     for node in nodes:
-        del node['single_color']
+        node.pop('single_color', None)
 
     return nodes, meshes
 
@@ -618,7 +676,7 @@ def nodes_and_meshes(drawings, buffers, materials,
 # The GLTF 2.0 spec requires that a node cannot be the child of more than one
 # other node.  So the child nodes for drawing instances need to be duplicated.
 #
-def node_tree(drawings, leaf_instancing):
+def node_tree(drawings, leaf_instancing, buffers = None, gpu_instanced = None):
     
     # Find top level drawings.
     child_drawings = []
@@ -632,7 +690,8 @@ def node_tree(drawings, leaf_instancing):
     drawing_nodes = {}	# Maps drawing to list of nodes that are copies of that drawing.
     drawing_set = set(drawings)
     for drawing in top_drawings:
-        create_node(drawing, drawing_set, nodes, drawing_nodes, leaf_instancing)
+        create_node(drawing, drawing_set, nodes, drawing_nodes, leaf_instancing,
+                    buffers, gpu_instanced)
 
     return nodes, drawing_nodes
 
@@ -641,7 +700,8 @@ def node_tree(drawings, leaf_instancing):
 # and to the drawing_nodes mapping that records all the node copies for each
 # drawing.
 #
-def create_node(drawing, drawing_set, nodes, drawing_nodes, leaf_instancing):
+def create_node(drawing, drawing_set, nodes, drawing_nodes, leaf_instancing,
+                buffers = None, gpu_instanced = None):
     dn = {'name': drawing.name,
           'single_color': drawing.color}
     dni = len(nodes)
@@ -650,10 +710,21 @@ def create_node(drawing, drawing_set, nodes, drawing_nodes, leaf_instancing):
     children = [c for c in drawing.child_drawings() if c.display and c in drawing_set]
 
     positions = drawing.get_positions(displayed_only = True)
+    trs = None
+    if gpu_instanced is not None and len(positions) > 1 and not children:
+        trs = _instance_trs(positions)
     if len(positions) == 1:
         inodes = gnodes = [dn]
         if not positions.is_identity():
             dn['matrix'] = gltf_transform(positions[0])
+    elif trs is not None:
+        # One node for each instance color with instance positions
+        # given by the EXT_mesh_gpu_instancing extension.
+        inodes = gnodes = _gpu_instance_nodes(drawing, trs, buffers)
+        ni = len(nodes)
+        nodes.extend(inodes)
+        dn['children'] = list(range(ni,ni+len(inodes)))
+        gpu_instanced.add(drawing)
     elif leaf_instancing or children:
         ic = drawing.get_colors(displayed_only = True)
         inodes = [{'name': '%s %d' % (drawing.name, i+1),
@@ -675,7 +746,8 @@ def create_node(drawing, drawing_set, nodes, drawing_nodes, leaf_instancing):
 
     if children:
         for node in inodes:
-            node['children'] = [create_node(c, drawing_set, nodes, drawing_nodes, leaf_instancing)
+            node['children'] = [create_node(c, drawing_set, nodes, drawing_nodes, leaf_instancing,
+                                            buffers, gpu_instanced)
                                 for c in children]
 
     return dni
@@ -689,18 +761,75 @@ def gltf_transform(place):
             m02,m12,m22,0,
             m03,m13,m23,1]
 
+# -----------------------------------------------------------------------------
+# Decompose instance positions into translations, rotation quaternions (x,y,z,w)
+# and scale factors for EXT_mesh_gpu_instancing.  Returns None if some position
+# has shear so can not be represented.
+#
+def _instance_trs(positions):
+    pa = positions.array()
+    m, t = pa[:,:,:3], pa[:,:,3]
+    from numpy import linalg, sqrt, maximum, copysign, abs, eye, einsum, float32, empty
+    s = linalg.norm(m, axis = 1)	# Column lengths
+    if (s == 0).any():
+        return None
+    s[linalg.det(m) < 0, 0] *= -1	# Reflection
+    r = m / s[:,None,:]
+    if abs(einsum('nji,njk->nik', r, r) - eye(3)).max() > 1e-4:
+        return None
+    r00, r11, r22 = r[:,0,0], r[:,1,1], r[:,2,2]
+    q = empty((len(r),4), float32)
+    q[:,0] = copysign(0.5*sqrt(maximum(0, 1 + r00 - r11 - r22)), r[:,2,1] - r[:,1,2])
+    q[:,1] = copysign(0.5*sqrt(maximum(0, 1 - r00 + r11 - r22)), r[:,0,2] - r[:,2,0])
+    q[:,2] = copysign(0.5*sqrt(maximum(0, 1 - r00 - r11 + r22)), r[:,1,0] - r[:,0,1])
+    q[:,3] = 0.5*sqrt(maximum(0, 1 + r00 + r11 + r22))
+    return t.astype(float32), q, s.astype(float32)
+
+# -----------------------------------------------------------------------------
+#
+def _gpu_instance_nodes(drawing, trs, buffers):
+    t, q, s = trs
+    if drawing.vertex_colors is None:
+        # Instances with different colors need different materials.
+        from numpy import unique
+        ic = drawing.get_colors(displayed_only = True)
+        colors, cindex = unique(ic, axis = 0, return_inverse = True)
+        cindex = cindex.reshape(-1)
+        groups = [(tuple(int(c) for c in color), (cindex == i).nonzero()[0])
+                  for i, color in enumerate(colors)]
+    else:
+        groups = [(drawing.color, slice(None))]
+    nodes = []
+    for color, gi in groups:
+        attr = {'TRANSLATION': buffers.add_array(t[gi])}
+        gq, gs = q[gi], s[gi]
+        if (gq[:,:3] != 0).any():
+            attr['ROTATION'] = buffers.add_array(gq)
+        if (gs != 1).any():
+            attr['SCALE'] = buffers.add_array(gs)
+        nodes.append({'name': '%s instances' % drawing.name,
+                      'single_color': color,
+                      'extensions': {'EXT_mesh_gpu_instancing': {'attributes': attr}}})
+    return nodes
+
 # -----------------------------------------------------------------------------
 #
 class Meshes:
     def __init__(self, buffers, materials, short_vertex_indices = False,
-                 prune_vertex_colors = True, leaf_instancing = False):
+                 prune_vertex_colors = True, leaf_instancing = False, max_triangles = None,
+                 quantize = False, gpu_instanced = None):
         self._buffers = buffers
         self._materials = materials
         self._short_vertex_indices = short_vertex_indices
         self._prune_vertex_colors = prune_vertex_colors
         self._leaf_instancing = leaf_instancing
+        self._max_triangles = max_triangles
+        self._quantize = quantize
+        self._gpu_instanced = gpu_instanced	# Drawings using EXT_mesh_gpu_instancing
         self._meshes = {}	# Map Drawing to Mesh.
         self._mesh_specs = []	# List of all mesh specifications
+        self._mesh_spec_index = {}	# Map mesh specification json to index, to reuse meshes.
+        self.bytes_saved_instancing = 0
 
     def has_mesh(self, drawing):
         if drawing.vertices is None or drawing.triangles is None or len(drawing.triangles) == 0:
@@ -710,31 +839,66 @@ class Meshes:
     def mesh_index(self, drawing, instance_color):
         mesh = self._meshes.get(drawing)
         if mesh is None:
+            gpu_instanced = (self._gpu_instanced is not None and drawing in self._gpu_instanced)
             mesh = Mesh(drawing, self._buffers, self._materials,
                         self._short_vertex_indices, self._prune_vertex_colors,
-                        self._leaf_instancing)
+                        self._leaf_instancing or gpu_instanced, self._max_triangles,
+                        quantize = self._quantize, quantize_positions = not gpu_instanced)
             self._meshes[drawing] = mesh
-        mi = len(self._mesh_specs)
-        spec = mesh.specification(instance_color)
-        self._mesh_specs.append(spec)
+            spec = mesh.specification(instance_color)
+            if gpu_instanced:
+                ninst = len(drawing.get_positions(displayed_only = True))
+                self.bytes_saved_instancing += (ninst - 1) * mesh.geometry_bytes
+        else:
+            spec = mesh.specification(instance_color)
+        import json
+        key = json.dumps(spec, sort_keys = True)
+        mi = self._mesh_spec_index.get(key)
+        if mi is None:
+            self._mesh_spec_index[key] = mi = len(self._mesh_specs)
+            self._mesh_specs.append(spec)
         return mi
 
+    def dequantization_matrix(self, drawing):
+        mesh = self._meshes.get(drawing)
+        return None if mesh is None else mesh.dequantization_matrix
+
     @property
     def mesh_specs(self):
         return self._mesh_specs
+
+    @property
+    def bytes_saved_quantizing(self):
+        return sum(mesh.bytes_saved_quantizing for mesh in self._meshes.values())
+
+    @property
+    def extensions(self):
+        used = []
+        if self._gpu_instanced:
+            used.append('EXT_mesh_gpu_instancing')
+        if self._quantize and self._meshes:
+            used.append('KHR_mesh_quantization')
+        return used, list(used)
     
 # -----------------------------------------------------------------------------
 #
 class Mesh:
     def __init__(self, drawing, buffers, materials,
                  short_vertex_indices = False, prune_vertex_colors = True,
-                 leaf_instancing = False):
+                 leaf_instancing = False, max_triangles = None,
+                 quantize = False, quantize_positions = True):
         self._drawing = drawing
         self._buffers = buffers
         self._materials = materials
         self._short_vertex_indices = short_vertex_indices
         self._prune_vertex_colors = prune_vertex_colors
         self._leaf_instancing = leaf_instancing
+        self._max_triangles = max_triangles
+        self._quantize = quantize
+        self._quantize_positions = quantize_positions
+        self.dequantization_matrix = None	# Node matrix for quantized positions
+        self.bytes_saved_quantizing = 0
+        self.geometry_bytes = 0
         
         self._primitives = None
         self._geom_buffers = None
@@ -815,6 +979,13 @@ class Mesh:
         if len(self._texture_images) == 0:
             tc = None
 
+        # Reduce triangle count of large surfaces.
+        mt = self._max_triangles
+        if (mt is not None and d.display_style == d.Solid and tc is None
+            and len(ta) > mt):
+            from chimerax.surface import decimate_geometry
+            va, na, ta, vc, vmap = decimate_geometry(va, na, ta, vc, mt)
+
         # Combine instances into a single triangle set.
         if not self._leaf_instancing:
             positions = d.get_positions(displayed_only = True)
@@ -845,6 +1016,19 @@ class Mesh:
         # Some implementations only allow 16-bit unsigned vertex indices.
         if self._short_vertex_indices:
             geom = limit_vertex_count(geom)
+
+        # Positions are quantized to 16-bit integers in a box centered at the
+        # origin scaled by a node matrix, the same for all primitives of the mesh.
+        if self._quantize and self._quantize_positions and len(va) > 0:
+            from numpy import float64
+            xyz_min, xyz_max = va.min(axis = 0).astype(float64), va.max(axis = 0).astype(float64)
+            center = 0.5 * (xyz_min + xyz_max)
+            scale = max(0.5 * (xyz_max - xyz_min).max(), 1e-6) / 32767
+            self._position_quantization = (center, scale)
+            cx,cy,cz = center
+            s = float(scale)
+            self.dequantization_matrix = [s,0,0,0, 0,s,0,0, 0,0,s,0,
+                                          float(cx),float(cy),float(cz),1]
             
         self._geom_buffers = geom_bufs = [self._make_buffers(pva,pna,pvc,ptc,pta)
                                           for pva,pna,pvc,ptc,pta in geom]
@@ -855,10 +1039,24 @@ class Mesh:
     def _make_buffers(self, va, na, vc, tc, ta):
         b = self._buffers
         mat = self._materials
-        from numpy import float32, uint32, uint16
+        from numpy import float32, uint32, uint16, int16, int8
         
-        vi = b.add_array(va.astype(float32, copy=False), bounds=True, target=b.GLTF_ARRAY_BUFFER)
-        ni = b.add_array(na, target=b.GLTF_ARRAY_BUFFER) if na is not None and not self._materials.flat_lighting else None
+        nb0 = b.nbytes
+        if self.dequantization_matrix is not None:
+            center, scale = self._position_quantization
+            qva = _quantized_vectors(va, center, scale, int16)
+            vi = b.add_array(qva, bounds=True, target=b.GLTF_ARRAY_BUFFER, components=3)
+            self.bytes_saved_quantizing += 12*len(va) - qva.nbytes
+        else:
+            vi = b.add_array(va.astype(float32, copy=False), bounds=True, target=b.GLTF_ARRAY_BUFFER)
+        if na is None or self._materials.flat_lighting:
+            ni = None
+        elif self._quantize:
+            qna = _quantized_vectors(na, (0,0,0), 1/127, int8)
+            ni = b.add_array(qna, normalized=True, target=b.GLTF_ARRAY_BUFFER, components=3)
+            self.bytes_saved_quantizing += 12*len(na) - qna.nbytes
+        else:
+            ni = b.add_array(na, target=b.GLTF_ARRAY_BUFFER)
         ci = None
         single_vertex_color = None
         if vc is not None:
@@ -878,8 +1076,21 @@ class Mesh:
         ea = ta.astype(etype, copy=False).reshape((ta.size,))
         ti = b.add_array(ea, target=b.GLTF_ELEMENT_ARRAY_BUFFER)
         mode = _mesh_style(ta)
+        self.geometry_bytes += b.nbytes - nb0
         return (vi,ni,ci,tci,ti,mode,single_vertex_color)
     
+# -----------------------------------------------------------------------------
+# Round (vectors - center) / scale to integers padded to 4 components
+# so each vertex starts on a 4-byte boundary as glTF requires.
+#
+def _quantized_vectors(vectors, center, scale, dtype):
+    from numpy import iinfo, zeros, rint, clip, float64, array
+    vmax = iinfo(dtype).max
+    q = zeros((len(vectors),4), dtype)
+    qv = rint((vectors.astype(float64) - array(center, float64)) / scale)
+    q[:,:3] = clip(qv, -vmax, vmax)
+    return q
+
 # -----------------------------------------------------------------------------
 #
 def _single_vertex_color(vertex_colors):
@@ -1103,28 +1314,41 @@ def limit_vertex_count(geom, vmax = 2**16):
 # -----------------------------------------------------------------------------
 #
 class Buffers:
-    def __init__(self):
+    def __init__(self, deduplicate = True):
         self.accessors = []
         self.buffer_views = []
         self.buffer_bytes = []
         self.nbytes = 0
 
-        from numpy import float32, uint32, uint16, int16, uint8, frombuffer
-        self.value_types = {float32:5126, uint32:5125, uint16:5123, int16:5122, uint8:5121}
+        # Identical arrays, for instance copies of the same surface, are
+        # written once and shared by all accessors that use them.
+        self._deduplicate = deduplicate
+        self._accessor_index = {}	# Map array digest and properties to accessor index
+        self._buffer_view_index = {}	# Map bytes digest, target and stride to buffer view index
+        self.bytes_deduplicated = 0
+
+        from numpy import float32, uint32, uint16, int16, uint8, int8, frombuffer
+        self.value_types = {float32:5126, uint32:5125, uint16:5123, int16:5122, uint8:5121, int8:5120}
 
     # -----------------------------------------------------------------------------
+    # If components is less than the array second dimension then only the first
+    # components values of each row are used, for instance to pad 16-bit xyz
+    # values to 4-byte alignment.
     #
-    def add_array(self, array, bounds=False, normalized=False, target=None):
+    def add_array(self, array, bounds=False, normalized=False, target=None, components=None):
 
+        ncol = 1 if array.ndim == 1 else array.shape[1]
+        if components is None:
+            components = ncol
         a = {}
         a['count'] = array.shape[0]
         if len(array.shape) == 1:
             t = 'SCALAR'
-        elif array.shape[1] == 2:
+        elif components == 2:
             t = 'VEC2'
-        elif array.shape[1] == 3:
+        elif components == 3:
             t = 'VEC3'
-        elif array.shape[1] == 4:
+        elif components == 4:
             t = 'VEC4'
         else:
             raise glTFError('glTF buffer shape %s not allowed, must be 1 or 2 dimensional with second dimension size 1, 2, 3, or 4' % repr(tuple(array.shape)))
@@ -1135,17 +1359,30 @@ class Buffers:
 
         if bounds:
             nd = array.ndim
-            # TODO: Handle integer min/max
+            v = int if array.dtype.kind in 'iu' else float
             if nd == 2:
-                a['min'],a['max'] = (tuple(float(x) for x in array.min(axis=0)),
-                                     tuple(float(x) for x in array.max(axis=0)))
+                ba = array[:,:components]
+                a['min'],a['max'] = (tuple(v(x) for x in ba.min(axis=0)),
+                                     tuple(v(x) for x in ba.max(axis=0)))
             else:
-                a['min'],a['max'] = float(array.min(axis=0)), float(array.max(axis=0))
-                
-        self.accessors.append(a)
+                a['min'],a['max'] = v(array.min(axis=0)), v(array.max(axis=0))
 
         b = array.tobytes()
-        a['bufferView'] = self.add_buffer(b, target=target)
+        digest = None
+        if self._deduplicate:
+            from hashlib import blake2b
+            digest = blake2b(b, digest_size = 16).digest()
+            key = (digest, array.dtype.str, array.shape, normalized, bounds, target, components)
+            ai = self._accessor_index.get(key)
+            if ai is not None:
+                self.bytes_deduplicated += len(b)
+                return ai
+            self._accessor_index[key] = len(self.accessors)
+
+        self.accessors.append(a)
+
+        stride = array.itemsize * ncol if components < ncol else None
+        a['bufferView'] = self.add_buffer(b, target=target, byte_stride=stride, digest=digest)
 
         return len(self.accessors) - 1
 
@@ -1159,15 +1396,27 @@ class Buffers:
     
     # -----------------------------------------------------------------------------
     #
-    def add_buffer(self, bytes, target=None):
-        bvi = len(self.buffer_views)
+    def add_buffer(self, bytes, target=None, byte_stride=None, digest=None):
         nb = len(bytes)
+        if self._deduplicate:
+            if digest is None:
+                from hashlib import blake2b
+                digest = blake2b(bytes, digest_size = 16).digest()
+            key = (digest, nb, target, byte_stride)
+            bvi = self._buffer_view_index.get(key)
+            if bvi is not None:
+                self.bytes_deduplicated += nb
+                return bvi
+            self._buffer_view_index[key] = len(self.buffer_views)
+        bvi = len(self.buffer_views)
         if nb % 4 != 0:
             bytes += b'\0' * (4 - (nb%4))  # byteOffset is required to be multiple of 4
         self.buffer_bytes.append(bytes)
         bv = {"byteLength": nb, "byteOffset": self.nbytes, "buffer": 0}
         if target is not None:
             bv["target"] = target
+        if byte_stride is not None:
+            bv["byteStride"] = byte_stride
         self.buffer_views.append(bv)
         self.nbytes += len(bytes)
         return bvi
@@ -206,6 +206,9 @@ class Drawing:
     skip_bounds = False
     '''Whether this drawing is included in calculation by bounds().'''
 
+    view_dependent = False
+    '''Whether update_for_camera() is called before each frame is drawn.'''
+
     def redraw_needed(self, **kw):
         """Function called when the drawing has been changed to indicate
         that the graphics needs to be redrawn."""
@@ -770,6 +773,13 @@ class Drawing:
         for d in self.child_drawings():
             d.drawings_for_each_pass(pass_drawings)
 
+    def update_for_camera(self, camera, window_size):
+        '''
+        Called before each frame is drawn if view_dependent is true so the
+        drawing can cull or simplify geometry depending on the camera.
+        '''
+        pass
+
     def draw(self, renderer, draw_pass):
         '''Draw this drawing using the given draw pass. Does not draw child drawings'''
 
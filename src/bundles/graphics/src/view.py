@@ -215,6 +215,8 @@ class View:
                        len(transparent_drawings) == 0 and
                        len(highlight_drawings) == 0 and
                        len(on_top_drawings) == 0)
+        self._update_view_dependent_drawings(camera, opaque_drawings, transparent_drawings,
+                                             highlight_drawings)
 
         offscreen = r.offscreen if r.offscreen.enabled else None
         if highlight_drawings and r.outline.offscreen_outline_needed:
@@ -278,6 +280,19 @@ class View:
                 offscreen.finish(r)
 
                 
+    def _update_view_dependent_drawings(self, camera, *pass_drawings):
+        '''
+        Drawings such as the atoms of huge structures cull and simplify
+        their geometry using the camera before they are drawn.
+        '''
+        vdrawings = set(d for drawings in pass_drawings for d in drawings if d.view_dependent)
+        if vdrawings:
+            ws = self._render.render_size()
+            if ws[0] == 0 or ws[1] == 0:
+                return
+            for d in vdrawings:
+                d.update_for_camera(camera, ws)
+
     def _drawings_by_pass(self, drawings):
         pass_drawings = {}
         for d in drawings:
@@ -23,4 +23,4 @@
 # === UCSF ChimeraX Copyright ===
 
 from .compression import remove_compression_suffix, UnwantedCompressionError
-from .io import open_input, open_output, file_system_file_name
+from .io import open_input, open_output, open_threaded_output, file_system_file_name
@@ -86,6 +86,94 @@ def open_output(output, encoding=None, *, append=False, compression=None):
             mode=mode, encoding=encoding)
     return open(fs_output, mode, encoding=encoding)
 
+def open_threaded_output(output, encoding='utf-8', *, compression=None, chunk_size=4194304,
+        max_pending=4):
+    """Supported API.
+    Open a path for (possibly compressed) text writing, with the encoding, compression and
+    file writing done in a background thread so that they overlap with producing the text.
+
+    Written text is collected into chunks of about *chunk_size* characters, which are
+    written in order.  At most *max_pending* chunks wait for the background thread (writes
+    block when that many are queued), so memory use stays bounded regardless of the
+    output size.  *compression* is as for :py:func:`open_output`.  The returned object
+    has 'write' and 'close' methods and can be used as a context manager.  Errors in the
+    background thread are raised by the next 'write' or by 'close'.
+    """
+    fs_output = file_system_file_name(output)
+    compression_type = get_compression_type(fs_output, compression)
+    if compression_type:
+        stream = handle_compression(compression_type, fs_output, mode='wb')
+    else:
+        stream = open(fs_output, 'wb')
+    return ThreadedOutput(stream, encoding, chunk_size, max_pending)
+
+from io import IOBase
+class ThreadedOutput(IOBase):
+    """Text output whose encoding and writing happen in a background thread.
+       See :py:func:`open_threaded_output`.
+    """
+    def __init__(self, stream, encoding, chunk_size, max_pending):
+        super().__init__()
+        self._stream = stream
+        self._encoding = encoding
+        self._chunk_size = chunk_size
+        self._pieces = []
+        self._buffered = 0
+        self._error = None
+        self._error_reported = False
+        from queue import Queue
+        self._queue = Queue(max_pending)
+        from threading import Thread
+        self._thread = Thread(target=self._write_chunks, daemon=True)
+        self._thread.start()
+
+    def write(self, text):
+        if self._error is not None:
+            self._raise_error()
+        self._pieces.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self._chunk_size:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self._pieces and not self.closed:
+            self._queue.put(''.join(self._pieces))
+            self._pieces = []
+            self._buffered = 0
+
+    def writable(self):
+        return True
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+        self._stream.close()
+        super().close()
+        if self._error is not None:
+            self._raise_error()
+
+    def _write_chunks(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            if self._error is not None:
+                # drain the queue so that writers do not block
+                continue
+            try:
+                self._stream.write(chunk.encode(self._encoding))
+            except Exception as e:
+                self._error = e
+
+    def _raise_error(self):
+        if not self._error_reported:
+            self._error_reported = True
+            raise self._error
+
 def file_system_file_name(file_name):
     import os.path
     file_name = os.path.expanduser(file_name)
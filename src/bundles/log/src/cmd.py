@@ -112,7 +112,8 @@ def log_save(session, file_name, executable_links = None):
         log = session.logger
         log.warning("no log tool to save")
 
-def log_settings(session, error_dialog = None, warning_dialog = None):
+def log_settings(session, error_dialog = None, warning_dialog = None, max_shown_size = None,
+                 plain_text_rate = None):
     '''Save the log window
 
     Parameters
@@ -121,6 +122,10 @@ def log_settings(session, error_dialog = None, warning_dialog = None):
       Whether to show errors in a separate dialog (for the remainder of this session)
     warning_dialog : bool
       Whether to show warnings in a separate dialog (for the remainder of this session)
+    max_shown_size : float
+      Megabytes of log HTML to display.  Earlier contents are hidden but still saved.
+    plain_text_rate : int
+      Messages per second above which messages are shown as plain text.  Zero means never.
     '''
     from .settings import settings
     if error_dialog is not None:
@@ -129,6 +134,15 @@ def log_settings(session, error_dialog = None, warning_dialog = None):
     if warning_dialog is not None:
         settings.warnings_raise_dialog = warning_dialog
 
+    if max_shown_size is not None:
+        settings.max_shown_megabytes = max_shown_size
+        log = get_singleton(session, create = False)
+        if log is not None:
+            log.redisplay()
+
+    if plain_text_rate is not None:
+        settings.plain_text_rate = plain_text_rate
+
 def log_metadata(session, models=None, verbose=False):
     if models is None:
         models = session.models
@@ -151,7 +165,7 @@ def log_metadata(session, models=None, verbose=False):
 
 def register_log_command(logger):
     from chimerax.core.commands import register, CmdDesc, NoArg, BoolArg, IntArg, RestOfLine, \
-        SaveFileNameArg, ModelsArg
+        SaveFileNameArg, ModelsArg, FloatArg
     log_desc = CmdDesc(keyword = [('thumbnail', NoArg),
                                   ('text', RestOfLine),
                                   ('html', RestOfLine),
@@ -170,7 +184,8 @@ def register_log_command(logger):
     )
     register('log save', save_desc, log_save, logger=logger)
     settings_desc = CmdDesc(
-                        keyword = [('warning_dialog', BoolArg), ('error_dialog', BoolArg)],
+                        keyword = [('warning_dialog', BoolArg), ('error_dialog', BoolArg),
+                                   ('max_shown_size', FloatArg), ('plain_text_rate', IntArg)],
                         synopsis = 'Temporarily change log settings'
     )
     register('log settings', settings_desc, log_settings, logger=logger)
@@ -29,6 +29,8 @@ class _LogSettings(Settings):
         'errors_raise_dialog': True,
         'warnings_raise_dialog': False,
         'session_restore_clears': True,
+        'max_shown_megabytes': 8.0,
+        'plain_text_rate': 200,
     }
 
     AUTO_SAVE = {
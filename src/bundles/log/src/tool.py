@@ -145,6 +145,13 @@ class Log(ToolInstance, HtmlLog):
         self.suppress_scroll = False
         self._log_file = None
         self.page_source = ""
+        self._shown_source = None	# page_source last sent to the HTML widget
+        self._shown_size = 0		# characters of page_source in the HTML widget
+        self._page_loaded = False
+        self._burst_text = []		# Messages logged as plain text at high message rate
+        self._burst_mode = False
+        self._rate_start = None
+        self._rate_count = 0
         from chimerax.ui import MainToolWindow
         class LogToolWindow(MainToolWindow):
             def fill_context_menu(self, menu, x, y, session=session):
@@ -248,14 +255,19 @@ class Log(ToolInstance, HtmlLog):
         self.tool_window.manage(placement="side")
         session.logger.add_log(self)
         # Don't record html history as log changes.
-        def clear_history(okay, lw=lw):
+        def clear_history(okay, lw=lw, self=self):
             lw.history().clear()
+            self._page_loaded = True
         lw.loadFinished.connect(clear_history)
+        # Show batched messages as soon as a command ends.
+        self._command_handlers = [session.triggers.add_handler(trigger_name,
+            lambda *args, self=self: session.ui.thread_safe(self._flush_at_command_end))
+            for trigger_name in ('command finished', 'command failed')]
         self.show_page_source()
 
     def cm_set_cmd_links(self, checked):
         self.settings.exec_cmd_links = checked
-        self._show()
+        self.redisplay()
 
     def show_error_message(self, msg, bug = False):
         ed = self.error_dialog
@@ -321,6 +333,14 @@ class Log(ToolInstance, HtmlLog):
         """
 
         start_len = len(self.page_source)
+        if self._high_message_rate() and image_info[0] is None and level < self.LEVEL_WARNING:
+            # Many messages per second, e.g. per-frame output from a script.  Log these
+            # as plain text which is much faster to render than HTML.
+            from chimerax.core.logger import html_to_plain
+            self._burst_text.append(html_to_plain(msg) if is_html else msg)
+            self.show_page_source()
+            return True
+        self._flush_burst_text()
         if image_info[0] is not None:
             from chimerax.core.logger import image_info_to_html
             self._append_message(image_info_to_html(msg, image_info))
@@ -412,6 +432,40 @@ class Log(ToolInstance, HtmlLog):
         self.page_source += msg
         self._log_to_file(msg)
 
+    def _high_message_rate(self, interval = 0.25):
+        '''
+        Count messages over short intervals to decide whether to log in plain text mode.
+        Plain text mode starts when the rate exceeds the plain_text_rate setting and
+        ends when it falls below half that rate.
+        '''
+        rate = self.settings.plain_text_rate
+        if not rate:
+            return False
+        from time import time
+        t = time()
+        if self._rate_start is None or t - self._rate_start > 4*interval:
+            self._rate_start, self._rate_count = t, 0
+        self._rate_count += 1
+        elapsed = t - self._rate_start
+        if elapsed >= interval:
+            msg_rate = self._rate_count / elapsed
+            if self._burst_mode:
+                if msg_rate < 0.5 * rate:
+                    self._burst_mode = False
+            elif msg_rate > rate:
+                self._burst_mode = True
+                self._append_message('<p style="color:gray">Log showing plain text'
+                    ' while messages arrive at more than %d per second</p>' % rate)
+            self._rate_start, self._rate_count = t, 0
+        return self._burst_mode
+
+    def _flush_burst_text(self):
+        if self._burst_text:
+            from html import escape
+            text = ''.join(self._burst_text)
+            self._burst_text = []
+            self._append_message('<pre style="margin:0">%s</pre>' % escape(text))
+
     def _log_to_file(self, msg):
         file = self._log_file
         if file is not None:
@@ -429,15 +483,51 @@ class Log(ToolInstance, HtmlLog):
     def show_page_source(self):
         self.session.ui.thread_safe(self._show)
 
+    def redisplay(self):
+        '''Replace the displayed page instead of appending new messages.'''
+        self._shown_source = None
+        self.show_page_source()
+
     def _show(self):
-        # start() is documented to stop the timer if it is running
+        # Batch messages arriving while the timer runs into one page update.
+        # Don't restart a running timer so a steady stream of messages is still shown.
+        from Qt import qt_object_is_deleted
+        if qt_object_is_deleted(self.regulating_timer):
+            return
+        if not self.regulating_timer.isActive():
+            self.regulating_timer.start(100)
+
+    def _flush_at_command_end(self):
         from Qt import qt_object_is_deleted
         if qt_object_is_deleted(self.regulating_timer):
             return
-        self.regulating_timer.start(100)
+        if self.regulating_timer.isActive() or self._burst_text:
+            self._actually_show()
 
     def _actually_show(self):
         self.regulating_timer.stop()
+        self._flush_burst_text()
+        page = self.page_source
+        shown = self._shown_source
+        max_size = self._max_shown_size()	# Zero or less means no limit
+        if (shown is not None and self._page_loaded and not self.suppress_scroll
+                and page.startswith(shown)
+                and (max_size <= 0 or self._shown_size + len(page) - len(shown) <= max_size)):
+            # Only new messages were added, append them to the displayed page.
+            new_html = page[len(shown):]
+            if new_html:
+                import json
+                self.log_window.page().runJavaScript(
+                    "document.body.insertAdjacentHTML('beforeend', %s);"
+                    "window.scrollTo(0, document.body.scrollHeight);" % json.dumps(new_html))
+                self._shown_size += len(new_html)
+            self._shown_source = page
+            return
+        if not self._page_loaded and shown is not None:
+            # Previous page is still loading, try again shortly.
+            self._show()
+            return
+
         if self.suppress_scroll:
             sp = self.log_window.page().scrollPosition()
             height = str(sp.y())
@@ -448,14 +538,45 @@ class Log(ToolInstance, HtmlLog):
         html = (
             f"<style>{css}</style>\n"
             f"<body onload=\"window.scrollTo(0, {height});\">\n"
-            f"{self.page_source}"
+            f"{self._truncated_page(page)}"
             "</body>"
         )
+        self._shown_source = page
+        self._page_loaded = False
         lw = self.log_window
         lw.setHtml(html)
 
+    def _max_shown_size(self):
+        return int(self.settings.max_shown_megabytes * 2**20)
+
+    def _truncated_page(self, page):
+        '''
+        Very long logs are slow to display, so only show the end of the log with
+        a collapsed note about the hidden earlier part.  The full contents are kept
+        and are saved by "log save".  Half the maximum size is shown so that many
+        messages can be appended before the page is truncated again.
+        '''
+        max_size = self._max_shown_size()
+        if max_size <= 0 or len(page) <= max_size:
+            self._shown_size = len(page)
+            return page
+        start = len(page) - max_size//2
+        # Start at a command or line break to avoid splitting HTML tags.
+        cut = [i for i in (page.find('<div class="cxcmd">', start), page.find('<br>', start))
+               if i >= 0]
+        start = min(cut) if cut else len(page)
+        tail = page[start:]
+        from chimerax.ui.html import disclosure
+        hidden_mb = start / 2**20
+        note = disclosure('<p>The beginning of the log is not shown to keep the Log fast.'
+            ' Use the command <b>log save</b> to save the full log to a file.</p>', summary = '%.1f Mbytes of earlier log not shown' % hidden_mb,
+            background_color = "#ebf5fb")
+        self._shown_size = len(tail)
+        return note + tail
+
     def plain_text(self):
         """Convert HTML to plain text"""
+        self._flush_burst_text()
         return log_html_to_plain_text(self.page_source)
 
     def clear(self):
@@ -465,6 +586,7 @@ class Log(ToolInstance, HtmlLog):
     def save(self, path, *, executable_links=None):
         if executable_links is None:
             executable_links = self.settings.exec_cmd_links
+        self._flush_burst_text()
         from os.path import expanduser
         path = expanduser(path)
         with open(path, 'w', encoding='utf-8') as f:
@@ -503,6 +625,8 @@ class Log(ToolInstance, HtmlLog):
     #
     def delete(self):
         self.regulating_timer.stop()
+        for h in self._command_handlers:
+            self.session.triggers.remove_handler(h)
         self.session.logger.remove_log(self)
         super().delete()
 
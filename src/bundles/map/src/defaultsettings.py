@@ -91,6 +91,8 @@ class _VolumeSettings(Settings):
         'surface_smoothing': False,
         'smoothing_factor': 0.3,
         'smoothing_iterations': 2,
+        'limit_surface_triangles': False,
+        'surface_triangle_limit': 2.0,          # Mtriangles
         'square_mesh': True,
         'cap_faces': True,
         'orthoplanes_shown': (False, False, False),
@@ -166,6 +168,8 @@ class VolumeDefaultSettings:
             'surface_smoothing',
             'smoothing_factor',
             'smoothing_iterations',
+            'limit_surface_triangles',
+            'surface_triangle_limit',
             'square_mesh',
             'cap_faces',
             'orthoplanes_shown',
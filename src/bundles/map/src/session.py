@@ -709,6 +709,8 @@ rendering_options_attributes = (
   'surface_smoothing',
   'smoothing_factor',
   'smoothing_iterations',
+  'limit_surface_triangles',
+  'surface_triangle_limit',
   'square_mesh',
   'cap_faces',
   'orthoplanes_shown',
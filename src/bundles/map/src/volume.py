@@ -2246,6 +2246,12 @@ class VolumeSurface(Surface):
       for i in range(ro.subdivision_levels):
         varray, tarray, narray = subdivide_triangles(varray, tarray, narray)
 
+    if ro.limit_surface_triangles:
+      max_tri = int(ro.surface_triangle_limit * (2 ** 20))
+      if len(tarray) > max_tri:
+        from chimerax.surface import decimate_geometry
+        varray, narray, tarray = decimate_geometry(varray, narray, tarray, None, max_tri)[:3]
+
     if ro.square_mesh:
       from numpy import empty, uint8
       hidden_edges = empty((len(tarray),), uint8)
@@ -2321,6 +2327,8 @@ class VolumeSurface(Surface):
                         'smoothing_iterations': ro.smoothing_iterations,
                         'subdivide_surface': ro.subdivide_surface,
                         'subdivision_levels': ro.subdivision_levels,
+                        'limit_surface_triangles': ro.limit_surface_triangles,
+                        'surface_triangle_limit': ro.surface_triangle_limit,
                         'square_mesh': ro.square_mesh,
                         'cap_faces': ro.cap_faces,
                         'flip_normals': ro.flip_normals,
@@ -2811,6 +2819,12 @@ class RenderingOptions:
   smoothing_factor : .3
     When surface smoothing each vertex is moved a fraction of the ways towards
     the average position of the connected vertices.  This parameter is the fraction.
+  limit_surface_triangles : False
+    Whether to reduce the triangle count of surfaces and meshes that have more
+    than surface_triangle_limit triangles by quadric error edge collapse.
+  surface_triangle_limit : 2
+    Maximum number of triangles in millions per contour surface if
+    limit_surface_triangles is True.
   square_mesh : True
     Whether mesh display hides diagonal mesh lines.  If true than only mesh lines
     intersecting the xy, yz, and xz grid planes are shown.
@@ -2881,6 +2895,8 @@ class RenderingOptions:
     self.surface_smoothing = False
     self.smoothing_iterations = 2
     self.smoothing_factor = .3
+    self.limit_surface_triangles = False
+    self.surface_triangle_limit = 2		# Mtriangles
     self.square_mesh = True
     self.cap_faces = True
     self.orthoplanes_shown = (False, False, False)
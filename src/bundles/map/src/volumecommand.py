@@ -76,6 +76,8 @@ def register_volume_command(logger):
                ('surface_smoothing', BoolArg),
                ('smoothing_iterations', IntArg),
                ('smoothing_factor', FloatArg),
+               ('limit_surface_triangles', BoolArg),
+               ('surface_triangle_limit', FloatArg),
                ('square_mesh', BoolArg),
                ('cap_faces', BoolArg),
                ('position_planes', Int3Arg),
@@ -222,6 +224,8 @@ def volume(session,
            surface_smoothing = None,
            smoothing_iterations = None,
            smoothing_factor = None,
+           limit_surface_triangles = None,
+           surface_triangle_limit = None,    # Mtriangles
            square_mesh = None,
            cap_faces = None,
            box_faces = None,
@@ -338,6 +342,10 @@ def volume(session,
         surface_smoothing: bool
         smoothing_iterations: integer
         smoothing_factor: float
+        limit_surface_triangles: bool
+            Reduce contour surface triangle count by edge collapse.
+        surface_triangle_limit: float
+            Maximum contour surface triangles in millions.
         square_mesh: bool
         cap_faces: bool
         box_faces: bool
@@ -434,7 +442,8 @@ def _render_settings(options):
         'line_thickness', 'smooth_lines', 'mesh_lighting',
         'two_sided_lighting', 'flip_normals', 'subdivide_surface',
         'subdivision_levels', 'surface_smoothing', 'smoothing_iterations',
-        'smoothing_factor', 'square_mesh', 'cap_faces',
+        'smoothing_factor', 'limit_surface_triangles', 'surface_triangle_limit',
+        'square_mesh', 'cap_faces',
         'tilted_slab_axis', 'tilted_slab_offset',
         'tilted_slab_spacing', 'tilted_slab_plane_count', 'image_mode', 'backing_color')
     rsettings = dict((n,options[n]) for n in ropt if options.get(n) is not None)
@@ -872,6 +881,8 @@ def volume_default_values(session,
            surface_smoothing = None,
            smoothing_iterations = None,
            smoothing_factor = None,
+           limit_surface_triangles = None,
+           surface_triangle_limit = None,    # Mtriangles
            square_mesh = None,
            cap_faces = None,
            position_planes = None,
@@ -25,7 +25,7 @@
 #--- public API ---
 from .match import CP_SPECIFIC_SPECIFIC, CP_SPECIFIC_BEST, CP_BEST_BEST
 from .match import AA_NEEDLEMAN_WUNSCH, AA_SMITH_WATERMAN
-from .match import match, defaults
+from .match import match, match_all_pairs, save_all_pairs, defaults
 
 #--- toolshed/session-init funcs ---
 
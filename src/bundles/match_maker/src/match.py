@@ -49,30 +49,7 @@ def align(session, ref, match, matrix_name, algorithm, gap_open, gap_extend, dss
     ssf = ss_fraction
     ssm = ss_matrix
     if ssf is not None and ssf is not False and compute_ss:
-        need_compute = []
-        if ref.structure not in dssp_cache:
-            for r in ref.residues:
-                if r and len(r.atoms) > 1:
-                    # not CA only
-                    need_compute.append(ref.structure)
-                    dssp_cache[ref.structure] = (ref.structure.residues.ss_ids,
-                        ref.structure.residues.ss_types)
-                    break
-        if match.structure not in dssp_cache:
-            for r in match.residues:
-                if r and len(r.atoms) > 1:
-                    # not CA only
-                    need_compute.append(match.structure)
-                    dssp_cache[match.structure] = (match.structure.residues.ss_ids,
-                        match.structure.residues.ss_types)
-                    break
-        if need_compute:
-            from chimerax import dssp
-            for s in need_compute:
-                # keep_computed_ss is None in a recursive call
-                if not keep_computed_ss and keep_computed_ss is not None:
-                    s.ss_change_notify = False
-                dssp.compute_ss(s)
+        compute_missing_ss([ref, match], dssp_cache, keep_computed_ss)
     if algorithm == "nw":
         from chimerax.alignment_algs import NeedlemanWunsch
         score, seqs = NeedlemanWunsch.nw(ref, match,
@@ -192,6 +169,30 @@ def align(session, ref, match, matrix_name, algorithm, gap_open, gap_extend, dss
             _dm_cleanup.append(aligned)
     return score, gapped_ref, gapped_match
 
+def compute_missing_ss(chains, dssp_cache, keep_computed_ss):
+    """Compute secondary structure (with DSSP) for the structures of 'chains' that are not
+       already in 'dssp_cache', recording the original SS assignments in the cache.
+       'keep_computed_ss' of None indicates a recursive call.
+    """
+    need_compute = []
+    for chain in chains:
+        if chain.structure in dssp_cache:
+            continue
+        for r in chain.residues:
+            if r and len(r.atoms) > 1:
+                # not CA only
+                need_compute.append(chain.structure)
+                dssp_cache[chain.structure] = (chain.structure.residues.ss_ids,
+                    chain.structure.residues.ss_types)
+                break
+    if need_compute:
+        from chimerax import dssp
+        for s in need_compute:
+            # keep_computed_ss is None in a recursive call
+            if not keep_computed_ss and keep_computed_ss is not None:
+                s.ss_change_notify = False
+            dssp.compute_ss(s)
+
 def match(session, chain_pairing, match_items, matrix, alg, gap_open, gap_extend, *, cutoff_distance=None,
         show_alignment=defaults['show_alignment'], align=align, domain_residues=(None, None), bring=None,
         verbose=defaults['verbose_logging'], always_raise_errors=False, report_matrix=False,
@@ -258,15 +259,7 @@ def match(session, chain_pairing, match_items, matrix, alg, gap_open, gap_extend
        failure in the log and continuing on to other pairings.
     """
     dssp_cache = {}
-    alg = alg.lower()
-    if alg == "nw" or alg.startswith("needle"):
-        alg = "nw"
-        alg_name = "Needleman-Wunsch"
-    elif alg =="sw" or alg.startswith("smith"):
-        alg = "sw"
-        alg_name = "Smith-Waterman"
-    else:
-        raise ValueError("Unknown sequence alignment algorithm: %s" % alg)
+    alg, alg_name = _normalize_alg(alg)
     pairings = {}
     small_mol_err_msg = "Reference and/or match model contains no nucleic or"\
         " amino acid chains.\nUse the command-line 'align' command" \
@@ -566,39 +559,12 @@ def match(session, chain_pairing, match_items, matrix, alg, gap_open, gap_extend
                 alignment.auto_associate = True
                 for hdr in alignment.headers:
                     hdr.shown = hdr.ident == "rmsd"
-            residues1 = s1.residues
-            residues2 = s2.residues
-            for i in range(len(s1)):
-                if s1[i] == "." or s2[i] == ".":
-                    continue
-                ref_res = residues1[s1.gapped_to_ungapped(i)]
-                if not ref_res:
-                    continue
-                ref_atom = ref_res.principal_atom
-                if not ref_atom:
-                    continue
-                match_res = residues2[s2.gapped_to_ungapped(i)]
-                if not match_res:
-                    continue
-                match_atom = match_res.principal_atom
-                if not match_atom:
-                    continue
-                if ref_res in skip or match_res in skip:
-                    continue
-                if ref_atom.name != match_atom.name:
-                    # nucleic P-only trace vs. full nucleic
-                    if ref_atom.name != "P":
-                        ref_atom = ref_atom.residue.find_atom("P")
-                        if not ref_atom:
-                            continue
-                    else:
-                        match_atom = match_atom.residue.find_atom("P")
-                        if not match_atom:
-                            continue
-                ref_atoms.append(ref_atom)
-                match_atoms.append(match_atom)
-                if show_alignment and cutoff_distance is not None:
-                    for viewer in  alignment.viewers:
+            pair_ref_atoms, pair_match_atoms, columns = aligned_principal_atoms(s1, s2, skip)
+            ref_atoms.extend(pair_ref_atoms)
+            match_atoms.extend(pair_match_atoms)
+            if show_alignment and cutoff_distance is not None:
+                for viewer in  alignment.viewers:
+                    for ref_atom, i in zip(pair_ref_atoms, columns):
                         region_info[ref_atom] = (viewer, i)
 
             if verbose:
@@ -668,6 +634,317 @@ def match(session, chain_pairing, match_items, matrix, alg, gap_open, gap_extend
     _dm_cleanup = []
     return ret_vals
 
+def match_all_pairs(session, structures, matrix, alg, gap_open, gap_extend, *, cutoff_distance=None,
+        domain_residues=None, move=False, verbose=defaults['verbose_logging'], nthread=None,
+        ss_matrix=defaults["ss_scores"], ss_fraction=defaults["ss_mixture"],
+        gap_open_helix=defaults["helix_open"], gap_open_strand=defaults["strand_open"],
+        gap_open_other=defaults["other_open"], compute_ss=defaults["compute_ss"],
+        keep_computed_ss=defaults['overwrite_ss']):
+    """Superimpose every pair of 'structures' using the best-aligning chain pairing (as
+       with CP_BEST_BEST) and return the scores/RMSDs as matrices.
+
+       Chain sequences, secondary structure and principal-atom coordinates are
+       extracted once per structure, and the pairwise sequence alignments and fits
+       are then run in 'nthread' threads (default: half the number of CPUs).  The
+       structures are not moved unless 'move' is True, in which case each structure
+       is superimposed onto the first structure.
+
+       Returns a dictionary:
+       {
+         "structures": list of the structures, in matrix order
+         "score": N x N float32 array of sequence-alignment scores
+         "final RMSD": N x N float32 array of RMSDs after iteration pruning
+         "full RMSD": N x N float32 array of RMSDs across all paired residues
+         "final pairs": N x N int32 array of the number of pairs after pruning
+         "full pairs": N x N int32 array of the number of paired residues
+       }
+       Pairs that could not be superimposed have RMSDs of NaN.  The arrays are symmetric.
+
+       The other arguments are as for match().
+    """
+    structures = list(structures)
+    if len(structures) < 2:
+        raise UserError("Need at least two structures to compute all-pairs matching")
+    alg, alg_name = _normalize_alg(alg)
+    if ss_fraction is False:
+        ss_fraction = None
+
+    from chimerax.sim_matrices import compatible_matrix_names
+    chains = []
+    cross_compatible = None
+    for s in structures:
+        s_chains = check_domain_matching(s.chains, domain_residues)
+        if not s_chains:
+            raise LimitationError("%s contains no nucleic or amino acid chains to match" % s)
+        compatible = set()
+        for chain in s_chains:
+            compatible.update(compatible_matrix_names(chain, session.logger))
+        cross_compatible = compatible if cross_compatible is None else cross_compatible & compatible
+        chains.append(s_chains)
+    if not cross_compatible:
+        raise UserError("No matrix compatible with all structures")
+    if matrix not in cross_compatible:
+        if len(cross_compatible) == 1:
+            compatible_matrix = list(cross_compatible)[0]
+            session.logger.info("Using %s matrix instead of %s for matching"
+                % (compatible_matrix, matrix))
+            matrix = compatible_matrix
+        else:
+            raise UserError("Not all structures are compatible with %s similarity matrix" % matrix)
+    from chimerax import sim_matrices
+    similarity_matrix = sim_matrices.matrix(matrix, session.logger)
+
+    # gather everything that needs the structures (rather than just numbers/strings)
+    # before starting the threads
+    dssp_cache = {}
+    try:
+        if ss_fraction is not None and compute_ss:
+            compute_missing_ss([ch for s_chains in chains for ch in s_chains], dssp_cache,
+                keep_computed_ss)
+        chain_info = [[_AllPairsChain(ch) for ch in s_chains] for s_chains in chains]
+    finally:
+        if not keep_computed_ss:
+            for s, ss_info in dssp_cache.items():
+                ss_ids, ss_types = ss_info
+                s.residues.ss_ids = ss_ids
+                s.residues.ss_types = ss_types
+                s.ss_change_notify = True
+
+    if alg == "sw" and ss_fraction is not None:
+        # account for missing structure (blank SS letter)
+        ss_matrix = ss_matrix.copy()
+        for let in "HSO ":
+            ss_matrix[(let, ' ')] = 0.0
+            ss_matrix[(' ', let)] = 0.0
+
+    def match_pair(i, j):
+        best = None
+        for ref_info in chain_info[i]:
+            for match_info in chain_info[j]:
+                if alg == "nw":
+                    from chimerax.alignment_algs import NeedlemanWunsch
+                    score, pairs = NeedlemanWunsch.nw(ref_info, match_info,
+                        score_gap=-gap_extend, score_gap_open=0-gap_open,
+                        similarity_matrix=similarity_matrix, ss_matrix=ss_matrix,
+                        ss_fraction=ss_fraction, gap_open_helix=-gap_open_helix,
+                        gap_open_strand=-gap_open_strand, gap_open_other=-gap_open_other)
+                else:
+                    score, pairs = _sw_pairs(ref_info, match_info, similarity_matrix,
+                        gap_open, gap_extend, ss_matrix, ss_fraction,
+                        gap_open_helix, gap_open_strand, gap_open_other)
+                if best is None or score > best[0]:
+                    best = (score, ref_info, match_info, pairs)
+        score, ref_info, match_info, pairs = best
+        ref_xyz, match_xyz = _paired_coords(ref_info, match_info, pairs)
+        return (i, j, score) + _fit_pair(match_xyz, ref_xyz, cutoff_distance)
+
+    from time import time
+    t0 = time()
+    n = len(structures)
+    session.logger.status("Matchmaker: computing %d structure pairs" % (n * (n-1) // 2))
+    from chimerax.core.threadq import apply_to_list
+    results = apply_to_list(match_pair, [(i, j) for i in range(n) for j in range(i+1, n)], nthread)
+
+    from numpy import zeros, full, nan, float32, int32
+    scores = zeros((n, n), float32)
+    final_rmsds = full((n, n), nan, float32)
+    full_rmsds = full((n, n), nan, float32)
+    final_pairs = zeros((n, n), int32)
+    full_pairs = zeros((n, n), int32)
+    for i in range(n):
+        final_rmsds[i,i] = full_rmsds[i,i] = 0.0
+    ref_transforms = {}
+    for i, j, score, rmsd, full_rmsd, num_final, num_full, xf in results:
+        scores[i,j] = scores[j,i] = score
+        final_rmsds[i,j] = final_rmsds[j,i] = rmsd
+        full_rmsds[i,j] = full_rmsds[j,i] = full_rmsd
+        final_pairs[i,j] = final_pairs[j,i] = num_final
+        full_pairs[i,j] = full_pairs[j,i] = num_full
+        if i == 0 and xf is not None:
+            ref_transforms[structures[j]] = xf
+
+    logger = session.logger
+    from math import isnan
+    num_failed = sum([isnan(r[3]) for r in results])
+    if verbose is not None:
+        logger.info("Matchmaker all-pairs (%s, %s): %d structures, %d pairs in %.2f seconds"
+            % (alg_name, matrix, n, len(results), time() - t0))
+        if num_failed:
+            logger.warning("%d pairs had fewer than 3 residues aligned"
+                " or failed to satisfy the iteration threshold" % num_failed)
+    if move:
+        for s, xf in ref_transforms.items():
+            s.scene_position = xf * s.scene_position
+    return {
+        "structures": structures,
+        "score": scores,
+        "final RMSD": final_rmsds,
+        "full RMSD": full_rmsds,
+        "final pairs": final_pairs,
+        "full pairs": full_pairs,
+    }
+
+def save_all_pairs(path, results):
+    """Save the results of match_all_pairs() to 'path'.  A path ending in .npz
+       produces a NumPy archive of the matrices (plus the model ID strings); otherwise
+       a comma-separated table with one row per structure pair is written.
+    """
+    structures = results["structures"]
+    ids = ['#' + s.id_string for s in structures]
+    keys = ["score", "final RMSD", "full RMSD", "final pairs", "full pairs"]
+    if path.endswith('.npz'):
+        import numpy
+        numpy.savez_compressed(path, models=numpy.array(ids),
+            **dict([(k.replace(' ', '_'), results[k]) for k in keys]))
+        return
+    n = len(structures)
+    with open(path, 'w') as f:
+        print("ref,match,%s" % ",".join([k.replace(' ', '_') for k in keys]), file=f)
+        for i in range(n):
+            for j in range(i+1, n):
+                print("%s,%s,%s" % (ids[i], ids[j],
+                    ",".join([str(results[k][i,j]) for k in keys])), file=f)
+
+class _AllPairsChain:
+    """Numbers/strings needed to match a chain, extracted once so that pair matching
+       can run in threads without touching the structure.  Acts enough like a Sequence
+       for NeedlemanWunsch.nw().
+    """
+    def __init__(self, chain):
+        self.characters = chain.characters
+        self.ss_types = "".join([chain.ss_type(i) or ' ' for i in range(len(chain))])
+        from numpy import full, nan, float64, array
+        self.xyz = full((len(chain), 3), nan, float64)
+        self.p_xyz = self.xyz.copy()
+        names = []
+        for i, r in enumerate(chain.residues):
+            pa = r.principal_atom if r else None
+            names.append(pa.name if pa else '')
+            if pa:
+                self.xyz[i] = pa.scene_coord
+                p = pa if pa.name == "P" else r.find_atom("P")
+                if p:
+                    self.p_xyz[i] = p.scene_coord
+        self.principal_names = array(names)
+
+    def __len__(self):
+        return len(self.characters)
+
+    def ss_type(self, i):
+        return self.ss_types[i]
+
+def _sw_pairs(ref_info, match_info, similarity_matrix, gap_open, gap_extend, ss_matrix, ss_fraction,
+        gap_open_helix, gap_open_strand, gap_open_other):
+    from chimerax.alignment_algs import SmithWaterman
+    score, alignment = SmithWaterman.align(ref_info.characters, match_info.characters,
+        similarity_matrix, float(gap_open), float(gap_extend), gap_char=".",
+        ss_matrix=(None if ss_fraction is None else ss_matrix),
+        ss_fraction=(0.0 if ss_fraction is None else ss_fraction),
+        gap_open_helix=float(gap_open_helix), gap_open_strand=float(gap_open_strand),
+        gap_open_other=float(gap_open_other), ss1=ref_info.ss_types, ss2=match_info.ss_types)
+    # Smith-Waterman may not be entirety of sequences...
+    pos = []
+    for info, aligned in zip((ref_info, match_info), alignment):
+        ungapped = aligned.replace('.', '')
+        offset = info.characters.find(ungapped)
+        if offset < 0:
+            raise ValueError("Smith-Waterman result not a subsequence of original sequence")
+        pos.append(offset)
+    pairs = []
+    for c1, c2 in zip(*alignment):
+        if c1 != '.' and c2 != '.':
+            pairs.append(tuple(pos))
+        if c1 != '.':
+            pos[0] += 1
+        if c2 != '.':
+            pos[1] += 1
+    return score, pairs
+
+def _paired_coords(ref_info, match_info, pairs):
+    from numpy import array, int32, isnan
+    if not pairs:
+        return ref_info.xyz[:0], match_info.xyz[:0]
+    ri, mi = array(pairs, int32).transpose()
+    ref_xyz, match_xyz = ref_info.xyz[ri], match_info.xyz[mi]
+    # nucleic P-only trace vs. full nucleic
+    p_only = ref_info.principal_names[ri] != match_info.principal_names[mi]
+    if p_only.any():
+        ref_xyz[p_only] = ref_info.p_xyz[ri[p_only]]
+        match_xyz[p_only] = match_info.p_xyz[mi[p_only]]
+    keep = ~(isnan(ref_xyz[:,0]) | isnan(match_xyz[:,0]))
+    return ref_xyz[keep], match_xyz[keep]
+
+def _fit_pair(match_xyz, ref_xyz, cutoff_distance):
+    """Returns RMSD, full RMSD, number of final pairs, number of pairs and the transform
+       placing the match coordinates onto the reference coordinates.
+    """
+    from math import nan, sqrt
+    num_full = len(match_xyz)
+    if num_full < 3:
+        return nan, nan, 0, num_full, None
+    from chimerax.std_commands.align import align_and_prune, IterationError
+    from chimerax.geometry import align_points
+    if cutoff_distance is None:
+        xf, rmsd = align_points(match_xyz, ref_xyz)
+        return rmsd, rmsd, num_full, num_full, xf
+    try:
+        xf, rmsd, indices = align_and_prune(match_xyz, ref_xyz, cutoff_distance)
+    except IterationError:
+        return nan, nan, 0, num_full, None
+    dxyz = xf*match_xyz - ref_xyz
+    full_rmsd = sqrt((dxyz*dxyz).sum() / num_full)
+    return rmsd, full_rmsd, len(indices), num_full, xf
+
+def _normalize_alg(alg):
+    alg = alg.lower()
+    if alg == "nw" or alg.startswith("needle"):
+        return "nw", "Needleman-Wunsch"
+    if alg =="sw" or alg.startswith("smith"):
+        return "sw", "Smith-Waterman"
+    raise ValueError("Unknown sequence alignment algorithm: %s" % alg)
+
+def aligned_principal_atoms(s1, s2, skip=()):
+    """Return lists of the paired reference and match principal atoms for the aligned
+       sequences 's1' and 's2', and the alignment columns that each pair came from.
+       Residues in 'skip' are not used.
+    """
+    ref_atoms = []
+    match_atoms = []
+    columns = []
+    residues1 = s1.residues
+    residues2 = s2.residues
+    for i in range(len(s1)):
+        if s1[i] == "." or s2[i] == ".":
+            continue
+        ref_res = residues1[s1.gapped_to_ungapped(i)]
+        if not ref_res:
+            continue
+        ref_atom = ref_res.principal_atom
+        if not ref_atom:
+            continue
+        match_res = residues2[s2.gapped_to_ungapped(i)]
+        if not match_res:
+            continue
+        match_atom = match_res.principal_atom
+        if not match_atom:
+            continue
+        if ref_res in skip or match_res in skip:
+            continue
+        if ref_atom.name != match_atom.name:
+            # nucleic P-only trace vs. full nucleic
+            if ref_atom.name != "P":
+                ref_atom = ref_atom.residue.find_atom("P")
+                if not ref_atom:
+                    continue
+            else:
+                match_atom = match_atom.residue.find_atom("P")
+                if not match_atom:
+                    continue
+        ref_atoms.append(ref_atom)
+        match_atoms.append(match_atom)
+        columns.append(i)
+    return ref_atoms, match_atoms, columns
+
 def cmd_match(session, match_atoms, to=None, pairing=defaults["chain_pairing"],
         alg=defaults["alignment_algorithm"], verbose=defaults['verbose_logging'], bring=None,
         ss_fraction=defaults["ss_mixture"], matrix=defaults["matrix"], gap_open=defaults["gap_open"],
@@ -675,6 +952,7 @@ def cmd_match(session, match_atoms, to=None, pairing=defaults["chain_pairing"],
         cutoff_distance=defaults["iter_cutoff"], gap_extend=defaults["gap_extend"],
         show_alignment=defaults['show_alignment'], compute_s_s=defaults["compute_ss"],
         keep_computed_s_s=defaults['overwrite_ss'], report_matrix=False,
+        all_pairs=False, all_pairs_file=None, move=False,
         mat_h_h=default_ss_matrix[('H', 'H')],
         mat_s_s=default_ss_matrix[('S', 'S')],
         mat_o_o=default_ss_matrix[('O', 'O')],
@@ -710,6 +988,13 @@ def cmd_match(session, match_atoms, to=None, pairing=defaults["chain_pairing"],
         matches = match_atoms.structures.unique()
     if not matches:
         raise UserError("No molecules/chains to match specified")
+    if all_pairs:
+        if pairing != CP_BEST_BEST:
+            raise UserError("'allPairs' matching requires the best-best (bb) chain pairing")
+        if bring is not None:
+            raise UserError("'bring' option cannot be used with 'allPairs'")
+    elif all_pairs_file is not None:
+        raise UserError("'allPairsFile' option requires 'allPairs true'")
     # the .subtract() method of Collections does not preserve order (as of 10/28/16),
     # so "subtract" by hand...
     refs = [r for r in refs if r not in matches]
@@ -753,6 +1038,17 @@ def cmd_match(session, match_atoms, to=None, pairing=defaults["chain_pairing"],
     ss_matrix[('H', 'S')] = ss_matrix[('S', 'H')] = float(mat_h_s)
     ss_matrix[('H', 'O')] = ss_matrix[('O', 'H')] = float(mat_h_o)
     ss_matrix[('S', 'O')] = ss_matrix[('O', 'S')] = float(mat_s_o)
+    if all_pairs:
+        structures = [refs[0]] + [m for m in matches]
+        results = match_all_pairs(session, structures, matrix, alg, gap_open, gap_extend,
+            cutoff_distance=cutoff_distance, domain_residues=match_atoms.residues.unique()
+            | ref_atoms.residues.unique(), move=move, verbose=verbose,
+            ss_fraction=ss_fraction, ss_matrix=ss_matrix,
+            gap_open_helix=hgap, gap_open_strand=sgap, gap_open_other=ogap,
+            compute_ss=compute_s_s, keep_computed_ss=keep_computed_s_s)
+        if all_pairs_file is not None:
+            save_all_pairs(all_pairs_file, results)
+        return results
     ret_vals = match(session, pairing, match_items, matrix, alg, gap_open, gap_extend,
         ss_fraction=ss_fraction, ss_matrix=ss_matrix,
         cutoff_distance=cutoff_distance, show_alignment=show_alignment, bring=bring,
@@ -806,7 +1102,7 @@ def register_command(logger):
         return
     _registered = True
     from chimerax.core.commands import CmdDesc, register, FloatArg, StringArg, \
-        BoolArg, NoneArg, TopModelsArg, create_alias, Or, DynamicEnum
+        BoolArg, NoneArg, TopModelsArg, create_alias, Or, DynamicEnum, SaveFileNameArg
     # use OrderedAtomsArg so that /A-F come out in the expected order even if not ordered that way
     # internally [#7577]
     from chimerax.atomic import OrderedAtomsArg
@@ -822,7 +1118,8 @@ def register_command(logger):
             ('bring', TopModelsArg), ('show_alignment', BoolArg), ('compute_s_s', BoolArg),
             ('mat_h_h', FloatArg), ('mat_s_s', FloatArg), ('mat_o_o', FloatArg), ('mat_h_s', FloatArg),
             ('mat_h_o', FloatArg), ('mat_s_o', FloatArg), ('keep_computed_s_s', BoolArg),
-            ('report_matrix', BoolArg)],
+            ('report_matrix', BoolArg), ('all_pairs', BoolArg),
+            ('all_pairs_file', SaveFileNameArg), ('move', BoolArg)],
         synopsis = 'Align atomic structures using sequence alignment'
     )
     register('matchmaker', desc, cmd_match, logger=logger)
@@ -104,6 +104,9 @@ def _rdisplayed(r):
 
 
 def write_mmcif(session, path, *, models=None, rel_model=None, selected_only=False, displayed_only=False, fixed_width=True, best_guess=False, all_coordsets=False, computed_sheets=False):
+    # The file is written (and compressed if the path ends in .gz, etc.) in a
+    # background thread while the tables are formatted
+    from chimerax.io import open_threaded_output
     from chimerax.atomic import Structure
     if models is None:
         models = session.models.list(type=Structure)
@@ -138,7 +141,7 @@ def write_mmcif(session, path, *, models=None, rel_model=None, selected_only=Fal
         for m in models:
             used_data_names = set()
             file_name = path.replace("[ID]", m.id_string).replace("[NAME]", m.name)
-            with open(file_name, 'w', encoding='utf-8', newline='\n') as f:
+            with open_threaded_output(file_name) as f:
                 f.write(MMCIF_PREAMBLE)
                 save_structure(session, f, [m], [xforms[m]], used_data_names, selected_only, displayed_only, fixed_width, best_guess, all_coordsets, computed_sheets)
         return
@@ -165,7 +168,7 @@ def write_mmcif(session, path, *, models=None, rel_model=None, selected_only=Fal
         is_ensemble[g] = all(_same_chains(chains, m.chains) for m in models[1:])
 
     used_data_names = set()
-    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+    with open_threaded_output(path) as f:
         f.write(MMCIF_PREAMBLE)
         for g, models in grouped.items():
             if is_ensemble[g]:
@@ -235,6 +238,114 @@ ChimeraX_software_info = {
 del system
 
 
+class _StreamingLoop:
+    """Output a CIF loop with very many rows, formatting a chunk of rows at a time.
+
+    Rows are added with add_row() and the table is completed with finish().  Tables that
+    fit in a single chunk are output exactly as CIFTable would.  Otherwise if 'direct' is
+    true and fixed-width columns are not needed, formatted chunks go straight to the
+    file (so no other table may be written before finish() is called); else they are
+    spooled to a temporary file (which stays in memory unless large) until finish(),
+    when the final column widths are known.
+    """
+
+    FIELD_SEP = '\x1f'
+    ROW_SEP = '\x1e'
+
+    def __init__(self, table_name, tags, file, fixed_width, *, direct=False, chunk_rows=100000):
+        self.table_name = table_name
+        self.tags = tags
+        self.file = file
+        self.fixed_width = fixed_width
+        self.direct = direct and not fixed_width
+        self.chunk_rows = chunk_rows
+        self.rows = []
+        self.widths = [0] * len(tags)
+        self.spool = None
+        self.started = False
+
+    def add_row(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.chunk_rows:
+            self._flush_rows()
+
+    def finish(self):
+        if not self.started and self.spool is None:
+            table = mmcif.CIFTable(self.table_name, self.tags, flattened(self.rows))
+            table.print(self.file, fixed_width=self.fixed_width)
+            self.rows = []
+            return
+        self._flush_rows()
+        if self.spool is not None:
+            self._start()
+            widths = self.widths
+            bad_fixed_width = self.fixed_width and sys.maxsize in widths
+            if self.fixed_width and not bad_fixed_width:
+                fmt = ''.join(['%%-%ds ' % w for w in widths])
+            first = True
+            self.spool.seek(0)
+            remainder = ''
+            while True:
+                text = self.spool.read(4194304)
+                if not text:
+                    break
+                rows = (remainder + text).split(self.ROW_SEP)
+                remainder = rows.pop()
+                lines = []
+                for row in rows:
+                    data = row.split(self.FIELD_SEP)
+                    if not self.fixed_width:
+                        lines.append(' '.join(data))
+                    elif bad_fixed_width:
+                        if first:
+                            first = False
+                            lines.append(data[0])
+                            lines.append(' '.join(data[1:]))
+                        else:
+                            lines.append(' '.join(data))
+                    else:
+                        lines.append(fmt % tuple(data))
+                lines.append('')
+                self.file.write('\n'.join(lines))
+            self.spool.close()
+            self.spool = None
+        print('#', file=self.file)  # PDBx/mmCIF style
+
+    def _start(self):
+        if self.started:
+            return
+        self.started = True
+        print('loop_', file=self.file)
+        for t in self.tags:
+            print(f'_{self.table_name}.{t}', file=self.file)
+
+    def _flush_rows(self):
+        if not self.rows:
+            return
+        quote = mmcif.quote
+        rows = [[quote(x) for x in row] for row in self.rows]
+        self.rows = []
+        if self.direct:
+            self._start()
+            self.file.write(''.join([' '.join(data) + '\n' for data in rows]))
+            return
+        if self.fixed_width:
+            widths = self.widths
+            for i, column in enumerate(zip(*rows)):
+                try:
+                    w = max([len(f) if f[0] != '\n' else sys.maxsize for f in column])
+                except Exception:
+                    w = sys.maxsize
+                if w > widths[i]:
+                    widths[i] = w
+        if self.spool is None:
+            from tempfile import SpooledTemporaryFile
+            self.spool = SpooledTemporaryFile(max_size=67108864, mode='w+',
+                encoding='utf-8', newline='\n')
+        fsep, rsep = self.FIELD_SEP, self.ROW_SEP
+        self.spool.write(''.join([fsep.join(data) + rsep for data in rows]))
+
+
 def _mmcif_chain_id(i):
     # want A..9, AA..99
     assert i > 0
@@ -531,24 +642,24 @@ def save_structure(session, file, models, xforms, used_data_names, selected_only
     atom_type.print(file, fixed_width=fixed_width)
     del atom_type_data, atom_type
 
-    atom_site_data = []
-    atom_site = mmcif.CIFTable("atom_site", [
+    # atom_site (and atom_site_anisotrop) can be huge, so they are formatted
+    # and output a chunk of rows at a time
+    atom_site = _StreamingLoop("atom_site", [
         'group_PDB', 'id', 'type_symbol', 'label_atom_id', 'label_alt_id',
         'label_comp_id', 'label_asym_id', 'label_entity_id', 'label_seq_id',
         'Cartn_x', 'Cartn_y', 'Cartn_z',
         'auth_asym_id', 'auth_seq_id', 'pdbx_PDB_ins_code',
         'occupancy', 'B_iso_or_equiv', 'pdbx_PDB_model_num'
-    ], atom_site_data)
-    atom_site_anisotrop_data = []
-    atom_site_anisotrop = mmcif.CIFTable("atom_site_anisotrop", [
+    ], file, fixed_width, direct=True)
+    atom_site_anisotrop = _StreamingLoop("atom_site_anisotrop", [
         'id', 'type_symbol',
         'U[1][1]', 'U[2][2]', 'U[3][3]',
         'U[1][2]', 'U[1][3]', 'U[2][3]',
-    ], atom_site_anisotrop_data)
+    ], file, fixed_width)
     serial_num = 0
 
     def atom_site_residue(residue, seq_id, asym_id, entity_id, model_num, xform):
-        nonlocal serial_num, residue_info, atom_site_data, atom_site_anisotrop_data
+        nonlocal serial_num, residue_info
         residue_info[residue] = (asym_id, seq_id)
         atoms = residue.atoms
         rname = residue.name
@@ -582,14 +693,14 @@ def save_structure(session, file, models, xforms, used_data_names, selected_only
                 occ = "%.2f" % atom.occupancy
                 bfact = "%.2f" % atom.bfactor
                 serial_num += 1
-                atom_site_data.append((
+                atom_site.add_row((
                     group, serial_num, elem, aname, alt_loc, rname, asym_id,
                     entity_id, seq_id, *xyz, cid, rnum, rins, occ, bfact,
                     model_num))
                 u6 = atom.aniso_u6
                 if u6 is not None and len(u6) > 0:
                     u6 = ['%.4f' % f for f in u6]
-                    atom_site_anisotrop_data.append((serial_num, elem, u6))
+                    atom_site_anisotrop.add_row((serial_num, elem, *u6))
             if alt_loc != '.':
                 atom.set_alt_loc(original_alt_loc, False)
 
@@ -623,11 +734,9 @@ def save_structure(session, file, models, xforms, used_data_names, selected_only
         for m, xform, model_num in zip(models, xforms, range(1, sys.maxsize)):
             do_atom_site_model(m, xform, model_num)
 
-    atom_site_data[:] = flattened(atom_site_data)
-    atom_site.print(file, fixed_width=fixed_width)
-    atom_site_anisotrop_data[:] = flattened(atom_site_anisotrop_data)
-    atom_site_anisotrop.print(file, fixed_width=fixed_width)
-    # del atom_site_data, atom_site, atom_site_anisotrop_data, atom_site_anisotrop  # not in cython
+    atom_site.finish()
+    atom_site_anisotrop.finish()
+    # del atom_site, atom_site_anisotrop  # not in cython
 
     struct_conn_data = []
     struct_conn = mmcif.CIFTable("struct_conn", [
@@ -173,6 +173,15 @@ class ModelPanel(ToolInstance):
         reasons = changes.atom_reasons()
         if "color changed" in reasons or 'display changed' in reasons:
             self._initiate_fill_tree(countdown=3)
+        elif 'active_coordset changed' in changes.structure_reasons():
+            # only the name tooltip of "mseries coordsets" structures changes
+            posed = set(s for s in changes.modified_structures()
+                        if getattr(s, 'coordset_attributes', None))
+            if posed:
+                for item in self._items:
+                    model = getattr(item, '_model', None)
+                    if model in posed:
+                        self._set_name_tooltip(item, model, item.text(self.NAME_COLUMN))
 
     def _ensure_id_width(self, *args):
         # ensure that the newly visible model id isn't just "..."
@@ -296,8 +305,7 @@ class ModelPanel(ToolInstance):
                     but.color_pause.connect(log_delayed_cmd)
                     but.set_color(bg_color)
                     self.tree.setItemWidget(item, self.COLOR_COLUMN, but)
-            if len(name) > 30:
-                item.setToolTip(self.NAME_COLUMN, name)
+            self._set_name_tooltip(item, model, name)
                 
                     
                 
@@ -400,6 +408,24 @@ class ModelPanel(ToolInstance):
     def _model_color(self, model):
         return model.overall_color
 
+    def _set_name_tooltip(self, item, model, name):
+        pose = self._pose_name(model)
+        if pose is not None:
+            item.setToolTip(self.NAME_COLUMN, "%s, %s" % (name, pose))
+        elif len(name) > 30:
+            item.setToolTip(self.NAME_COLUMN, name)
+
+    def _pose_name(self, model):
+        # structures combined by "mseries coordsets" have a name for each coordset
+        table = getattr(model, 'coordset_attributes', None)
+        if not table or 'name' not in table:
+            return None
+        ids = list(model.coordset_ids)
+        if model.active_coordset_id not in ids:
+            return None
+        i = ids.index(model.active_coordset_id)
+        return "pose %d of %d %s" % (i+1, len(ids), table['name'][i])
+
     def _previous_model(self):
         self._show_next_model(-1)
 
@@ -0,0 +1,226 @@
+# vim: set expandtab ts=4 sw=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Combine a series of structures with the same atoms (NMR ensemble, docking
+# poses) into one structure with a coordinate set for each model.  The model
+# names and scores are kept in a table with one row per coordinate set.
+#
+def mseries_coordsets(session, models, name = None, close = True):
+    '''Combine structures with identical atoms into one structure with multiple coordinate sets.
+
+    Parameters
+    ----------
+    models : list of Model
+      Structures to combine.  If one model is given its child models are used.
+    name : string
+      Name of the combined structure.  Default is the name of the first structure.
+    close : bool
+      Whether to close the original structures.  Default true.
+    '''
+    mlist = models[0].child_models() if len(models) == 1 else models
+    from chimerax.atomic import Structure
+    structures = [m for m in mlist if isinstance(m, Structure)]
+    if len(structures) < 2:
+        from chimerax.core.errors import UserError
+        raise UserError('mseries coordsets: Need at least 2 structures, got %d' % len(structures))
+
+    xyzs = structure_coordinates(structures)
+    table = coordset_table(structures)
+
+    s0 = structures[0]
+    combined = s0.copy(s0.name if name is None else name)
+    combined.add_coordsets(xyzs, replace = True)
+    combined.active_coordset_id = combined.coordset_ids[0]
+    combined.position = s0.scene_position
+    combined.coordset_attributes = table
+    _register_coordset_attributes(session)
+    report_pose_changes(session)
+
+    if close:
+        session.models.close(structures)
+    session.models.add([combined])
+
+    msg = ('Combined %d structures into %s with %d coordinate sets, %d atoms'
+           % (len(structures), combined.name_with_id(), len(structures), combined.num_atoms))
+    cols = [c for c in table.keys() if c != 'name']
+    if cols:
+        msg += ', pose attributes %s' % ', '.join(cols)
+    session.logger.status(msg, log = True)
+    return combined
+
+# -----------------------------------------------------------------------------
+# Coordinates of each structure in the scene coordinate system of the first
+# structure, with atoms in the order of the first structure.
+#
+def structure_coordinates(structures):
+    s0 = structures[0]
+    atoms0 = s0.atoms
+    from numpy import empty, float64
+    xyzs = empty((len(structures), len(atoms0), 3), float64)
+    to_s0 = s0.scene_position.inverse()
+    keys0 = None
+    for i, s in enumerate(structures):
+        atoms = s.atoms
+        if s is not s0 and not _same_atom_order(atoms0, atoms):
+            if keys0 is None:
+                keys0 = _atom_keys(atoms0)
+            atoms = atoms[_atom_order(keys0, atoms, s0, s)]
+        if s.num_bonds != s0.num_bonds:
+            _topology_error(s0, s, 'has %d bonds, %s has %d'
+                            % (s0.num_bonds, s.name_with_id(), s.num_bonds))
+        xyzs[i] = (to_s0 * s.scene_position).transform_points(atoms.coords)
+    return xyzs
+
+def _same_atom_order(atoms0, atoms):
+    if len(atoms) != len(atoms0):
+        return False
+    r0, r = atoms0.residues, atoms.residues
+    return ((atoms.names == atoms0.names).all()
+            and (atoms.element_numbers == atoms0.element_numbers).all()
+            and (r.numbers == r0.numbers).all()
+            and (r.names == r0.names).all()
+            and (r.chain_ids == r0.chain_ids).all()
+            and (r.insertion_codes == r0.insertion_codes).all())
+
+def _atom_keys(atoms):
+    r = atoms.residues
+    from numpy import array
+    return array(['%s %d%s %s %s' % k for k in zip(r.chain_ids, r.numbers, r.insertion_codes,
+                                                   r.names, atoms.names)])
+
+def _atom_order(keys0, atoms, s0, s):
+    '''Index of the atom of structure s matching each atom of structure s0.'''
+    if len(atoms) != len(keys0):
+        _topology_error(s0, s, 'has %d atoms, %s has %d'
+                        % (len(keys0), s.name_with_id(), len(atoms)))
+    keys = _atom_keys(atoms)
+    o0, o = keys0.argsort(kind = 'stable'), keys.argsort(kind = 'stable')
+    sk0, sk = keys0[o0], keys[o]
+    differ = (sk0 != sk).nonzero()[0]
+    if len(differ) > 0:
+        _topology_error(s0, s, 'atom %s has no match in %s'
+                        % (sk0[differ[0]], s.name_with_id()))
+    if (sk0[1:] == sk0[:-1]).any():
+        _topology_error(s0, s, 'has atoms with the same chain, residue and atom name'
+                        ' so atoms of %s cannot be matched' % s.name_with_id())
+    from numpy import empty, int64
+    order = empty((len(keys0),), int64)
+    order[o0] = o
+    return order
+
+def _topology_error(s0, s, detail):
+    from chimerax.core.errors import UserError
+    raise UserError('mseries coordsets: Structures %s and %s do not have the same atoms, %s %s'
+                    % (s0.name_with_id(), s.name_with_id(), s0.name_with_id(), detail))
+
+# -----------------------------------------------------------------------------
+# Per-coordinate set attributes are a dictionary mapping attribute name to a
+# list with a value for each coordinate set in coordset_ids order.  Docking
+# scores read by ViewDockX are included.
+#
+def coordset_table(structures):
+    table = {'name': [s.name for s in structures],
+             'model id': [s.id_string for s in structures]}
+    scores = [getattr(s, 'viewdockx_data', None) or {} for s in structures]
+    columns = []
+    for sc in scores:
+        for attr_name in sc.keys():
+            if attr_name not in table and attr_name not in columns:
+                columns.append(attr_name)
+    for attr_name in columns:
+        table[attr_name] = [sc.get(attr_name) for sc in scores]
+    return table
+
+def coordset_attribute_values(structure, coordset_id = None):
+    '''
+    Dictionary of attribute values for a coordinate set of a structure made by
+    mseries coordsets, or None if the structure has no per-coordset attributes.
+    Default is the active coordinate set.
+    '''
+    table = getattr(structure, 'coordset_attributes', None)
+    if not table:
+        return None
+    if coordset_id is None:
+        coordset_id = structure.active_coordset_id
+    ids = structure.coordset_ids
+    row = (ids == coordset_id).nonzero()[0]
+    if len(row) == 0:
+        return None
+    i = int(row[0])
+    return {attr_name: values[i] for attr_name, values in table.items() if i < len(values)}
+
+def pose_description(structure):
+    '''Text describing the active coordinate set and its attributes.'''
+    values = coordset_attribute_values(structure)
+    if values is None:
+        return None
+    ids = structure.coordset_ids
+    i = int((ids == structure.active_coordset_id).nonzero()[0][0])
+    desc = 'pose %d of %d' % (i+1, len(ids))
+    name = values.get('name')
+    if name:
+        desc += ' %s' % name
+    attrs = ['%s %s' % (attr_name, _format_value(v)) for attr_name, v in values.items()
+             if attr_name not in ('name', 'model id') and v is not None]
+    if attrs:
+        desc += ', ' + ', '.join(attrs)
+    return desc
+
+def _format_value(v):
+    return '%.5g' % v if isinstance(v, float) else str(v)
+
+def _register_coordset_attributes(session):
+    from chimerax.atomic import Structure
+    Structure.register_attr(session, 'coordset_attributes', 'Model Series')
+
+# -----------------------------------------------------------------------------
+# Show the pose name and attributes on the status line when the active
+# coordinate set changes, for example during coordset or mseries playback.
+#
+def report_pose_changes(session):
+    if getattr(session, '_pose_changes_handler', None) is not None:
+        return
+    from chimerax.atomic import get_triggers
+    session._pose_changes_handler = get_triggers().add_handler('changes', _pose_changes_cb)
+
+def _pose_changes_cb(trigger_name, changes):
+    if 'active_coordset changed' not in changes.structure_reasons():
+        return
+    for s in changes.modified_structures():
+        if s.deleted or not s.display:
+            continue
+        desc = pose_description(s)
+        if desc is not None:
+            s.session.logger.status('%s %s' % (s.name_with_id(), desc))
+
+# ------------------------------------------------------------------------------
+#
+def register_coordsets_command(logger):
+    from chimerax.core.commands import CmdDesc, register, TopModelsArg, StringArg, BoolArg
+    desc = CmdDesc(required = [('models', TopModelsArg)],
+                   keyword = [('name', StringArg),
+                              ('close', BoolArg)],
+                   synopsis = 'Combine structures with the same atoms into one structure with multiple coordinate sets.')
+    register('mseries coordsets', desc, mseries_coordsets, logger=logger)
@@ -35,7 +35,18 @@ def mseries(session, models, pause_frames = 10, loop = 1, step = 1):
       How many times to repeat playing through the models.  Default 1.
     step : integer
       Show every Nth model with N given by step, default 1.
+
+    A single structure with multiple coordinate sets and no child models,
+    for example made by mseries coordsets, plays its coordinate sets.
     '''
+    if _coordset_series(models):
+        from chimerax.std_commands.coordset import coordset
+        from .coordsets import report_pose_changes
+        report_pose_changes(session)
+        index_range = (1, None, step) if step > 0 else (-1, 1, step)
+        coordset(session, models, index_range, pause_frames = pause_frames, loop = loop)
+        return None
+
     mlist = models[0].child_models() if len(models) == 1 else models
     if mlist:
         msp = ModelSequencePlayer(mlist, pause_frames = pause_frames,
@@ -65,6 +76,14 @@ def mseries_slider(session, models, pause_frames = 10, step = 1, movie_framerate
     title : string
       Title shown at the top of the slider pane.
     '''
+    if _coordset_series(models):
+        from chimerax.std_commands.coordset import coordset_slider
+        from .coordsets import report_pose_changes
+        report_pose_changes(session)
+        coordset_slider(session, models, pause_frames = pause_frames,
+                        movie_framerate = movie_framerate)
+        return None
+
     mlist = models[0].child_models() if len(models) == 1 else models
     if mlist:
         mss = ModelSequenceSlider(session, mlist, pause_frames = pause_frames,
@@ -75,6 +94,15 @@ def mseries_slider(session, models, pause_frames = 10, step = 1, movie_framerate
 
     return mss
 
+# ------------------------------------------------------------------------------
+#
+def _coordset_series(models):
+    if len(models) != 1 or models[0].child_models():
+        return False
+    from chimerax.atomic import Structure
+    m = models[0]
+    return isinstance(m, Structure) and m.num_coordsets > 1
+
 # ------------------------------------------------------------------------------
 #
 def register_mseries_command(logger):
@@ -95,6 +123,9 @@ def register_mseries_command(logger):
                               ],
                    synopsis = 'Show slider to play through sequence of models.')
     register('mseries slider', desc, mseries_slider, logger=logger)
+
+    from .coordsets import register_coordsets_command
+    register_coordsets_command(logger)
     
 # -----------------------------------------------------------------------------
 #
@@ -451,31 +451,48 @@ compile_seqres(const Structure* s, std::vector<std::string>& seqres)
 
 class StringIOStream
 {
+    // Text is accumulated and handed to the Python 'write' method in large pieces,
+    // since a Python call per record dominates the time for big structures
+    static const std::string::size_type  FLUSH_SIZE = 1 << 20;
     PyObject* _string_io_write;
+    std::string _buffer;
     bool _good;
 public:
     StringIOStream(PyObject* string_io): _good(true) {
         _string_io_write = PyObject_GetAttrString(string_io, "write");
         if (_string_io_write == nullptr)
             throw std::logic_error("StringIO object has no 'write' attribute");
+        _buffer.reserve(FLUSH_SIZE + 256);
     }
-    virtual ~StringIOStream() { Py_DECREF(_string_io_write); }
+    virtual ~StringIOStream() { flush(); Py_DECREF(_string_io_write); }
     bool bad() const { return !_good; }
     bool good() const { return _good; }
-    void write_char(char c) {
-        char buf[2];
-        buf[0] = c;
-        buf[1] = '\0';
-        write_text(buf);
-    }
-    void write_text(const char* text) {
-        PyObject* py_text = PyUnicode_FromString(text);
+    void flush() {
+        if (_buffer.empty() || !_good)
+            return;
+        PyObject* py_text = PyUnicode_FromStringAndSize(_buffer.data(), _buffer.size());
+        _buffer.clear();
+        if (py_text == nullptr) {
+            _good = false;
+            return;
+        }
         auto result = PyObject_CallFunctionObjArgs(_string_io_write, py_text, nullptr);
+        Py_DECREF(py_text);
         if (result == nullptr)
             _good = false;
         else
             Py_DECREF(result);
     }
+    void write_char(char c) {
+        _buffer.push_back(c);
+        if (_buffer.size() >= FLUSH_SIZE)
+            flush();
+    }
+    void write_text(const char* text) {
+        _buffer.append(text);
+        if (_buffer.size() >= FLUSH_SIZE)
+            flush();
+    }
     StringIOStream& operator<<(const char* text) { write_text(text); return *this; }
     StringIOStream& operator<<(const PDB& p) { *this << p.c_str(); return *this; }
     StringIOStream& operator<<(const std::string& s) { *this << s.c_str(); return *this; }
@@ -503,6 +520,12 @@ public:
             delete _io_stream;
     }
     bool bad() const { return _use_fstream ? _fstream->bad() : _io_stream->bad(); }
+    void flush() {
+        if (_use_fstream)
+            _fstream->flush();
+        else
+            _io_stream->flush();
+    }
     bool good() const { return _use_fstream ? _fstream->good() : _io_stream->good(); }
     StreamDispatcher& operator<<(const char* text) {
         if (_use_fstream)
@@ -2436,6 +2459,7 @@ write_pdb_file(PyObject *, PyObject *args)
     write_pdb(structures, *out_stream, (bool)selected_only, (bool)displayed_only, xforms,
         (bool)all_coordsets, (bool)pqr, (bool)h36, poly_res_names, py_logger);
 
+    out_stream->flush();
     if (out_stream->bad()) {
         PyErr_SetString(PyExc_ValueError, "Problem writing output PDB file");
         delete out_stream;
@@ -145,7 +145,8 @@ def save_pdb(session, output, *, models=None, selected_only=False, displayed_onl
     """Write PDB data to a file.
 
     ``output`` is a file system path to a writable location.  It can contain the strings "[NAME]"
-    and/or "[ID]", which will be replaced with the model's name/id, respectively.
+    and/or "[ID]", which will be replaced with the model's name/id, respectively.  If it ends in
+    a compression suffix (e.g. ".gz"), the output is compressed as it is written.
 
     ``models`` is a list of models to output.  If not specified, all structure models will be output.
 
@@ -213,17 +214,25 @@ def save_pdb(session, output, *, models=None, selected_only=False, displayed_onl
     from . import _pdbio
     if polymeric_res_names is None:
         polymeric_res_names = _pdbio.standard_polymeric_res_names
+    def write_pdb_file(structures, file_name, xforms):
+        from chimerax.io import remove_compression_suffix, open_threaded_output
+        if remove_compression_suffix(file_name) == file_name:
+            _pdbio.write_pdb_file([s.cpp_pointer for s in structures], file_name, selected_only,
+                displayed_only, xforms, all_coordsets, pqr, (serial_numbering == "h36"),
+                polymeric_res_names, session.logger)
+        else:
+            # compress in a background thread as the records are produced
+            with open_threaded_output(file_name) as f:
+                _pdbio.write_pdb_file([s.cpp_pointer for s in structures], f, selected_only,
+                    displayed_only, xforms, all_coordsets, pqr, (serial_numbering == "h36"),
+                    polymeric_res_names, session.logger)
     file_per_model = "[NAME]" in output or "[ID]" in output
     if file_per_model:
         for m, xform in zip(models, xforms):
             file_name = output.replace("[ID]", m.id_string).replace("[NAME]", m.name)
-            _pdbio.write_pdb_file([m.cpp_pointer], file_name, selected_only,
-                displayed_only, [xform], all_coordsets,
-                pqr, (serial_numbering == "h36"), polymeric_res_names, session.logger)
+            write_pdb_file([m], file_name, [xform])
     else:
-        _pdbio.write_pdb_file([m.cpp_pointer for m in models], output, selected_only,
-            displayed_only, xforms, all_coordsets, pqr,
-            (serial_numbering == "h36"), polymeric_res_names, session.logger)
+        write_pdb_file(models, output, xforms)
 
 _pdb_sources = {
 #    "rcsb": "http://www.pdb.org/pdb/files/%s.pdb",
@@ -139,5 +139,16 @@ class _SegmentBundle(BundleAPI):
         if command_name == 'segmentation':
             from . import segment
             segment.register_segmentation_command(logger)
+        elif command_name == 'measure segmentstats':
+            from . import segstats
+            segstats.register_segment_stats_command(logger)
+
+    @staticmethod
+    def get_class(class_name):
+        # 'get_class' is called by session code to get class saved in a session
+        if class_name == 'SegmentationSurface':
+            from . import segsurf
+            return segsurf.SegmentationSurface
+        return None
 
 bundle_api = _SegmentBundle()
@@ -121,8 +121,13 @@ class SegmentationMapColor:
 #
 def _color_surface(surface, segmentation, attribute_name,
                    color = None, outside_color = None, step = None):
-    sstep = _voxel_limit_step(segmentation, subregion = 'all') if step is None else step
-    vs = _surface_vertex_segments(surface, segmentation, step=sstep)
+    from .segsurf import SegmentationSurface
+    if (isinstance(surface, SegmentationSurface) and surface.segmentation is segmentation
+        and surface.attribute_name == 'segment'):
+        vs = surface.vertex_segment_ids	# Exact segment ids recorded when computed.
+    else:
+        sstep = _voxel_limit_step(segmentation, subregion = 'all') if step is None else step
+        vs = _surface_vertex_segments(surface, segmentation, step=sstep)
     c = _attribute_colors(segmentation, attribute_name)
     if outside_color is None:
         # Preserve current vertex colors outside where attribute value is 0.
@@ -253,11 +258,20 @@ def _which_segments(segmentation, conditions):
 
     attribute_name = 'segment'
     max_seg_id = _maximum_segment_id(segmentation)
-    from numpy import arange, int32, logical_and
+    from numpy import arange, int32, logical_and, zeros
     group = arange(max_seg_id+1, dtype = int32)
     
     for condition in conditions:
-        if '=' in condition:
+        comparison = _parse_comparison(condition)
+        if comparison is not None:
+            # Segments with attribute value in a range ("volume>1000")
+            name, compare, value = comparison
+            av = _attribute_values(segmentation, name, allow_float = True)
+            keep = zeros((len(group),), bool)
+            nv = min(len(av), len(group))
+            keep[:nv] = compare(av[:nv], value)
+            group[~keep] = 0
+        elif '=' in condition:
             # All segments with attribute with specified value ("neuron_id=1")
             attribute_name, vals = condition.split('=', maxsplit = 1)
             av = _attribute_values(segmentation, attribute_name)
@@ -295,6 +309,27 @@ def _which_segments(segmentation, conditions):
 
     return group, attribute_name
 
+# -----------------------------------------------------------------------------
+#
+def _parse_comparison(condition):
+    '''
+    Parse an attribute comparison such as "volume>1000" or "map_mean<=0.5".
+    Return attribute name, comparison function and value, or None if the
+    condition is not a comparison.
+    '''
+    import operator
+    for op, func in (('>=', operator.ge), ('<=', operator.le),
+                     ('>', operator.gt), ('<', operator.lt)):
+        if op in condition:
+            name, value = condition.split(op, maxsplit = 1)
+            try:
+                v = float(value)
+            except ValueError:
+                from chimerax.core.errors import UserError
+                raise UserError('Require numeric value in "%s"' % condition)
+            return name.strip(), func, v
+    return None
+
 # -----------------------------------------------------------------------------
 #
 def _parse_integers(ids_string):
@@ -330,7 +365,7 @@ def _parse_integers(ids_string):
 def segmentation_surfaces(session, segmentations,
                           where = None, each = None, region = 'all', step = None,
                           color = None, smooth = False, smoothing_iterations = 10,
-                          smoothing_factor = 1.0):
+                          smoothing_factor = 1.0, show = None):
 
     if len(segmentations) == 0:
         from chimerax.core.errors import UserError
@@ -339,13 +374,20 @@ def segmentation_surfaces(session, segmentations,
     if color is not None:
         color = color.uint8x4()
 
+    if show is not None:
+        show_ids = _parse_integers(show)
+        if show_ids is None:
+            from chimerax.core.errors import UserError
+            raise UserError('segmentation surfaces: show option requires integer ids, got "%s"' % show)
+        show = show_ids
+
     surfaces = []
     for seg in segmentations:
         sstep = _voxel_limit_step(seg, region) if step is None else step
         segsurfs = calculate_segmentation_surfaces(seg, where=where, each=each,
                                                    region=region, step=sstep, color=color,
                                                    smooth=smooth, smoothing_iterations=smoothing_iterations,
-                                                   smoothing_factor=smoothing_factor)
+                                                   smoothing_factor=smoothing_factor, show=show)
         surfaces.extend(segsurfs)
 
         nsurf = len(segsurfs)
@@ -355,6 +397,14 @@ def segmentation_surfaces(session, segmentations,
         elif nsurf == 1:
             session.models.add(segsurfs)
 
+        from .segsurf import SegmentationSurface
+        if nsurf == 1 and isinstance(segsurfs[0], SegmentationSurface):
+            s = segsurfs[0]
+            session.logger.info('Created surface for %d of %d %ss, %d triangles, subsampled %s'
+                                % (len(s.shown_segment_ids), len(s.segment_ids), s.attribute_name,
+                                   len(s.triangles) if s.triangles is not None else 0,
+                                   _step_string(sstep)))
+            continue
         tcount = sum([len(s.triangles) for s in segsurfs])
         session.logger.info('Created %d segmentation surfaces, %d triangles, subsampled %s'
                             % (nsurf, tcount, _step_string(sstep)))
@@ -365,19 +415,32 @@ def segmentation_surfaces(session, segmentations,
 def calculate_segmentation_surfaces(seg, where = None, each = None,
                                     region = 'all', step = None, color = None,
                                     smooth = False, smoothing_iterations = 10,
-                                    smoothing_factor = 1.0):
-    # Warn if number of surfaces is large.
-    if where is None and each is None:
-        max_seg_id = _maximum_segment_id(seg)
-        if max_seg_id > 100:
-            from chimerax.core.errors import UserError
-            raise UserError('Segmentation %s (#%s) has %d segments (> 100).'
-                            ' To create surface for each segment use "each segment" option.'
-                            % (seg.name, seg.id_string, max_seg_id))
-
-    # Compute surfaces
+                                    smoothing_factor = 1.0, show = None):
     conditions = (where if where else []) + ([each] if each else [])
     group, attribute_name = _which_segments(seg, conditions)
+
+    # Determine surface coloring.
+    if color is None:
+        attr = None if attribute_name == 'segment' else attribute_name
+        colors = _attribute_colors(seg, attr).attribute_rgba
+
+    if each is None:
+        # Make one surface model for all segments computing segment
+        # surfaces in parallel, and only for segments that are shown.
+        from .segsurf import SegmentationSurface
+        s = SegmentationSurface(seg.name + ' surfaces', seg, group, attribute_name,
+                                region = region, step = step,
+                                colors = (None if color is not None else colors.copy()),
+                                color = color, smooth = smooth,
+                                smoothing_iterations = smoothing_iterations,
+                                smoothing_factor = smoothing_factor)
+        s.show_segments(s.segment_ids if show is None else show)
+        if s.triangles is None:
+            return []
+        s.name = '%s %d %ss' % (seg.name, len(s.segment_ids), attribute_name)
+        return [s]
+
+    # Compute surfaces
     matrix = seg.matrix(step = step, subregion = region)
     from . import segmentation_surfaces
     surfs = segmentation_surfaces(matrix, group)
@@ -396,50 +459,48 @@ def calculate_segmentation_surfaces(seg, where = None, each = None,
             smooth_vertex_positions(na, ta, sf, si)
         geom.append((region_id, va, na, ta))
 
-    # Determine surface coloring.
-    if color is None:
-        attr = None if attribute_name == 'segment' else attribute_name
-        colors = _attribute_colors(seg, attr).attribute_rgba
-        
-    # Create one or more surface models
+    # Create multiple surface models
     from chimerax.core.models import Surface
-    from chimerax.surface import combine_geometry_xvnt
     segsurfs = []
-    if each is None and len(geom) > 1:
-        # Combine multiple surfaces into one.
-        va, na, ta = combine_geometry_xvnt(geom)
-        name = '%s %d %ss' % (seg.name, len(geom), attribute_name)
+    for region_id, va, na, ta in geom:
+        name = '%s %s %d' % (seg.name, attribute_name, region_id)
         s = Surface(name, seg.session)
         s.clip_cap = True  # Cap surface when clipped
         s.set_geometry(va, na, ta)
-        if color is None:
-            color_counts = [(colors[region_id], len(sva)) for region_id, sva, sna, sta in geom]
-            s.vertex_colors = _vertex_colors(len(va), color_counts)
-        else:
-            s.color = color
+        s.color = colors[region_id] if color is None else color
         segsurfs.append(s)
-    else:
-        # Create multiple surface models
-        for region_id, va, na, ta in geom:
-            name = '%s %s %d' % (seg.name, attribute_name, region_id)
-            s = Surface(name, seg.session)
-            s.clip_cap = True  # Cap surface when clipped
-            s.set_geometry(va, na, ta)
-            s.color = colors[region_id] if color is None else color
-            segsurfs.append(s)
 
     return segsurfs
 
 # -----------------------------------------------------------------------------
 #
-def _vertex_colors(n, color_counts):
-    from numpy import empty, uint8
-    vertex_colors = empty((n,4), uint8)
-    voffset = 0
-    for color, nc in color_counts:
-        vertex_colors[voffset:voffset+nc,:] = color
-        voffset += nc
-    return vertex_colors
+def segmentation_show(session, surfaces, segments = None, show = True):
+    '''Show or hide segments of combined segmentation surfaces by segment id.'''
+    from .segsurf import SegmentationSurface
+    ssurfs = [s for s in surfaces if isinstance(s, SegmentationSurface)]
+    if len(ssurfs) == 0:
+        from chimerax.core.errors import UserError
+        raise UserError('No combined segmentation surfaces specified')
+    if segments is None:
+        seg_ids = None
+    else:
+        seg_ids = _parse_integers(segments)
+        if seg_ids is None:
+            from chimerax.core.errors import UserError
+            raise UserError('Require integer segment ids "%s"' % segments)
+    for s in ssurfs:
+        ids = s.segment_ids if seg_ids is None else seg_ids
+        if show:
+            ncomp = s.computed_segment_count
+            s.show_segments(ids)
+            session.logger.status('Showing %d %ss of %s (#%s), computed %d new surfaces'
+                                  % (len(s.shown_segment_ids), s.attribute_name, s.name,
+                                     s.id_string, s.computed_segment_count - ncomp))
+        else:
+            s.hide_segments(ids)
+
+def segmentation_hide(session, surfaces, segments = None):
+    segmentation_show(session, surfaces, segments, show = False)
 
 # -----------------------------------------------------------------------------
 #
@@ -461,7 +522,12 @@ def _step_string(step):
 
 # -----------------------------------------------------------------------------
 #
-def _maximum_segment_id(segmentation):
+def _maximum_segment_id(segmentation, compute = True):
+    '''
+    Return the maximum segment id from the file attributes or by reading the
+    full segmentation.  If compute is false and the file does not record it
+    then return None instead of reading the full segmentation.
+    '''
     seg = segmentation
     if hasattr(seg, '_max_segment_id'):
         max_seg_id = seg._max_segment_id
@@ -476,6 +542,8 @@ def _maximum_segment_id(segmentation):
                 from chimerax.core.errors import UserError
                 raise UserError('Model %s (#%s) is not a segmentation, has non-integer values (%s)'
                                 % (seg.name, seg.id_string, str(seg.data.value_type)))
+            if not compute:
+                return None
             max_seg_id = seg.full_matrix().max()
         seg._max_segment_id = max_seg_id
 
@@ -483,7 +551,7 @@ def _maximum_segment_id(segmentation):
 
 # -----------------------------------------------------------------------------
 #
-def _attribute_values(seg, attribute_name):
+def _attribute_values(seg, attribute_name, allow_float = False):
     from chimerax.core.errors import UserError
     if hasattr(seg, attribute_name):
         g = getattr(seg, attribute_name)
@@ -508,7 +576,9 @@ def _attribute_values(seg, attribute_name):
                             ' must be a 1-D array (numpy, tuple, or list), got %s'
                             % (seg.name, seg.id_string, attribute_name, type(g)))
             
-        if g.dtype != int32:
+        if allow_float and g.dtype.kind == 'f':
+            pass
+        elif g.dtype != int32:
             from numpy import uint8, int8, uint16, int16, uint32
             if g.dtype in (uint8, int8, uint16, int16, uint32):
                 g = g.astype(int32)
@@ -552,7 +622,22 @@ def register_segmentation_command(logger):
                    ('color', ColorArg),
                    ('smooth', BoolArg),
                    ('smoothing_iterations', IntArg),
-                   ('smoothing_factor', FloatArg)],
+                   ('smoothing_factor', FloatArg),
+                   ('show', StringArg)],
         synopsis = 'Create surfaces for a segmentation regions.'
     )
     register('segmentation surfaces', desc, segmentation_surfaces, logger=logger)
+
+    desc = CmdDesc(
+        required = [('surfaces', SurfacesArg)],
+        optional = [('segments', StringArg)],
+        synopsis = 'Show segments of a segmentation surface computing surfaces as needed'
+    )
+    register('segmentation show', desc, segmentation_show, logger=logger)
+
+    desc = CmdDesc(
+        required = [('surfaces', SurfacesArg)],
+        optional = [('segments', StringArg)],
+        synopsis = 'Hide segments of a segmentation surface'
+    )
+    register('segmentation hide', desc, segmentation_hide, logger=logger)
@@ -0,0 +1,256 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Command to measure volume, centroid, bounds and map values for every segment
+# of a segmentation.
+#
+
+# -----------------------------------------------------------------------------
+#
+def measure_segment_stats(session, segmentations, map = None, step = 1,
+                          subregion = 'all', attributes = True, save_file = None,
+                          chunk_voxels = 2**24):
+    if len(segmentations) == 0:
+        from chimerax.core.errors import UserError
+        raise UserError('No segmentations specified')
+
+    for seg in segmentations:
+        if map is not None and tuple(map.data.size) != tuple(seg.data.size):
+            from chimerax.core.errors import UserError
+            raise UserError('measure segmentstats: Volume size %d,%d,%d' % tuple(map.data.size) +
+                            ' does not match segmentation size %d,%d,%d' % tuple(seg.data.size))
+
+        stats = segment_statistics(seg, map, step = step, subregion = subregion,
+                                   chunk_voxels = chunk_voxels)
+        if attributes:
+            set_segment_attributes(seg, stats)
+        if save_file is not None:
+            path = save_file if len(segmentations) == 1 else _numbered_path(save_file, seg)
+            save_segment_stats_csv(stats, path)
+
+        nseg = (stats['voxel_count'][1:] > 0).sum()
+        msg = 'Measured %d segments of %s' % (nseg, seg.name_with_id())
+        if map is not None:
+            msg += ' with map values from %s' % map.name_with_id()
+        if attributes:
+            msg += ', set attributes %s' % ', '.join(n for n in stats.keys() if n != 'segment')
+        session.logger.status(msg, log = True)
+
+# -----------------------------------------------------------------------------
+#
+def segment_statistics(seg, map = None, step = 1, subregion = 'all',
+                       chunk_voxels = 2**24):
+    '''
+    Compute voxel count, volume, centroid, grid index bounds and optionally
+    minimum, maximum, mean and standard deviation of map values for every
+    segment id in a single pass over the segmentation.  The segmentation is
+    read in slabs of planes of about chunk_voxels voxels so maps larger than
+    memory can be measured.  If the maximum segment id is not recorded in the
+    file the per-segment arrays grow as larger ids are found.  The full grid at
+    step 1 is measured by default, not the displayed region and step.  Returns
+    a dictionary of arrays indexed by segment id.
+    '''
+    from .segment import _maximum_segment_id
+    max_id = _maximum_segment_id(seg, compute = False)
+    n = 1 if max_id is None else int(max_id) + 1
+
+    ijk_min, ijk_max, ijk_step = seg.subregion(step, subregion)
+    (i0,j0,k0), (i1,j1,k1), (si,sj,sk) = ijk_min, ijk_max, ijk_step
+    ni, nj = (i1-i0)//si + 1, (j1-j0)//sj + 1
+    planes = max(1, chunk_voxels // (ni*nj))
+
+    from numpy import zeros, float64, int64, int32, arange, bincount, broadcast_to, uint32, inf
+    sums = {'count': zeros((n,), int64),
+            'isum': zeros((n,), float64), 'jsum': zeros((n,), float64), 'ksum': zeros((n,), float64),
+            'bounds': zeros((n,6), int32)}
+    sums['bounds'][:] = _bounds_fill
+    if map is not None:
+        sums.update({'vsum': zeros((n,), float64), 'v2sum': zeros((n,), float64),
+                     'vmin': zeros((n,), float64), 'vmax': zeros((n,), float64)})
+        sums['vmin'][:], sums['vmax'][:] = inf, -inf
+
+    iplane = arange(ni, dtype = float64)
+    jplane = arange(nj, dtype = float64)[:,None]
+    from numpy import minimum, maximum, ascontiguousarray
+    from . import region_bounds
+    for kc in range(k0, k1+1, planes*sk):
+        kc1 = min(k1, kc + (planes-1)*sk)
+        region = ((i0,j0,kc), (i1,j1,kc1), ijk_step)
+        labels = seg.region_matrix(region)
+        nk = labels.shape[0]
+        lab = labels.ravel()
+        if lab.dtype.kind not in 'iu' or lab.dtype.itemsize > 4:
+            lab = lab.astype(int64)
+        if lab.size > 0 and int(lab.max()) >= n:
+            n = int(lab.max()) + 1
+            _grow_arrays(sums, n)
+
+        # Counts and index sums in one bincount each.
+        sums['count'] += bincount(lab, minlength = n)
+        shape = labels.shape
+        sums['isum'] += bincount(lab, broadcast_to(iplane, shape).ravel(), n)
+        sums['jsum'] += bincount(lab, broadcast_to(jplane, shape).ravel(), n)
+        kc_index = (kc - k0)//sk
+        kplane = arange(kc_index, kc_index + nk, dtype = float64)[:,None,None]
+        sums['ksum'] += bincount(lab, broadcast_to(kplane, shape).ravel(), n)
+
+        # Index bounds of each segment in this slab.
+        cb = region_bounds(ascontiguousarray(labels, uint32))
+        nb = min(n, len(cb))
+        present = (cb[:nb,6] > 0)
+        cb = cb[:nb][present]
+        ids = present.nonzero()[0]
+        cb[:,2] += kc_index
+        cb[:,5] += kc_index
+        bounds = sums['bounds']
+        bounds[ids,:3] = minimum(bounds[ids,:3], cb[:,:3])
+        bounds[ids,3:] = maximum(bounds[ids,3:], cb[:,3:6])
+
+        if map is not None:
+            values = map.region_matrix(region).ravel().astype(float64)
+            sums['vsum'] += bincount(lab, values, n)
+            sums['v2sum'] += bincount(lab, values*values, n)
+            smin, smax, sids = _segment_min_max(lab, values)
+            sums['vmin'][sids] = minimum(sums['vmin'][sids], smin)
+            sums['vmax'][sids] = maximum(sums['vmax'][sids], smax)
+
+    count, bounds = sums['count'], sums['bounds']
+    isum, jsum, ksum = sums['isum'], sums['jsum'], sums['ksum']
+    if map is not None:
+        vsum, v2sum, vmin, vmax = sums['vsum'], sums['v2sum'], sums['vmin'], sums['vmax']
+
+    # Convert index sums to centroids in scene coordinates.
+    from numpy import sqrt, empty, array, prod
+    c = maximum(count, 1)
+    ijk = empty((n,3), float64)
+    ijk[:,0], ijk[:,1], ijk[:,2] = isum/c, jsum/c, ksum/c
+    tf = seg.scene_position * seg.matrix_indices_to_xyz_transform(step, subregion)
+    centroid = tf.transform_points(ijk)
+    voxel_volume = prod(array(seg.data.step) * array(ijk_step))
+
+    # Index bounds in full map grid indices.
+    grid_bounds = bounds.copy()
+    istep = array(ijk_step, int32)
+    grid_bounds[:,:3] = grid_bounds[:,:3] * istep + ijk_min
+    grid_bounds[:,3:] = grid_bounds[:,3:] * istep + ijk_min
+    empty_seg = (count == 0)
+    grid_bounds[empty_seg] = 0
+    centroid[empty_seg] = 0
+
+    stats = {
+        'segment': arange(n, dtype = int32),
+        'voxel_count': count.astype(int32),
+        'volume': count * voxel_volume,
+        'centroid_x': centroid[:,0],
+        'centroid_y': centroid[:,1],
+        'centroid_z': centroid[:,2],
+        'imin': grid_bounds[:,0], 'jmin': grid_bounds[:,1], 'kmin': grid_bounds[:,2],
+        'imax': grid_bounds[:,3], 'jmax': grid_bounds[:,4], 'kmax': grid_bounds[:,5],
+    }
+    if map is not None:
+        mean = vsum / c
+        sd = sqrt(maximum(v2sum / c - mean*mean, 0))
+        vmin[empty_seg] = vmax[empty_seg] = mean[empty_seg] = 0
+        stats.update({'map_minimum': vmin, 'map_maximum': vmax,
+                      'map_mean': mean, 'map_sd': sd})
+    return stats
+
+# -----------------------------------------------------------------------------
+# Extend per-segment arrays to n segment ids when a larger id is found.
+#
+_bounds_fill = (2**30, 2**30, 2**30, -1, -1, -1)
+_array_fill = {'bounds': _bounds_fill, 'vmin': float('inf'), 'vmax': float('-inf')}
+def _grow_arrays(sums, n):
+    from numpy import empty
+    for name, a in sums.items():
+        g = empty((n,) + a.shape[1:], a.dtype)
+        g[:len(a)] = a
+        g[len(a):] = _array_fill.get(name, 0)
+        sums[name] = g
+
+# -----------------------------------------------------------------------------
+# Minimum and maximum value for each label using one sort and reduceat.
+#
+def _segment_min_max(labels, values):
+    from numpy import argsort, flatnonzero, diff, minimum, maximum, concatenate
+    order = argsort(labels, kind = 'stable')
+    sl, sv = labels[order], values[order]
+    starts = concatenate(([0], flatnonzero(diff(sl)) + 1))
+    return minimum.reduceat(sv, starts), maximum.reduceat(sv, starts), sl[starts]
+
+# -----------------------------------------------------------------------------
+# Segment attributes are arrays indexed by segment id set on the segmentation.
+# Integer attributes can be used to group or color segments, and all attributes
+# can be used in segment selection conditions such as "volume>1000".
+#
+def set_segment_attributes(seg, stats):
+    for name, values in stats.items():
+        if name != 'segment':
+            setattr(seg, name, values)
+    # Cached colors for attributes are no longer valid.
+    if hasattr(seg, '_segment_attribute_colors'):
+        for name in stats.keys():
+            seg._segment_attribute_colors.pop(name, None)
+
+# -----------------------------------------------------------------------------
+#
+def save_segment_stats_csv(stats, path, include_empty = False):
+    names = list(stats.keys())
+    columns = [stats[name] for name in names]
+    count = stats['voxel_count']
+    rows = range(len(count)) if include_empty else (count > 0).nonzero()[0]
+    with open(path, 'w') as f:
+        f.write(','.join(names) + '\n')
+        for r in rows:
+            if r == 0 and not include_empty:
+                continue
+            f.write(','.join(_csv_value(col[r]) for col in columns) + '\n')
+
+def _csv_value(v):
+    if v.dtype.kind in 'iu':
+        return '%d' % v
+    return '%.6g' % v
+
+def _numbered_path(path, seg):
+    from os.path import splitext
+    base, suffix = splitext(path)
+    return '%s_%s%s' % (base, seg.id_string.replace('.','_'), suffix)
+
+# -----------------------------------------------------------------------------
+#
+def register_segment_stats_command(logger):
+    from chimerax.core.commands import CmdDesc, register, BoolArg, SaveFileNameArg
+    from chimerax.map import MapsArg, MapArg, MapRegionArg, MapStepArg
+
+    desc = CmdDesc(
+        required = [('segmentations', MapsArg)],
+        keyword = [('map', MapArg),
+                   ('step', MapStepArg),
+                   ('subregion', MapRegionArg),
+                   ('attributes', BoolArg),
+                   ('save_file', SaveFileNameArg)],
+        synopsis = 'Measure volume, centroid, bounds and map values for each segment'
+    )
+    register('measure segmentstats', desc, measure_segment_stats, logger=logger)
@@ -0,0 +1,290 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Surfaces for many segments of a segmentation combined in one drawing.
+#
+from chimerax.core.models import Surface
+
+SEGSURF_STATE_VERSION = 1
+
+class SegmentationSurface(Surface):
+    '''
+    Surfaces for the segments of a segmentation held in a single drawing.
+    The surface for a segment is computed only when it is first shown.
+    Segments are computed in parallel using the bounding box of each segment
+    so label maps with hundreds of thousands of segments are practical.
+    The group array maps segmentation values to the segment (group) ids
+    used for the surfaces, 0 meaning no surface.
+    '''
+    def __init__(self, name, segmentation, group, attribute_name = 'segment',
+                 region = 'all', step = (1,1,1), colors = None, color = None,
+                 smooth = False, smoothing_iterations = 10, smoothing_factor = 1.0):
+        Surface.__init__(self, name, segmentation.session)
+        self.clip_cap = True  # Cap surface when clipped
+
+        self.segmentation = segmentation
+        self.attribute_name = attribute_name
+        self._group = group
+        self._region = region
+        self._step = step
+        self._segment_colors = colors	# Nx4 uint8 indexed by segment id
+        self._single_color = color	# Used if colors is None
+        self._smoothing = (smooth, smoothing_iterations, smoothing_factor)
+
+        self._group_map = None		# Segmentation matrix mapped to segment ids, uint32
+        self._bounds = None		# Segment index bounds, N x 7 (imin,jmin,kmin,imax,jmax,kmax,count)
+        self._geometry = {}		# Segment id to (vertices, normals, triangles)
+        self._segment_ids = None	# Sorted segment ids in combined geometry
+        self._vertex_ranges = None	# Vertex start for each segment id, length nseg+1
+        self._triangle_ranges = None	# Triangle start for each segment id, length nseg+1
+        self._shown = set()		# Segment ids currently shown
+
+    # -------------------------------------------------------------------------
+    #
+    @property
+    def segment_ids(self):
+        '''Ids of all segments with at least one voxel.'''
+        b = self._segment_bounds()
+        from numpy import int32
+        ids = (b[:,6] > 0).nonzero()[0].astype(int32)
+        return ids[ids != 0]
+
+    @property
+    def shown_segment_ids(self):
+        from numpy import array, int32
+        return array(sorted(self._shown), int32)
+
+    @property
+    def computed_segment_count(self):
+        return len(self._geometry)
+
+    # -------------------------------------------------------------------------
+    #
+    def show_segments(self, segment_ids, nthread = None):
+        '''Show surfaces for the specified segment ids computing them if needed.'''
+        ids = [int(i) for i in segment_ids if i != 0]
+        self._compute_surfaces([i for i in ids if i not in self._geometry], nthread)
+        self._shown.update(i for i in ids if i in self._geometry)
+        self._update_mask()
+
+    def hide_segments(self, segment_ids):
+        self._shown.difference_update(int(i) for i in segment_ids)
+        self._update_mask()
+
+    # -------------------------------------------------------------------------
+    #
+    def color_segments(self, segment_ids, color):
+        '''
+        Color surfaces of the specified segments.  Color can be a single
+        rgba uint8 color or an N x 4 array of colors indexed by segment id.
+        '''
+        from numpy import ndarray
+        per_segment = isinstance(color, ndarray) and color.ndim == 2
+        sc = self._colors()
+        for sid in segment_ids:
+            if sid < len(sc):
+                sc[sid] = color[sid] if per_segment else color
+        vc = self.vertex_colors
+        if vc is None:
+            return
+        for sid in segment_ids:
+            r = self._segment_range(sid)
+            if r is not None:
+                v0,v1,t0,t1 = r
+                vc[v0:v1] = color[sid] if per_segment else color
+        self.vertex_colors = vc
+
+    # -------------------------------------------------------------------------
+    #
+    @property
+    def vertex_segment_ids(self):
+        '''Segment id for each vertex, exact since recorded when computed.'''
+        from numpy import repeat, diff, int32, zeros
+        if self._segment_ids is None:
+            return zeros((0,), int32)
+        return repeat(self._segment_ids, diff(self._vertex_ranges)).astype(int32, copy = False)
+
+    def segment_triangle_range(self, segment_id):
+        '''Return (start, end) triangle indices for a segment or None if not computed.'''
+        r = self._segment_range(segment_id)
+        return None if r is None else r[2:]
+
+    def _segment_range(self, segment_id):
+        ids = self._segment_ids
+        if ids is None:
+            return None
+        from numpy import searchsorted
+        i = searchsorted(ids, segment_id)
+        if i >= len(ids) or ids[i] != segment_id:
+            return None
+        vr, tr = self._vertex_ranges, self._triangle_ranges
+        return vr[i], vr[i+1], tr[i], tr[i+1]
+
+    # -------------------------------------------------------------------------
+    #
+    def _segment_bounds(self):
+        if self._bounds is None:
+            from . import region_bounds
+            self._bounds = region_bounds(self._segment_map())
+        return self._bounds
+
+    def _segment_map(self):
+        gm = self._group_map
+        if gm is None:
+            m = self.segmentation.matrix(step = self._step, subregion = self._region)
+            from numpy import uint32
+            self._group_map = gm = self._group.astype(uint32)[m]
+        return gm
+
+    # -------------------------------------------------------------------------
+    #
+    def _compute_surfaces(self, segment_ids, nthread = None, chunk_size = 64):
+        if len(segment_ids) == 0:
+            return
+        self._segment_map()
+        bounds = self._segment_bounds()
+        ids = [sid for sid in segment_ids if sid < len(bounds) and bounds[sid,6] > 0]
+        chunks = [(ids[i:i+chunk_size],) for i in range(0, len(ids), chunk_size)]
+        from chimerax.core.threadq import apply_to_list
+        for chunk_geom in apply_to_list(self._chunk_surfaces, chunks, nthread):
+            self._geometry.update(chunk_geom)
+        self._update_geometry()
+
+    def _chunk_surfaces(self, segment_ids):
+        gm = self._segment_map()
+        bounds = self._segment_bounds()
+        ksz,jsz,isz = gm.shape
+        seg = self.segmentation
+        tf = seg.matrix_indices_to_xyz_transform(step = self._step, subregion = self._region)
+        smooth, si, sf = self._smoothing
+        from . import segmentation_surfaces
+        from chimerax.surface import calculate_vertex_normals, smooth_vertex_positions
+        from numpy import uint8
+        geom = {}
+        for sid in segment_ids:
+            # Pad box by one voxel so caps are only made at the map boundary.
+            i0,j0,k0,i1,j1,k1 = bounds[sid,:6]
+            i0,j0,k0 = max(0,i0-1), max(0,j0-1), max(0,k0-1)
+            i1,j1,k1 = min(isz-1,i1+1), min(jsz-1,j1+1), min(ksz-1,k1+1)
+            mask = (gm[k0:k1+1,j0:j1+1,i0:i1+1] == sid).view(uint8)
+            surfs = segmentation_surfaces(mask)
+            if len(surfs) == 0:
+                continue
+            rid, va, ta = surfs[0]
+            va += (i0,j0,k0)
+            tf.transform_points(va, in_place = True)
+            na = calculate_vertex_normals(va, ta)
+            if smooth:
+                smooth_vertex_positions(va, ta, sf, si)
+                smooth_vertex_positions(na, ta, sf, si)
+            geom[sid] = (va, na, ta)
+        return geom
+
+    # -------------------------------------------------------------------------
+    #
+    def _update_geometry(self):
+        from numpy import array, int32, concatenate, cumsum, zeros, empty, uint8
+        ids = array(sorted(self._geometry.keys()), int32)
+        geom = [self._geometry[sid] for sid in ids]
+        nv = [len(va) for va,na,ta in geom]
+        nt = [len(ta) for va,na,ta in geom]
+        vr, tr = zeros((len(ids)+1,), int32), zeros((len(ids)+1,), int32)
+        cumsum(nv, out = vr[1:])
+        cumsum(nt, out = tr[1:])
+        self._segment_ids, self._vertex_ranges, self._triangle_ranges = ids, vr, tr
+        if len(geom) == 0:
+            self.set_geometry(None, None, None)
+            return
+
+        va = concatenate([va for va,na,ta in geom])
+        na = concatenate([na for va,na,ta in geom])
+        ta = concatenate([ta + v0 for (va,na,ta),v0 in zip(geom, vr[:-1])])
+        self.set_geometry(va, na, ta)
+
+        sc = self._colors()
+        vc = empty((len(va),4), uint8)
+        for sid, v0, v1 in zip(ids, vr[:-1], vr[1:]):
+            vc[v0:v1] = sc[sid]
+        self.vertex_colors = vc
+
+    def _colors(self):
+        sc = self._segment_colors
+        if sc is None:
+            from numpy import empty, uint8
+            sc = empty((len(self._segment_bounds()),4), uint8)
+            sc[:] = (180,180,180,255) if self._single_color is None else self._single_color
+            self._segment_colors = sc
+        return sc
+
+    def _update_mask(self):
+        ids = self._segment_ids
+        if ids is None or len(ids) == 0:
+            return
+        if len(self._shown) == len(ids):
+            self.triangle_mask = None
+            return
+        from numpy import isin, repeat, diff
+        shown = isin(ids, self.shown_segment_ids)
+        self.triangle_mask = repeat(shown, diff(self._triangle_ranges))
+
+    # -------------------------------------------------------------------------
+    # Sessions save the segment choices and colors, not the surface geometry.
+    # Surfaces of the shown segments are recomputed when the session is restored.
+    #
+    def take_snapshot(self, session, flags):
+        smooth, iterations, factor = self._smoothing
+        data = {
+            'segmentation': self.segmentation,
+            'group': self._group,
+            'attribute_name': self.attribute_name,
+            'region': self._region,
+            'step': self._step,
+            'segment_colors': self._segment_colors,
+            'single_color': self._single_color,
+            'smooth': smooth,
+            'smoothing_iterations': iterations,
+            'smoothing_factor': factor,
+            'shown': self.shown_segment_ids,
+            'display': self.display,
+            'model state': Surface.take_snapshot(self, session, flags),
+            'version': SEGSURF_STATE_VERSION,
+        }
+        return data
+
+    @staticmethod
+    def restore_snapshot(session, data):
+        seg = data['segmentation']
+        if seg is None:
+            return None		# Segmentation was not restored.
+        s = SegmentationSurface(data['model state']['name'], seg, data['group'],
+                                data['attribute_name'], region = data['region'],
+                                step = data['step'], colors = data['segment_colors'],
+                                color = data['single_color'], smooth = data['smooth'],
+                                smoothing_iterations = data['smoothing_iterations'],
+                                smoothing_factor = data['smoothing_factor'])
+        Surface.set_state_from_snapshot(s, session, data['model state'])
+        s.show_segments(data['shown'])
+        s.display = data['display']
+        return s
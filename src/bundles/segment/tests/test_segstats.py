@@ -0,0 +1,94 @@
+import numpy
+
+import pytest
+
+from chimerax.geometry import Place
+from chimerax.segment.segstats import segment_statistics
+
+origin, spacing = (1.0, -2.0, 0.5), (0.5, 0.75, 1.25)
+
+class _Grid:
+    def __init__(self, labels, max_id):
+        self.size = labels.shape[::-1]
+        self.step = spacing
+        self.value_type = labels.dtype
+        self._max_id = max_id
+
+    def find_attribute(self, name):
+        return self._max_id if name == 'maximum_segment_id' else None
+
+class _Segmentation:
+    # Segmentation stand-in without full_matrix() so reading the whole map fails.
+    def __init__(self, labels, max_id = None):
+        self.labels = labels
+        self.data = _Grid(labels, max_id)
+        self.scene_position = Place()
+
+    def subregion(self, step, subregion):
+        nk, nj, ni = self.labels.shape
+        return (0,0,0), (ni-1,nj-1,nk-1), (step,step,step)
+
+    def region_matrix(self, region):
+        (i0,j0,k0), (i1,j1,k1), (si,sj,sk) = region
+        return self.labels[k0:k1+1:sk, j0:j1+1:sj, i0:i1+1:si]
+
+    def matrix_indices_to_xyz_transform(self, step, subregion):
+        sx, sy, sz = [s*step for s in spacing]
+        return Place(axes = ((sx,0,0),(0,sy,0),(0,0,sz)), origin = origin)
+
+class _Map(_Segmentation):
+    pass
+
+def _labels():
+    labels = numpy.random.default_rng(0).integers(0, 5, (9, 7, 8)).astype(numpy.uint16)
+    labels[0,3,2] = 7		# Only in the first plane
+    labels[8,6,7] = 11		# Largest id only in the last plane
+    return labels
+
+def _values(labels):
+    return numpy.random.default_rng(1).normal(size = labels.shape).astype(numpy.float32)
+
+def _reference(labels, values, step):
+    lab = labels[::step,::step,::step]
+    val = values[::step,::step,::step].astype(numpy.float64)
+    k, j, i = numpy.indices(lab.shape)
+    n = int(lab.max()) + 1
+    ref = {name: numpy.zeros((n,)) for name in
+           ('voxel_count', 'volume', 'centroid_x', 'centroid_y', 'centroid_z',
+            'imin', 'jmin', 'kmin', 'imax', 'jmax', 'kmax',
+            'map_minimum', 'map_maximum', 'map_mean', 'map_sd')}
+    for s in range(n):
+        mask = (lab == s)
+        if not mask.any():
+            continue
+        ref['voxel_count'][s] = mask.sum()
+        ref['volume'][s] = mask.sum() * numpy.prod(spacing) * step**3
+        for axis, index in zip('xyz', (i, j, k)):
+            a = 'xyz'.index(axis)
+            ref['centroid_' + axis][s] = origin[a] + index[mask].mean() * step * spacing[a]
+        for axis, index in zip('ijk', (i, j, k)):
+            ref[axis + 'min'][s] = index[mask].min() * step
+            ref[axis + 'max'][s] = index[mask].max() * step
+        v = val[mask]
+        ref['map_minimum'][s], ref['map_maximum'][s] = v.min(), v.max()
+        ref['map_mean'][s], ref['map_sd'][s] = v.mean(), v.std()
+    return ref
+
+@pytest.mark.parametrize("chunk_voxels", [1, 56*3, 2**24])
+@pytest.mark.parametrize("step", [1, 2])
+def test_slabs_match_numpy(chunk_voxels, step):
+    labels = _labels()
+    values = _values(labels)
+    stats = segment_statistics(_Segmentation(labels), _Map(values), step = step,
+                               chunk_voxels = chunk_voxels)
+    ref = _reference(labels, values, step)
+    assert (stats['segment'] == numpy.arange(len(ref['voxel_count']))).all()
+    for name, expected in ref.items():
+        assert stats[name] == pytest.approx(expected, abs = 1e-6), name
+
+def test_recorded_maximum_segment_id():
+    labels = _labels()
+    stats = segment_statistics(_Segmentation(labels, max_id = 15), chunk_voxels = 56)
+    assert len(stats['voxel_count']) == 16
+    assert stats['voxel_count'][11] == 1 and stats['voxel_count'][12:].sum() == 0
+    assert 'map_mean' not in stats
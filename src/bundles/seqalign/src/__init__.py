@@ -79,11 +79,12 @@ class _AlignmentsBundleAPI(BundleAPI):
 
                 @property
                 def open_args(self, *, session=session):
-                    from chimerax.core.commands import BoolArg, StringArg, Or
+                    from chimerax.core.commands import BoolArg, StringArg, Or, PositiveIntArg
                     return {
                         'alignment': BoolArg,
                         'auto_associate': BoolArg,
                         'ident': StringArg,
+                        'max_sequences': PositiveIntArg,
                         'viewer': Or(BoolArg, AlignmentViewerArg(session), SequenceViewerArg(session)),
                     }
         else:
@@ -79,6 +79,10 @@ class Alignment(State):
     #   NOTE_HDR_VALUES: a 2-tuple of the header and where the values changed (either a 2-tuple of 0-based
     #       indices into the header, or None -- which indicates the entire header)
 
+    # associate() uses the k-mer prefiltered bulk association if
+    # (number of structures) x (number of sequences) is at least this
+    BULK_ASSOC_PAIRS = 1000
+
     def __init__(self, session, seqs, ident, file_attrs, file_markups, auto_destroy, auto_associate,
             description, intrinsic, *, create_headers=True, session_restore=False):
         if not seqs:
@@ -104,6 +108,8 @@ class Alignment(State):
         self._reference_seq = None
         self._rmsd_chains = None
         self._rmsd_handler = None
+        self._char_matrix = None	# Sequence characters as numpy uint8 array
+        self._col_counts = None		# Count of each character in each column
         self.associations = {}
         # need to be able to look up chain obj even after demotion to Sequence
         self._sseq_to_chain = {}
@@ -199,12 +205,17 @@ class Alignment(State):
 
            Normally, associating additional chains would change the 'intrinsic' property to
            False, but some operations (like the inital associations) need to keep it True.
+
+           When many structures are associated with a large alignment, each chain is only
+           tested against the alignment sequences sharing the most k-mers with it (see
+           the assoc module).
         """
 
         if not keep_intrinsic:
             self.intrinsic = False
         from chimerax.atomic import Sequence, Chain, StructureSeq, AtomicStructure, \
-            SeqMatchMap, estimate_assoc_params, StructAssocError, try_assoc
+            SeqMatchMap, estimate_assoc_params
+        from .assoc import best_assoc, assoc_message, structure_name
         from .settings import settings
         status = self.session.logger.status
         reeval = False
@@ -240,6 +251,11 @@ class Alignment(State):
         else:
             aseqs = self.seqs
             aseqs.sort(key=lambda s: len(s.ungapped()))
+        if structures and not seq and len(structures) * len(aseqs) >= self.BULK_ASSOC_PAIRS:
+            from .assoc import associate_structures
+            new_match_maps.extend(associate_structures(self, structures, force=force,
+                min_length=min_length, reassoc=reassoc))
+            structures = []
         if structures:
             forw_aseqs = aseqs
             rev_aseqs = aseqs[:]
@@ -253,10 +269,7 @@ class Alignment(State):
                 # sort sequences so that longest is tried first
                 sseqs.sort(key=lambda s: len(s), reverse=True)
             associated = False
-            struct_name = struct.name
-            if '.' in struct.id_string:
-                # ensemble
-                struct_name += " (" + struct.id_string + ")"
+            struct_name = structure_name(struct)
             def do_assoc(add_gaps=False):
                 if reeval and sseq in self.associations:
                     old_aseq = self.associations[sseq]
@@ -264,13 +277,8 @@ class Alignment(State):
                         return
                     self.disassociate(sseq)
                 if not self.intrinsic:
-                    s1, s2, s3 = ("", "", "") if best_errors == 1 else ("es", "and/", "s")
-                    if add_gaps:
-                        gaps = " %sor gap%s" % (s2, s3)
-                    else:
-                        gaps = ""
-                    status("Associated %s %s to %s with %d mismatch%s%s" % (struct_name,
-                        sseq.name, best_match_map.align_seq.name, best_errors, s1, gaps), log=True)
+                    status(assoc_message(struct_name, sseq, best_match_map, best_errors, add_gaps),
+                        log=True)
                 self.prematched_assoc_structure(best_match_map, best_errors, reassoc)
                 new_match_maps.append(best_match_map)
                 nonlocal associated
@@ -310,7 +318,6 @@ class Alignment(State):
                     aseqs = mixed
                 else:
                     aseqs = forw_aseqs
-                best_errors = best_match_map = None
                 max_errors = len(sseq) // settings.assoc_error_rate
                 if reeval:
                     aseqs = []
@@ -318,38 +325,8 @@ class Alignment(State):
                         if chain.structure == struct:
                             aseqs.append(self.associations[chain])
                     aseqs.append(seq)
-                for aseq in aseqs:
-                    if best_errors:
-                        try_errors = best_errors - 1
-                    else:
-                        try_errors = max_errors
-                    try:
-                        match_map, errors = try_assoc(aseq, sseq,
-                            (est_len, segments, gaps), max_errors=try_errors)
-                    except StructAssocError:
-                        # maybe the sequence is derived from the structure...
-                        if gaps:
-                            try:
-                                match_map, errors = try_assoc(aseq, sseq,
-                                    (len(sseq), [sseq[:]], []), max_errors=try_errors)
-                            except StructAssocError:
-                                continue
-                        else:
-                            continue
-                    else:
-                        # if the above worked but had errors, see if just
-                        # smooshing sequence together works better
-                        if errors and gaps:
-                            try:
-                                match_map, errors = try_assoc(aseq, sseq,
-                                    (len(sseq), [sseq[:]], []), max_errors=errors-1)
-                            except StructAssocError:
-                                pass
-
-                    best_match_map = match_map
-                    best_errors = errors
-                    if errors == 0:
-                        break
+                best_match_map, best_errors = best_assoc(aseqs, sseq, (est_len, segments, gaps),
+                    max_errors)
 
                 if best_match_map:
                     do_assoc()
@@ -434,6 +411,48 @@ class Alignment(State):
     def being_destroyed(self):
         return self._in_destroy
 
+    def character_matrix(self):
+        '''
+        Return the alignment characters as a (number of sequences x alignment length)
+        numpy uint8 array.  The array is cached and should not be modified.
+        '''
+        m = self._char_matrix
+        seqs = self._seqs
+        if m is None or m.shape != (len(seqs), len(seqs[0])):
+            from .columns import character_matrix
+            self._char_matrix = m = character_matrix(seqs)
+            self._col_counts = None
+        return m
+
+    def column_counts(self, pos1=0, pos2=None):
+        '''
+        Return an array of the count of each character (0-255) in the alignment
+        columns pos1 through pos2 inclusive, shape (number of columns x 256).
+        '''
+        m = self.character_matrix()
+        cc = self._col_counts
+        if cc is None:
+            from .columns import column_counts
+            self._col_counts = cc = column_counts(m)
+        if pos2 is None:
+            pos2 = m.shape[1] - 1
+        return cc[pos1:pos2+1]
+
+    def columns_changed(self, pos1=0, pos2=None):
+        '''
+        Update cached column data for columns pos1 through pos2 inclusive after
+        sequence characters in those columns were changed in place.
+        '''
+        m = self._char_matrix
+        seqs = self._seqs
+        if m is None or m.shape != (len(seqs), len(seqs[0])) or pos2 is None:
+            self._char_matrix = self._col_counts = None
+            return
+        from .columns import character_matrix, column_counts
+        m[:,pos1:pos2+1] = character_matrix([seq.characters[pos1:pos2+1] for seq in seqs])
+        if self._col_counts is not None:
+            self._col_counts[pos1:pos2+1] = column_counts(m[:,pos1:pos2+1])
+
     def detach_viewer(self, viewer):
         """Called when a viewer is done with the alignment (see attach_viewer)"""
         self.viewers.remove(viewer)
@@ -890,6 +909,7 @@ class Alignment(State):
                 break
 
     def _seq_characters_changed_cb(self, trig_name, seq):
+        self.columns_changed()
         if not getattr(self, '_realigning', False):
             self._notify_observers(self.NOTE_SEQ_CONTENTS, seq)
 
@@ -902,6 +922,7 @@ class Alignment(State):
             prev_seqs.append(copy(cur_seq))
             cur_seq.characters = realigned_seq.characters
         self._realigning = False
+        self.columns_changed()
         self._notify_observers(self.NOTE_REALIGNMENT, prev_seqs)
 
     def _set_residue_attributes(self, *, headers=None, match_maps=None):
@@ -952,13 +973,19 @@ def nw_assoc(session, align_seq, struct_seq):
     '''Wrapper around Needleman-Wunsch matching, to make it return the same kinds of values
        that try_assoc returns'''
 
-    from chimerax.atomic import Sequence, SeqMatchMap
-    sseq = struct_seq
+    from chimerax.atomic import Sequence
     aseq = Sequence(name=align_seq.name, characters=align_seq.ungapped())
     aseq.circular = align_seq.circular
     from chimerax.alignment_algs.NeedlemanWunsch import nw
-    score, match_list = nw(sseq, aseq)
+    score, match_list = nw(struct_seq, aseq)
+    return nw_match_map(align_seq, struct_seq, aseq, match_list)
 
+def nw_match_map(align_seq, struct_seq, aseq, match_list):
+    '''Make the SeqMatchMap and error count for a Needleman-Wunsch match list of
+       struct_seq with 'aseq', the ungapped alignment sequence'''
+
+    from chimerax.atomic import SeqMatchMap
+    sseq = struct_seq
     errors = 0
     # matched are in reverse order...
     try:
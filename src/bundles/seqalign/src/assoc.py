@@ -0,0 +1,313 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+"""
+Associate the chains of many structures with the sequences of a large alignment.
+Alignment sequences sharing the most k-mers with a chain are found with a numpy
+index and only those are tested with the usual association criteria, and the
+Needleman-Wunsch alignments used to force associations are run in parallel threads.
+"""
+
+class KmerSequenceIndex:
+    '''
+    Index of the k-mers of the ungapped alignment sequences used to find the
+    sequences most similar to a chain sequence.  Letters are compared ignoring
+    case and k-mers containing other characters are not indexed.
+    '''
+    def __init__(self, seqs, k = 5):
+        self.seqs = seqs
+        self.k = k
+        ungapped = [seq.ungapped().upper() for seq in seqs]
+        self._exact = {}	# Ungapped characters to sequence indices
+        for i, chars in enumerate(ungapped):
+            self._exact.setdefault(chars, []).append(i)
+
+        from numpy import array, int64, repeat, arange, unique, cumsum
+        lengths = array([len(chars) for chars in ungapped], int64)
+        kmers, valid = self._kmers(''.join(ungapped))
+        starts = cumsum(lengths) - lengths
+        seq_index = repeat(arange(len(seqs), dtype = int64), lengths)
+        # Drop k-mers that span two sequences.
+        position = arange(len(seq_index), dtype = int64) - repeat(starts, lengths)
+        keep = valid & (position + k <= repeat(lengths, lengths))
+        nseqs = max(1, len(seqs))
+        keys = unique(kmers[keep] * nseqs + seq_index[keep])
+        self._kmer_keys = keys // nseqs		# Sorted k-mer values
+        self._kmer_seqs = keys % nseqs		# Sequence index for each k-mer value
+
+    def _kmers(self, chars):
+        '''
+        K-mer value starting at each position as 5 bits per letter, and whether
+        the k-mer is all letters and ends before the end of chars.
+        '''
+        from numpy import frombuffer, uint8, int64, zeros
+        k = self.k
+        c = frombuffer(chars.encode('latin-1', errors = 'replace'), uint8)
+        letter = (c >= ord('A')) & (c <= ord('Z'))
+        code = (c - ord('@')).astype(int64) & 31
+        n = max(0, len(c) - k + 1)
+        kmers = zeros((len(c),), int64)
+        valid = zeros((len(c),), bool)
+        valid[:n] = True
+        for j in range(k):
+            kmers[:n] = (kmers[:n] << 5) | code[j:j+n]
+            valid[:n] &= letter[j:j+n]
+        return kmers, valid
+
+    def candidates(self, characters, max_candidates = 10):
+        '''
+        Alignment sequences whose ungapped characters equal the given characters,
+        followed by those sharing the most k-mers with them, at most max_candidates.
+        '''
+        chars = characters.upper()
+        exact = self._exact.get(chars, [])
+        kmers, valid = self._kmers(chars)
+        from numpy import unique, searchsorted, repeat, arange, cumsum, bincount, argsort, int64
+        q = unique(kmers[valid])
+        keys = self._kmer_keys
+        lo = searchsorted(keys, q, 'left')
+        hi = searchsorted(keys, q, 'right')
+        counts = hi - lo
+        total = int(counts.sum())
+        best = []
+        if total > 0:
+            offsets = repeat(lo - (cumsum(counts) - counts), counts) + arange(total, dtype = int64)
+            shared = bincount(self._kmer_seqs[offsets], minlength = len(self.seqs))
+            order = argsort(-shared, kind = 'stable')[:max_candidates]
+            best = [int(i) for i in order if shared[i] > 0]
+        indices = exact + [i for i in best if i not in exact]
+        return [self.seqs[i] for i in indices[:max(max_candidates, len(exact))]]
+
+def associate_structures(alignment, structures, *, force = True, min_length = 10, reassoc = False,
+        max_candidates = 10, nthread = None):
+    '''
+    Associate the chains of many structures with an alignment, testing each chain
+    only against the alignment sequences found by a KmerSequenceIndex.  Items of
+    structures that are Chains associate just that chain.  If force is
+    true, structures with no chain meeting the association criteria are associated
+    by Needleman-Wunsch with the candidate sequences, computed in parallel threads.
+    The association time for each structure is logged.  Returns the new match maps.
+    '''
+    from chimerax.atomic import estimate_assoc_params, Chain
+    from .settings import settings
+    from time import time
+    t0 = time()
+    index = KmerSequenceIndex(alignment.seqs)
+    t_index = time() - t0
+    status = alignment.session.logger.status
+    new_match_maps = []
+    times = {}
+    unassociated = []
+    for i, struct in enumerate(structures):
+        ts = time()
+        if isinstance(struct, Chain):
+            chains = [struct]
+            struct = struct.structure
+        else:
+            chains = struct.chains
+        status("Associating %s with %s (%d of %d)" % (structure_name(struct), alignment,
+            i+1, len(structures)))
+        sseqs = sorted([sseq for sseq in chains if len(sseq) >= min_length], key = len,
+            reverse = True)
+        associated = bogus = False
+        for sseq in sseqs:
+            assoc_params = est_len, segments, gaps = estimate_assoc_params(sseq)
+            if not force:
+                if len(segments) > 10 and len(segments[0]) == 1 \
+                and segments.count(segments[0]) == len(segments):
+                    # some kind of bogus structure (e.g. from SAXS)
+                    bogus = True
+                    break
+            aseqs = assoc_order(index.candidates(sseq.characters, max_candidates), est_len)
+            match_map, errors = best_assoc(aseqs, sseq, assoc_params,
+                len(sseq) // settings.assoc_error_rate)
+            if match_map:
+                _add_assoc(alignment, match_map, errors, reassoc, new_match_maps)
+                associated = True
+        if not associated and not bogus and force and sseqs:
+            unassociated.append((struct, sseqs))
+        times[struct] = times.get(struct, 0) + time() - ts
+
+    if unassociated:
+        ts = time()
+        for struct, match_map, errors in _nw_associations(index, unassociated, max_candidates, nthread):
+            if match_map:
+                _add_assoc(alignment, match_map, errors, reassoc, new_match_maps, add_gaps=True)
+            else:
+                status("No reasonable association found for %s" % structure_name(struct))
+        # Needleman-Wunsch alignments are computed together, so share the time equally.
+        tnw = (time() - ts) / len(unassociated)
+        for struct, sseqs in unassociated:
+            times[struct] += tnw
+
+    _report_times(alignment, times, t_index, time() - t0, len(new_match_maps))
+    return new_match_maps
+
+def assoc_order(aseqs, est_len):
+    '''
+    Order alignment sequences in which to try associating a structure sequence
+    of estimated length est_len.  A match against a shorter sequence is better
+    than against a longer one with the same number of errors, except for structure
+    sequences longer than the alignment sequences.
+    '''
+    lengths = {aseq: len(aseq.ungapped()) for aseq in aseqs}
+    forw_aseqs = sorted(aseqs, key = lambda s: lengths[s])
+    if not forw_aseqs or est_len <= lengths[forw_aseqs[0]]:
+        return forw_aseqs
+    if est_len >= lengths[forw_aseqs[-1]]:
+        # match against longest alignment sequences first
+        return forw_aseqs[::-1]
+    def mixed_key_func(s):
+        ls = len(s)
+        uls = lengths[s]
+        if uls >= est_len:
+            # larger than estimated length; want smallest (closest to est_len)
+            # first; and before all the ones smaller than est_len; so use
+            # negative numbers
+            return uls - ls
+        # smaller than est_len; want largest (closest to est_len) first
+        return ls - uls
+    return sorted(forw_aseqs, key = mixed_key_func)
+
+def best_assoc(aseqs, sseq, assoc_params, max_errors):
+    '''
+    Try associating sseq with each alignment sequence in order, allowing fewer
+    errors after each success.  Returns the best SeqMatchMap and its number of
+    errors, or (None, None).
+    '''
+    from chimerax.atomic import StructAssocError, try_assoc
+    est_len, segments, gaps = assoc_params
+    best_errors = best_match_map = None
+    for aseq in aseqs:
+        if best_errors:
+            try_errors = best_errors - 1
+        else:
+            try_errors = max_errors
+        try:
+            match_map, errors = try_assoc(aseq, sseq, assoc_params, max_errors=try_errors)
+        except StructAssocError:
+            # maybe the sequence is derived from the structure...
+            if gaps:
+                try:
+                    match_map, errors = try_assoc(aseq, sseq,
+                        (len(sseq), [sseq[:]], []), max_errors=try_errors)
+                except StructAssocError:
+                    continue
+            else:
+                continue
+        else:
+            # if the above worked but had errors, see if just
+            # smooshing sequence together works better
+            if errors and gaps:
+                try:
+                    match_map, errors = try_assoc(aseq, sseq,
+                        (len(sseq), [sseq[:]], []), max_errors=errors-1)
+                except StructAssocError:
+                    pass
+
+        best_match_map = match_map
+        best_errors = errors
+        if errors == 0:
+            break
+    return best_match_map, best_errors
+
+def structure_name(struct):
+    if '.' in struct.id_string:
+        # ensemble
+        return struct.name + " (" + struct.id_string + ")"
+    return struct.name
+
+def assoc_message(struct_name, sseq, match_map, errors, add_gaps=False):
+    s1, s2, s3 = ("", "", "") if errors == 1 else ("es", "and/", "s")
+    if add_gaps:
+        gaps = " %sor gap%s" % (s2, s3)
+    else:
+        gaps = ""
+    return "Associated %s %s to %s with %d mismatch%s%s" % (struct_name,
+        sseq.name, match_map.align_seq.name, errors, s1, gaps)
+
+def _add_assoc(alignment, match_map, errors, reassoc, new_match_maps, add_gaps=False):
+    sseq = match_map.struct_seq
+    if sseq in alignment.associations:
+        # already associated, only change it if a different sequence matches best
+        if alignment.associations[sseq] == match_map.align_seq:
+            return
+        alignment.disassociate(sseq, reassoc=True)
+    if not alignment.intrinsic:
+        alignment.session.logger.status(assoc_message(structure_name(sseq.structure), sseq,
+            match_map, errors, add_gaps), log=True)
+    alignment.prematched_assoc_structure(match_map, errors, reassoc)
+    new_match_maps.append(match_map)
+
+# -----------------------------------------------------------------------------
+# Needleman-Wunsch alignments of unassociated chains with their candidate
+# sequences run in threads (the alignment code releases the Python global
+# interpreter lock).  Threads only see plain Sequence copies; match maps
+# referring to residues are made afterwards in the main thread.
+#
+def _nw_associations(index, unassociated, max_candidates, nthread):
+    from chimerax.atomic import Sequence
+    pairs = []
+    jobs = []
+    ungapped = {}
+    for u, (struct, sseqs) in enumerate(unassociated):
+        for sseq in sseqs:
+            s = Sequence(name=sseq.name, characters=sseq.characters)
+            aseqs = index.candidates(sseq.characters, max_candidates) or index.seqs
+            for aseq in aseqs:
+                if aseq not in ungapped:
+                    useq = Sequence(name=aseq.name, characters=aseq.ungapped())
+                    useq.circular = aseq.circular
+                    ungapped[aseq] = useq
+                jobs.append((len(jobs), s, ungapped[aseq]))
+                pairs.append((u, sseq, aseq))
+    from chimerax.core.threadq import apply_to_list
+    results = apply_to_list(_nw_match_list, jobs, nthread)
+    for r in results:
+        if isinstance(r, Exception):
+            raise r
+    match_lists = dict(results)
+
+    from .alignment import nw_match_map
+    best = {}
+    for j, (u, sseq, aseq) in enumerate(pairs):
+        match_map, errors = nw_match_map(aseq, sseq, ungapped[aseq], match_lists[j])
+        if u not in best or errors < best[u][1]:
+            best[u] = (match_map, errors)
+    for u, (struct, sseqs) in enumerate(unassociated):
+        match_map, errors = best.get(u, (None, None))
+        yield struct, match_map, errors
+
+def _nw_match_list(job_index, sseq, aseq):
+    from chimerax.alignment_algs.NeedlemanWunsch import nw
+    score, match_list = nw(sseq, aseq)
+    return job_index, match_list
+
+def _report_times(alignment, times, t_index, t_total, num_assoc):
+    logger = alignment.session.logger
+    lines = ['%s %.3g seconds' % (structure_name(s), t) for s, t in times.items()]
+    logger.info('Association time per structure with %s:\n%s' % (alignment, '\n'.join(lines)))
+    logger.status('Made %d associations for %d structures with %s in %.3g seconds'
+        ' (sequence index %.3g seconds)' % (num_assoc, len(times), alignment, t_total, t_index),
+        log=True)
@@ -0,0 +1,149 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+"""
+Alignment column statistics computed with numpy from a (number of sequences x
+alignment length) uint8 character matrix.  Most statistics only need the count
+of each character in each column, an (ncolumns x 256) array, so they are cheap
+to compute once the counts are known.
+"""
+
+def character_matrix(seqs):
+    '''Return sequence characters as an (len(seqs) x alignment length) uint8 array.'''
+    from numpy import frombuffer, uint8, full
+    n = len(seqs)
+    chars = [seq if isinstance(seq, str) else seq.characters for seq in seqs]
+    ncols = max((len(c) for c in chars), default = 0)
+    if all(len(c) == ncols for c in chars):
+        text = ''.join(chars).encode('latin-1', errors = 'replace')
+        return frombuffer(text, uint8).reshape((n, ncols)).copy()
+    # Pad ragged sequences with gaps.
+    m = full((n, ncols), ord('.'), uint8)
+    for i, c in enumerate(chars):
+        m[i,:len(c)] = frombuffer(c.encode('latin-1', errors = 'replace'), uint8)
+    return m
+
+def column_counts(matrix, chunk_size = 2**22):
+    '''Return an (ncolumns x 256) int32 array counting each character in each column.'''
+    from numpy import zeros, int32, int64, arange, bincount
+    nseqs, ncols = matrix.shape
+    counts = zeros((ncols, 256), int32)
+    step = max(1, chunk_size // max(1, nseqs))
+    for c0 in range(0, ncols, step):
+        sub = matrix[:, c0:c0+step]
+        k = sub.shape[1]
+        index = arange(0, 256*k, 256, dtype = int64)[None,:] + sub
+        counts[c0:c0+k] = bincount(index.ravel(), minlength = 256*k).reshape((k, 256))
+    return counts
+
+def _char_table(func):
+    from numpy import array
+    return array([func(chr(i)) for i in range(256)])
+
+_alpha = None
+def alpha_mask():
+    '''Boolean array of length 256, true for alphabetic (non-gap) characters.'''
+    global _alpha
+    if _alpha is None:
+        _alpha = _char_table(str.isalpha)
+    return _alpha
+
+_upper = None
+def _upper_case_map():
+    global _upper
+    if _upper is None:
+        def upper(c):
+            u = c.upper()
+            return ord(u) if len(u) == 1 and ord(u) < 256 else ord(c)
+        _upper = _char_table(upper)
+    return _upper
+
+def percent_identity(counts, nseqs, for_histogram = False):
+    '''
+    Fraction of sequences having the most common letter in each column.
+    With for_histogram true, the value is (count-1)/(nseqs-1) so that
+    columns with no repeated letter have value 0.
+    '''
+    from numpy import where, float64
+    best = (counts * alpha_mask()).max(axis = 1).astype(float64)
+    if for_histogram:
+        return where(best > 0, (best - 1) / max(1, nseqs - 1), 0.0)
+    return best / nseqs
+
+def clustal_types(counts, nseqs):
+    '''
+    Clustal conservation type for each column: 3 = all characters identical,
+    2 = all in a strong group, 1 = all in a weak group, 0 otherwise.
+    Characters are compared ignoring case.
+    '''
+    from numpy import zeros, int32, add, int8
+    from .alignment import clustal_strong_groups, clustal_weak_groups
+    upper = zeros(counts.shape, int32)
+    add.at(upper.T, _upper_case_map(), counts.T)
+    types = zeros((len(counts),), int8)
+    for value, groups in ((1, clustal_weak_groups), (2, clustal_strong_groups)):
+        for group in groups:
+            gi = [ord(c) for c in group]
+            types[upper[:,gi].sum(axis = 1) == nseqs] = value
+    types[(upper > 0).sum(axis = 1) == 1] = 3
+    return types
+
+def consensus_characters(matrix, counts, ignore_gaps = False, first_column = 0):
+    '''
+    Most common character in each column and its count.  Ties go to the letter
+    appearing first in the column, except that gap characters win ties.
+    Matrix columns start at first_column relative to the counts.
+    Returns a list of characters (None for columns with no counted characters)
+    and an array of counts.
+    '''
+    alpha = alpha_mask()
+    occur = counts * alpha if ignore_gaps else counts
+    num = occur.max(axis = 1)
+    ties = (occur == num[:,None]).sum(axis = 1) > 1
+    chars = [chr(c) for c in occur.argmax(axis = 1)]
+    for col in ties.nonzero()[0]:
+        if num[col] == 0:
+            chars[col] = None
+            continue
+        column = matrix[:, first_column + col]
+        candidates = (occur[col] == num[col]).nonzero()[0]
+        first = sorted((int((column == c).argmax()), c) for c in candidates)
+        best = first[0][1]
+        for i, c in first[1:]:
+            if not alpha[c]:
+                best = c
+        chars[col] = chr(best)
+    return chars, num
+
+def entropy(counts, ignore_gaps = True):
+    '''Shannon entropy in bits of the character distribution of each column.'''
+    from numpy import log2, where, float64
+    c = (counts * alpha_mask() if ignore_gaps else counts).astype(float64)
+    total = c.sum(axis = 1)[:,None]
+    p = c / where(total > 0, total, 1)
+    return -(p * log2(where(p > 0, p, 1))).sum(axis = 1)
+
+def gap_fraction(counts, nseqs):
+    '''Fraction of non-alphabetic characters in each column.'''
+    return 1.0 - (counts * alpha_mask()).sum(axis = 1) / nseqs
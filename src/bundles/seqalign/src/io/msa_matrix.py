@@ -0,0 +1,193 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+"""
+Read FASTA and A3M files with many sequences into a numpy character array.
+The file is memory mapped, record starts are found with numpy, and groups
+of records are parsed in parallel threads.
+"""
+
+class SequenceRecords:
+    '''
+    Sequences read from a FASTA or A3M file.  The characters of all sequences
+    are held in one uint8 array, and can be viewed as a (number of sequences x
+    length) matrix if all sequences have the same length.
+    '''
+    def __init__(self, names, name_offsets, characters, lengths, end_offset = None):
+        self.names = names		# Sequence names as strings
+        self.name_offsets = name_offsets	# N x 2 int64 file offsets of start and end of names
+        self.characters = characters	# Sequence characters concatenated, uint8
+        self.lengths = lengths		# Length of each sequence, int64
+        self.end_offset = end_offset	# File offset of the end of the last record
+
+    def __len__(self):
+        return len(self.lengths)
+
+    @property
+    def matrix(self):
+        '''Characters as a 2D uint8 array, or None if sequence lengths differ.'''
+        lengths = self.lengths
+        n = len(lengths)
+        if n == 0 or (lengths != lengths[0]).any():
+            return None
+        return self.characters.reshape((n, int(lengths[0])))
+
+    def sequence_strings(self):
+        text = self.characters.tobytes().decode('latin-1')
+        from numpy import cumsum
+        ends = cumsum(self.lengths)
+        starts = ends - self.lengths
+        return [text[s:e] for s, e in zip(starts.tolist(), ends.tolist())]
+
+def read_sequence_records(f, max_sequences=None, a3m=False, nthread=None, chunk_bytes=2**24):
+    '''
+    Read FASTA records from an open file.  Only the first max_sequences records are
+    read, and only the part of the file containing them is scanned.  With a3m true,
+    lowercase insertion characters and '.' are removed so that the sequences align
+    to the first (query) sequence.
+    '''
+    data = _file_bytes(f)
+    starts, end = _record_starts(data, max_sequences)
+    chunks = _record_chunks(data, starts, end, a3m, chunk_bytes)
+    return _parse_chunks(chunks, end, nthread)
+
+def sequence_record_batches(f, nthread=None, chunk_bytes=2**24):
+    '''
+    Read FASTA records from an open file yielding a SequenceRecords instance
+    for each group of about nthread * chunk_bytes bytes of the file, so that
+    files larger than memory can be processed.
+    '''
+    data = _file_bytes(f)
+    starts, end = _record_starts(data)
+    chunks = _record_chunks(data, starts, end, False, chunk_bytes)
+    if nthread is None:
+        from multiprocessing import cpu_count
+        nthread = max(1, cpu_count()//2)
+    for b in range(0, len(chunks), nthread):
+        batch_end = int(chunks[b+nthread][2][0]) if b+nthread < len(chunks) else end
+        yield _parse_chunks(chunks[b:b+nthread], batch_end, nthread)
+
+def _record_chunks(data, starts, end, a3m, chunk_bytes):
+    '''Group records into chunks of about chunk_bytes bytes each.'''
+    n = len(starts)
+    if n == 0:
+        return []
+    from numpy import arange, searchsorted, unique, append
+    first = searchsorted(starts, arange(starts[0], end, chunk_bytes))
+    # Records longer than chunk_bytes give repeated or past-the-end chunk starts.
+    bounds = append(unique(first[first < n]), n).tolist()
+    return [(c, data, starts[r0:r1], int(starts[r1]) if r1 < n else end, a3m)
+            for c, (r0, r1) in enumerate(zip(bounds[:-1], bounds[1:]))]
+
+def _parse_chunks(chunks, end, nthread):
+    from numpy import zeros, int64, uint8, concatenate
+    if len(chunks) == 0:
+        return SequenceRecords([], zeros((0,2), int64), zeros((0,), uint8), zeros((0,), int64), end)
+    from chimerax.core.threadq import apply_to_list
+    results = sorted(apply_to_list(_parse_records, chunks, nthread), key = lambda r: r[0])
+
+    names = [name for r in results for name in r[1]]
+    name_offsets = concatenate([r[2] for r in results])
+    characters = concatenate([r[3] for r in results])
+    lengths = concatenate([r[4] for r in results])
+    return SequenceRecords(names, name_offsets, characters, lengths, end)
+
+def _file_bytes(f):
+    '''File contents as a uint8 array, memory mapped if f is an uncompressed file.'''
+    import io
+    from numpy import frombuffer, uint8
+    buffer = getattr(f, 'buffer', f)
+    if isinstance(buffer, io.BufferedReader):
+        import mmap
+        try:
+            m = mmap.mmap(buffer.fileno(), 0, access = mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            pass	# Empty file or file that can't be mapped
+        else:
+            return frombuffer(m, uint8)
+    text = f.read()
+    if isinstance(text, str):
+        text = text.encode('utf-8')
+    return frombuffer(text, uint8)
+
+def _record_starts(data, max_sequences=None, block_size=2**26):
+    '''
+    Offsets of '>' characters that begin a line, found one block at a time
+    stopping once more than max_sequences have been found.  Also returns
+    the end offset of the last record.
+    '''
+    from numpy import flatnonzero, maximum, concatenate, zeros, int64
+    size = len(data)
+    found = []
+    count = 0
+    for b0 in range(0, size, block_size):
+        s = flatnonzero(data[b0:b0+block_size] == ord('>')) + b0
+        prev = s - 1
+        s = s[(prev < 0) | (data[maximum(prev, 0)] == ord('\n'))]
+        found.append(s)
+        count += len(s)
+        if max_sequences is not None and count > max_sequences:
+            break
+    starts = concatenate(found).astype(int64) if found else zeros((0,), int64)
+    if max_sequences is not None and len(starts) > max_sequences:
+        return starts[:max_sequences], int(starts[max_sequences])
+    return starts, size
+
+def _parse_records(chunk_index, data, starts, end, a3m):
+    from numpy import flatnonzero, searchsorted, append, zeros, int8, cumsum, add, int64, empty
+    c0 = int(starts[0])
+    b = data[c0:end]
+    local = starts - c0
+    newlines = flatnonzero(b == ord('\n'))
+    name_end = append(newlines, len(b))[searchsorted(newlines, local)]
+
+    # Skip header lines, whitespace and for A3M insertions.
+    mark = zeros((len(b)+1,), int8)
+    mark[local] = 1
+    mark[name_end] -= 1
+    header = cumsum(mark[:-1], dtype = int8).view(bool)
+    keep = (b > ord(' '))
+    keep &= ~header
+    if a3m:
+        keep &= ~(((b >= ord('a')) & (b <= ord('z'))) | (b == ord('.')))
+    characters = b[keep]
+    lengths = add.reduceat(keep, local, dtype = int64)
+
+    names = [bytes(b[s+1:e]).decode('utf-8', errors = 'replace')
+             for s, e in zip(local.tolist(), name_end.tolist())]
+    name_offsets = empty((len(local),2), int64)
+    name_offsets[:,0] = starts + 1
+    name_offsets[:,1] = name_end + c0
+    return chunk_index, names, name_offsets, characters, lengths
+
+def sequences_from_records(records):
+    '''Make Sequence objects from records, checking that no sequence is empty.'''
+    from ..parse import FormatSyntaxError, make_readable
+    from chimerax.atomic import Sequence
+    names = records.names
+    empty = (records.lengths == 0).nonzero()[0]
+    if len(empty) > 0:
+        raise FormatSyntaxError("No sequence found for %s" % make_readable(names[empty[0]]))
+    return [Sequence(name=make_readable(name), characters=chars)
+            for name, chars in zip(names, records.sequence_strings())]
@@ -42,15 +42,15 @@ generic_seq_attrs = {
     "WT": "weight"
 }
 
-def read(session, f):
+def read(session, f, max_sequences=None):
     line_num = 0
     file_attrs = {}
     file_markups = {}
     seq_attrs = {}
     seq_markups = {}
-    sequences = {}
+    blocks = {}
     seq_sequence = []
-    for line in f.readlines():
+    for line in f:
         line = line.rstrip() # drop trailing newline/whitespace
         line_num += 1
         if line_num == 1:
@@ -115,11 +115,24 @@ def read(session, f):
         except ValueError:
             raise FormatSyntaxError(
                 "Sequence info not in name/contents format on line %d" % line_num)
-        if seq_name not in sequences:
-            sequences[seq_name] = Sequence(name=make_readable(seq_name))
+        seq_blocks = blocks.get(seq_name)
+        if seq_blocks is None:
+            if max_sequences is not None and len(seq_sequence) >= max_sequences:
+                continue
+            blocks[seq_name] = seq_blocks = []
             seq_sequence.append(seq_name)
-        sequences[seq_name].extend(block)
+        seq_blocks.append(block)
     f.close()
+    sequences = { seq_name: Sequence(name=make_readable(seq_name), characters=''.join(seq_blocks))
+        for seq_name, seq_blocks in blocks.items() }
+    if max_sequences is not None:
+        # drop annotations of sequences that were not read
+        read_names = set(sequences.keys())
+        read_names.update([name[:name.rindex('/')] for name in sequences.keys() if '/' in name])
+        for seq_info in (seq_attrs, seq_markups):
+            for seq_name in list(seq_info.keys()):
+                if seq_name not in read_names:
+                    del seq_info[seq_name]
     for seq_name, seq in sequences.items():
         if seq_name in seq_attrs:
             seq.attrs = seq_attrs[seq_name]
@@ -27,8 +27,10 @@ class FormatSyntaxError(Exception):
 class NoSequencesError(ValueError):
     pass
 
+streaming_formats = set(["FASTA", "A3M", "STOCKHOLM"])
+
 def open_file(session, stream, fname, format_name="FASTA", return_vals=None,
-        alignment=True, ident=None, auto_associate=True, **kw):
+        alignment=True, ident=None, auto_associate=True, max_sequences=None, **kw):
     ns = {}
     try:
         exec("from .io.read%s import read" % format_name.replace(' ', '_'), globals(), ns)
@@ -40,12 +42,17 @@ def open_file(session, stream, fname, format_name="FASTA", return_vals=None,
         fname = os.path.basename(path)
         from chimerax import io
         stream = io.open_input(path, 'utf-8')
+    # Readers for formats that can hold very many sequences stop reading after max_sequences
+    read_kw = {} if max_sequences is None or format_name not in streaming_formats \
+        else {'max_sequences': max_sequences}
     try:
-        seqs, file_attrs, file_markups = ns['read'](session, stream)
+        seqs, file_attrs, file_markups = ns['read'](session, stream, **read_kw)
     except FormatSyntaxError as err:
         raise IOError("Syntax error in %s file '%s': %s" % (format_name, fname, err))
     if not seqs:
         raise NoSequencesError("No sequences found in %s file '%s'!" % (format_name, fname))
+    if max_sequences is not None:
+        seqs = seqs[:max_sequences]
     uniform_length = True
     for s in seqs:
         if uniform_length and len(s) != len(seqs[0]):
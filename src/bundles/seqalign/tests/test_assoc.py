@@ -0,0 +1,46 @@
+from chimerax.seqalign.assoc import KmerSequenceIndex
+
+class _Seq:
+    # Alignment sequence stand-in with the methods the index uses
+    def __init__(self, name, characters):
+        self.name = name
+        self.characters = characters
+
+    def ungapped(self):
+        return self.characters.replace('-', '').replace('.', '')
+
+seqs = [
+    _Seq("a", "MKTAYIAKQRQISFVKSHFSRQ"),
+    _Seq("b", "MKTAY--IAKQRQISFVKSHFSRQLEERLGLIEVQ"),
+    _Seq("c", "GSHMLEDPVDAFQEAWNKLQEHG"),
+    _Seq("d", "MSDNGPQSNQRSAPRITFGGPTDST"),
+    _Seq("e", "mktayiakqrqisfvkshfsrq"),
+]
+
+def test_exact_match_first():
+    c = KmerSequenceIndex(seqs).candidates("MKTAYIAKQRQISFVKSHFSRQ")
+    # both case variants match exactly, then the sequence containing it
+    assert [s.name for s in c] == ["a", "e", "b"]
+
+def test_substring_finds_source():
+    c = KmerSequenceIndex(seqs).candidates("DPVDAFQEAW")
+    assert [s.name for s in c] == ["c"]
+
+def test_mutated_query_ranks_source_first():
+    c = KmerSequenceIndex(seqs).candidates("MSDNGPQSNQWSAPRITFGGPTDST")
+    assert c[0].name == "d"
+
+def test_max_candidates():
+    c = KmerSequenceIndex(seqs).candidates("MKTAYIAKQRQ", max_candidates=1)
+    assert len(c) == 1
+
+def test_no_shared_kmers():
+    assert KmerSequenceIndex(seqs).candidates("WWWWWWWW") == []
+
+def test_kmers_span_alignment_gaps():
+    # sequences are indexed ungapped, so k-mers spanning a gap are found
+    c = KmerSequenceIndex(seqs).candidates("KTAYIAK")
+    assert "b" in [s.name for s in c]
+
+def test_query_shorter_than_k():
+    assert KmerSequenceIndex(seqs, k=5).candidates("MKT") == []
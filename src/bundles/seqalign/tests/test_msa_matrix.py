@@ -0,0 +1,55 @@
+import io
+
+import pytest
+
+from chimerax.seqalign.io.msa_matrix import read_sequence_records, sequence_record_batches
+
+fasta = b">seq1 first\nACDEF\nGHIK\n>seq2\nAC-EFGHIK\n>seq3\n\nACDEFGH-K\n"
+
+def _read(text, **kw):
+    return read_sequence_records(io.BytesIO(text), **kw)
+
+@pytest.mark.parametrize("chunk_bytes", [1, 7, 16, 2**24])
+def test_chunking_does_not_change_records(chunk_bytes):
+    r = _read(fasta, chunk_bytes=chunk_bytes, nthread=2)
+    assert r.names == ["seq1 first", "seq2", "seq3"]
+    assert r.sequence_strings() == ["ACDEFGHIK", "AC-EFGHIK", "ACDEFGH-K"]
+    assert r.matrix.shape == (3, 9)
+    assert r.end_offset == len(fasta)
+
+def test_single_record():
+    r = _read(b">only\nACGT\n")
+    assert len(r) == 1
+    assert r.sequence_strings() == ["ACGT"]
+
+def test_record_longer_than_chunk():
+    r = _read(b">chr1\n" + b"ACGT"*10, chunk_bytes=16)
+    assert len(r) == 1
+    assert r.sequence_strings() == ["ACGT"*10]
+
+def test_oversized_record_between_records():
+    text = b">a\nAC\n>chr1\n" + b"ACGT"*10 + b"\n>b\nGG\n"
+    r = _read(text, chunk_bytes=16, nthread=2)
+    assert r.names == ["a", "chr1", "b"]
+    assert r.sequence_strings() == ["AC", "ACGT"*10, "GG"]
+
+def test_oversized_record_batches():
+    text = b">a\nAC\n>chr1\n" + b"ACGT"*10 + b"\n>b\nGG\n"
+    seqs = []
+    for batch in sequence_record_batches(io.BytesIO(text), nthread=1, chunk_bytes=16):
+        seqs.extend(batch.sequence_strings())
+    assert seqs == ["AC", "ACGT"*10, "GG"]
+
+def test_max_sequences():
+    r = _read(fasta, max_sequences=2)
+    assert r.names == ["seq1 first", "seq2"]
+    assert r.end_offset == fasta.index(b">seq3")
+
+def test_a3m_insertions_removed():
+    r = _read(b">q\nACDE\n>h\nAcgC.DE\n", a3m=True)
+    assert r.sequence_strings() == ["ACDE", "ACDE"]
+
+def test_empty_file():
+    r = _read(b"")
+    assert len(r) == 0
+    assert r.matrix is None
@@ -303,13 +303,15 @@ def _set_ribbon_colors(residues, color, opacity, bgcolor, undo_state):
         undo_state.add(masked_residues, "ribbon_colors", masked_residues.ribbon_colors, c[rmask, :])
         masked_residues.ribbon_colors = c[rmask, :]
     elif color == 'bymodel':
+        # Set colors for all structures at once.
+        cur = residues.ribbon_colors
+        c = cur.copy()
         for m, res in residues.by_structure:
-            c = res.ribbon_colors
-            c[:, :3] = m.initial_color(bgcolor).uint8x4()[:3]
-            if opacity is not None:
-                c[:, 3] = opacity
-            undo_state.add(res, "ribbon_colors", res.ribbon_colors, c)
-            res.ribbon_colors = c
+            c[residues.mask(res), :3] = m.initial_color(bgcolor).uint8x4()[:3]
+        if opacity is not None:
+            c[:, 3] = opacity
+        undo_state.add(residues, "ribbon_colors", cur, c)
+        residues.ribbon_colors = c
     elif color == 'random':
         from numpy import random, uint8
         c = random.randint(0, 255, (len(residues), 4)).astype(uint8)
@@ -349,13 +351,15 @@ def _set_ring_colors(residues, color, opacity, bgcolor, undo_state):
         undo_state.add(masked_residues, "ring_colors", masked_residues.ring_colors, c[rmask, :])
         masked_residues.ring_colors = c[rmask, :]
     elif color == 'bymodel':
+        # Set colors for all structures at once.
+        cur = residues.ring_colors
+        c = cur.copy()
         for m, res in residues.by_structure:
-            c = res.ring_colors
-            c[:, :3] = m.initial_color(bgcolor).uint8x4()[:3]
-            if opacity is not None:
-                c[:, 3] = opacity
-            undo_state.add(res, "ring_colors", res.ring_colors, c)
-            res.ring_colors = c
+            c[residues.mask(res), :3] = m.initial_color(bgcolor).uint8x4()[:3]
+        if opacity is not None:
+            c[:, 3] = opacity
+        undo_state.add(residues, "ring_colors", cur, c)
+        residues.ring_colors = c
     elif color == 'random':
         from numpy import random, uint8
         c = random.randint(0, 255, (len(residues), 4)).astype(uint8)
@@ -439,11 +443,11 @@ def _color_with_opacity(color, opacity, rgba):
 # Chain ids in each structure are colored from color map ordered alphabetically.
 #
 def _set_sequential_chain(session, objects, cmap, opacity, target, undo_state):
-    # Organize atoms by structure and then chain
+    # Organize chains by structure
     uc = objects.residues.chains.unique()
-    chain_atoms = {}
+    struct_chains = {}
     for c in uc:
-        chain_atoms.setdefault(c.structure, []).append((c.chain_id, c.existing_residues.atoms))
+        struct_chains.setdefault(c.structure, []).append(c)
 
     # Make sure there is a colormap
     if cmap is None:
@@ -453,34 +457,24 @@ def _set_sequential_chain(session, objects, cmap, opacity, target, undo_state):
 
     # Each structure is colored separately with cmap applied by chain
     import numpy
-    from chimerax.core.colors import Color
-    for sl in chain_atoms.values():
-        sl.sort(key = lambda ca: ca[0])	# Sort by chain id
-        colors = cmap.interpolated_rgba(numpy.linspace(0.0, 1.0, len(sl)))
-        for color, (chain_id, atoms) in zip(colors, sl):
-            c = Color(color)
-            opac = 255*color[3] if use_color_alpha else opacity
-            if target is None or 'a' in target:
-                _set_atom_colors(atoms, c, opac, None, undo_state)
-            if target is None or 'c' in target:
-                res = atoms.unique_residues
-                _set_ribbon_colors(res, c, opac, None, undo_state)
-            if target is None or 'f' in target:
-                res = atoms.unique_residues
-                _set_ring_colors(res, c, opac, None, undo_state)
-            if target is None or 's' in target:
-                _set_surface_colors(session, atoms, c, opac, undo_state=undo_state)
+    res_list, colors = [], []
+    for sc in struct_chains.values():
+        sc.sort(key = lambda c: c.chain_id)
+        res_list.extend(c.existing_residues for c in sc)
+        colors.append(cmap.interpolated_rgba8(numpy.linspace(0.0, 1.0, len(sc))))
+    _set_residue_group_colors(session, res_list, colors, opacity, use_color_alpha,
+                              target, undo_state)
 
 # ----------------------------------------------------------------------------------
 # Polymers (unique sequences) in each structure are colored from color map ordered
 # by polymer length.
 #
 def _set_sequential_polymer(session, objects, cmap, opacity, target, undo_state):
-    # Organize atoms by structure and then polymer sequence
+    # Organize chains by structure and then polymer sequence
     uc = objects.residues.chains.unique()
-    seq_atoms = {}
+    seq_chains = {}
     for c in uc:
-        seq_atoms.setdefault(c.structure, {}).setdefault(c.characters, []).append(c.existing_residues.atoms)
+        seq_chains.setdefault(c.structure, {}).setdefault(c.characters, []).append(c)
 
     # Make sure there is a colormap
     if cmap is None:
@@ -488,27 +482,18 @@ def _set_sequential_polymer(session, objects, cmap, opacity, target, undo_state)
         cmap = colors.BuiltinColormaps["rainbow"]
     use_color_alpha = (opacity is None) and cmap.is_transparent
 
-    # Each structure is colored separately with cmap applied by chain
+    # Each structure is colored separately with cmap applied by sequence
     import numpy
-    from chimerax.core.colors import Color
-    for sl in seq_atoms.values():
+    res_list, colors = [], []
+    for sl in seq_chains.values():
         sseq = list(sl.items())
-        sseq.sort(key = lambda sa: len(sa[0]))	# Sort by sequence length
-        colors = cmap.interpolated_rgba(numpy.linspace(0.0, 1.0, len(sseq)))
-        for color, (seq, alist) in zip(colors, sseq):
-            c = Color(color)
-            opac = 255*color[3] if use_color_alpha else opacity
-            for atoms in alist:
-                if target is None or 'a' in target:
-                    _set_atom_colors(atoms, c, opac, None, undo_state)
-                if target is None or 'c' in target:
-                    res = atoms.unique_residues
-                    _set_ribbon_colors(res, c, opac, None, undo_state)
-                if target is None or 'f' in target:
-                    res = atoms.unique_residues
-                    _set_ring_colors(res, c, opac, None, undo_state)
-                if target is None or 's' in target:
-                    _set_surface_colors(session, atoms, c, opac, undo_state=undo_state)
+        sseq.sort(key = lambda sc: len(sc[0]))	# Sort by sequence length
+        scolors = cmap.interpolated_rgba8(numpy.linspace(0.0, 1.0, len(sseq)))
+        for color, (seq, chains) in zip(scolors, sseq):
+            res_list.extend(c.existing_residues for c in chains)
+            colors.append(numpy.tile(color, (len(chains),1)))
+    _set_residue_group_colors(session, res_list, colors, opacity, use_color_alpha,
+                              target, undo_state)
 
 # -----------------------------------------------------------------------------
 #
@@ -519,32 +504,20 @@ def _set_sequential_residue(session, objects, cmap, opacity, target, undo_state)
         cmap = colors.BuiltinColormaps["rainbow"]
     use_color_alpha = (opacity is None) and cmap.is_transparent
 
-    # Get chains and atoms in chains with "by_chain"
     # Each chain is colored separately with cmap applied by residue
     res = objects.atoms.unique_residues
-    chain_res = [(chain, chain.existing_residues.intersect(res))
-                 for chain in res.unique_chains]
+    chain_res = [chain.existing_residues.intersect(res) for chain in res.unique_chains]
+    if len(chain_res) == 0:
+        return
     import numpy
-    from chimerax.core.colors import Color
-    from chimerax.atomic import Residues
-    for chain, residues in chain_res:
-        colors = cmap.interpolated_rgba8(numpy.linspace(0.0, 1.0, len(residues)))
-        for color, r in zip(colors, residues):
-            c = Color(color)
-            opac = color[3] if use_color_alpha else opacity
-            if target is None or 'a' in target:
-                _set_atom_colors(r.atoms, c, opac, None, undo_state)
-            if target is None or 'c' in target:
-                rgba = c.uint8x4()
-                rgba[3] = r.ribbon_color[3] if opac is None else opac
-                undo_state.add(r, "ribbon_color", r.ribbon_color, rgba)
-                r.ribbon_color = rgba
-            if target is None or 'f' in target:
-                _set_ring_colors(Residues([r]), c, opac, None, undo_state)
-        if 's' in target:
-            _color_surfaces_at_residues(residues, colors, opacity=opac,
-                                        undo_state = undo_state)
-                
+    colors = [cmap.interpolated_rgba8(numpy.linspace(0.0, 1.0, len(residues)))
+              for residues in chain_res]
+    from chimerax.atomic import concatenate, Residues
+    residues = concatenate(chain_res, Residues)
+    rcolors = numpy.concatenate(colors)
+    _set_residue_colors(session, residues, rcolors, opacity, use_color_alpha,
+                        target, undo_state)
+
 # -----------------------------------------------------------------------------
 #
 def _set_sequential_structures(session, objects, cmap, opacity, target, undo_state):
@@ -560,22 +533,80 @@ def _set_sequential_structures(session, objects, cmap, opacity, target, undo_sta
     if len(models) == 0:
         return
 
-    # Each structure is colored separately with cmap applied by chain
+    # Each structure is colored separately with cmap applied by structure
     import numpy
-    from chimerax.core.colors import Color, rgba_to_rgba8
-    colors = cmap.interpolated_rgba(numpy.linspace(0.0, 1.0, len(models)))
-    for color, m in zip(colors, models):
-        c = Color(color)
-        opac = 255*color[3] if use_color_alpha else opacity
-        if 'a' in target:
-            _set_atom_colors(m.atoms, c, opac, None, undo_state)
-        if 'c' in target:
-            _set_ribbon_colors(m.residues, c, opac, None, undo_state)
-        if 'f' in target:
-            _set_ring_colors(m.residues, c, opac, None, undo_state)
-        if 's' in target:
-            _color_surfaces_at_atoms(m.atoms, rgba_to_rgba8(color),
-                                     opacity=opac, undo_state=undo_state)
+    colors = cmap.interpolated_rgba8(numpy.linspace(0.0, 1.0, len(models)))
+    _set_residue_group_colors(session, [m.residues for m in models], [colors],
+                              opacity, use_color_alpha, target, undo_state)
+
+# -----------------------------------------------------------------------------
+# Color groups of residues each with one color, e.g. all residues of a chain.
+# Colors is a list of Nx4 uint8 arrays, one row per residue group.
+#
+def _set_residue_group_colors(session, res_list, colors, opacity, use_color_alpha,
+                              target, undo_state):
+    if len(res_list) == 0:
+        return
+    from chimerax.atomic import concatenate, Residues
+    residues = concatenate(res_list, Residues)
+    from numpy import repeat, concatenate as concat
+    rcolors = repeat(concat(colors), [len(r) for r in res_list], axis = 0)
+    _set_residue_colors(session, residues, rcolors, opacity, use_color_alpha,
+                        target, undo_state)
+
+# -----------------------------------------------------------------------------
+# Color residues and their atoms, ribbons, rings and surfaces with per-residue
+# colors.  The final color arrays are computed first and each is set with a
+# single call so huge structures get one color change per structure instead
+# of one per chain or residue.  Transparency is kept unless opacity is given
+# or the colormap is transparent.
+#
+def _set_residue_colors(session, residues, rcolors, opacity, use_color_alpha,
+                        target, undo_state):
+    if len(residues) == 0:
+        return
+
+    def _with_alpha(colors, current_colors):
+        if opacity is not None:
+            colors[:,3] = opacity
+        elif not use_color_alpha:
+            colors[:,3] = current_colors[:,3]
+        return colors
+
+    atoms, acolors = _residue_atoms_and_colors(residues, rcolors)
+    if target is None or 'a' in target:
+        cur = atoms.colors
+        c = _with_alpha(acolors.copy(), cur)
+        undo_state.add(atoms, "colors", cur, c)
+        atoms.colors = c
+    if target is None or 'c' in target:
+        cur = residues.ribbon_colors
+        c = _with_alpha(rcolors.copy(), cur)
+        undo_state.add(residues, "ribbon_colors", cur, c)
+        residues.ribbon_colors = c
+    if target is None or 'f' in target:
+        cur = residues.ring_colors
+        c = _with_alpha(rcolors.copy(), cur)
+        undo_state.add(residues, "ring_colors", cur, c)
+        residues.ring_colors = c
+    if target is None or 's' in target:
+        _color_surfaces_at_atoms_keep_alpha(atoms, acolors, opacity, use_color_alpha, undo_state)
+
+def _color_surfaces_at_atoms_keep_alpha(atoms, acolors, opacity, use_color_alpha, undo_state):
+    from chimerax import atomic
+    for s in atomic.surfaces_with_atoms(atoms):
+        op = opacity
+        if op is None and not use_color_alpha:
+            # Keep surface transparency if it is the same for all vertices.
+            vc = s.get_vertex_colors(create = True)
+            if vc is not None and len(vc) > 0 and (vc[:,3] == vc[0,3]).all():
+                op = vc[0,3]
+        if undo_state and hasattr(s, 'color_undo_state'):
+            colors_before = s.color_undo_state
+            s.color_atom_patches(atoms, per_atom_colors = acolors, opacity = op)
+            undo_state.add(s, 'color_undo_state', colors_before, s.color_undo_state)
+        else:
+            s.color_atom_patches(atoms, per_atom_colors = acolors, opacity = op)
 
 # -----------------------------------------------------------------------------
 #
@@ -1153,8 +1184,8 @@ def color_by_attr(session, attr_name, atoms=None, what=None, target=None, averag
         needs_none_processing = False
         if average == 'residues' and class_obj == Atom:
             residues = atoms.unique_residues
-            res_average = { r: getattr(r.atoms, attr_names).mean() for r in residues }
-            attr_vals = [res_average[r] for r in atoms.residues]
+            res_attr_vals = _residue_average_values(residues, attr_names)
+            attr_vals = res_attr_vals[residues.indices(atoms.residues)]
         else:
             import numpy
             attr_vals = getattr(attr_objs, attr_names)
@@ -1168,8 +1199,7 @@ def color_by_attr(session, attr_name, atoms=None, what=None, target=None, averag
                     if average != 'residues':
                         # these vars already computed if average == 'residues'...
                         residues = atoms.unique_residues
-                        res_average = { r: getattr(r.atoms, attr_names).mean() for r in residues }
-                    res_attr_vals = [res_average[r] for r in residues]
+                        res_attr_vals = _residue_average_values(residues, attr_names)
                 else:
                     residues = atoms.unique_residues
                     if class_obj == Residue:
@@ -1322,9 +1352,21 @@ def _residue_atoms_and_colors(residues, colors):
     acolors = repeat(colors, residues.num_atoms, axis=0)
     return atoms, acolors
 
+def _residue_average_values(residues, attr_names):
+    '''Average of an atom attribute over all atoms of each residue.'''
+    values = getattr(residues.atoms, attr_names)
+    from numpy import repeat, arange, bincount, maximum
+    natoms = residues.num_atoms
+    ri = repeat(arange(len(residues)), natoms)
+    return bincount(ri, values, len(residues)) / maximum(natoms, 1)
+
 def _value_colors(palette, range, values, *, return_cmap_data=False):
     from chimerax.surface.colorvol import _use_full_range, _colormap_with_range
-    min_val, max_val = min(values), max(values)
+    from numpy import ndarray
+    if isinstance(values, ndarray):
+        min_val, max_val = values.min(), values.max()
+    else:
+        min_val, max_val = min(values), max(values)
     r = (min_val, max_val) if _use_full_range(range, palette) else range
     if r is not None and r[0] == r[1]:
         # all values the same; artificially manipulate the range to get the
@@ -86,7 +86,8 @@ def graphics_quality(session, quality = None, subdivision = None,
                      atom_triangles = None, bond_triangles = None,
                      total_atom_triangles = None, total_bond_triangles = None,
                      bond_sides = None, pseudobond_sides = None,
-                     ribbon_divisions = None, ribbon_sides = None, color_depth = None):
+                     ribbon_divisions = None, ribbon_sides = None, color_depth = None,
+                     view_dependent = None, view_dependent_atoms = None):
     '''
     Set graphics quality parameters.
 
@@ -123,6 +124,12 @@ def graphics_quality(session, quality = None, subdivision = None,
         Number of bits per color channel (red, green, blue, alpha) in framebuffer.
         If 16 is specified then offscreen rendering is used since it is not easy or
         possible to switch on-screen framebuffer depth.
+    view_dependent : bool
+        Whether structures showing very many atoms skip drawing atoms outside the view
+        and use fewer triangles for distant atoms.  Default true.
+    view_dependent_atoms : integer
+        Minimum number of shown atoms in a structure for view-dependent drawing,
+        default 1000000.
     '''
     from chimerax.atomic import structure_graphics_updater
     gu = structure_graphics_updater(session)
@@ -186,8 +193,18 @@ def graphics_quality(session, quality = None, subdivision = None,
         v.redraw_needed = True
         change = True
 
+    if view_dependent is not None:
+        lod.atom_view_dependent = view_dependent
+        change = True
+    if view_dependent_atoms is not None:
+        if view_dependent_atoms < 1:
+            raise UserError('View dependent atoms must be positive, got %d' % view_dependent_atoms)
+        lod.atom_view_dependent_min_atoms = view_dependent_atoms
+        change = True
+
     if change:
         gu.update_level_of_detail()
+        session.main_view.redraw_needed = True
     else:
         na = gu.num_atoms_shown
         msg = ('Quality %.3g, atom triangles %d, bond triangles %d, pseudobond sides %d' %
@@ -197,6 +214,8 @@ def graphics_quality(session, quality = None, subdivision = None,
             dmin, dmax = min(div), max(div)
             drange = '%d-%d' % (dmin, dmax) if dmin < dmax else '%d' % dmin
             msg += ', ribbon divisions %s' % drange
+        if lod.atom_view_dependent:
+            msg += ', view dependent for %d or more atoms' % lod.atom_view_dependent_min_atoms
         session.logger.status(msg, log = True)
 
 def graphics_silhouettes(session, enable=None, width=None, color=None, depth_jump=None):
@@ -323,6 +342,8 @@ def register_command(logger):
                  ('ribbon_divisions', IntOrDefaultArg),
                  ('ribbon_sides', IntArg),
                  ('color_depth', IntArg),
+                 ('view_dependent', BoolArg),
+                 ('view_dependent_atoms', IntArg),
                  ],
         hidden = ['subdivision'], # Deprecated in favor of quality
         synopsis='Set graphics quality parameters'
@@ -447,7 +468,7 @@ class FrameRateReporter:
         dt = t - lt
         if dt > self.report_interval:
             fps = nf / dt
-            msg = '%.1f frames per second' % fps
+            msg = '%.1f frames per second, %.1f msec per frame' % (fps, 1000/fps)
             ct = self._cumulative_times
             msg += ', ' + ', '.join(['%s %.0f%%' % (k[:-5], 100*v/dt) for k,v in ct.items()])
             self.session.logger.status(msg)
@@ -23,7 +23,8 @@
 # === UCSF ChimeraX Copyright ===
 
 def perframe(session, command, frames = None, interval = 1, format = None,
-             zero_pad_width = None, ranges = None, show_commands = False):
+             zero_pad_width = None, ranges = None, show_commands = False,
+             batch = False, batch_file = None, processes = 1, frame_range = None):
     '''Execute specified command each frame, typically used during movie recording.
 
     Parameters
@@ -43,12 +44,29 @@ def perframe(session, command, frames = None, interval = 1, format = None,
       start,end[,step] integer or float range of values to substitute for $1 instead of frame number.
     show_commands : bool
       Whether to echo commands to log.
+    batch : bool
+      Run the command for all frames immediately without drawing and collect
+      the results in a table.  Requires frames or ranges.
+    batch_file : string
+      File to save the batch results table.  Suffix .json saves JSON,
+      .csv comma-separated values, otherwise tab-separated values.
+    processes : int
+      Number of ChimeraX processes to run batch frames.  If more than 1 the
+      session is saved and each process restores it and runs a range of frames.
+    frame_range : tuple of 2 int
+      First and last frame number to run in batch mode.  Used by batch processes.
     '''
 
     if command == 'stop':
         stop_perframe_callbacks(session)
         return
 
+    if batch:
+        return perframe_batch(session, command, frames = frames, format = format,
+                              zero_pad_width = zero_pad_width, ranges = ranges,
+                              show_commands = show_commands, batch_file = batch_file,
+                              processes = processes, frame_range = frame_range)
+
     from chimerax.core.commands import cli
     data = {
         'command': cli.Alias(command),
@@ -71,14 +89,19 @@ def perframe(session, command, frames = None, interval = 1, format = None,
 def register_command(logger):
 
     from chimerax.core.commands import CmdDesc, register, IntArg, StringArg, BoolArg, \
-        RepeatOf, create_alias
+        RepeatOf, SaveFileNameArg, create_alias
     desc = CmdDesc(required = [('command', StringArg)],
                    keyword = [('ranges', RepeatOf(RangeArg)),      # TODO: Allow multiple range arguments.
                               ('frames', IntArg),
                               ('interval', IntArg),
                               ('format', StringArg),    # TODO: Allow multiple format arguments.
                               ('zero_pad_width', IntArg),
-                              ('show_commands', BoolArg)],
+                              ('show_commands', BoolArg),
+                              ('batch', BoolArg),
+                              ('batch_file', SaveFileNameArg),
+                              ('processes', IntArg),
+                              ('frame_range', ListOf(IntArg, 2, 2))],
+                   hidden = ['frame_range'],
                    synopsis = 'Run a command before each graphics frame is drawn')
     register('perframe', desc, perframe, logger=logger)
     desc = CmdDesc(synopsis = 'Stop all perframe commands')
@@ -147,6 +170,189 @@ def _perframe_args(frame_num, frames, ranges, format, zero_pad_width):
         args.append(fmt % frame_num)
     return args, stop
 
+def perframe_batch(session, command, frames = None, format = None, zero_pad_width = None,
+                   ranges = None, show_commands = False, batch_file = None,
+                   processes = 1, frame_range = None):
+    '''
+    Run a command for each frame value without drawing and return a list of
+    dictionaries, one per frame, with keys "frame" (frame number starting at 1),
+    "values" (text substituted for $1), "result" (command return value as text)
+    and "output" (text logged by the command).
+    '''
+    from chimerax.core.errors import UserError
+    if frames is None and not ranges:
+        raise UserError('perframe batch mode requires the frames or ranges option')
+    if processes < 1:
+        raise UserError('perframe processes must be at least 1, got %d' % processes)
+
+    frame_args = _batch_frame_args(frames, ranges, format, zero_pad_width)
+    if frame_range is not None:
+        f0, f1 = frame_range
+        frame_args = [(f, args) for f, args in frame_args if f0 <= f <= f1]
+
+    from time import time
+    t0 = time()
+    if processes > 1 and len(frame_args) > 1:
+        rows = _run_batch_processes(session, command, frame_args, processes, frames = frames,
+                                    format = format, zero_pad_width = zero_pad_width,
+                                    ranges = ranges, show_commands = show_commands)
+    else:
+        rows = _run_batch(session, command, frame_args, show_commands)
+    t1 = time()
+
+    if batch_file is not None:
+        save_batch_table(batch_file, rows)
+    _report_batch(session, rows, t1 - t0, batch_file)
+    return rows
+
+def _batch_frame_args(frames, ranges, format, zero_pad_width):
+    if frames is None:
+        for vr in ranges:
+            if len(vr) > 2 and vr[1] != vr[0] and (vr[1] - vr[0]) * vr[2] <= 0:
+                from chimerax.core.errors import UserError
+                raise UserError('perframe range step %g does not reach end value %g from %g'
+                                % (vr[2], vr[1], vr[0]))
+    frame_args = []
+    frame_num = 1
+    while True:
+        args, stop = _perframe_args(frame_num, frames, ranges, format, zero_pad_width)
+        frame_args.append((frame_num, args))
+        if stop or (frames is not None and frame_num >= frames):
+            break
+        frame_num += 1
+    return frame_args
+
+def _run_batch(session, command, frame_args, show_commands):
+    from chimerax.core.commands import cli
+    from chimerax.core.logger import StringPlainTextLog
+    alias = cli.Alias(command)
+    rows = []
+    ul = session.update_loop
+    ul.block_redraw()
+    try:
+        for frame_num, args in frame_args:
+            tag = ('perframe %d: ' % frame_num) if show_commands else None
+            error = None
+            with StringPlainTextLog(session.logger) as log:
+                try:
+                    results = alias(session, *args, echo_tag=tag, log=False)
+                except Exception as e:
+                    error = e
+            if error is not None:
+                cmd_text = alias.cmd.current_text if alias.cmd is not None else alias.original_text
+                from chimerax.core.errors import UserError
+                raise UserError("Error executing per-frame command '%s' for frame %d: %s"
+                                % (cmd_text, frame_num, error))
+            rows.append({'frame': frame_num,
+                         'values': ' '.join(args),
+                         'result': _result_text(results),
+                         'output': log.getvalue().strip()})
+    finally:
+        ul.unblock_redraw()
+    return rows
+
+def _result_text(results):
+    if results is None:
+        return ''
+    if not isinstance(results, (list, tuple)):
+        results = [results]
+    return ' '.join(str(r) for r in results if r is not None)
+
+def _run_batch_processes(session, command, frame_args, processes, **options):
+    import os, sys, json, tempfile
+    from subprocess import Popen, DEVNULL
+    from chimerax.core.commands import run, quote_path_if_necessary
+    from chimerax.core.errors import UserError
+    temp_dir = tempfile.mkdtemp(prefix = 'perframe_')
+    try:
+        session_path = os.path.join(temp_dir, 'perframe.cxs')
+        run(session, 'save %s' % quote_path_if_necessary(session_path), log = False)
+        nproc = min(processes, len(frame_args))
+        chunk_size = (len(frame_args) + nproc - 1) // nproc
+        jobs = []
+        for i in range(nproc):
+            fargs = frame_args[i*chunk_size:(i+1)*chunk_size]
+            if len(fargs) == 0:
+                continue
+            table_path = os.path.join(temp_dir, 'frames%d.json' % i)
+            err_path = os.path.join(temp_dir, 'errors%d.txt' % i)
+            perframe_cmd = _batch_process_command(command, (fargs[0][0], fargs[-1][0]),
+                                                  table_path, **options)
+            args = [sys.executable, '--nogui', '--exit', '--silent',
+                    '--cmd', 'open %s' % quote_path_if_necessary(session_path),
+                    '--cmd', perframe_cmd]
+            with open(err_path, 'w') as err:
+                p = Popen(args, stdout = DEVNULL, stderr = err)
+            jobs.append((p, table_path, err_path))
+        session.logger.status('Running perframe batch in %d processes' % len(jobs))
+        rows = []
+        for p, table_path, err_path in jobs:
+            p.wait()
+            if not os.path.exists(table_path):
+                with open(err_path) as err:
+                    msg = err.read()[-2000:]
+                raise UserError('perframe batch process failed: %s' % msg)
+            with open(table_path) as f:
+                rows.extend(json.load(f))
+    finally:
+        import shutil
+        shutil.rmtree(temp_dir, ignore_errors = True)
+    rows.sort(key = lambda row: row['frame'])
+    return rows
+
+def _batch_process_command(command, frame_range, table_path, frames = None, format = None,
+                           zero_pad_width = None, ranges = None, show_commands = False):
+    from chimerax.core.commands import StringArg, quote_path_if_necessary
+    opts = ['batch true',
+            'batchFile %s' % quote_path_if_necessary(table_path),
+            'frameRange %d,%d' % frame_range]
+    if frames is not None:
+        opts.append('frames %d' % frames)
+    for vr in (ranges or []):
+        opts.append('ranges %s' % ','.join('%.17g' % v for v in vr))
+    if format is not None:
+        opts.append('format %s' % StringArg.unparse(format))
+    if zero_pad_width is not None:
+        opts.append('zeroPadWidth %d' % zero_pad_width)
+    if show_commands:
+        opts.append('showCommands true')
+    return 'perframe %s %s' % (StringArg.unparse(command), ' '.join(opts))
+
+def save_batch_table(path, rows):
+    '''
+    Save perframe batch results.  A .json suffix writes a list of row dictionaries,
+    .csv writes comma-separated values, other suffixes tab-separated values.
+    '''
+    columns = ('frame', 'values', 'result', 'output')
+    if path.endswith('.json'):
+        import json
+        with open(path, 'w') as f:
+            json.dump(rows, f)
+        return
+    import csv
+    delimiter = ',' if path.endswith('.csv') else '\t'
+    with open(path, 'w', newline = '') as f:
+        w = csv.writer(f, delimiter = delimiter)
+        w.writerow(columns)
+        for row in rows:
+            w.writerow([row[c] for c in columns])
+
+def _report_batch(session, rows, seconds, batch_file):
+    msg = 'perframe batch ran %d frames in %.3g seconds' % (len(rows), seconds)
+    if batch_file is not None:
+        session.logger.info(msg + ', results saved to %s' % batch_file)
+        return
+    from html import escape
+    lines = ['<table border=1 cellpadding=2 cellspacing=0>',
+             '<tr><th>Frame<th>Value<th>Result<th>Output']
+    for row in rows:
+        lines.append('<tr><td>%d<td>%s<td>%s<td>%s' % (row['frame'], escape(row['values']),
+                                                     escape(row['result']),
+                                                     escape(row['output']).replace('\n', '<br>')))
+    lines.append('</table>')
+    session.logger.info(msg)
+    session.logger.info('\n'.join(lines), is_html = True)
+
 def stop_perframe_callbacks(session, handlers = None):
 
     if not hasattr(session, 'perframe_handlers'):
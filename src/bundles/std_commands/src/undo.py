@@ -38,6 +38,12 @@ def undo_list(session, nested=False):
     '''
     msgs = _list_stack("undo", session.undo.undo_stack, nested)
     msgs.extend(_list_stack("redo", session.undo.redo_stack, nested))
+    u = session.undo
+    msgs.append("<p>Undo memory use %s of %s limit%s</p>"
+                % (_size_string(u.memory_used()),
+                   _size_string(u.max_bytes) if u.max_bytes > 0 else 'no',
+                   (", %s in temporary file" % _size_string(u.disk_used())
+                    if u.disk_used() > 0 else "")))
     session.logger.info(''.join(msgs), is_html=True)
 
 
@@ -47,7 +53,7 @@ def _list_stack(label, stack, show_nested):
     def show_items(stack):
         msgs.append("<ul>")
         for item in stack:
-            msgs.append("<li>%s</li>" % item.name)
+            msgs.append("<li>%s%s</li>" % (item.name, _item_size(item)))
             if show_nested and isinstance(item, UndoAggregateAction):
                 show_items(item.actions)
         msgs.append("</ul>")
@@ -55,6 +61,23 @@ def _list_stack(label, stack, show_nested):
     return msgs
 
 
+def _item_size(item):
+    sizes = []
+    if item.nbytes > 0:
+        sizes.append(_size_string(item.nbytes))
+    if item.disk_bytes > 0:
+        sizes.append("%s in temporary file" % _size_string(item.disk_bytes))
+    return " (%s)" % ", ".join(sizes) if sizes else ""
+
+
+def _size_string(nbytes):
+    if nbytes >= 2**30:
+        return "%.1f Gbytes" % (nbytes / 2**30)
+    if nbytes >= 2**20:
+        return "%.1f Mbytes" % (nbytes / 2**20)
+    return "%.0f Kbytes" % (nbytes / 2**10)
+
+
 def undo_clear(session):
     '''Clear all undoable and redoable actions
     '''
@@ -75,6 +98,18 @@ def undo_depth(session, depth=None):
             session.logger.info("Undo stack depth is unlimited")
 
 
+def undo_memory(session, megabytes=None):
+    if megabytes is not None:
+        session.undo.set_memory_limit(int(megabytes * 2**20))
+    u = session.undo
+    if u.max_bytes > 0:
+        session.logger.info("Undo memory limit is %s, using %s"
+                            % (_size_string(u.max_bytes), _size_string(u.memory_used())))
+    else:
+        session.logger.info("Undo memory is unlimited, using %s"
+                            % _size_string(u.memory_used()))
+
+
 def redo(session):
     '''Redo last undone action.
     '''
@@ -86,7 +121,7 @@ def redo(session):
 
 
 def register_command(logger):
-    from chimerax.core.commands import CmdDesc, register, IntArg, NoArg
+    from chimerax.core.commands import CmdDesc, register, IntArg, FloatArg, NoArg
     desc = CmdDesc(synopsis='undo last action')
     register('undo', desc, undo, logger=logger)
     desc = CmdDesc(synopsis='list available undo actions',
@@ -97,6 +132,9 @@ def register_command(logger):
     desc = CmdDesc(optional=[('depth', IntArg)],
                    synopsis='set undo/redo stack depth')
     register('undo depth', desc, undo_depth, logger=logger)
+    desc = CmdDesc(optional=[('megabytes', FloatArg)],
+                   synopsis='set undo/redo memory limit')
+    register('undo memory', desc, undo_memory, logger=logger)
     desc = CmdDesc(
         synopsis='redo last undone action',
         url='help:user/commands/undo.html#redo'
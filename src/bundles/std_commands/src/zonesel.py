@@ -100,18 +100,22 @@ def zone_items(na, ns, range, fa, fs, extend = False, residues = False):
     from chimerax.geometry import Place
     im = Place().matrix
     nxyz = [(naxyz,im)] + nsxyz
-    faxyz = fa.scene_coords.astype(float32)
-    fsxyz = [(s.vertices.astype(float32), p.matrix) for s in fs for p in s.get_scene_positions()]
-    fxyz = [(faxyz,im)] + fsxyz
 
-    from chimerax.geometry import find_close_points_sets
-    i1, i2 = find_close_points_sets(nxyz, fxyz, range)
-
-    sel = []
-    from numpy import take, compress
-    sa = fa.filter(i2[0])
-
-    ss = set(fs for fs,i in zip(fs,i2[1:]) if len(i) > 0)
+    # Target atoms are found using the session spatial index of atoms.
+    if len(fa) > 0:
+        from numpy import concatenate
+        nscenexyz = concatenate([naxyz] + [Place(m).transform_points(xyz) for xyz, m in nsxyz])
+        from chimerax.atomic import zone_index
+        sa = zone_index(fa[0].structure.session).close_atoms(fa, nscenexyz, range)
+    else:
+        sa = fa
+
+    ss = set()
+    if fs:
+        fsxyz = [(s.vertices.astype(float32), p.matrix) for s in fs for p in s.get_scene_positions()]
+        from chimerax.geometry import find_close_points_sets
+        i1, i2 = find_close_points_sets(nxyz, fsxyz, range)
+        ss = set(fs for fs,i in zip(fs,i2) if len(i) > 0)
     if extend:
         sa = sa.merge(na)
         ss.update(ns)
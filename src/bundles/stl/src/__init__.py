@@ -45,14 +45,14 @@ class _STLAPI(BundleAPI):
         else:
             from chimerax.save_command import SaverInfo
             class STLInfo(SaverInfo):
-                def save(self, session, path, models=None):
+                def save(self, session, path, models=None, max_triangles=None):
                     from . import stl
-                    stl.write_stl(session, path, models)
+                    stl.write_stl(session, path, models, max_triangles)
 
                 @property
                 def save_args(self):
-                    from chimerax.core.commands import ModelsArg
-                    return { 'models': ModelsArg }
+                    from chimerax.core.commands import ModelsArg, IntArg
+                    return { 'models': ModelsArg, 'max_triangles': IntArg }
 
         return STLInfo()
 bundle_api = _STLAPI()
@@ -285,7 +285,7 @@ def stl_unpack(geom):
 
 # -----------------------------------------------------------------------------
 #
-def write_stl(session, filename, models):
+def write_stl(session, filename, models, max_triangles = None):
     if models is None:
         models = session.models.list()
 
@@ -303,6 +303,9 @@ def write_stl(session, filename, models):
         if va is not None and ta is not None and d.display and d.parents_displayed:
             pos = d.get_scene_positions(displayed_only = True)
             if len(pos) > 0:
+                if max_triangles is not None and len(ta) > max_triangles:
+                    from chimerax.surface import decimate_geometry
+                    va, na, ta = decimate_geometry(va, None, ta, None, max_triangles)[:3]
                 geom.append((va, ta, pos))
     from chimerax.surface import combine_geometry_vtp
     va, ta = combine_geometry_vtp(geom)
@@ -0,0 +1,456 @@
+// vi: set expandtab shiftwidth=4 softtabstop=4:
+
+/*
+ * === UCSF ChimeraX Copyright ===
+ * Copyright 2022 Regents of the University of California. All rights reserved.
+ * The ChimeraX application is provided pursuant to the ChimeraX license
+ * agreement, which covers academic and commercial uses. For more details, see
+ * <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+ *
+ * This particular file is part of the ChimeraX library. You can also
+ * redistribute and/or modify it under the terms of the GNU Lesser General
+ * Public License version 2.1 as published by the Free Software Foundation.
+ * For more details, see
+ * <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+ *
+ * THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+ * EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+ * OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+ * LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+ * VERSION 2.1
+ *
+ * This notice must be embedded in or attached to all copies, including partial
+ * copies, of the software or any revisions or derivations thereof.
+ * === UCSF ChimeraX Copyright ===
+ */
+
+// ----------------------------------------------------------------------------
+// Reduce surface triangle count by quadric error metric edge collapse.
+//
+// This follows Garland and Heckbert, "Surface Simplification Using Quadric
+// Error Metrics", SIGGRAPH 1997, except that a collapsed edge is replaced by
+// one of its end vertices rather than an optimal new position.  Keeping only
+// original vertices lets the caller carry vertex normals, colors and other
+// per-vertex values to the reduced surface with a vertex index map.
+//
+#include <Python.h>			// use PyObject
+
+#include <algorithm>			// use std::sort, std::unique, std::set_intersection
+#include <iterator>			// use std::back_inserter
+#include <math.h>			// use sqrt()
+#include <queue>			// use std::priority_queue
+#include <utility>			// use std::pair
+#include <vector>			// use std::vector
+
+#include <arrays/pythonarray.h>		// use parse_float_n3_array(), ...
+#include <arrays/rcarray.h>		// use FArray, IArray
+
+namespace Decimate
+{
+
+// ----------------------------------------------------------------------------
+// Symmetric 4x4 matrix giving the sum of squared distances to a set of planes.
+//
+class Quadric
+{
+public:
+  Quadric() { for (int i = 0 ; i < 10 ; ++i) q[i] = 0; }
+  void add_plane(double nx, double ny, double nz, double d, double w = 1)
+  {
+    q[0] += w*nx*nx; q[1] += w*nx*ny; q[2] += w*nx*nz; q[3] += w*nx*d;
+    q[4] += w*ny*ny; q[5] += w*ny*nz; q[6] += w*ny*d;
+    q[7] += w*nz*nz; q[8] += w*nz*d;
+    q[9] += w*d*d;
+  }
+  void add(const Quadric &qa)
+    { for (int i = 0 ; i < 10 ; ++i) q[i] += qa.q[i]; }
+  double error(const Quadric &qa, const float *v) const
+  {
+    double a[10];
+    for (int i = 0 ; i < 10 ; ++i) a[i] = q[i] + qa.q[i];
+    double x = v[0], y = v[1], z = v[2];
+    return (a[0]*x*x + 2*a[1]*x*y + 2*a[2]*x*z + 2*a[3]*x
+	    + a[4]*y*y + 2*a[5]*y*z + 2*a[6]*y
+	    + a[7]*z*z + 2*a[8]*z
+	    + a[9]);
+  }
+private:
+  double q[10];
+};
+
+// ----------------------------------------------------------------------------
+//
+class Collapse
+{
+public:
+  Collapse(double cost, int from, int to, unsigned int from_version, unsigned int to_version) :
+    cost(cost), from(from), to(to), from_version(from_version), to_version(to_version) {}
+  bool operator>(const Collapse &c) const { return cost > c.cost; }
+  double cost;
+  int from, to;
+  unsigned int from_version, to_version;
+};
+
+typedef std::priority_queue<Collapse, std::vector<Collapse>, std::greater<Collapse> > Collapse_Queue;
+
+// ----------------------------------------------------------------------------
+//
+class Mesh
+{
+public:
+  Mesh(const FArray &varray, const IArray &tarray, bool preserve_boundaries);
+  int decimate(int target_triangle_count, double max_error);
+  int triangle_count() const { return tcount; }
+
+  std::vector<float> v;			// Vertex xyz, 3 per vertex
+  std::vector<int> t;			// Triangle vertex indices, 3 per triangle
+  std::vector<bool> tri_alive;
+private:
+  std::vector<std::vector<int> > vtri;	// Triangles using each vertex
+  std::vector<Quadric> quadric;
+  std::vector<unsigned int> version;
+  std::vector<bool> removed, locked, boundary;
+  int tcount;
+  Collapse_Queue queue;
+
+  void add_candidates(int v1, int v2);
+  bool collapse_allowed(int from, int to);
+  void collapse(int from, int to);
+  void vertex_neighbors(int vi, std::vector<int> &nbrs);
+  bool triangle_normal(int ti, int from, int to, double *n);
+};
+
+// ----------------------------------------------------------------------------
+//
+Mesh::Mesh(const FArray &varray, const IArray &tarray, bool preserve_boundaries)
+{
+  FArray vc = varray.contiguous_array();
+  IArray tc = tarray.contiguous_array();
+  int64_t nv = vc.size(0), nt = tc.size(0);
+  float *va = vc.values();
+  int *ta = tc.values();
+  v.assign(va, va + 3*nv);
+  t.assign(ta, ta + 3*nt);
+  tri_alive.assign(nt, true);
+  tcount = nt;
+  vtri.resize(nv);
+  quadric.resize(nv);
+  version.assign(nv, 0);
+  removed.assign(nv, false);
+  locked.assign(nv, false);
+  boundary.assign(nv, false);
+
+  // Plane quadrics for each triangle.
+  for (int64_t ti = 0 ; ti < nt ; ++ti)
+    {
+      int *tv = &t[3*ti];
+      for (int c = 0 ; c < 3 ; ++c)
+	vtri[tv[c]].push_back(ti);
+      double n[3];
+      if (!triangle_normal(ti, -1, -1, n))
+	continue;
+      const float *p = &v[3*tv[0]];
+      double d = -(n[0]*p[0] + n[1]*p[1] + n[2]*p[2]);
+      for (int c = 0 ; c < 3 ; ++c)
+	quadric[tv[c]].add_plane(n[0], n[1], n[2], d);
+    }
+
+  // Find edges and the number of triangles using each edge.
+  std::vector<std::pair<int,int> > edges;
+  edges.reserve(3*nt);
+  for (int64_t ti = 0 ; ti < nt ; ++ti)
+    for (int c = 0 ; c < 3 ; ++c)
+      {
+	int v1 = t[3*ti+c], v2 = t[3*ti+(c+1)%3];
+	edges.push_back(v1 < v2 ? std::make_pair(v1,v2) : std::make_pair(v2,v1));
+      }
+  std::sort(edges.begin(), edges.end());
+
+  // Boundary edges have one triangle.  Lock vertices on non-manifold edges,
+  // and boundary vertices if boundaries are preserved, otherwise add planes
+  // perpendicular to the boundary to keep boundary vertices on the boundary.
+  int64_t ne = edges.size();
+  for (int64_t e = 0 ; e < ne ; )
+    {
+      int64_t e2 = e+1;
+      while (e2 < ne && edges[e2] == edges[e])
+	e2 += 1;
+      int count = e2 - e;
+      int v1 = edges[e].first, v2 = edges[e].second;
+      if (count > 2 || (count == 1 && preserve_boundaries))
+	locked[v1] = locked[v2] = true;
+      if (count == 1)
+	{
+	  boundary[v1] = boundary[v2] = true;
+	  // Find triangle with this edge to get boundary plane normal.
+	  for (int ti : vtri[v1])
+	    {
+	      int *tv = &t[3*ti];
+	      if (tv[0] != v2 && tv[1] != v2 && tv[2] != v2)
+		continue;
+	      double n[3];
+	      if (triangle_normal(ti, -1, -1, n))
+		{
+		  const float *p1 = &v[3*v1], *p2 = &v[3*v2];
+		  double ex = p2[0]-p1[0], ey = p2[1]-p1[1], ez = p2[2]-p1[2];
+		  double bx = ey*n[2]-ez*n[1], by = ez*n[0]-ex*n[2], bz = ex*n[1]-ey*n[0];
+		  double bn = sqrt(bx*bx + by*by + bz*bz);
+		  if (bn > 0)
+		    {
+		      bx /= bn; by /= bn; bz /= bn;
+		      double d = -(bx*p1[0] + by*p1[1] + bz*p1[2]);
+		      double w = 1000;
+		      quadric[v1].add_plane(bx, by, bz, d, w);
+		      quadric[v2].add_plane(bx, by, bz, d, w);
+		    }
+		}
+	      break;
+	    }
+	}
+      add_candidates(v1, v2);
+      e = e2;
+    }
+}
+
+// ----------------------------------------------------------------------------
+// Unit normal of triangle with vertex "from" replaced by vertex "to".
+// Returns false for degenerate triangles.
+//
+bool Mesh::triangle_normal(int ti, int from, int to, double *n)
+{
+  const float *p[3];
+  for (int c = 0 ; c < 3 ; ++c)
+    {
+      int vi = t[3*ti+c];
+      p[c] = &v[3*(vi == from ? to : vi)];
+    }
+  double e1x = p[1][0]-p[0][0], e1y = p[1][1]-p[0][1], e1z = p[1][2]-p[0][2];
+  double e2x = p[2][0]-p[0][0], e2y = p[2][1]-p[0][1], e2z = p[2][2]-p[0][2];
+  double nx = e1y*e2z-e1z*e2y, ny = e1z*e2x-e1x*e2z, nz = e1x*e2y-e1y*e2x;
+  double nn = sqrt(nx*nx + ny*ny + nz*nz);
+  if (nn == 0)
+    return false;
+  n[0] = nx/nn; n[1] = ny/nn; n[2] = nz/nn;
+  return true;
+}
+
+// ----------------------------------------------------------------------------
+//
+void Mesh::add_candidates(int v1, int v2)
+{
+  const Quadric &q1 = quadric[v1], &q2 = quadric[v2];
+  if (!locked[v1])
+    queue.push(Collapse(q1.error(q2, &v[3*v2]), v1, v2, version[v1], version[v2]));
+  if (!locked[v2])
+    queue.push(Collapse(q1.error(q2, &v[3*v1]), v2, v1, version[v2], version[v1]));
+}
+
+// ----------------------------------------------------------------------------
+//
+int Mesh::decimate(int target_triangle_count, double max_error)
+{
+  double max_cost = (max_error >= 0 ? max_error*max_error : -1);
+  while (tcount > target_triangle_count && !queue.empty())
+    {
+      Collapse c = queue.top();
+      queue.pop();
+      if (removed[c.from] || removed[c.to] ||
+	  c.from_version != version[c.from] || c.to_version != version[c.to])
+	continue;	// Stale collapse.
+      if (max_cost >= 0 && c.cost > max_cost)
+	break;
+      if (!collapse_allowed(c.from, c.to))
+	continue;
+      collapse(c.from, c.to);
+    }
+  return tcount;
+}
+
+// ----------------------------------------------------------------------------
+//
+void Mesh::vertex_neighbors(int vi, std::vector<int> &nbrs)
+{
+  nbrs.clear();
+  for (int ti : vtri[vi])
+    if (tri_alive[ti])
+      for (int c = 0 ; c < 3 ; ++c)
+	{
+	  int nv = t[3*ti+c];
+	  if (nv != vi)
+	    nbrs.push_back(nv);
+	}
+  std::sort(nbrs.begin(), nbrs.end());
+  nbrs.erase(std::unique(nbrs.begin(), nbrs.end()), nbrs.end());
+}
+
+// ----------------------------------------------------------------------------
+// Check that the collapse keeps the surface manifold and does not flip triangles.
+//
+bool Mesh::collapse_allowed(int from, int to)
+{
+  // Link condition: vertices adjacent to both edge vertices must be
+  // the opposite vertices of the triangles sharing the edge.
+  std::vector<int> opposite, nfrom, nto, common;
+  for (int ti : vtri[from])
+    if (tri_alive[ti])
+      {
+	int *tv = &t[3*ti];
+	if (tv[0] == to || tv[1] == to || tv[2] == to)
+	  for (int c = 0 ; c < 3 ; ++c)
+	    if (tv[c] != from && tv[c] != to)
+	      opposite.push_back(tv[c]);
+      }
+  if (opposite.empty())
+    return false;
+  // A boundary vertex can only move along a boundary edge.
+  if (boundary[from] && !(boundary[to] && opposite.size() == 1))
+    return false;
+  std::sort(opposite.begin(), opposite.end());
+  vertex_neighbors(from, nfrom);
+  vertex_neighbors(to, nto);
+  std::set_intersection(nfrom.begin(), nfrom.end(), nto.begin(), nto.end(),
+			std::back_inserter(common));
+  if (common != opposite)
+    return false;
+
+  // Don't flip or degenerate triangles that move.
+  for (int ti : vtri[from])
+    if (tri_alive[ti])
+      {
+	int *tv = &t[3*ti];
+	if (tv[0] == to || tv[1] == to || tv[2] == to)
+	  continue;
+	double n0[3], n1[3];
+	if (!triangle_normal(ti, -1, -1, n0))
+	  continue;
+	if (!triangle_normal(ti, from, to, n1))
+	  return false;
+	if (n0[0]*n1[0] + n0[1]*n1[1] + n0[2]*n1[2] < 0.2)
+	  return false;
+      }
+  return true;
+}
+
+// ----------------------------------------------------------------------------
+//
+void Mesh::collapse(int from, int to)
+{
+  std::vector<int> &tto = vtri[to];
+  for (int ti : vtri[from])
+    if (tri_alive[ti])
+      {
+	int *tv = &t[3*ti];
+	if (tv[0] == to || tv[1] == to || tv[2] == to)
+	  {
+	    tri_alive[ti] = false;
+	    tcount -= 1;
+	  }
+	else
+	  {
+	    for (int c = 0 ; c < 3 ; ++c)
+	      if (tv[c] == from)
+		tv[c] = to;
+	    tto.push_back(ti);
+	  }
+      }
+  vtri[from].clear();
+  removed[from] = true;
+  quadric[to].add(quadric[from]);
+  version[to] += 1;
+
+  // Remove deleted triangles from vertex triangle list.
+  size_t k = 0;
+  for (size_t i = 0 ; i < tto.size() ; ++i)
+    if (tri_alive[tto[i]])
+      tto[k++] = tto[i];
+  tto.resize(k);
+
+  std::vector<int> nbrs;
+  vertex_neighbors(to, nbrs);
+  for (int nv : nbrs)
+    add_candidates(to, nv);
+}
+
+} // namespace Decimate
+
+using namespace Decimate;
+
+// ----------------------------------------------------------------------------
+//
+extern "C" PyObject *decimate_mesh(PyObject *, PyObject *args, PyObject *keywds)
+{
+  FArray varray;
+  IArray tarray;
+  int target_triangle_count;
+  float max_error = -1;
+  bool preserve_boundaries = true;
+  const char *kwlist[] = {"vertices", "triangles", "target_triangle_count", "max_error",
+			  "preserve_boundaries", NULL};
+  if (!PyArg_ParseTupleAndKeywords(args, keywds,
+				   const_cast<char *>("O&O&i|fO&"), (char **)kwlist,
+				   parse_float_n3_array, &varray,
+				   parse_int_n3_array, &tarray,
+				   &target_triangle_count,
+				   &max_error,
+				   parse_bool, &preserve_boundaries))
+    return NULL;
+
+  int64_t nv = varray.size(0);
+  IArray tc = tarray.contiguous_array();
+  int64_t tsize = tc.size();
+  const int *ta = tc.values();
+  for (int64_t i = 0 ; i < tsize ; ++i)
+    if (ta[i] < 0 || ta[i] >= nv)
+      {
+	PyErr_Format(PyExc_ValueError,
+		     "decimate_mesh(): triangle vertex index %d out of range (%ld vertices)",
+		     ta[i], (long)nv);
+	return NULL;
+      }
+
+  std::vector<int> vmap, vnew;
+  Mesh *mesh;
+  int ntri;
+  int64_t nt;
+  Py_BEGIN_ALLOW_THREADS
+  mesh = new Mesh(varray, tarray, preserve_boundaries);
+  ntri = mesh->decimate(target_triangle_count, max_error);
+
+  // Number the vertices used by the remaining triangles.
+  vnew.assign(nv, -1);
+  nt = mesh->tri_alive.size();
+  for (int64_t ti = 0 ; ti < nt ; ++ti)
+    if (mesh->tri_alive[ti])
+      for (int c = 0 ; c < 3 ; ++c)
+	{
+	  int vi = mesh->t[3*ti+c];
+	  if (vnew[vi] == -1)
+	    {
+	      vnew[vi] = vmap.size();
+	      vmap.push_back(vi);
+	    }
+	}
+  Py_END_ALLOW_THREADS
+
+  int nvr = vmap.size();
+  float *vr;
+  PyObject *varray2 = python_float_array(nvr, 3, &vr);
+  int *tr;
+  PyObject *tarray2 = python_int_array(ntri, 3, &tr);
+  int *vm;
+  PyObject *vertex_map = python_int_array(nvr, &vm);
+  for (int i = 0 ; i < nvr ; ++i)
+    {
+      const float *p = &mesh->v[3*vmap[i]];
+      vr[3*i] = p[0]; vr[3*i+1] = p[1]; vr[3*i+2] = p[2];
+      vm[i] = vmap[i];
+    }
+  int k = 0;
+  for (int64_t ti = 0 ; ti < nt ; ++ti)
+    if (mesh->tri_alive[ti])
+      for (int c = 0 ; c < 3 ; ++c)
+	tr[k++] = vnew[mesh->t[3*ti+c]];
+  delete mesh;
+
+  return python_tuple(varray2, tarray2, vertex_map);
+}
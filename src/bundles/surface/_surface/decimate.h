@@ -0,0 +1,48 @@
+// vi: set expandtab shiftwidth=4 softtabstop=4:
+
+/*
+ * === UCSF ChimeraX Copyright ===
+ * Copyright 2022 Regents of the University of California. All rights reserved.
+ * The ChimeraX application is provided pursuant to the ChimeraX license
+ * agreement, which covers academic and commercial uses. For more details, see
+ * <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+ *
+ * This particular file is part of the ChimeraX library. You can also
+ * redistribute and/or modify it under the terms of the GNU Lesser General
+ * Public License version 2.1 as published by the Free Software Foundation.
+ * For more details, see
+ * <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+ *
+ * THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+ * EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+ * OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+ * LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+ * VERSION 2.1
+ *
+ * This notice must be embedded in or attached to all copies, including partial
+ * copies, of the software or any revisions or derivations thereof.
+ * === UCSF ChimeraX Copyright ===
+ */
+
+// ----------------------------------------------------------------------------
+//
+#ifndef DECIMATE_HEADER_INCLUDED
+#define DECIMATE_HEADER_INCLUDED
+
+#include <Python.h>			// use PyObject
+
+extern "C"
+{
+//
+// Reduce the number of triangles of a surface by collapsing edges
+// choosing the edges that least change the surface shape as measured
+// by the quadric error metric.  Each collapse moves one vertex onto
+// the other so remaining vertices are vertices of the original surface.
+//
+// Args: vertex_array, triangle_array, int target_triangle_count,
+//       float max_error, bool preserve_boundaries
+//
+PyObject *decimate_mesh(PyObject *, PyObject *args, PyObject *keywds);
+}
+
+#endif
@@ -30,6 +30,7 @@
 #include "capper.h"			// use compute_cap
 #include "connected.h"			// use connected_triangles, ...
 #include "convexity.h"			// use vertex_convexity
+#include "decimate.h"			// use decimate_mesh
 #include "measure.h"			// use enclosed_volume, surface_area, ...
 #include "normals.h"			// use calculate_vertex_normals, invert_vertex_normals
 #include "patches.h"			// use sharp_edge_patches
@@ -295,6 +296,32 @@ vertex_map : 1d array of int, maps vertex index to unique vertex index.
 )"
   },
 
+// ----------------------------------------------------------------------------    
+  /* decimate.h */
+  {const_cast<char*>("decimate_mesh"),
+   (PyCFunction)decimate_mesh,
+   METH_VARARGS|METH_KEYWORDS,
+R"(
+decimate_mesh(vertices, triangles, target_triangle_count, max_error = -1, preserve_boundaries = True)
+
+Reduce the number of triangles by collapsing edges, choosing at each step
+the collapse that least changes the surface shape by the quadric error metric.
+A collapse moves one edge vertex onto the other, so the remaining vertices
+are a subset of the original vertices.  Stops when the triangle count reaches
+the target or when the next collapse would move a vertex further than
+max_error (root sum square distance to the planes of its original triangles)
+if max_error is not negative.  If preserve_boundaries is true then vertices on
+surface boundary edges are not moved.  Triangles are not flipped and the surface
+topology is not changed.  Implemented in C++.
+
+Returns
+-------
+vertices : n by 3 array of float
+triangles : m by 3 array of int
+vertex_map : length n array of int, original vertex index for each vertex
+)"
+  },
+
 // ----------------------------------------------------------------------------    
   /* refinemesh.h */
   {const_cast<char*>("refine_mesh"),
@@ -26,7 +26,7 @@ from .sasa import spheres_surface_area
 from .split import split_surfaces
 from .shapes import sphere_geometry, sphere_geometry2, cylinder_geometry, dashed_cylinder_geometry, cone_geometry, box_geometry
 from .area import surface_area, enclosed_volume, surface_volume_and_area
-from .gridsurf import ses_surface_geometry
+from .gridsurf import ses_surface_geometry, BrickedSESSurface
 
 # Make sure _surface can runtime link shared library libarrays.
 import chimerax.arrays
@@ -41,11 +41,13 @@ from ._surface import boundary_edge_mask
 from ._surface import vertex_convexity
 from ._surface import smooth_vertex_positions
 from ._surface import surface_distance
+from ._surface import decimate_mesh
 
 from .dust import largest_blobs_triangle_mask
 from .gaussian import gaussian_surface
 from .cap import update_clip_caps, remove_clip_caps
 from .topology import check_surface_topology
+from .decimate import decimate_geometry, decimate_surface
 from .colorgeom import color_radial, color_cylindrical, color_height
 from .colorvol import color_sample, color_electrostatic, color_gradient, color_surfaces_by_map_value
 from .combine import combine_geometry, combine_geometry_vnt, combine_geometry_vntc
@@ -90,6 +92,8 @@ class _SurfaceBundle(BundleAPI):
             check.register_command(logger)
             from . import hidefarblobs
             hidefarblobs.register_command(logger)
+            from . import decimate
+            decimate.register_command(logger)
             
     @staticmethod
     def start_tool(session, tool_name):
@@ -0,0 +1,123 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+
+# -----------------------------------------------------------------------------
+#
+def surface_decimate(session, surfaces = None, triangles = None, fraction = None,
+                     max_error = None, preserve_boundaries = True):
+    '''
+    Reduce the number of triangles of surfaces by quadric error edge collapse.
+
+    Parameters
+    ----------
+    surfaces : list of Surface
+      Surfaces to reduce.  Default all surfaces.
+    triangles : int
+      Target number of triangles for each surface.
+    fraction : float
+      Target number of triangles as a fraction of the current number.
+      Used if triangles is not given.  Default 0.5 if neither triangles
+      nor max_error is given.
+    max_error : float
+      Stop collapsing edges when vertices would move more than this
+      distance from the original surface.
+    preserve_boundaries : bool
+      Whether to keep vertices on surface boundary edges in place.
+    '''
+    if surfaces is None:
+        from chimerax.core.models import Surface
+        surfaces = session.models.list(type = Surface)
+    if triangles is None and fraction is None and max_error is None:
+        fraction = 0.5
+
+    lines = []
+    for surface in surfaces:
+        t = surface.triangles
+        if t is None or len(t) == 0:
+            continue
+        nt = len(t)
+        ntarget = (triangles if triangles is not None
+                   else (int(fraction * nt) if fraction is not None else 0))
+        decimate_surface(surface, ntarget, max_error, preserve_boundaries)
+        lines.append('%s #%s %d triangles reduced to %d'
+                     % (surface.name, surface.id_string, nt, len(surface.triangles)))
+    if lines:
+        session.logger.info('\n'.join(lines))
+
+# -----------------------------------------------------------------------------
+#
+def decimate_surface(surface, triangle_count, max_error = None, preserve_boundaries = True):
+    '''
+    Replace the geometry of a surface model with a reduced triangle count version
+    keeping vertex colors.  Triangle and edge masks are cleared.
+    '''
+    va, na, ta = surface.vertices, surface.normals, surface.triangles
+    vc = surface.vertex_colors
+    va, na, ta, vc, vmap = decimate_geometry(va, na, ta, vc, triangle_count,
+                                             max_error, preserve_boundaries)
+    from chimerax.atomic import MolecularSurface
+    if isinstance(surface, MolecularSurface):
+        v2a = surface.vertex_to_atom_map()
+        surface.set_geometry(va, na, ta)
+        if v2a is not None:
+            surface._vertex_to_atom = v2a[vmap]
+        surface.joined_triangles = None
+    else:
+        surface.set_geometry(va, na, ta)
+    surface.vertex_colors = vc
+    return vmap
+
+# -----------------------------------------------------------------------------
+#
+def decimate_geometry(vertices, normals, triangles, vertex_colors = None,
+                      triangle_count = 0, max_error = None, preserve_boundaries = True):
+    '''
+    Reduce the number of triangles using quadric error metric edge collapse.
+    Collapses stop when triangle_count is reached, or when the vertex error
+    would exceed max_error if that is not None.  The remaining vertices are
+    a subset of the original ones and normals and vertex colors are those
+    of the original vertices.  Returns vertices, normals, triangles, vertex colors
+    and an array giving the original vertex index for each new vertex.
+    '''
+    from ._surface import decimate_mesh
+    err = -1 if max_error is None else max_error
+    va, ta, vmap = decimate_mesh(vertices, triangles, triangle_count, err, preserve_boundaries)
+    na = None if normals is None else normals[vmap]
+    vc = None if vertex_colors is None else vertex_colors[vmap]
+    return va, na, ta, vc, vmap
+
+# -------------------------------------------------------------------------------------
+#
+def register_command(logger):
+    from chimerax.core.commands import CmdDesc, register, SurfacesArg
+    from chimerax.core.commands import IntArg, FloatArg, BoolArg
+    desc = CmdDesc(
+        optional = [('surfaces', SurfacesArg)],
+        keyword = [('triangles', IntArg),
+                   ('fraction', FloatArg),
+                   ('max_error', FloatArg),
+                   ('preserve_boundaries', BoolArg)],
+        synopsis = 'reduce surface triangle count')
+    register('surface decimate', desc, surface_decimate, logger=logger)
@@ -34,9 +34,13 @@ def hide_surface_dust(surface, metric, limit, auto_update = False, use_cached_ge
     if getattr(s, 'is_clip_cap', False):
         return    # Don't hide surface cap on a visible blob.
     
-    b = getattr(s, 'blobs', None) if use_cached_geometry else None
-    if b is None or len(s.vertices) != b.vertex_count:
+    # Reuse blob topology if triangles are unchanged, e.g. only metric or limit changed.
+    b = getattr(s, 'blobs', None)
+    if (b is None or b.triangles is not s.triangles or b.tsubset is not None
+        or len(s.vertices) != b.vertex_count):
         s.blobs = b = Blob_Masker(s.vertices, s.triangles)
+    elif not use_cached_geometry:
+        b.set_vertices(s.vertices)
     m = b.triangle_mask(metric, limit)
     s.triangle_mask = m
 
@@ -140,11 +144,17 @@ def unhide_dust(model):
 # -----------------------------------------------------------------------------
 #
 class Blob_Masker:
-
+    '''
+    Compute size, area and volume of connected surface pieces (blobs) and
+    mask triangles of blobs below a limit.  Metrics for all blobs are computed
+    with array operations from the triangle to blob assignment.  The blob
+    topology depends only on the triangles and is kept when vertices move.
+    '''
     def __init__(self, vertices, triangles, triangle_mask = None):
 
         self.tsubset = triangle_mask
-                
+        self.triangles = triangles
+
         self.varray = va = vertices
         self.tarray = ta = triangles if triangle_mask is None else triangles[triangle_mask,:]
         self.vertex_count = len(va)
@@ -152,13 +162,20 @@ class Blob_Masker:
 
         self.blist = None
         self.tbindex = None
-        self.tbvalues = {}
-        self.tbsizes = None
-        self.tbranks = None
-        self.tbvolumes = None
-        self.tbareas = None
+        self.bvindex = None	# Vertex indices grouped by blob and blob start offsets
+        self.tbvalues = {}	# Per-triangle metric values
+        self.bvalues = {}	# Per-blob metric values
         self.tmask = None
 
+    def set_vertices(self, vertices):
+        '''
+        Use new vertex positions keeping the blob topology.  Metric values
+        are always recomputed since the vertices may have been modified in place.
+        '''
+        self.varray = vertices
+        self.tbvalues.clear()
+        self.bvalues.clear()
+
     def triangle_mask(self, metric, limit):
 
         mask = self.mask_array()
@@ -181,55 +198,132 @@ class Blob_Masker:
 
     def triangle_values(self, metric):
 
-        if metric == 'size':
-            v = self.blob_sizes()
-        elif metric == 'area':
-            v = self.blob_areas()
-        elif metric == 'volume':
-            v = self.blob_volumes()
-        elif metric.endswith('rank'):
-            v = self.blob_ranks(metric)
-        return v
+        tv = self.tbvalues
+        if metric not in tv:
+            if metric.endswith('rank'):
+                v = self.blob_rank_values(metric)
+            else:
+                v = self.blob_metric_values(metric)
+            tv[metric] = v[self.triangle_blob_indices()]
+        return tv[metric]
 
     def triangle_blob_indices(self):
         if self.tbindex is None:
-            from numpy import empty, intc
+            from numpy import empty, intc, concatenate, repeat, arange
             tbi = empty((self.triangle_count,), intc)
-            for i, (vi, ti) in enumerate(self.blob_list()):
-                tbi.put(ti, i)
+            blist = self.blob_list()
+            if len(blist) > 0:
+                ti = concatenate([t for v,t in blist])
+                tbi[ti] = repeat(arange(len(blist), dtype = intc), [len(t) for v,t in blist])
             self.tbindex = tbi
         return self.tbindex
 
+    def blob_vertex_indices(self):
+        '''Vertex indices of all blobs concatenated and the start offset of each blob.'''
+        if self.bvindex is None:
+            from numpy import concatenate, cumsum, zeros, intc
+            blist = self.blob_list()
+            vi = concatenate([v for v,t in blist]) if blist else zeros((0,), intc)
+            starts = zeros((len(blist),), intc)
+            if len(blist) > 1:
+                cumsum([len(v) for v,t in blist[:-1]], out = starts[1:])
+            self.bvindex = (vi, starts)
+        return self.bvindex
+
     def blob_sizes(self):
-        tv = self.tbvalues
-        if not 'size' in tv:
-            bsizes = self.blob_values(self.blob_size)
-            tv['size'] = bsizes[self.triangle_blob_indices()]
-        return tv['size']
+        return self.triangle_values('size')
 
-    def blob_size(self, vi, ti):
-        v = self.varray[vi,:]
-        return max(v.max(axis=0) - v.min(axis=0))
+    def blob_areas(self):
+        return self.triangle_values('area')
+
+    def blob_volumes(self):
+        return self.triangle_values('volume')
 
     def blob_ranks(self, metric):
-        tv = self.tbvalues
-        if not metric in tv:
-            m = {'size rank':self.blob_size,
-                 'area rank':self.blob_area,
-                 'volume rank':self.blob_volume}[metric]
-            border = self.blob_values(m).argsort()
-            branks = border.copy()
-            from numpy import arange
-            branks.put(border, arange(len(border)))
-            tv[metric] = branks[self.triangle_blob_indices()]
-        return tv[metric]
+        return self.triangle_values(metric)
+
+    def blob_metric_values(self, metric):
+        '''Values of metric "size", "area" or "volume" for each blob.'''
+        bv = self.bvalues
+        if metric not in bv:
+            f = {'size': self._blob_sizes,
+                 'area': self._blob_areas,
+                 'volume': self._blob_volumes}[metric]
+            from numpy import single as floatc
+            bv[metric] = f().astype(floatc, copy = False)
+        return bv[metric]
+
+    def blob_rank_values(self, metric):
+        values = self.blob_metric_values(metric[:-len(' rank')])
+        border = values.argsort()
+        from numpy import arange
+        branks = border.copy()
+        branks.put(border, arange(len(border)))
+        return branks
+
+    def _blob_sizes(self):
+        # Maximum extent along x, y and z axes.
+        vi, starts = self.blob_vertex_indices()
+        if len(starts) == 0:
+            from numpy import zeros
+            return zeros((0,))
+        from numpy import maximum, minimum
+        v = self.varray[vi]
+        extent = maximum.reduceat(v, starts, axis = 0) - minimum.reduceat(v, starts, axis = 0)
+        return extent.max(axis = 1)
+
+    def _blob_areas(self):
+        v0, v1, v2 = self._triangle_corners()
+        from numpy import cross, sqrt, bincount
+        c = cross(v1-v0, v2-v0)
+        tarea = 0.5 * sqrt((c*c).sum(axis = 1))
+        return bincount(self.triangle_blob_indices(), tarea, len(self.blob_list()))
+
+    def _blob_volumes(self):
+        # Sum signed volumes of tetrahedra from the origin for closed blobs.
+        v0, v1, v2 = self._triangle_corners()
+        from numpy import cross, bincount
+        tvol = (v0 * cross(v1, v2)).sum(axis = 1) / 6
+        vol = abs(bincount(self.triangle_blob_indices(), tvol, len(self.blob_list())))
+        # Blobs with boundary curves need caps to enclose a volume.
+        blist = self.blob_list()
+        for b in self._open_blobs():
+            vol[b] = self.blob_volume(*blist[b])
+        return vol
 
-    def blob_volumes(self):
-        tv = self.tbvalues
-        if not 'volume' in tv:
-            bvolumes = self.blob_values(self.blob_volume)
-            tv['volume'] = bvolumes[self.triangle_blob_indices()]
-        return tv['volume']
+    def _triangle_corners(self):
+        # Center coordinates for better precision in double.
+        from numpy import float64
+        va = self.varray.astype(float64)
+        if len(va) > 0:
+            va -= va.mean(axis = 0)
+        ta = self.tarray
+        return va[ta[:,0]], va[ta[:,1]], va[ta[:,2]]
+
+    def _open_blobs(self):
+        '''
+        Indices of blobs having an edge without an oppositely directed partner
+        or an edge used twice in the same direction.
+        '''
+        ta = self.tarray
+        if len(ta) == 0:
+            return []
+        from numpy import concatenate, int64, isin, unique
+        n = self.vertex_count
+        t = ta.astype(int64)
+        e0, e1 = concatenate((t[:,0], t[:,1], t[:,2])), concatenate((t[:,1], t[:,2], t[:,0]))
+        forward, reverse = e0 * n + e1, e1 * n + e0
+        irregular = ~isin(forward, reverse)
+        fs = forward.argsort()
+        sf = forward[fs]
+        dup = (sf[1:] == sf[:-1]).nonzero()[0]
+        irregular[fs[dup]] = irregular[fs[dup+1]] = True
+        tri = irregular.nonzero()[0] % len(ta)
+        return unique(self.triangle_blob_indices()[tri])
+
+    def blob_size(self, vi, ti):
+        v = self.varray[vi,:]
+        return max(v.max(axis=0) - v.min(axis=0))
 
     def blob_volume(self, vi, ti):
         from .area import enclosed_volume
@@ -239,13 +333,6 @@ class Blob_Masker:
             vol = 0
         return vol
 
-    def blob_areas(self):
-        tv = self.tbvalues
-        if not 'area' in tv:
-            bareas = self.blob_values(self.blob_area)
-            tv['area'] = bareas[self.triangle_blob_indices()]
-        return tv['area']
-
     def blob_area(self, vi, ti):
         from .area import surface_area
         t = self.tarray[ti,:]
@@ -22,11 +22,18 @@
 # copies, of the software or any revisions or derivations thereof.
 # === UCSF ChimeraX Copyright ===
 
-def ses_surface_geometry(xyz, radii, probe_radius = 1.4, grid_spacing = 0.5, sas = False):
+def ses_surface_geometry(xyz, radii, probe_radius = 1.4, grid_spacing = 0.5, sas = False,
+                         blocked = None, brick_size = 64, max_dense_grid_points = 2**26):
     '''
     Calculate a solvent excluded molecular surface using a distance grid
     contouring method.  Vertex, normal and triangle arrays are returned.
     If sas is true then the solvent accessible surface is returned instead.
+
+    Large grids are computed in bricks of brick_size grid cells on a side.
+    Only bricks within range of atoms are allocated, bricks are contoured in
+    parallel threads, and vertices on shared brick faces are merged to give a
+    single connected mesh.  If blocked is None, bricks are used when the full
+    grid would have more than max_dense_grid_points or cannot be allocated.
     '''
 
     # Compute bounding box for atoms
@@ -40,10 +47,18 @@ def ses_surface_geometry(xyz, radii, probe_radius = 1.4, grid_spacing = 0.5, sas
     shape = [int(ceil((xyz_max[a] - xyz_min[a] + 2*pad) / s))
              for a in (2,1,0)]
 #    print('ses surface grid size', shape, 'spheres', len(xyz))
-    from numpy import empty, float32, sqrt
+    if blocked is None:
+        blocked = (shape[0]*shape[1]*shape[2] > max_dense_grid_points)
+    if blocked:
+        return _ses_surface_geometry_blocked(xyz, radii, probe_radius, grid_spacing, sas,
+                                             origin, brick_size)
+    from numpy import empty, float32
     try:
         matrix = empty(shape, float32)
     except (MemoryError, ValueError):
+        if max(shape) >= brick_size:
+            return _ses_surface_geometry_blocked(xyz, radii, probe_radius, grid_spacing, sas,
+                                                 origin, brick_size)
         raise MemoryError('Surface calculation out of memory trying to allocate a grid %d x %d x %d '
                           % (shape[2], shape[1], shape[0]) + 
                           'to cover xyz bounds %.3g,%.3g,%.3g ' % tuple(xyz_min) +
@@ -90,6 +105,9 @@ def ses_surface_geometry(xyz, radii, probe_radius = 1.4, grid_spacing = 0.5, sas
     # Transform surface from grid index coordinates to atom coordinates
     xyz_to_ijk_tf.inverse().transform_points(ses_va, in_place = True)
 
+    return _remove_far_pieces(ses_va, ses_na, ses_ta, xyz, radii, probe_radius)
+
+def _remove_far_pieces(ses_va, ses_na, ses_ta, xyz, radii, probe_radius):
     # Delete connected components more than 1.5 probe radius from atom spheres.
     from ._surface import connected_pieces
     vtilist = connected_pieces(ses_ta)
@@ -110,3 +128,264 @@ def ses_surface_geometry(xyz, radii, probe_radius = 1.4, grid_spacing = 0.5, sas
     va,na,ta = reduce_geometry(ses_va, ses_na, ses_ta, keepv, keept)
 
     return va, na, ta
+
+def _ses_surface_geometry_blocked(xyz, radii, probe_radius, grid_spacing, sas,
+                                  origin, brick_size):
+    bs = BrickedSESSurface(xyz, radii, probe_radius, grid_spacing, brick_size = brick_size,
+                           origin = origin, sas = sas)
+    return bs.geometry(xyz, radii)
+
+class BrickedSESSurface:
+    '''
+    Solvent excluded surface computed on a grid divided into cubic bricks.
+    Only bricks within range of atoms are allocated, so memory use scales
+    with surface area instead of bounding box volume, and bricks are
+    contoured in parallel threads.  The raw contour surface and the brick
+    that made each triangle are kept so that when some atoms move only the
+    bricks near those atoms are recomputed and spliced into the surface.
+    '''
+    def __init__(self, xyz, radii, probe_radius = 1.4, grid_spacing = 0.5,
+                 brick_size = 64, origin = None, sas = False):
+        self.probe_radius = probe_radius
+        self.grid_spacing = s = grid_spacing
+        self.brick_size = brick_size
+        self.sas = sas
+        from numpy import array, float64, floor
+        if origin is None:
+            pad = 2*probe_radius + radii.max() + grid_spacing
+            origin = floor((xyz.min(axis = 0) - pad) / s) * s
+        self.origin = array(origin, float64)
+
+        # Round sphere centers in grid index units to a power of 2 fraction
+        # so brick relative centers are exact in 32-bit floating point.
+        # Then grid values on a face shared by two bricks are computed
+        # identically by both bricks and the contour seams match.
+        from math import ceil, log2
+        extent = 4 * (xyz.max(axis = 0) - xyz.min(axis = 0)).max() / s + 4 * brick_size
+        self._quantum = 2.0 ** max(0, 23 - int(ceil(log2(max(extent, 2)))))
+
+        # Raw surface in grid index coordinates, grid edge (i,j,k,axis) of each
+        # vertex and key of brick that contains each triangle.
+        self._surface = _contour_bricks_surface(self._contour(xyz, radii))
+        self._atom_xyz = xyz.copy()
+        self._atom_radii = radii.copy()
+
+    def _contour(self, xyz, radii, bricks = None):
+        '''
+        Contour bricks with the given keys, or all bricks if bricks is None.
+        Returns a list of brick pieces.
+        '''
+        s = self.grid_spacing
+        max_index_range = 2
+        ijk = (xyz - self.origin) / s
+        from numpy import float32, full
+        ri = ((radii + self.probe_radius) / s).astype(float32)
+        if self.sas:
+            return _contour_bricks(ijk, ri, max_index_range, self.brick_size,
+                                   self._quantum, bricks)
+
+        # Probe centers on the SAS reach probe_radius + max_index_range, so
+        # compute the SAS one brick beyond the SES bricks.
+        sas_bricks = None if bricks is None else _neighbor_bricks(bricks)
+        sas_pieces = _contour_bricks(ijk, ri, max_index_range, self.brick_size,
+                                     self._quantum, sas_bricks)
+
+        # Compute SES surface using SAS surface vertex points as probe sphere centers.
+        sas_va = _contour_bricks_surface(sas_pieces)[0]
+        rp = full((len(sas_va),), self.probe_radius / s, float32)
+        return _contour_bricks(sas_va, rp, max_index_range, self.brick_size,
+                               self._quantum, bricks)
+
+    def update(self, xyz, radii = None):
+        '''
+        Update the surface for new atom coordinates.  Only bricks within
+        range of moved atoms are recomputed.  The number of atoms and radii
+        must be unchanged, otherwise False is returned and the surface
+        is not changed.
+        '''
+        axyz = self._atom_xyz
+        if len(xyz) != len(axyz):
+            return False
+        if radii is not None and (radii != self._atom_radii).any():
+            return False
+        moved = (xyz != axyz).any(axis = 1)
+        if not moved.any():
+            return True
+
+        # Grid values depend on atoms within range of SAS vertices within range
+        # of the grid point.  Find bricks in that range of old and new positions.
+        s = self.grid_spacing
+        pr, rmax = self.probe_radius, self._atom_radii.max()
+        reach = ((rmax + (1 if self.sas else 2)*pr) / s) + 6
+        from numpy import concatenate, full
+        mxyz = concatenate((axyz[moved], xyz[moved]))
+        mijk = (mxyz - self.origin) / s
+        bricks = _brick_members(mijk, full((len(mijk),), reach), self.brick_size)[0]
+
+        pieces = self._contour(xyz, self._atom_radii, bricks)
+        self._surface = _splice_surface(self._surface, bricks, _contour_bricks_surface(pieces))
+        self._atom_xyz = xyz.copy()
+        return True
+
+    def geometry(self, xyz = None, radii = None):
+        '''
+        Return surface vertices, normals and triangles in atom coordinates
+        with pieces far from atoms removed.
+        '''
+        va, na, ta = self._surface[:3]
+        from numpy import float32
+        xyz_va = (va * self.grid_spacing + self.origin).astype(float32)
+        if self.sas:
+            return xyz_va, na, ta
+        if xyz is None:
+            xyz, radii = self._atom_xyz, self._atom_radii
+        return _remove_far_pieces(xyz_va, na, ta, xyz, radii, self.probe_radius)
+
+def _contour_bricks(centers, radii, max_index_range, brick_size, quantum, bricks = None):
+    '''
+    Contour the distance to the surface of spheres at level 0 in grid bricks.
+    Centers and radii are in grid index units.  If bricks is not None then
+    only bricks with those keys are contoured.  Returns a list of brick pieces
+    (brick key, brick grid index origin, vertices, normals, triangles) with
+    vertices relative to the brick origin.
+    '''
+    if len(centers) == 0:
+        return []
+    from numpy import around, float32, isin
+    centers = (around(centers * quantum) / quantum).astype(float32)
+    reach = radii + max_index_range
+    bkeys, starts, counts, members = _brick_members(centers, reach, brick_size)
+    if bricks is not None:
+        bmask = isin(bkeys, bricks)
+        bkeys, starts, counts = bkeys[bmask], starts[bmask], counts[bmask]
+
+    args = []
+    bsize = brick_size
+    for bkey, start, count in zip(bkeys, starts, counts):
+        i0 = _brick_index(bkey) * bsize
+        m = members[start:start+count]
+        args.append((bkey, i0, bsize, centers[m], radii[m], max_index_range))
+
+    # Surfaces computed in worker threads (e.g. by the surface command) do not
+    # start more threads for their bricks.
+    import threading
+    nthread = None if threading.current_thread() is threading.main_thread() else 1
+    from chimerax.core.threadq import apply_to_list
+    pieces = apply_to_list(_brick_contour, args, nthread)
+    return pieces
+
+# Brick (i,j,k) indices are packed in a 64-bit integer key, 21 bits per axis.
+_brick_key_offset = 2**20
+def _brick_key(bijk):
+    b = bijk + _brick_key_offset
+    return (b[:,2] << 42) | (b[:,1] << 21) | b[:,0]
+
+def _brick_index(key):
+    from numpy import array, int64
+    m = 2**21 - 1
+    return array((key & m, (key >> 21) & m, key >> 42), int64) - _brick_key_offset
+
+def _neighbor_bricks(bricks):
+    '''Brick keys including all bricks adjacent to the given bricks.'''
+    from numpy import array, int64, unique, concatenate
+    bijk = array([_brick_index(k) for k in bricks], int64).reshape((len(bricks),3))
+    nkeys = [_brick_key(bijk + array((i,j,k), int64))
+             for i in (-1,0,1) for j in (-1,0,1) for k in (-1,0,1)]
+    return unique(concatenate(nkeys))
+
+def _brick_members(centers, reach, brick_size):
+    '''
+    Find which spheres reach the grid points of each brick.  Brick (i,j,k)
+    includes grid points i*brick_size through (i+1)*brick_size along the
+    first axis so faces are shared with neighbor bricks.  Returns brick keys,
+    start and count into member sphere indices for each brick.
+    '''
+    from numpy import floor, ceil, int64, arange, concatenate, argsort, unique, array
+    r = reach.reshape((len(reach),1))
+    lo = (ceil((centers - r) / brick_size) - 1).astype(int64)
+    hi = floor((centers + r) / brick_size).astype(int64)
+    span = hi - lo
+    smax = span.max(axis = 0)
+    ci = arange(len(centers))
+    keys, sphere_indices = [], []
+    for dk in range(smax[2]+1):
+        for dj in range(smax[1]+1):
+            for di in range(smax[0]+1):
+                d = array((di,dj,dk), int64)
+                m = (span >= d).all(axis = 1)
+                keys.append(_brick_key(lo[m] + d))
+                sphere_indices.append(ci[m])
+    keys = concatenate(keys)
+    sphere_indices = concatenate(sphere_indices)
+    order = argsort(keys, kind = 'stable')
+    bkeys, starts, counts = unique(keys[order], return_index = True, return_counts = True)
+    return bkeys, starts, counts, sphere_indices[order]
+
+def _brick_contour(bkey, i0, brick_size, centers, radii, max_index_range):
+    from numpy import empty, float32
+    n = brick_size + 1
+    matrix = empty((n,n,n), float32)
+    matrix[:,:,:] = max_index_range
+    bcenters = centers - i0.astype(float32)
+    from chimerax.map import sphere_surface_distance, contour_surface
+    sphere_surface_distance(bcenters, radii, max_index_range, matrix)
+    va, ta, na = contour_surface(matrix, 0, cap_faces = False, calculate_normals = True)
+    return bkey, i0, va, na, ta
+
+def _contour_bricks_surface(pieces):
+    '''
+    Combine brick contour surfaces merging the duplicate vertices on shared
+    brick faces.  Contour vertices lie on grid edges, so a vertex is identified
+    by the grid point at the low end of its edge and the edge axis.  Returns
+    vertices in grid index coordinates, normals, triangles, vertex grid edges
+    and the brick key for each triangle.
+    '''
+    from numpy import empty, float32, float64, int32, int64, concatenate, rint, floor, \
+        where, argmax, column_stack, full
+    pieces = [p for p in pieces if len(p[4]) > 0]
+    if len(pieces) == 0:
+        return (empty((0,3), float64), empty((0,3), float32), empty((0,3), int32),
+                empty((0,4), int32), empty((0,), int64))
+
+    vas, edges, tas, tbricks = [], [], [], []
+    voffset = 0
+    for bkey, i0, va, na, ta in pieces:
+        # Brick relative grid indices are small integers, exact in 32-bit
+        # floating point, so the two coordinates of a vertex that lie on grid
+        # planes are exactly integral and no tolerance is needed.
+        rva = rint(va)
+        on_grid = (va == rva)
+        base = where(on_grid, rva, floor(va)).astype(int32) + i0.astype(int32)
+        axis = where(on_grid.all(axis = 1), 3, argmax(~on_grid, axis = 1)).astype(int32)
+        edges.append(column_stack((base, axis)))
+        vas.append(va.astype(float64) + i0)
+        tas.append(ta + voffset)
+        tbricks.append(full((len(ta),), bkey, int64))
+        voffset += len(va)
+    va = concatenate(vas)
+    na = concatenate([p[3] for p in pieces])
+    ta = concatenate(tas)
+    return _weld_vertices(va, na, ta, concatenate(edges), concatenate(tbricks))
+
+def _weld_vertices(va, na, ta, edges, tbricks):
+    from numpy import unique, int32
+    uedges, first, vmap = unique(edges, axis = 0, return_index = True, return_inverse = True)
+    vmap = vmap.reshape(-1).astype(int32)
+    return va[first], na[first], vmap[ta], uedges, tbricks
+
+def _splice_surface(surface, bricks, brick_surface):
+    '''
+    Replace the triangles of the specified bricks with a new brick surface.
+    '''
+    va, na, ta, edges, tbricks = surface
+    from numpy import isin, unique, full, arange, int32, concatenate
+    tkeep = ~isin(tbricks, bricks)
+    kta = ta[tkeep]
+    kv = unique(kta)
+    vmap = full((len(va),), -1, int32)
+    vmap[kv] = arange(len(kv), dtype = int32)
+    bva, bna, bta, bedges, btbricks = brick_surface
+    return _weld_vertices(concatenate((va[kv], bva)), concatenate((na[kv], bna)),
+                          concatenate((vmap[kta], bta + len(kv))),
+                          concatenate((edges[kv], bedges)),
+                          concatenate((tbricks[tkeep], btbricks)))
@@ -0,0 +1,74 @@
+import numpy
+
+import pytest
+
+from chimerax.surface.gridsurf import ses_surface_geometry, BrickedSESSurface
+
+probe_radius, grid_spacing = 1.4, 0.5
+
+def _atoms(n = 24):
+    # Atoms along a helix, like a short alpha helix backbone.
+    t = numpy.arange(n) * 1.75
+    xyz = numpy.column_stack((2.3 * numpy.cos(t), 2.3 * numpy.sin(t), 0.5 * numpy.arange(n)))
+    radii = numpy.where(numpy.arange(n) % 3 == 0, 1.8, 1.6)
+    return xyz.astype(numpy.float32), radii.astype(numpy.float32)
+
+def _origin(xyz, radii):
+    # Same grid origin as the unbricked ses_surface_geometry calculation.
+    pad = 2*probe_radius + radii.max() + grid_spacing
+    return xyz.min(axis = 0) - pad
+
+def _max_vertex_distance(va1, va2):
+    d = numpy.sqrt(((va1[:,numpy.newaxis,:] - va2[numpy.newaxis,:,:])**2).sum(axis = 2))
+    return max(d.min(axis = 1).max(), d.min(axis = 0).max())
+
+def _assert_same_surface(surf1, surf2):
+    (va1, na1, ta1), (va2, na2, ta2) = surf1, surf2
+    assert len(va1) == len(va2)
+    assert len(ta1) == len(ta2)
+    assert _max_vertex_distance(va1, va2) < 1e-3 * grid_spacing
+    # Normals are unit length at every vertex, including welded brick boundaries.
+    for na in (na1, na2):
+        assert numpy.allclose(numpy.linalg.norm(na, axis = 1), 1, atol = 1e-3)
+
+@pytest.mark.parametrize("brick_size", [4, 7, 16, 64])
+def test_bricked_surface_matches_dense_grid(brick_size):
+    xyz, radii = _atoms()
+    dense = ses_surface_geometry(xyz, radii, probe_radius, grid_spacing, blocked = False)
+    bricked = ses_surface_geometry(xyz, radii, probe_radius, grid_spacing, blocked = True,
+                                   brick_size = brick_size)
+    _assert_same_surface(dense, bricked)
+
+def test_bricked_sas_matches_dense_grid():
+    xyz, radii = _atoms()
+    dense = ses_surface_geometry(xyz, radii, probe_radius, grid_spacing, sas = True, blocked = False)
+    bricked = ses_surface_geometry(xyz, radii, probe_radius, grid_spacing, sas = True, blocked = True,
+                                   brick_size = 8)
+    _assert_same_surface(dense, bricked)
+
+def test_bricked_surface_is_welded():
+    xyz, radii = _atoms()
+    va, na, ta = ses_surface_geometry(xyz, radii, probe_radius, grid_spacing, blocked = True,
+                                      brick_size = 4)
+    # No duplicate vertices remain on brick faces.
+    assert len(numpy.unique(numpy.round(va / (1e-3 * grid_spacing)), axis = 0)) == len(va)
+    assert numpy.isin(numpy.arange(len(va)), ta).all()
+
+def test_update_matches_recomputed_surface():
+    xyz, radii = _atoms()
+    bs = BrickedSESSurface(xyz, radii, probe_radius, grid_spacing, brick_size = 8,
+                           origin = _origin(xyz, radii))
+    moved = xyz.copy()
+    moved[5] += (1.2, -0.7, 0.4)
+    assert bs.update(moved, radii)
+    # Keep the same grid origin as the first calculation.
+    fresh = BrickedSESSurface(moved, radii, probe_radius, grid_spacing, brick_size = 8,
+                              origin = _origin(xyz, radii))
+    _assert_same_surface(bs.geometry(moved, radii), fresh.geometry(moved, radii))
+
+def test_update_rejects_changed_atoms():
+    xyz, radii = _atoms()
+    bs = BrickedSESSurface(xyz, radii, probe_radius, grid_spacing, brick_size = 8)
+    assert not bs.update(xyz[:-1])
+    assert not bs.update(xyz, radii * 1.1)
+    assert bs.update(xyz, radii)
@@ -1,7 +1,9 @@
 # vim: set expandtab ts=4 sw=4:
 
-from chimerax.core.commands import CmdDesc, StringArg
+from chimerax.core.commands import CmdDesc, StringArg, OpenFileNameArg, EnumOf
+from chimerax.core.commands import BoolArg, FloatArg, PositiveIntArg
 from chimerax.atomic import AtomicStructure, AtomicStructuresArg
+from .poses import pose_formats
 
 
 def viewdock(session, structures=None, name=None):
@@ -39,10 +41,49 @@ def viewdock_up(session, name=None):
 viewdock_up_desc = CmdDesc(optional=[("name", StringArg)])
 
 
+def viewdock_poses(session, file_name, format=None, sort_by=None, descending=False,
+                   filter_by=None, minimum=None, maximum=None, first=1, count=10,
+                   max_structures=100, name=None):
+    from .poses import pose_browser
+    b = pose_browser(session, file_name, format_name=format,
+                     max_structures=max(count, max_structures), name=name)
+    if sort_by is not None or filter_by is not None:
+        b.reset()
+        if filter_by is not None:
+            b.filter(filter_by, minimum, maximum)
+        if sort_by is not None:
+            b.sort(sort_by, descending)
+    shown = b.show(first, count)
+    total = len(b.poses)
+    num = len(b.order)
+    if shown:
+        msg = "Showing poses %d-%d of %d" % (first, first + len(shown) - 1, num)
+    else:
+        msg = "No poses to show, %d poses in order" % num
+    if num < total:
+        msg += " (%d of %d poses pass filter)" % (num, total)
+    if b.order_description:
+        msg += ", %s" % b.order_description
+    session.logger.status(msg, log=True)
+    return shown
+viewdock_poses_desc = CmdDesc(required=[("file_name", OpenFileNameArg)],
+                              keyword=[("format", EnumOf(pose_formats)),
+                                       ("sort_by", StringArg),
+                                       ("descending", BoolArg),
+                                       ("filter_by", StringArg),
+                                       ("minimum", FloatArg),
+                                       ("maximum", FloatArg),
+                                       ("first", PositiveIntArg),
+                                       ("count", PositiveIntArg),
+                                       ("max_structures", PositiveIntArg),
+                                       ("name", StringArg)])
+
+
 command_map = {
     "viewdockx": (viewdock, viewdock_desc),
     "viewdockx down": (viewdock_down, viewdock_down_desc),
     "viewdockx up": (viewdock_up, viewdock_up_desc),
+    "viewdockx poses": (viewdock_poses, viewdock_poses_desc),
 }
 
 
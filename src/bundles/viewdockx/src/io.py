@@ -294,15 +294,9 @@ class Mol2Parser:
             # Dock 3.7 has lines with a single #, but they contain
             # a table of values that we cannot easily display, so skip
             if non_hash > 8:
-                parts = self._line[non_hash:].lstrip().split(':', 1)
-                if len(parts) != 2:
-                    # Assume value is last field
-                    parts = self._line[non_hash:].rsplit(None, 1)
-                try:
-                    self._data[parts[0].strip()] = _value(parts[1].strip())
-                except IndexError:
-                    # Must be a single word on the line, just ignore
-                    pass
+                item = _prelude_item(self._line[non_hash:])
+                if item is not None:
+                    self._data[item[0]] = item[1]
             self._get_line()
 
     def _section_molecule(self):
@@ -456,6 +450,17 @@ class Mol2Parser:
                     self._data[param] = _value(lines[0])
 
 
+def _prelude_item(text):
+    """Return (name, value) from a Dock comment line with the leading #s removed"""
+    parts = text.lstrip().split(':', 1)
+    if len(parts) != 2:
+        # Assume value is last field
+        parts = text.rsplit(None, 1)
+    if len(parts) != 2:
+        # Must be a single word on the line, just ignore
+        return None
+    return parts[0].strip(), _value(parts[1].strip())
+
 def _value(s):
     try:
         return int(s)
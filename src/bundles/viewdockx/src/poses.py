@@ -0,0 +1,471 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+"""
+Browse docking results with too many poses to open as separate structures.
+The result file is indexed by the byte offset of each pose record and the
+scores are read into a column table that can be sorted and filtered.  Only
+the poses being shown are parsed into structures, and the number of parsed
+structures kept is limited by discarding the least recently used ones.
+"""
+
+pose_formats = ("mol2", "sdf", "pdbqt")
+
+
+class PoseIndex:
+    """Byte offsets, names and scores of the pose records in a docking results file."""
+
+    def __init__(self, path, format_name=None):
+        self.path = path
+        if format_name is None:
+            format_name = _format_from_suffix(path)
+        self.format_name = format_name
+        data = _file_bytes(path)
+        try:
+            find_records = {"mol2": _mol2_records, "sdf": _sdf_records,
+                            "pdbqt": _pdbqt_records}[format_name]
+            self.offsets, self.names, items = find_records(data)
+        finally:
+            if hasattr(data, "close"):
+                data.close()
+        self.scores = ScoreTable(items, len(self.names))
+
+    def __len__(self):
+        return len(self.names)
+
+    def record_text(self, i):
+        """Text of pose record i"""
+        start, end = int(self.offsets[i]), int(self.offsets[i+1])
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start).decode("utf-8", errors="replace")
+
+    def open_pose(self, session, i, auto_style=True):
+        """Parse pose record i and return the structure, not yet added to the session"""
+        text = self.record_text(i)
+        from io import StringIO
+        if self.format_name == "mol2":
+            from .io import Mol2Parser
+            structures = Mol2Parser(session, StringIO(text), self.names[i], auto_style, True).structures
+        elif self.format_name == "sdf":
+            from chimerax.sdf.sdf import read_sdf
+            structures, _status = read_sdf(session, StringIO(text), self.names[i], auto_style=auto_style)
+        else:
+            structures = _open_pdbqt_text(session, text, self.names[i], auto_style)
+        if not structures:
+            from chimerax.core.errors import UserError
+            raise UserError("No structure in pose %d of %s" % (i+1, self.path))
+        for extra in structures[1:]:
+            extra.delete()
+        s = structures[0]
+        s.name = self.names[i] or "pose %d" % (i+1)
+        from chimerax.atomic import Structure
+        Structure.register_attr(session, "viewdockx_data", "ViewDockX")
+        data = getattr(s, "viewdockx_data", None) or {}
+        data.update(self.scores.row(i))
+        s.viewdockx_data = data
+        return s
+
+
+class ScoreTable:
+    """
+    Pose scores with one array per score name.  Numeric scores are float64
+    arrays with nan for missing values, other scores are object arrays with
+    None for missing values.
+    """
+
+    def __init__(self, items, size):
+        # Items maps score name to lists of pose indices and values as bytes
+        self.size = size
+        self.columns = {}
+        self._integer = set()	# Numeric columns with only integer values
+        for name, (rows, values) in items.items():
+            column, integer = _score_column(rows, values, size)
+            self.columns[name] = column
+            if integer:
+                self._integer.add(name)
+
+    @property
+    def names(self):
+        return list(self.columns.keys())
+
+    def is_numeric(self, name):
+        return self.column(name).dtype.kind == 'f'
+
+    def column(self, name):
+        try:
+            return self.columns[name]
+        except KeyError:
+            # Score names are matched case insensitively
+            for cname, column in self.columns.items():
+                if cname.lower() == name.lower():
+                    return column
+            from chimerax.core.errors import UserError
+            raise UserError("No score named \"%s\", available scores: %s"
+                            % (name, ", ".join(self.columns.keys())))
+
+    def sort_order(self, name, descending=False, indices=None):
+        """Pose indices sorted by a score, poses without the score last"""
+        from numpy import arange, int64, array
+        if indices is None:
+            indices = arange(self.size, dtype=int64)
+        values = self.column(name)[indices]
+        if values.dtype.kind == 'f':
+            keys = -values if descending else values
+            order = keys.argsort(kind="stable")		# nan sorts last
+        else:
+            present = [i for i, v in enumerate(values) if v is not None]
+            present.sort(key=lambda i: str(values[i]), reverse=descending)
+            missing = [i for i, v in enumerate(values) if v is None]
+            order = array(present + missing, int64)
+        return indices[order]
+
+    def filter(self, name, minimum=None, maximum=None, indices=None):
+        """Pose indices with a numeric score within the given bounds"""
+        from numpy import arange, int64
+        if indices is None:
+            indices = arange(self.size, dtype=int64)
+        if not self.is_numeric(name):
+            from chimerax.core.errors import UserError
+            raise UserError("Score \"%s\" is not numeric" % name)
+        values = self.column(name)[indices]
+        keep = ~(values != values)	# exclude nan
+        if minimum is not None:
+            keep &= (values >= minimum)
+        if maximum is not None:
+            keep &= (values <= maximum)
+        return indices[keep]
+
+    def row(self, i):
+        """Dictionary of the scores of pose i as used for the viewdockx_data attribute"""
+        data = {}
+        for name, column in self.columns.items():
+            v = column[i]
+            if v is None or v != v:
+                continue
+            if column.dtype.kind == 'f':
+                v = int(v) if name in self._integer else float(v)
+            data[name] = v
+        return data
+
+
+class PoseBrowser:
+    """
+    Show poses from a PoseIndex in the order given by sorting and filtering
+    the scores.  Shown poses are grouped under one model.  At most
+    max_structures parsed poses are kept, closing the least recently used
+    hidden ones.
+    """
+
+    def __init__(self, session, pose_index, max_structures=100, name=None):
+        self.session = session
+        self.poses = pose_index
+        self.max_structures = max_structures
+        from numpy import arange, int64
+        self.order = arange(len(pose_index), dtype=int64)
+        self.order_description = None
+        from collections import OrderedDict
+        self._structures = OrderedDict()	# Pose index to structure, least recently used first
+        self._shown = set()
+        if name is None:
+            from os.path import basename
+            name = basename(pose_index.path)
+        from chimerax.core.models import Model, REMOVE_MODELS
+        self.group = Model(name, session)
+        session.models.add([self.group])
+        self._remove_handler = session.triggers.add_handler(REMOVE_MODELS, self._models_closed)
+
+    def sort(self, name, descending=False):
+        self.order = self.poses.scores.sort_order(name, descending, self.order)
+        self.order_description = "sorted by %s" % name
+
+    def filter(self, name, minimum=None, maximum=None):
+        self.order = self.poses.scores.filter(name, minimum, maximum, self.order)
+
+    def reset(self):
+        from numpy import arange, int64
+        self.order = arange(len(self.poses), dtype=int64)
+        self.order_description = None
+
+    def show(self, first=1, count=10):
+        """Show count poses starting at position first (1-based) in the current order and hide others"""
+        indices = [int(i) for i in self.order[first-1:first-1+count]]
+        shown = [self.structure(i) for i in indices]
+        for i in self._shown.difference(indices):
+            s = self._structures.get(i)
+            if s is not None and not s.deleted:
+                s.display = False
+        for s in shown:
+            s.display = True
+        self._shown = set(indices)
+        self._discard_unused()
+        return shown
+
+    def structure(self, i):
+        """Structure for pose index i, parsed and added to the session if needed"""
+        s = self._structures.get(i)
+        if s is None or s.deleted:
+            s = self.poses.open_pose(self.session, i)
+            self.session.models.add([s], parent=self.group)
+            self._structures[i] = s
+        else:
+            self._structures.move_to_end(i)
+        return s
+
+    @property
+    def structures(self):
+        """Currently parsed pose structures, least recently used first"""
+        return [s for s in self._structures.values() if not s.deleted]
+
+    def _discard_unused(self):
+        excess = len(self._structures) - self.max_structures
+        if excess <= 0:
+            return
+        close = []
+        for i, s in self._structures.items():
+            if len(close) >= excess:
+                break
+            if i not in self._shown:
+                close.append(i)
+        structures = [self._structures.pop(i) for i in close]
+        structures = [s for s in structures if not s.deleted]
+        if structures:
+            self.session.models.close(structures)
+
+    def _models_closed(self, trigger_name, models):
+        if self.group in models:
+            self._forget()
+            return
+        closed = set(models)
+        for i in [i for i, s in self._structures.items() if s in closed]:
+            del self._structures[i]
+            self._shown.discard(i)
+
+    def delete(self):
+        self._forget()
+        if not self.group.deleted:
+            self.session.models.close([self.group])
+
+    def _forget(self):
+        if self._remove_handler is not None:
+            self.session.triggers.remove_handler(self._remove_handler)
+            self._remove_handler = None
+        self._structures.clear()
+        self._shown.clear()
+        browsers = getattr(self.session, "_viewdockx_pose_browsers", {})
+        if browsers.get(self.poses.path) is self:
+            del browsers[self.poses.path]
+
+
+def pose_browser(session, path, format_name=None, max_structures=100, name=None):
+    """Return the browser for a docking results file, indexing the file if not already browsed"""
+    from os.path import abspath
+    path = abspath(path)
+    if not hasattr(session, "_viewdockx_pose_browsers"):
+        session._viewdockx_pose_browsers = {}
+    browsers = session._viewdockx_pose_browsers
+    b = browsers.get(path)
+    if b is None or b.group.deleted:
+        from time import time
+        t0 = time()
+        try:
+            index = PoseIndex(path, format_name)
+        except (IOError, OSError) as e:
+            from chimerax.core.errors import UserError
+            raise UserError("Could not read %s: %s" % (path, e))
+        session.logger.info("Indexed %d poses in %s in %.2f seconds, scores %s"
+                            % (len(index), path, time() - t0, ", ".join(index.scores.names)))
+        browsers[path] = b = PoseBrowser(session, index, max_structures=max_structures, name=name)
+    else:
+        b.max_structures = max_structures
+    return b
+
+
+#
+# Find pose records and score lines in the file contents
+#
+def _format_from_suffix(path):
+    from os.path import splitext
+    suffix = splitext(path)[1].lower()
+    format_name = {".mol2": "mol2", ".sdf": "sdf", ".sd": "sdf", ".mol": "sdf",
+                   ".pdbqt": "pdbqt"}.get(suffix)
+    if format_name is None:
+        from chimerax.core.errors import UserError
+        raise UserError("Cannot determine docking results format of %s, use format %s"
+                        % (path, ", ".join(pose_formats)))
+    return format_name
+
+
+def _file_bytes(path):
+    """File contents memory mapped"""
+    import mmap
+    with open(path, "rb") as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return b""		# Empty file
+
+
+def _score_column(rows, values, size):
+    """Return numeric or text column array and whether numeric values are all integers"""
+    from numpy import array, float64, full, nan, empty, char, int64
+    rows = array(rows, int64)
+    raw = array(values)
+    try:
+        numbers = raw.astype(float64)
+    except ValueError:
+        pass
+    else:
+        column = full((size,), nan, float64)
+        column[rows] = numbers
+        integer = char.isdigit(char.lstrip(char.strip(raw), b"+-")).all()
+        return column, bool(integer)
+
+    # Mixed numbers and text.  If there are more numbers than text, then assume numeric.
+    from .io import _value
+    converted = [_value(v.decode("utf-8", errors="replace").strip()) for v in values]
+    numeric = [isinstance(v, (int, float)) for v in converted]
+    if sum(numeric) > len(numeric) - sum(numeric):
+        column = full((size,), nan, float64)
+        for r, v, is_num in zip(rows, converted, numeric):
+            if is_num:
+                column[r] = v
+        integer = all(isinstance(v, int) for v, is_num in zip(converted, numeric) if is_num)
+        return column, integer
+    column = empty((size,), object)
+    for r, v in zip(rows, converted):
+        column[r] = v
+    return column, False
+
+
+def _add_item(items, name, pose, value):
+    rows, values = items.setdefault(name, ([], []))
+    rows.append(pose)
+    values.append(value)
+
+
+def _pose_of_offsets(offsets, positions):
+    from numpy import searchsorted, array, int64
+    return searchsorted(offsets, array(positions, int64), side="right") - 1
+
+
+def _line_after(data, pos):
+    end = data.find(b"\n", pos)
+    if end < 0:
+        end = len(data)
+    return bytes(data[pos:end]).decode("utf-8", errors="replace").strip(), end + 1
+
+
+def _line_matches(data, pattern, flags=0):
+    """
+    Yield (line start offset, match) for pattern matching at the start of a
+    line.  Searching for a newline followed by the pattern is much faster than
+    a multiline ^ pattern for large files.
+    """
+    import re
+    m = re.compile(pattern, flags).match(data)
+    if m is not None:
+        yield 0, m
+    for m in re.finditer(b"\n" + pattern, data, flags):
+        yield m.start() + 1, m
+
+
+def _mol2_records(data):
+    import re
+    tags = [pos for pos, m in _line_matches(data, rb"@<TRIPOS>MOLECULE", re.IGNORECASE)]
+    names = [_line_after(data, data.find(b"\n", t) + 1)[0] for t in tags]
+    # Comments only occur before a molecule section, so a record starts at
+    # the first comment line after the previous molecule section.
+    starts = []
+    prev = 0
+    for tag in tags:
+        c = data.find(b"\n#", prev, tag)
+        starts.append(tag if c < 0 else c + 1)
+        prev = tag
+    if starts:
+        starts[0] = 0
+    offsets = _offsets(starts, len(data))
+
+    # Dock scores are in comment lines starting with many #s
+    items = {}
+    item_lists = {}
+    from .io import _prelude_item
+    comment = re.compile(rb"^#{9,}[ \t]*(?:([^:\n]*)(:)([^\n]*)|([^\n]*))", re.MULTILINE)
+    for pose, (start, tag) in enumerate(zip(starts, tags)):
+        if start == tag:
+            continue
+        for name, colon, value, other in comment.findall(data[start:tag]):
+            if not colon:
+                # Assume value is last field
+                item = _prelude_item(other.decode("utf-8", errors="replace"))
+                if item is not None:
+                    _add_item(items, item[0], pose, str(item[1]).encode("utf-8"))
+                continue
+            lists = item_lists.get(name)
+            if lists is None:
+                key = name.decode("utf-8", errors="replace").strip()
+                item_lists[name] = lists = items.setdefault(key, ([], []))
+            lists[0].append(pose)
+            lists[1].append(value)
+
+    properties = []
+    for m in re.finditer(rb"\t\|\t([^\n]*)", data):
+        line_start = data.rfind(b"\n", 0, m.start()) + 1
+        properties.append((line_start, data[line_start:m.start()], m.group(1)))
+    for pose, (pos, tag, value) in zip(_pose_of_offsets(offsets, [p[0] for p in properties]),
+                                       properties):
+        if pose >= 0:
+            _add_item(items, tag.decode("utf-8", errors="replace").strip(), int(pose), value)
+    return offsets, names, items
+
+
+def _sdf_records(data):
+    ends = [m.end() for pos, m in _line_matches(data, rb"\$\$\$\$[^\n]*\n?")]
+    starts = [0] + ends
+    if not bytes(data[starts[-1]:]).strip():
+        starts.pop()
+    offsets = _offsets(starts, len(data))
+    names = [_line_after(data, s)[0] for s in starts]
+    items = {}
+    fields = [(pos, m.group(1), m.group(2)) for pos, m in
+              _line_matches(data, rb">[^\n<]*<([^>\n]+)>[^\n]*\n([^\n]*)")]
+    for pose, (pos, tag, value) in zip(_pose_of_offsets(offsets, [f[0] for f in fields]), fields):
+        tag = tag.decode("utf-8", errors="replace")
+        if "charges" in tag.lower():
+            continue
+        _add_item(items, tag, int(pose), value)
+    return offsets, names, items
+
+
+def _pdbqt_records(data):
+    import re
+    starts = [pos for pos, m in _line_matches(data, rb"MODEL ")]
+    if not starts:
+        starts = [0]
+    offsets = _offsets(starts, len(data))
+    names = ["model %d" % (i+1) for i in range(len(starts))]
+    items = {}
+    vina_labels = ["Score", "RMSD l.b.", "RMSD u.b."]
+    results = [(m.start(), m.group(1)) for m in re.finditer(rb"VINA RESULT:([^\n]*)", data)]
+    for pose, (pos, text) in zip(_pose_of_offsets(offsets, [r[0] for r in results]), results):
+        if pose < 0:
+            continue
+        for label, value in zip(vina_labels, text.split()):
+            _add_item(items, label, int(pose), value)
+    return offsets, names, items
+
+
+def _offsets(starts, size):
+    from numpy import array, int64
+    return array(starts + [size], int64)
+
+
+def _open_pdbqt_text(session, text, name, auto_style):
+    from tempfile import TemporaryDirectory
+    import os
+    with TemporaryDirectory() as d:
+        path = os.path.join(d, "pose.pdbqt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        from .pdbqt import open_pdbqt
+        structures, _status = open_pdbqt(session, path, name, auto_style, True)
+    return structures
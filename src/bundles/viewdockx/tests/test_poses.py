@@ -0,0 +1,88 @@
+import os
+
+import numpy
+
+import pytest
+
+from chimerax.core.errors import UserError
+from chimerax.viewdockx.poses import PoseIndex
+
+example_dir = os.path.join(os.path.dirname(__file__), "..", "src", "example_files")
+
+sdf_text = """lig1
+  test
+
+  0  0  0  0  0  0            999 V2000
+M  END
+> <Score>
+-7.5
+
+> <ID>
+abc
+
+$$$$
+lig2
+  test
+
+  0  0  0  0  0  0            999 V2000
+M  END
+>  <Score>  (2)
+-9
+
+$$$$
+"""
+
+@pytest.fixture
+def sdf_path(tmp_path):
+    path = tmp_path / "poses.sdf"
+    path.write_text(sdf_text)
+    return str(path)
+
+def test_mol2_poses():
+    index = PoseIndex(os.path.join(example_dir, "poses.mol2"))
+    assert index.format_name == "mol2"
+    assert len(index) == 48
+    assert index.scores.row(0)["Total Energy"] == -47.65
+    assert index.scores.row(0)["Name"] == 119
+    # Records start at the dock comment lines and cover the whole file.
+    assert index.record_text(0).startswith("##########")
+    assert index.record_text(1).startswith("##########")
+    assert index.record_text(0).count("@<TRIPOS>MOLECULE") == 1
+    size = os.path.getsize(index.path)
+    assert index.offsets[0] == 0 and index.offsets[-1] == size
+
+def test_pdbqt_poses():
+    index = PoseIndex(os.path.join(example_dir, "vina", "output.pdbqt"))
+    assert len(index) == 3
+    assert index.names == ["model 1", "model 2", "model 3"]
+    assert index.scores.names == ["Score", "RMSD l.b.", "RMSD u.b."]
+    assert index.scores.column("score").tolist() == [-11.1, -9.4, -8.6]
+    assert index.record_text(1).startswith("MODEL 2\n")
+
+def test_sdf_poses(sdf_path):
+    index = PoseIndex(sdf_path)
+    assert index.format_name == "sdf"
+    assert index.names == ["lig1", "lig2"]
+    assert index.scores.row(0) == {"Score": -7.5, "ID": "abc"}
+    assert index.scores.row(1) == {"Score": -9.0}
+    assert index.record_text(0) + index.record_text(1) == sdf_text
+
+def test_sort_and_filter(sdf_path):
+    scores = PoseIndex(sdf_path).scores
+    assert scores.sort_order("Score").tolist() == [1, 0]
+    assert scores.sort_order("Score", descending = True).tolist() == [0, 1]
+    # Poses without the score sort last.
+    assert scores.sort_order("ID", descending = True).tolist() == [0, 1]
+    assert scores.filter("Score", maximum = -8).tolist() == [1]
+    assert scores.filter("Score", minimum = -8, indices = numpy.array([1])).tolist() == []
+    with pytest.raises(UserError):
+        scores.filter("ID")
+    with pytest.raises(UserError):
+        scores.column("Energy")
+
+def test_unknown_suffix(tmp_path):
+    path = tmp_path / "poses.txt"
+    path.write_text(sdf_text)
+    with pytest.raises(UserError):
+        PoseIndex(str(path))
+    assert len(PoseIndex(str(path), format_name = "sdf")) == 2
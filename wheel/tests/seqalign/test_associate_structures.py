@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from chimerax.core.session import Session
+from chimerax.pdb import open_pdb
+from chimerax.atomic import initialize_atomic, Sequence
+from chimerax.dist_monitor import _DistMonitorBundleAPI
+from chimerax.seqalign.assoc import KmerSequenceIndex, _nw_associations
+
+def _open(session, name):
+    pdb_loc = os.path.join(os.path.dirname(__file__), "..", "data", "pdb", name)
+    models, status_message = open_pdb(session, pdb_loc)
+    session.models.add(models)
+    return models[0]
+
+def _mutated(chars, positions):
+    chars = list(chars)
+    for p in positions:
+        chars[p] = 'W' if chars[p] != 'W' else 'A'
+    return ''.join(chars)
+
+@pytest.mark.dependency(
+    depends=["tests/pdb/test_open_pdb.py::test_open_pdb"]
+    , scope="session"
+)
+def test_forced_nw_associations():
+    session = Session('cx standalone')
+    _DistMonitorBundleAPI.initialize(session)
+    initialize_atomic(session)
+    structs = [_open(session, "2gbp.pdb"), _open(session, "1ie9.pdb")]
+    chains = [s.chains[0] for s in structs]
+    # Alignment sequences with gaps and mismatches so only a forced association works.
+    mutations = [(5, 50, 100, 150, 200), (10, 60, 120)]
+    aseqs = []
+    for chain, positions in zip(chains, mutations):
+        chars = _mutated(chain.characters, positions)
+        aseqs.append(Sequence(name=chain.name, characters=chars[:30] + '--' + chars[30:]))
+    aseqs.append(Sequence(name="decoy", characters="GSHMLEDPVDAFQEAWNKLQEHG"))
+    index = KmerSequenceIndex(aseqs)
+    unassociated = [(s, [c]) for s, c in zip(structs, chains)]
+    results = list(_nw_associations(index, unassociated, 10, 2))
+    assert [r[0] for r in results] == structs
+    for (struct, match_map, errors), chain, aseq, positions in zip(results, chains, aseqs, mutations):
+        assert match_map is not None
+        assert match_map.struct_seq is chain
+        assert match_map.align_seq is aseq
+        assert errors == len(positions)